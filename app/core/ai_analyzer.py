@@ -2,15 +2,40 @@ import google.generativeai as genai
 from openai import AsyncOpenAI
 import json
 from app.core.config import settings
+from app.core.ai_metrics import ai_metrics
+from app.core.instrumentation import timed
 import logging
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Batch prompts: fixed instructions live in the system message (identical across calls -> cacheable prefix),
+# per-request payload is only the market line + a pipe-separated feature table.
+BATCH_SYSTEM_PROMPT = """You are a professional stock trader. Analyze stocks for scalping opportunities at market open.
+Input: 'market:' line, then a table with header sym|name|px|chg|trend|rsi|vol|news
+(chg = daily change %, vol = volatility %, news = headlines joined by ' / ', '-' if none).
+Return a JSON object keyed by sym:
+{"SYM": {"score": int, "reason": str, "action": "Buy|Watch|Pass", "strategy": {"entry": str, "target_price": <target %>, "stop_loss": <stop %>}}}
+Criteria:
+1. Score 0-100 (80+ Strong Buy, 60+ Watch, <60 Pass).
+2. Market BEAR/Down: be VERY conservative, require a strong news catalyst, score < 70 if no news. Market BULL/Up: focus on momentum.
+3. chg > 20%: REJECT, score MUST be < 60 (reversal risk). chg > 15%: apply caution.
+4. trend DOWN (SMA5 < SMA20): penalize unless dip-buy (rsi < 40) or reversal pattern.
+5. Favor dip buying (pullback -1~-3% after breakout) over market order at high.
+6. "reason" MUST be in Korean (Hangul)."""
+
+HOT_TRENDS_SYSTEM_PROMPT = """You are a momentum trader. Identify the TOP 'HOT' stocks for a 'Must Watch' list.
+Focus on: 1. Strong news/catalyst 2. Sector rotation 3. Explosive momentum. IGNORE overbought signals (rsi > 75 is OK).
+Input: 'market:' line, then a table with header sym|name|chg|trend|rsi|news
+(chg = daily change %, news = headlines joined by ' / ', '-' if none).
+Return a JSON object keyed by sym: {"SYM": {"score": <0-100 hotness>, "reason": str}}
+Scoring: earnings/contract news 90+, strong sector move (e.g. AI rally) 80+, momentum without news 70+, bad news/boring < 50.
+"reason" engaging, in Korean (e.g. 'AI 섹터 수급 폭발', '실적 서프라이즈')."""
+
 class AIAnalyzer:
     def __init__(self):
         # Initialize OpenAI (Fallback) - Async Client
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
         self.gpt_model = settings.GPT_MODEL
         
         # Initialize Gemini (Primary)
@@ -22,45 +47,81 @@ class AIAnalyzer:
             self.gemini_model = None
             logger.warning("Gemini API Key not found. Using GPT only.")
 
+    @timed()
     async def analyze_stock(self, stock_name: str, news_list: list[str], tech_summary: dict, market_ctx: str = "Neutral") -> dict:
         """
         Analyze stock using GPT (Primary) -> Gemini (Fallback) [Async].
         """
         prompt = self._create_prompt(stock_name, news_list, tech_summary, market_ctx)
-        
-        # 1. Try GPT (Primary)
+        record = ai_metrics.start("analyze_stock")
         try:
-            return await self._analyze_with_gpt(prompt)
-        except Exception as e:
-            logger.error(f"GPT Analysis Failed: {e}. Switching to Gemini...")
-            
-        # 2. Fallback to Gemini
-        if self.gemini_model:
+            # 1. Try GPT (Primary)
             try:
-                logger.info(f"Analyzing {stock_name} with Gemini (Fallback)...")
-                # Gemini Async Call
-                response = await self.gemini_model.generate_content_async(
-                    prompt,
-                    generation_config={"response_mime_type": "application/json"}
-                )
-                return json.loads(self._clean_json_text(response.text))
+                return await self._analyze_with_gpt(prompt, record)
             except Exception as e:
-                logger.error(f"Gemini Analysis Failed: {e}")
-        
-        return {"score": 50, "reason": "AI Analysis Failed (Both Models)", "action": "Pass", "strategy": {}}
+                logger.error(f"GPT Analysis Failed: {e}. Switching to Gemini...")
+                
+            # 2. Fallback to Gemini
+            if self.gemini_model:
+                try:
+                    logger.info(f"Analyzing {stock_name} with Gemini (Fallback)...")
+                    text = await self._ask_gemini(record, prompt)
+                    return self._parse_json(text, record)
+                except Exception as e:
+                    logger.error(f"Gemini Analysis Failed: {e}")
+            
+            return {"score": 50, "reason": "AI Analysis Failed (Both Models)", "action": "Pass", "strategy": {}}
+        finally:
+            ai_metrics.finish(record)
 
-    async def _analyze_with_gpt(self, prompt: str) -> dict:
+    async def _analyze_with_gpt(self, prompt: str, record) -> dict:
         logger.info(f"Analyzing with GPT ({self.gpt_model})...")
-        response = await self.openai_client.chat.completions.create(
-            model=self.gpt_model,
-            messages=[
-                {"role": "system", "content": "You are a professional stock trader analyzing news for scalping opportunities."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
-        content = response.choices[0].message.content
-        return json.loads(self._clean_json_text(content))
+        content = await self._ask_gpt(record, [
+            {"role": "system", "content": "You are a professional stock trader analyzing news for scalping opportunities."},
+            {"role": "user", "content": prompt}
+        ])
+        return self._parse_json(content, record)
+
+    async def _ask_gpt(self, record, messages: list, json_mode: bool = True) -> str:
+        """Single GPT call with usage accounting on `record`."""
+        record.provider, record.model = "GPT", self.gpt_model
+        kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+        try:
+            res = await self.openai_client.chat.completions.create(model=self.gpt_model, messages=messages, **kwargs)
+        except Exception as e:
+            record.provider, record.error = None, f"GPT: {e}"
+            raise
+        usage = getattr(res, "usage", None)
+        if usage:
+            record.add_usage(usage.prompt_tokens, usage.completion_tokens)
+        return res.choices[0].message.content
+
+    async def _ask_gemini(self, record, prompt: str, json_mode: bool = True) -> str:
+        """Single Gemini call (fallback path) with usage accounting on `record`."""
+        record.provider, record.model, record.fallback = "Gemini", settings.GEMINI_MODEL, True
+        kwargs = {"generation_config": {"response_mime_type": "application/json"}} if json_mode else {}
+        try:
+            res = await self.gemini_model.generate_content_async(prompt, **kwargs)
+        except Exception as e:
+            record.provider, record.error = None, f"Gemini: {e}"
+            raise
+        # Gemini answered: the record now describes its response, not the failed GPT attempt
+        record.error, record.parse_failed, record.json_repair = None, False, False
+        usage = getattr(res, "usage_metadata", None)
+        if usage:
+            record.add_usage(getattr(usage, "prompt_token_count", 0), getattr(usage, "candidates_token_count", 0))
+        return res.text
+
+    def _parse_json(self, text: str, record):
+        """json.loads with fence cleanup; flags repair/parse failure on `record`."""
+        cleaned = self._clean_json_text(text)
+        if text and cleaned != text.strip():
+            record.json_repair = True
+        try:
+            return json.loads(cleaned)
+        except Exception:
+            record.parse_failed = True
+            raise
 
     def _create_prompt(self, stock_name: str, news_list: list[str], tech_summary: dict, market_ctx: str) -> str:
         if not news_list:
@@ -106,6 +167,7 @@ class AIAnalyzer:
         }}
         """
 
+    @timed()
     async def analyze_risk(self, symbol: str, current_price: float, buy_price: float, tech_summary: dict, news_titles: list) -> dict:
         """
         Analyze whether to HOLD or SELL a losing position [Async].
@@ -141,27 +203,27 @@ class AIAnalyzer:
         }}
         """
         
-        # 1. GPT
+        record = ai_metrics.start("analyze_risk")
         try:
-            res = await self.openai_client.chat.completions.create(
-                model=self.gpt_model,
-                messages=[{"role": "system", "content": "Risk Manager Mode."}, {"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            return json.loads(self._clean_json_text(res.choices[0].message.content))
-        except Exception as e:
-            logger.error(f"GPT Risk Analysis Failed: {e}. Switching to Gemini...")
-            
-        # 2. Gemini
-        if self.gemini_model:
+            # 1. GPT
             try:
-                res = await self.gemini_model.generate_content_async(prompt, generation_config={"response_mime_type": "application/json"})
-                return json.loads(self._clean_json_text(res.text))
+                content = await self._ask_gpt(record, [{"role": "system", "content": "Risk Manager Mode."}, {"role": "user", "content": prompt}])
+                return self._parse_json(content, record)
             except Exception as e:
-                logger.error(f"Gemini Risk Analysis Failed: {e}")
+                logger.error(f"GPT Risk Analysis Failed: {e}. Switching to Gemini...")
                 
-        return {"decision": "HOLD", "reason": "AI Error (Default Hold)"}
+            # 2. Gemini
+            if self.gemini_model:
+                try:
+                    return self._parse_json(await self._ask_gemini(record, prompt), record)
+                except Exception as e:
+                    logger.error(f"Gemini Risk Analysis Failed: {e}")
+                    
+            return {"decision": "HOLD", "reason": "AI Error (Default Hold)"}
+        finally:
+            ai_metrics.finish(record)
             
+    @timed()
     async def analyze_stocks_batch(self, jobs: list) -> dict:
         """
         Analyze multiple stocks in one request to save API calls/Cost [Async].
@@ -169,52 +231,50 @@ class AIAnalyzer:
         if not jobs:
             return {}
             
-        # Construct Batch Prompt
-        market_context = jobs[0].get('market_status', 'Neutral Market')
-        
-        prompt = f"Current Market Environment: {market_context}\n\n"
-        prompt += "Analyze the following stocks for scalping opportunities at market open.\n"
-        prompt += "Return a JSON Object where keys are 'symbols' and values are analysis results.\n"
-        prompt += "Format: { 'SYMBOL': { 'score': ..., 'reason': ..., 'action': ..., 'strategy': ... } }\n\n"
+        prompt = self.encode_stock_table(jobs, ("px", "chg", "trend", "rsi", "vol", "news"))
         
-        for job in jobs:
-            daily_change = job['tech_summary'].get('daily_change', 0.0)
-            prompt += f"--- Stock: {job['name']} ({job['symbol']}) ---\n"
-            prompt += f"Price: {job['tech_summary']['close']} (Change: {daily_change:.2f}%)\n"
-            prompt += f"Technical: Trend={job['tech_summary']['trend']}, RSI={job['tech_summary']['rsi']}, Volatility={job['tech_summary']['volatility']}%\n"
-            prompt += f"News: {job['news_titles']}\n\n"
-            
-        prompt += """
-        Criteria:
-        1. Score 0-100 (80+ Strong Buy, 60+ Watch, <60 Pass).
-        2. Market Context Adaptation:
-           - IF Market is "BEAR" or "Down": Be VERY CONSERVATIVE. Require strong news catalyst. Score < 70 if no news.
-           - IF Market is "BULL" or "Up": Focus on momentum.
-        3. Daily Change Penalties:
-           - IF > 20%: REJECT (Too high risk of reversal). Score MUST be < 60.
-           - IF > 15%: Apply CAUTION.
-        4. IF SMA5 < SMA20:
-           - Generally bearish, BUT allow "Dip Buying" if RSI < 40 or Reversal Pattern detected.
-           - If no reversal signal, Penalize Score.
-        5. Favor "Dip Buying" (Pullback by -1~-3% after breakout) over "Market Order at High".
-        6. "reason" MUST be in Korean (Hangul).
+        record = ai_metrics.start("analyze_stocks_batch")
+        try:
+            return await self._run_batch(record, jobs, BATCH_SYSTEM_PROMPT, prompt)
+        finally:
+            ai_metrics.finish(record)
+
+    @staticmethod
+    def encode_stock_table(jobs: list, columns: tuple) -> str:
         """
-        
+        Compact per-stock encoding for batch prompts:
+        'market: ...' line + 'sym|name|<columns>' header + one row per stock.
+        """
+        def cell(value):
+            return str(value).replace("|", "/").replace("\n", " ").strip() or "-"
+
+        def fmt(job, col):
+            tech = job['tech_summary']
+            if col == "px": return tech.get('close')
+            if col == "chg": return f"{tech.get('daily_change', 0.0):.2f}"
+            if col == "trend": return tech.get('trend')
+            if col == "rsi": return tech.get('rsi')
+            if col == "vol": return tech.get('volatility')
+            if col == "news": return " / ".join(str(t) for t in (job.get('news_titles') or [])) or "-"
+            return "-"
+
+        lines = [f"market: {cell(jobs[0].get('market_status', 'Neutral Market'))}", "|".join(("sym", "name") + tuple(columns))]
+        for job in jobs:
+            row = [job['symbol'], job['name']] + [fmt(job, col) for col in columns]
+            lines.append("|".join(cell(v) for v in row))
+        return "\n".join(lines)
+
+    async def _run_batch(self, record, jobs: list, system_prompt: str, prompt: str) -> dict:
         # Call GPT (Primary) -> Gemini (Fallback)
         response_text = ""
         used_model = "GPT"
         
         try:
             logger.info(f"Batch Analyzing {len(jobs)} stocks with GPT ({self.gpt_model})...")
-            res = await self.openai_client.chat.completions.create(
-                model=self.gpt_model,
-                messages=[
-                    {"role": "system", "content": "You are a professional stock trader."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-            response_text = res.choices[0].message.content
+            response_text = await self._ask_gpt(record, [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ])
             
         except Exception as e:
             logger.error(f"GPT Batch Analysis Failed: {e}. Switching to Gemini...")
@@ -223,11 +283,7 @@ class AIAnalyzer:
             if self.gemini_model:
                 try:
                     logger.info(f"Batch Analyzing {len(jobs)} stocks with Gemini...")
-                    res = await self.gemini_model.generate_content_async(
-                        prompt, 
-                        generation_config={"response_mime_type": "application/json"}
-                    )
-                    response_text = res.text
+                    response_text = await self._ask_gemini(record, f"{system_prompt}\n\n{prompt}")
                 except Exception as g_e:
                     logger.error(f"Gemini Batch Analysis Failed: {g_e}")
                     return {}
@@ -236,7 +292,7 @@ class AIAnalyzer:
                 return {}
 
         try:
-            parsed = json.loads(self._clean_json_text(response_text))
+            parsed = self._parse_json(response_text, record)
             
             # Normalize Result to Dict { 'SYMBOL': { ... } }
             results = {}
@@ -267,6 +323,7 @@ class AIAnalyzer:
                 elif isinstance(v, str):
                     try:
                         # Try to fix "double encoded" json or just string garbage
+                        record.json_repair = True
                         v_parsed = json.loads(self._clean_json_text(v))
                         if isinstance(v_parsed, dict):
                             cleaned_results[k] = v_parsed
@@ -283,6 +340,7 @@ class AIAnalyzer:
             logger.error(f"Batch Analysis Parsing Failed ({used_model}): {e}")
             return {}
 
+    @timed()
     async def analyze_holding_stock(self, symbol: str, stock_name: str, tech_summary: dict, news_list: list) -> str:
         """
         Generate a detailed analysis report for a held stock [Async].
@@ -314,31 +372,31 @@ class AIAnalyzer:
         *반드시 한국어로 작성하고, 가독성 좋은 마크다운(Markdown) 형식으로 출력해주세요.*
         """
         
-        # 1. GPT
+        record = ai_metrics.start("analyze_holding_stock")
         try:
-            logger.info(f"Generating Analysis Report for {stock_name} with GPT...")
-            res = await self.openai_client.chat.completions.create(
-                model=self.gpt_model,
-                messages=[
+            # 1. GPT
+            try:
+                logger.info(f"Generating Analysis Report for {stock_name} with GPT...")
+                return await self._ask_gpt(record, [
                     {"role": "system", "content": "You are a helpful financial analyst."},
                     {"role": "user", "content": prompt}
-                ]
-            )
-            return res.choices[0].message.content
-        except Exception as e:
-            logger.error(f"GPT Report Gen Failed: {e}. Switching to Gemini...")
-            
-        # 2. Gemini
-        if self.gemini_model:
-            try:
-                res = await self.gemini_model.generate_content_async(prompt)
-                return res.text
+                ], json_mode=False)
             except Exception as e:
-                logger.error(f"Gemini Report Gen Failed: {e}")
-                return "AI 분석 서비스 일시적 오류. 잠시 후 다시 시도해주세요."
-        
-        return "AI 모델을 사용할 수 없습니다."
+                logger.error(f"GPT Report Gen Failed: {e}. Switching to Gemini...")
+                
+            # 2. Gemini
+            if self.gemini_model:
+                try:
+                    return await self._ask_gemini(record, prompt, json_mode=False)
+                except Exception as e:
+                    logger.error(f"Gemini Report Gen Failed: {e}")
+                    return "AI 분석 서비스 일시적 오류. 잠시 후 다시 시도해주세요."
+            
+            return "AI 모델을 사용할 수 없습니다."
+        finally:
+            ai_metrics.finish(record)
 
+    @timed()
     async def recommend_trend_stocks(self, news_titles: list, market_type: str = "KR") -> list:
         """
         Analyze news headlines and recommend TOP 5-10 stocks that benefit from the news.
@@ -371,21 +429,16 @@ class AIAnalyzer:
         ]
         """
         
+        record = ai_metrics.start("recommend_trend_stocks")
         try:
             # Call GPT (Primary)
-            res = await self.openai_client.chat.completions.create(
-                model=self.gpt_model,
-                messages=[
-                    {"role": "system", "content": "You are a professional stock analyst."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            response_text = res.choices[0].message.content
+            response_text = await self._ask_gpt(record, [
+                {"role": "system", "content": "You are a professional stock analyst."},
+                {"role": "user", "content": prompt}
+            ], json_mode=False)
             
             # Simple cleanup
-            response_text = self._clean_json_text(response_text)
-            import json
-            data = json.loads(response_text)
+            data = self._parse_json(response_text, record)
             
             # Validate format
             valid_list = []
@@ -398,6 +451,8 @@ class AIAnalyzer:
         except Exception as e:
             logger.error(f"Trend Analysis Error: {e}")
             return []
+        finally:
+            ai_metrics.finish(record)
 
     def _clean_json_text(self, text: str) -> str:
         if not text: return "{}"
@@ -410,6 +465,7 @@ class AIAnalyzer:
             text = text[:-3]
         return text.strip()
 
+    @timed()
     async def analyze_overnight_potential(self, symbol: str, current_price: float, buy_price: float, tech_summary: dict, news_titles: list) -> dict:
         """
         Analyze if we should HOLD this stock overnight (Gap-Up Potential).
@@ -449,27 +505,27 @@ class AIAnalyzer:
         }}
         """
         
-        # 1. GPT
+        record = ai_metrics.start("analyze_overnight_potential")
         try:
-            res = await self.openai_client.chat.completions.create(
-                model=self.gpt_model,
-                messages=[{"role": "system", "content": "Swing Trader Mode."}, {"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            return json.loads(self._clean_json_text(res.choices[0].message.content))
-        except Exception as e:
-            logger.error(f"GPT Overnight Analysis Failed: {e}. Switching to Gemini...")
-            
-        # 2. Gemini
-        if self.gemini_model:
+            # 1. GPT
             try:
-                res = await self.gemini_model.generate_content_async(prompt, generation_config={"response_mime_type": "application/json"})
-                return json.loads(self._clean_json_text(res.text))
+                content = await self._ask_gpt(record, [{"role": "system", "content": "Swing Trader Mode."}, {"role": "user", "content": prompt}])
+                return self._parse_json(content, record)
             except Exception as e:
-                logger.error(f"Gemini Overnight Analysis Failed: {e}")
+                logger.error(f"GPT Overnight Analysis Failed: {e}. Switching to Gemini...")
                 
-        return {"decision": "LIQUIDATE", "reason": "AI Error (Safety Liquidate)"}
+            # 2. Gemini
+            if self.gemini_model:
+                try:
+                    return self._parse_json(await self._ask_gemini(record, prompt), record)
+                except Exception as e:
+                    logger.error(f"Gemini Overnight Analysis Failed: {e}")
+                    
+            return {"decision": "LIQUIDATE", "reason": "AI Error (Safety Liquidate)"}
+        finally:
+            ai_metrics.finish(record)
 
+    @timed()
     async def analyze_hot_trends(self, jobs: list) -> dict:
         """
         Analyze stocks for 'Top 10 Hot Trends' (Pure AI, No Technical Filter).
@@ -478,62 +534,36 @@ class AIAnalyzer:
         if not jobs:
             return {}
             
-        # Construct Batch Prompt
-        market_context = jobs[0].get('market_status', 'Neutral Market')
-        
-        prompt = f"Current Market Environment: {market_context}\n\n"
-        prompt += "Identify the TOP 'HOT' stocks from the list below for a 'Must Watch' list.\n"
-        prompt += "Focus on: 1. Strong News/Catalyst 2. Sector Rotation 3. Explostive Momentum.\n"
-        prompt += "**IGNORE Technical Overbought signals (RSI > 75 is OK for Hot stocks).**\n"
-        
-        prompt += "Return JSON: { 'SYMBOL': { 'score': <0-100, Hotness>, 'reason': '<Korean explanation>' } }\n\n"
-        
-        for job in jobs:
-            daily_change = job['tech_summary'].get('daily_change', 0.0)
-            prompt += f"--- Stock: {job['name']} ({job['symbol']}) ---\n"
-            prompt += f"Change: {daily_change:.2f}%\n"
-            prompt += f"Technical: Trend={job['tech_summary']['trend']}, RSI={job['tech_summary']['rsi']}\n"
-            prompt += f"News: {job['news_titles']}\n\n"
-            
-        prompt += """
-        Criteria:
-        1. Score based on 'Excitement' and 'Potential for today'. 
-           - Good Earnings/Contract News = 90+
-           - Strong Sector Move (e.g. AI Rally) = 80+
-           - Just momentum without news = 70+
-           - Bad News / Boring = < 50
-        2. Describe the 'Reason' engagingly in Korean (e.g. 'AI 섹터 수급 폭발', '실적 서프라이즈').
-        """
+        prompt = self.encode_stock_table(jobs, ("chg", "trend", "rsi", "news"))
         
         # Call AI (GPT -> Gemini)
-        response_text = ""
+        record = ai_metrics.start("analyze_hot_trends")
         try:
-            logger.info(f"Hot Trend Analysis for {len(jobs)} stocks (GPT)...")
-            res = await self.openai_client.chat.completions.create(
-                model=self.gpt_model,
-                messages=[{"role": "system", "content": "You are a momentum trader."}, {"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            response_text = res.choices[0].message.content
-        except Exception as e:
-            logger.error(f"GPT Hot Trend Failed: {e}. Switching to Gemini...")
-            if self.gemini_model:
-                try:
-                    res = await self.gemini_model.generate_content_async(prompt, generation_config={"response_mime_type": "application/json"})
-                    response_text = res.text
-                except Exception as g_e:
-                    logger.error(f"Gemini Hot Trend Failed: {g_e}")
+            response_text = ""
+            try:
+                logger.info(f"Hot Trend Analysis for {len(jobs)} stocks (GPT)...")
+                response_text = await self._ask_gpt(record, [{"role": "system", "content": HOT_TRENDS_SYSTEM_PROMPT}, {"role": "user", "content": prompt}])
+            except Exception as e:
+                logger.error(f"GPT Hot Trend Failed: {e}. Switching to Gemini...")
+                if self.gemini_model:
+                    try:
+                        response_text = await self._ask_gemini(record, f"{HOT_TRENDS_SYSTEM_PROMPT}\n\n{prompt}")
+                    except Exception as g_e:
+                        logger.error(f"Gemini Hot Trend Failed: {g_e}")
+                        return {}
+                else:
                     return {}
-            else:
-                return {}
 
-        # Parse
-        try:
-             return json.loads(self._clean_json_text(response_text))
-        except:
-             logger.error("Failed to parse Hot Trend JSON")
-             return {}
+            # Parse
+            try:
+                 return self._parse_json(response_text, record)
+            except:
+                 logger.error("Failed to parse Hot Trend JSON")
+                 return {}
+        finally:
+            ai_metrics.finish(record)
 
+    @timed()
     async def select_candidates_by_trend(self, stock_list: list, market_ctx: str) -> list:
         """
         [Top-Down Optimization]
@@ -567,14 +597,11 @@ class AIAnalyzer:
         }}
         """
         
+        record = ai_metrics.start("select_candidates_by_trend")
         try:
             logger.info("🤖 AI Pre-Filtering Candidates (Top-Down)...")
-            res = await self.openai_client.chat.completions.create(
-                model=self.gpt_model,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            data = json.loads(self._clean_json_text(res.choices[0].message.content))
+            content = await self._ask_gpt(record, [{"role": "user", "content": prompt}])
+            data = self._parse_json(content, record)
             selected = data.get('selected_symbols', [])
             logger.info(f"✅ AI Selected {len(selected)} candidates: {selected}")
             return selected
@@ -583,8 +610,11 @@ class AIAnalyzer:
             logger.error(f"AI Pre-Filter Failed: {e}")
             # Fallback: Return first 10 stocks or safe defaults
             return [s['symbol'] for s in stock_list[:15]]
+        finally:
+            ai_metrics.finish(record)
 
 
+    @timed()
     async def analyze_market_context_and_pick_top10(self, market_type: str, market_status: dict, news_titles: list) -> dict:
         """
         [Stock Selection v2]
@@ -639,19 +669,16 @@ class AIAnalyzer:
         }}
         """
         
+        record = ai_metrics.start("analyze_market_context_and_pick_top10")
         try:
             logger.info(f"AI Generating Top 10 for {market_type}...")
             
             # 1. GPT Analysis
-            res = await self.openai_client.chat.completions.create(
-                model=self.gpt_model,
-                messages=[
-                    {"role": "system", "content": "You are a professional fund manager. Output JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-            data = json.loads(self._clean_json_text(res.choices[0].message.content))
+            content = await self._ask_gpt(record, [
+                {"role": "system", "content": "You are a professional fund manager. Output JSON only."},
+                {"role": "user", "content": prompt}
+            ])
+            data = self._parse_json(content, record)
             return data
             
         except Exception as e:
@@ -660,15 +687,13 @@ class AIAnalyzer:
             if self.gemini_model:
                 try:
                     logger.info("Switching to Gemini for Top 10...")
-                    res = await self.gemini_model.generate_content_async(
-                        prompt, 
-                        generation_config={"response_mime_type": "application/json"}
-                    )
-                    return json.loads(self._clean_json_text(res.text))
+                    return self._parse_json(await self._ask_gemini(record, prompt), record)
                 except Exception as g_e:
                     logger.error(f"Gemini Top 10 Generation Failed: {g_e}")
                     
             return {}
+        finally:
+            ai_metrics.finish(record)
 
 
 
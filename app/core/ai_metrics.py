@@ -0,0 +1,149 @@
+import time
+import threading
+import logging
+from collections import defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class AICallRecord:
+    """One LLM call (GPT primary / Gemini fallback) as seen by AIAnalyzer or StrategyOptimizer."""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.provider = None          # "GPT" | "Gemini" | None (no provider answered)
+        self.model = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.fallback = False         # Gemini was used after a GPT failure
+        self.json_repair = False      # Response needed cleanup (``` fences etc.) before json.loads
+        self.parse_failed = False
+        self.error = None
+        self.ts = time.time()
+        self.started = time.perf_counter()
+        self.wall_ms = 0.0
+
+    def add_usage(self, prompt_tokens, completion_tokens):
+        self.prompt_tokens += prompt_tokens or 0
+        self.completion_tokens += completion_tokens or 0
+
+    def to_dict(self):
+        return {
+            "method": self.method,
+            "provider": self.provider,
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "wall_ms": round(self.wall_ms, 1),
+            "fallback": self.fallback,
+            "json_repair": self.json_repair,
+            "parse_failed": self.parse_failed,
+            "error": self.error,
+            "ts": self.ts,
+        }
+
+
+class AIMetrics:
+    """
+    Per-method rolling window of AI call records + lifetime totals.
+    Latency histogram buckets are upper bounds in ms (last bucket = overflow).
+    """
+    LATENCY_BUCKETS_MS = [100, 250, 500, 1000, 2000, 5000, 10000, 30000]
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._calls = defaultdict(lambda: deque(maxlen=self.window))
+            self._totals = defaultdict(lambda: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "wall_ms": 0.0})
+            self._recent = deque(maxlen=100)
+
+    def start(self, method: str) -> AICallRecord:
+        return AICallRecord(method)
+
+    def finish(self, record: AICallRecord):
+        record.wall_ms = (time.perf_counter() - record.started) * 1000
+        with self._lock:
+            self._calls[record.method].append(record)
+            totals = self._totals[record.method]
+            totals["calls"] += 1
+            totals["prompt_tokens"] += record.prompt_tokens
+            totals["completion_tokens"] += record.completion_tokens
+            totals["wall_ms"] += record.wall_ms
+            self._recent.append(record)
+        logger.debug(f"AI call {record.method}: {record.provider} {record.wall_ms:.0f}ms "
+                     f"tokens={record.prompt_tokens}/{record.completion_tokens}")
+
+    @staticmethod
+    def _percentile(sorted_values, pct):
+        if not sorted_values:
+            return 0.0
+        idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+        return sorted_values[idx]
+
+    def _histogram(self, latencies):
+        counts = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+        for ms in latencies:
+            for i, bound in enumerate(self.LATENCY_BUCKETS_MS):
+                if ms <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = [f"<={b}" for b in self.LATENCY_BUCKETS_MS] + [f">{self.LATENCY_BUCKETS_MS[-1]}"]
+        return dict(zip(labels, counts))
+
+    def summary(self) -> dict:
+        """Per-method stats over the rolling window, sorted by total wall time (dominant first)."""
+        with self._lock:
+            snapshot = {m: list(calls) for m, calls in self._calls.items()}
+            totals = {m: dict(t) for m, t in self._totals.items()}
+
+        methods = {}
+        for method, calls in snapshot.items():
+            if not calls:
+                continue
+            n = len(calls)
+            latencies = sorted(c.wall_ms for c in calls)
+            providers = defaultdict(int)
+            for c in calls:
+                providers[c.provider or "none"] += 1
+            methods[method] = {
+                "window_calls": n,
+                "total_calls": totals[method]["calls"],
+                "p50_ms": round(self._percentile(latencies, 50), 1),
+                "p95_ms": round(self._percentile(latencies, 95), 1),
+                "p99_ms": round(self._percentile(latencies, 99), 1),
+                "max_ms": round(latencies[-1], 1),
+                "avg_prompt_tokens": round(sum(c.prompt_tokens for c in calls) / n, 1),
+                "avg_completion_tokens": round(sum(c.completion_tokens for c in calls) / n, 1),
+                "total_prompt_tokens": totals[method]["prompt_tokens"],
+                "total_completion_tokens": totals[method]["completion_tokens"],
+                "total_wall_ms": round(totals[method]["wall_ms"], 1),
+                "fallback_rate": round(sum(c.fallback for c in calls) / n, 3),
+                "json_repair_rate": round(sum(c.json_repair for c in calls) / n, 3),
+                "parse_failures": sum(c.parse_failed for c in calls),
+                "errors": sum(1 for c in calls if c.error),
+                "providers": dict(providers),
+                "histogram": self._histogram(latencies),
+            }
+
+        ordered = dict(sorted(methods.items(), key=lambda kv: -kv[1]["total_wall_ms"]))
+        return {
+            "window": self.window,
+            "buckets_ms": self.LATENCY_BUCKETS_MS,
+            "total_prompt_tokens": sum(t["prompt_tokens"] for t in totals.values()),
+            "total_completion_tokens": sum(t["completion_tokens"] for t in totals.values()),
+            "methods": ordered,
+        }
+
+    def recent(self, limit: int = 50) -> list:
+        with self._lock:
+            records = list(self._recent)[-limit:]
+        return [r.to_dict() for r in reversed(records)]
+
+
+ai_metrics = AIMetrics()
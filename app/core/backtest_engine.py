@@ -0,0 +1,202 @@
+import logging
+import time
+import numpy as np
+from app.core.exit_rules import exit_rules as default_rules, HOLD, TRAILING, STOP_LOSS, END_OF_DAY, TARGET, EXIT_LABELS
+
+logger = logging.getLogger(__name__)
+
+
+def ohlc_to_path(open_, high, low, close):
+    """
+    Expand (paths, bars) OHLC arrays into a (paths, bars * 4) price path.
+    Intrabar order is assumed O-L-H-C on up bars and O-H-L-C on down bars,
+    the usual convention when only bars are available.
+    """
+    up = close >= open_
+    first = np.where(up, low, high)
+    second = np.where(up, high, low)
+    return np.stack([open_, first, second, close], axis=2).reshape(open_.shape[0], -1)
+
+
+def load_bars_csv(path):
+    """
+    Long-format intraday CSV (date, symbol, time, open/high/low/close or price) ->
+    ((symbol-day, step) price paths, per-row day index).
+    """
+    import pandas as pd
+    df = pd.read_csv(path, dtype={"symbol": str})
+    df.columns = [c.lower() for c in df.columns]
+    df = df.sort_values(["date", "symbol", "time"])
+    df["step"] = df.groupby(["date", "symbol"]).cumcount()
+    keys = df[["date", "symbol"]].drop_duplicates()
+    days = pd.factorize(keys["date"], sort=True)[0]
+
+    if {"open", "high", "low", "close"} <= set(df.columns):
+        fields = [df.pivot_table(index=["date", "symbol"], columns="step", values=c).to_numpy()
+                  for c in ("open", "high", "low", "close")]
+        return ohlc_to_path(*fields), days
+    return df.pivot_table(index=["date", "symbol"], columns="step", values="price").to_numpy(), days
+
+
+def synthetic_bars(symbols: int, days: int, bars: int = 390, seed: int = 7):
+    """Random-walk minute bars (~0.15% per bar) for a symbol universe (speed checks, smoke tests)."""
+    rng = np.random.default_rng(seed)
+    n = symbols * days
+    opens = rng.uniform(5_000, 200_000, size=(n, 1))
+    returns = rng.normal(0.0, 0.0015, size=(n, bars))
+    close = opens * np.exp(np.cumsum(returns, axis=1))
+    open_ = np.concatenate([opens, close[:, :-1]], axis=1)
+    spread = np.abs(rng.normal(0, 0.0008, size=(n, bars)))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    return ohlc_to_path(open_, high, low, close), np.repeat(np.arange(days), symbols)
+
+
+class BacktestResult:
+    """Per-trade arrays plus the portfolio summary of one backtest run."""
+    def __init__(self, entry, exit_price, exit_step, reason, day, notional, capital, elapsed_ms):
+        self.entry = entry
+        self.exit_price = exit_price
+        self.exit_step = exit_step
+        self.reason = reason
+        self.day = day
+        self.notional = notional
+        self.capital = float(capital)
+        self.elapsed_ms = elapsed_ms
+        self.pnl_pct = (exit_price / entry - 1) * 100
+
+        # Daily portfolio P&L (trades of a day share the same capital)
+        self.days, inverse = np.unique(day, return_inverse=True)
+        self.daily_pnl = np.bincount(inverse, weights=self.notional * self.pnl_pct / 100, minlength=len(self.days))
+        self.equity = capital + np.cumsum(self.daily_pnl)
+        peak = np.maximum.accumulate(np.concatenate(([capital], self.equity)))[1:]
+        self.drawdown_pct = (self.equity / peak - 1) * 100
+
+    def summary(self) -> dict:
+        n = len(self.pnl_pct)
+        traded = 2 * self.notional.sum() # Buy + sell
+        return {
+            "trades": n,
+            "days": len(self.days),
+            "win_rate": round(float((self.pnl_pct > 0).mean() * 100), 2) if n else 0.0,
+            "avg_pnl_pct": round(float(self.pnl_pct.mean()), 3) if n else 0.0,
+            "total_pnl": round(float(self.daily_pnl.sum()), 2),
+            "return_pct": round(float(self.daily_pnl.sum() / self.capital * 100), 3),
+            "max_drawdown_pct": round(float(self.drawdown_pct.min()), 3) if n else 0.0,
+            "turnover": round(float(traded / self.capital / max(len(self.days), 1)), 3), # Per day, x capital
+            "avg_hold_steps": round(float(self.exit_step.mean()), 1) if n else 0.0,
+            "exits": {EXIT_LABELS[code]: int((self.reason == code).sum()) for code in (TARGET, TRAILING, STOP_LOSS, END_OF_DAY)},
+            "elapsed_ms": round(self.elapsed_ms, 1),
+        }
+
+
+class BacktestEngine:
+    """
+    Replays intraday price paths through the live exit rules (app/core/exit_rules.py),
+    all symbol-days at once: one NumPy pass per time step over the positions still open.
+    prices: (paths, steps) array, one row per symbol-day, entry at the first price
+    (NaN = no data at that step; a row is closed at its last valid price at the end of the day,
+    like the pre-close liquidation).
+    """
+    def __init__(self, rules=None, stop_loss_pct: float = 2.0, target_pct: float = 3.0, cost_pct: float = 0.0):
+        self.rules = rules or default_rules
+        self.stop_loss_pct = stop_loss_pct
+        self.target_pct = target_pct # Only exits when rules.target_exit is on
+        self.cost_pct = cost_pct # Round-trip fees / slippage, charged on exit
+
+    def run(self, prices, day=None, entry=None, notional=1.0, capital: float = None,
+            step_major: bool = False) -> BacktestResult:
+        """
+        day: per-row day index (drawdown / turnover), entry: buy prices (default first price).
+        step_major: prices already laid out as (steps, paths) (see prepare(); saves the transpose on repeated runs).
+        """
+        start = time.perf_counter()
+        steps = np.asarray(prices, dtype=np.float64) if step_major else self.prepare(prices)
+        n_steps, n_paths = steps.shape
+        entry = steps[0].copy() if entry is None else np.asarray(entry, dtype=np.float64)
+        day = np.zeros(n_paths, dtype=np.int64) if day is None else np.asarray(day)
+        notional = np.broadcast_to(np.asarray(notional, dtype=np.float64), (n_paths,))
+
+        valid_entry = np.isfinite(entry) & (entry > 0)
+        exit_price = np.full(n_paths, np.nan)
+        exit_step = np.full(n_paths, n_steps - 1, dtype=np.int64)
+        reason = np.full(n_paths, HOLD, dtype=np.int8)
+
+        # State of the rows still open (compacted as positions close, so late steps touch few rows)
+        idx = np.flatnonzero(valid_entry)
+        stop = entry[idx] * (1 - self.stop_loss_pct / 100)
+        target = entry[idx] * (1 + self.target_pct / 100) if self.rules.target_exit else np.full(len(idx), np.inf)
+        arm = entry[idx] * (1 + self.rules.trail_activate_pct / 100)
+        keep = 1 - self.rules.trail_drop_pct / 100
+        peak = entry[idx].copy()
+        last = entry[idx].copy()
+        trailing = np.zeros(len(idx), dtype=bool)
+
+        for t in range(n_steps):
+            if len(idx) == 0:
+                break
+            p = steps[t, idx] # NaN (no print) fails every comparison below
+            has = p == p
+            last = np.where(has, p, last)
+            peak = np.where(p > peak, p, peak)
+
+            # Same order as ExitRules.evaluate: target; armed -> trail check; else arm (no exit that tick) or stop
+            target_exit = p >= target
+            trail_exit = trailing & (p < peak * keep) & ~target_exit
+            arming = ~trailing & (p >= arm) & ~target_exit
+            stop_exit = ~trailing & ~arming & (p <= stop) & ~target_exit
+            trailing |= arming
+
+            exits = target_exit | trail_exit | stop_exit
+            if exits.any():
+                rows = idx[exits]
+                exit_price[rows] = p[exits]
+                exit_step[rows] = t
+                reason[idx[target_exit]] = TARGET
+                reason[idx[trail_exit]] = TRAILING
+                reason[idx[stop_exit]] = STOP_LOSS
+                stay = ~exits
+                idx, stop, target, arm, peak, last, trailing = (
+                    idx[stay], stop[stay], target[stay], arm[stay], peak[stay], last[stay], trailing[stay])
+
+        # End of day: close what is left at the last seen price
+        exit_price[idx] = last
+        reason[idx] = END_OF_DAY
+        entry, exit_price, exit_step, reason, day, notional = (
+            a[valid_entry] for a in (entry, exit_price, exit_step, reason, day, notional))
+        n_paths = len(entry)
+        exit_price = exit_price * (1 - self.cost_pct / 100)
+
+        if capital is None: # Enough to fund the busiest day
+            _, inverse = np.unique(day, return_inverse=True)
+            capital = float(np.bincount(inverse, weights=notional).max()) if n_paths else 1.0
+        return BacktestResult(entry, exit_price, exit_step, reason, day, notional, capital,
+                              (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def prepare(prices):
+        """(paths, steps) -> contiguous (steps, paths): each time step is one contiguous row."""
+        return np.ascontiguousarray(np.asarray(prices, dtype=np.float64).T)
+
+    def check_against_rules(self, prices, samples: int = 50) -> int:
+        """Replay `samples` rows through ExitRules.evaluate one tick at a time; returns mismatches."""
+        result = self.run(prices[:samples])
+        mismatches = 0
+        for i, row in enumerate(np.asarray(prices[:samples], dtype=np.float64)):
+            buy = row[0]
+            stop, target, peak, trailing = buy * (1 - self.stop_loss_pct / 100), buy * (1 + self.target_pct / 100), buy, False
+            code, price, step = END_OF_DAY, row[np.isfinite(row)][-1], len(row) - 1
+            for t, p in enumerate(row):
+                if not np.isfinite(p):
+                    continue
+                c, peak, trailing = self.rules.evaluate(p, buy, stop, peak, trailing, target)
+                if c != HOLD:
+                    code, price, step = c, p, t
+                    break
+            if code != result.reason[i] or step != result.exit_step[i] or \
+                    not np.isclose(price * (1 - self.cost_pct / 100), result.exit_price[i]):
+                mismatches += 1
+        return mismatches
+
+
+backtest_engine = BacktestEngine()
@@ -7,6 +7,9 @@ class Settings:
     PROJECT_NAME = "Scalping Stock Selector"
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     GPT_MODEL = os.getenv("GPT_MODEL", "gpt-5-nano")
+    OPTIMIZER_MODEL = os.getenv("OPTIMIZER_MODEL", "gpt-4o")
+    # Optional: point at an OpenAI-compatible endpoint (e.g. app/mock/llm_stub.py for offline benchmarks)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
     
     # Gemini Settings
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -19,6 +22,20 @@ class Settings:
     KIS_ACCOUNT_NO = os.getenv("KIS_ACCOUNT_NO")
     KIS_ACNT_PRDT_CD = os.getenv("KIS_ACNT_PRDT_CD")
     KIS_BASE_URL = os.getenv("KIS_BASE_URL", "https://openapi.koreainvestment.com:9443")
+    # Order lane: max order/cancel requests per second (KIS real ~20/s shared with quotes, virtual much lower)
+    KIS_ORDER_RATE_PER_SEC = float(os.getenv("KIS_ORDER_RATE_PER_SEC", "5"))
+    # Portfolio snapshot (balance / holdings) cache lifetime; order events invalidate it earlier
+    PORTFOLIO_TTL_SEC = float(os.getenv("PORTFOLIO_TTL_SEC", "5"))
+    # Ad-hoc exchange closures not covered by the calendar rules (e.g. "KR:2030-06-12,US:2027-01-09")
+    MARKET_HOLIDAYS_EXTRA = os.getenv("MARKET_HOLIDAYS_EXTRA", "")
+    # Ad-hoc session hours (exchange-local) for trading days, e.g. "KR:2026-11-19@10:00-16:30,US:2026-07-02@09:30-13:00"
+    MARKET_SESSIONS_EXTRA = os.getenv("MARKET_SESSIONS_EXTRA", "")
+    # Optional: WebSocket endpoint override (e.g. app/mock/kis_replay.py); default follows KIS_BASE_URL (real / virtual)
+    KIS_WS_URL = os.getenv("KIS_WS_URL") or None
+    # Optional: record KIS REST responses + WebSocket frames to this file (.jsonl.gz) for offline replay
+    KIS_RECORD_FILE = os.getenv("KIS_RECORD_FILE") or None
+    # Latency histograms per hot-path operation / KIS TR_ID (app/core/instrumentation.py); also switchable at runtime
+    INSTRUMENTATION = os.getenv("INSTRUMENTATION", "0").lower() in ("1", "true", "yes")
     
     # Telegram
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -1,10 +1,9 @@
 
 import requests
-import json
 import time
 from datetime import datetime
 import logging
-import os
+from app.core.state_store import state_store
 
 logger = logging.getLogger(__name__)
 
@@ -74,20 +73,10 @@ class ExchangeApi:
             return last_rate
 
     def _load_cache(self):
-        if not os.path.exists(self.cache_file):
-            return None
-        try:
-            with open(self.cache_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return None
+        return state_store.get(self.cache_file)
 
     def _save_cache(self, date_str, rate):
-        try:
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump({"date": date_str, "rate": rate}, f)
-        except Exception as e:
-            logger.error(f"Failed to save exchange rate cache: {e}")
+        state_store.set(self.cache_file, {"date": date_str, "rate": rate})
 
 # Singleton instance
 exchange_api = ExchangeApi()
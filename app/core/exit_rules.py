@@ -0,0 +1,61 @@
+# Scalping exit rules shared by the live monitor (TradeManager.monitor_active_trades)
+# and the backtest engine (app/core/backtest_engine.py)
+TRAIL_ACTIVATE_PCT = 2.0   # Profit (%) that arms the trailing stop
+TRAIL_DROP_PCT = 1.0       # Exit when price falls this far (%) below the peak once armed
+
+# Exit reason codes (backtest arrays) and their labels (alerts / reports)
+HOLD, TRAILING, STOP_LOSS, END_OF_DAY, TARGET = 0, 1, 2, 3, 4
+EXIT_LABELS = {
+    TARGET: "목표가 익절",
+    TRAILING: "트레일링 익절 (고점 대비 -1%)",
+    STOP_LOSS: "손절매 (Stop Loss)",
+    END_OF_DAY: "장 마감 청산",
+}
+
+
+class ExitRules:
+    """
+    Trailing-stop / stop-loss rules for one price update:
+    1. the peak follows the price
+    2. target_exit: price >= target price exits (off by default: winners run on the trailing stop)
+    3. armed: exit when price < peak * (1 - trail_drop%)
+    4. not armed: profit >= trail_activate% arms the trailing stop (no exit on that tick),
+       otherwise price <= stop-loss price exits
+    """
+    def __init__(self, trail_activate_pct: float = TRAIL_ACTIVATE_PCT, trail_drop_pct: float = TRAIL_DROP_PCT,
+                 target_exit: bool = False):
+        self.trail_activate_pct = trail_activate_pct
+        self.trail_drop_pct = trail_drop_pct
+        self.target_exit = target_exit
+
+    @classmethod
+    def from_params(cls, params: dict):
+        """Rules from a strategy_config.json market section (kr_parameters / us_parameters)."""
+        return cls(float(params.get('trail_activate_rate', TRAIL_ACTIVATE_PCT)),
+                   float(params.get('trail_drop_rate', TRAIL_DROP_PCT)),
+                   bool(params.get('target_exit', False)))
+
+    def label(self, code: int) -> str:
+        if code == TRAILING:
+            return f"트레일링 익절 (고점 대비 -{self.trail_drop_pct:g}%)"
+        return EXIT_LABELS.get(code)
+
+    def evaluate(self, price: float, buy_price: float, stop_loss_price: float, max_price: float, trailing_active: bool,
+                 target_price: float = 0.0):
+        """Returns (exit code, new max_price, new trailing_active)."""
+        if price > max_price:
+            max_price = price
+        if self.target_exit and target_price > 0 and price >= target_price:
+            return TARGET, max_price, trailing_active
+        if trailing_active:
+            if price < max_price * (1 - self.trail_drop_pct / 100):
+                return TRAILING, max_price, True
+            return HOLD, max_price, True
+        if (price - buy_price) / buy_price * 100 >= self.trail_activate_pct:
+            return HOLD, max_price, True
+        if price <= stop_loss_price:
+            return STOP_LOSS, max_price, False
+        return HOLD, max_price, False
+
+
+exit_rules = ExitRules()
@@ -0,0 +1,206 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram: log-linear buckets over microseconds. Each power of two is
+    split into 64 sub-buckets, so any recorded value is reported within ~1.6% (midpoint: ~0.8%)
+    from 1µs to hours, in constant memory and O(1) per sample.
+    """
+    SUB_BITS = 7
+    SUB = 1 << SUB_BITS     # Values below SUB µs are exact
+    HALF = SUB >> 1
+
+    __slots__ = ("counts", "count", "total_us", "min_us", "max_us")
+
+    def __init__(self):
+        self.counts = {}    # bucket index -> samples (sparse)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def _index(cls, us: int) -> int:
+        if us < cls.SUB:
+            return us
+        shift = us.bit_length() - cls.SUB_BITS
+        return shift * cls.HALF + (us >> shift)
+
+    @classmethod
+    def _bounds(cls, index: int):
+        """(lowest, highest) µs value of a bucket."""
+        if index < cls.SUB:
+            return index, index
+        shift = index // cls.HALF - 1
+        low = (index - shift * cls.HALF) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, seconds: float):
+        us = max(0, int(seconds * 1_000_000))
+        index = self._index(us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if not self.count or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+        self.count += 1
+        self.total_us += us
+
+    def percentile(self, pct: float) -> float:
+        """Value (ms) at or below which `pct`% of samples fall."""
+        if not self.count:
+            return 0.0
+        target = max(1, -(-self.count * pct // 100))  # ceil
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                low, high = self._bounds(index)
+                return min((low + high) / 2, self.max_us) / 1000
+        return self.max_us / 1000
+
+    def buckets(self) -> list:
+        """[(upper bound ms, count)] of non-empty buckets, ascending."""
+        return [(round(self._bounds(i)[1] / 1000, 3), self.counts[i]) for i in sorted(self.counts)]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_us / 1000, 1),
+            "mean_ms": round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            "min_ms": round(self.min_us / 1000, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p90_ms": round(self.percentile(90), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "p999_ms": round(self.percentile(99.9), 3),
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+
+class _Span:
+    __slots__ = ("owner", "name", "t0")
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.owner.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Instrumentation:
+    """
+    Latency histograms per hot-path operation (@timed functions, span() blocks) and per
+    KIS TR_ID ("kis_tr:<tr_id>", recorded by KisApi._request).
+    Enabled by INSTRUMENTATION=1 or at runtime (`instrumentation.enabled = True`); while
+    disabled every timed call costs one attribute check and nothing is recorded.
+    Works for sync, async and worker-thread (to_thread) callers alike.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._since = time.time()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = LatencyHistogram()
+            hist.record(seconds)
+
+    def timed(self, name: str = None):
+        """Decorator: record each call of the function under `name` (default: its qualified name)."""
+        def decorate(fn):
+            label = name or fn.__qualname__
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    t0 = time.perf_counter()
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        self.record(label, time.perf_counter() - t0)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(label, time.perf_counter() - t0)
+            return wrapper
+        return decorate
+
+    def span(self, name: str):
+        """Context manager: `with span("Selector.kr_batch"): ...` records the block's wall time."""
+        return _Span(self, name) if self.enabled else _NOOP_SPAN
+
+    def dump(self, reset: bool = False, buckets: bool = False) -> dict:
+        """Per-operation stats, sorted by total time (dominant first). reset=True starts a new window."""
+        with self._lock:
+            histograms, since = self._histograms, self._since
+            if reset:
+                self._histograms, self._since = {}, time.time()
+            else:
+                histograms = dict(histograms)
+            operations = {}
+            for name, hist in histograms.items():
+                operations[name] = hist.summary()
+                if buckets:
+                    operations[name]["buckets"] = hist.buckets()
+
+        ordered = dict(sorted(operations.items(), key=lambda kv: -kv[1]["total_ms"]))
+        return {"enabled": self.enabled, "since": since, "window_sec": round(time.time() - since, 1),
+                "operations": ordered}
+
+    def reset(self):
+        with self._lock:
+            self._histograms, self._since = {}, time.time()
+
+    def report(self, top: int = 20) -> str:
+        """Plain-text table of the `top` operations by total time (logs / console)."""
+        data = self.dump()
+        lines = [f"⏱️ Latency ({data['window_sec']:.0f}s window, {'on' if data['enabled'] else 'off'})"]
+        for name, s in list(data["operations"].items())[:top]:
+            lines.append(f"{name:<45} n={s['count']:>6} total {s['total_ms']:>10.1f}ms | p50 {s['p50_ms']:>9.2f} "
+                         f"p99 {s['p99_ms']:>9.2f} max {s['max_ms']:>9.2f}ms")
+        return "\n".join(lines)
+
+
+instrumentation = Instrumentation(enabled=settings.INSTRUMENTATION)
+timed = instrumentation.timed
+span = instrumentation.span
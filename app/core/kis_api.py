@@ -1,8 +1,10 @@
 import requests
-import json
 import time
 from datetime import datetime, timedelta
 from app.core.config import settings
+from app.core.kis_token import KisTokenManager
+from app.core.kis_recorder import kis_recorder
+from app.core.instrumentation import instrumentation, timed
 import logging
 from typing import Optional, Dict
 
@@ -14,14 +16,17 @@ class KisApi:
         self.app_key = settings.KIS_APP_KEY
         self.app_secret = settings.KIS_APP_SECRET
         self.account_no = settings.KIS_ACCOUNT_NO
-        self.access_token = None
-        self.token_expired = 0
+        self.tokens = KisTokenManager(self.base_url, self.app_key, self.app_secret)
         self.websocket = None  # Will be initialized when needed
 
-    def _get_headers(self, tr_id=None):
+    @property
+    def access_token(self):
+        return self.tokens.access_token
+
+    def _get_headers(self, tr_id=None, token=None):
         headers = {
             "content-type": "application/json; charset=utf-8",
-            "authorization": f"Bearer {self.access_token}",
+            "authorization": f"Bearer {token or self.tokens.get()}",
             "appkey": self.app_key,
             "appsecret": self.app_secret,
         }
@@ -30,65 +35,43 @@ class KisApi:
         return headers
 
     def get_access_token(self, force=False):
-        """Get or refresh access token (with File Persistence)"""
-        TOKEN_FILE = "kis_token_v2.json"
-        
-        # 1. Try to load from file (skip if force=True)
-        if not force:
-            try:
-                with open(TOKEN_FILE, "r") as f:
-                    data = json.load(f)
-                    saved_token = data.get("access_token")
-                    saved_expiry = data.get("token_expired", 0)
-                    
-                    if saved_token and time.time() < saved_expiry:
-                        self.access_token = saved_token
-                        self.token_expired = saved_expiry
-                        # logger.info("KIS Access Token Loaded from File (Valid)")
-                        return self.access_token
-            except (FileNotFoundError, json.JSONDecodeError):
-                pass # File doesn't exist or corrupt, fetch new
-            
-            # 2. If memory token is valid, use it
-            if self.access_token and time.time() < self.token_expired:
-                return self.access_token
+        """Current access token (in memory). force=True replaces it with a new one."""
+        if force:
+            return self.tokens.refresh(stale=self.tokens.access_token)
+        return self.tokens.get()
 
-        # 3. Request New Token
-        url = f"{self.base_url}/oauth2/tokenP"
-        body = {
-            "grant_type": "client_credentials",
-            "appkey": self.app_key,
-            "appsecret": self.app_secret
-        }
-        
-        try:
-            res = requests.post(url, json=body, timeout=20)
-            data = res.json()
-            if res.status_code == 200:
-                self.access_token = data['access_token']
-                # Expires in usually 86400s (24h). Safety buffer 60s
-                self.token_expired = time.time() + float(data['expires_in']) - 60 
-                
-                # 4. Save to File
-                try:
-                    with open(TOKEN_FILE, "w") as f:
-                        json.dump({
-                            "access_token": self.access_token,
-                            "token_expired": self.token_expired
-                        }, f)
-                    logger.info("KIS Access Token Refreshed & Saved")
-                except Exception as e:
-                    logger.warning(f"Failed to save token file: {e}")
-                    
-                return self.access_token
-            else:
-                logger.error(f"Failed to get token: {data}")
-                if "EGW00133" in str(data):
-                    logger.critical("⚠️ KIS Token Rate Limit (1/min). Please wait 1 minute.")
-                raise Exception(f"KIS Token Error: {data}")
-        except Exception as e:
-            logger.error(f"Error getting token: {str(e)}")
-            raise
+    def _request(self, method: str, path: str, tr_id: str = None, params: dict = None, body: dict = None, timeout: float = 20):
+        """
+        Send a KIS REST call with the in-memory token.
+        On EGW00123 (token expired) the token is refreshed once - shared by concurrent callers - and the call retried.
+        Returns (response, parsed JSON body or {} if not JSON).
+        """
+        url = f"{self.base_url}{path}"
+        for attempt in range(2):
+            token = self.tokens.get()
+            t0 = time.perf_counter()
+            res = requests.request(method, url, headers=self._get_headers(tr_id, token),
+                                   params=params, json=body, timeout=timeout)
+            try:
+                data = res.json()
+            except ValueError:
+                data = {}
+            if instrumentation.enabled:
+                instrumentation.record(f"kis_tr:{tr_id or path}", time.perf_counter() - t0)
+            if kis_recorder.enabled:
+                kis_recorder.record_rest(method, path, tr_id, params, body, res.status_code, data)
+            if attempt or not isinstance(data, dict) or data.get('msg_cd') != 'EGW00123':
+                return res, data
+            logger.warning(f"Token Expired (EGW00123) on {path}. Refreshing...")
+            self.tokens.refresh(stale=token)
+
+    def get_ws_price(self, symbol: str) -> Optional[Dict]:
+        """Latest WebSocket tick if less than 5 seconds old (memory only, never blocks), else None."""
+        if self.websocket and self.websocket.is_connected:
+            ws_data = self.websocket.get_latest_price(symbol)
+            if ws_data and (time.time() - ws_data['time']) < 5:
+                return ws_data
+        return None
 
     def get_realtime_price(self, symbol: str, market_type: str = "KR", excg_cd: str = None) -> Optional[Dict]:
         """
@@ -103,10 +86,9 @@ class KisApi:
             Dict with price information or None
         """
         # Try WebSocket first
-        if self.websocket and self.websocket.is_connected:
-            ws_data = self.websocket.get_latest_price(symbol)
-            if ws_data and (time.time() - ws_data['time']) < 5:  # Data less than 5 seconds old
-                return ws_data
+        ws_data = self.get_ws_price(symbol)
+        if ws_data:
+            return ws_data
         
         # Fallback to REST API
         if market_type == "KR":
@@ -139,32 +121,26 @@ class KisApi:
                 }
         return None
     
+    @timed()
     def get_current_price(self, symbol: str):
         """Get current price for a stock"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/quotations/inquire-price"
-        headers = self._get_headers(tr_id="FHKST01010100") 
-        
         params = {
             "fid_cond_mrkt_div_code": "J",
             "fid_input_iscd": symbol
         }
         
         try:
-            res = requests.get(url, headers=headers, params=params, timeout=10)
+            res, data = self._request("GET", "/uapi/domestic-stock/v1/quotations/inquire-price", "FHKST01010100", params=params, timeout=10)
             if res.status_code == 200:
-                return res.json()['output']
+                return data['output']
             logger.error(f"Get Price Failed: {res.status_code} {res.text}")
         except Exception as e:
             logger.error(f"Get Price Connection Error: {e}")
         return None
 
+    @timed()
     def get_volume_rank(self):
         """Get top volume stocks"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/quotations/volume-rank"
-        headers = self._get_headers(tr_id="FHPST01710000")
-        
         params = {
             "FID_COND_MRKT_DIV_CODE": "J",
             "FID_COND_SCR_DIV_CODE": "20171",
@@ -179,18 +155,15 @@ class KisApi:
             "FID_INPUT_DATE_1": "0"
         }
         
-        res = requests.get(url, headers=headers, params=params, timeout=20)
+        res, data = self._request("GET", "/uapi/domestic-stock/v1/quotations/volume-rank", "FHPST01710000", params=params)
         if res.status_code == 200:
-            return res.json()['output']
+            return data['output']
         logger.error(f"Failed to get volume rank: {res.text}")
         return []
 
+    @timed()
     def get_news_titles(self, symbol: str, search_date: str = None):
         """Get news titles for a stock"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/quotations/news-title"
-        headers = self._get_headers(tr_id="FHKST01011800")
-        
         target_date = search_date if search_date else time.strftime("%Y%m%d")
         
         params = {
@@ -204,8 +177,7 @@ class KisApi:
             "FID_INPUT_SRNO": ""           # Serial No
         }
         
-        res = requests.get(url, headers=headers, params=params, timeout=20)
-        data = res.json()
+        res, data = self._request("GET", "/uapi/domestic-stock/v1/quotations/news-title", "FHKST01011800", params=params)
         if res.status_code == 200 and 'output' in data:
             return data['output']
         elif data.get('msg_cd') == 'OPSQ0002':
@@ -217,12 +189,9 @@ class KisApi:
             logger.warning(f"No news or error for {symbol}: {data}")
             return []
 
+    @timed()
     def get_overseas_news_titles(self, symbol: str, search_date: str = None):
         """Get Overseas News Titles (Breaking News)"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/overseas-price/v1/quotations/brknews-title"
-        headers = self._get_headers(tr_id="FHKST01011801")
-        
         target_date = search_date if search_date else datetime.now().strftime("%Y%m%d")
         
         # Using same params structure as domestic news (FHKST01011800)
@@ -238,8 +207,7 @@ class KisApi:
         }
         
         try:
-            res = requests.get(url, headers=headers, params=params, timeout=5)
-            data = res.json()
+            res, data = self._request("GET", "/uapi/overseas-price/v1/quotations/brknews-title", "FHKST01011801", params=params, timeout=5)
             if res.status_code == 200 and 'output' in data:
                 return data['output']
             
@@ -249,12 +217,9 @@ class KisApi:
             logger.error(f"Failed to get US news for {symbol}: {e}")
             return []
 
+    @timed()
     def get_daily_price(self, symbol: str, days: int = 100):
         """Get daily OHLCV data for technical analysis"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
-        headers = self._get_headers(tr_id="FHKST03010100")
-        
         end_date = datetime.now().strftime("%Y%m%d")
         start_date = (datetime.now() - timedelta(days=days)).strftime("%Y%m%d")
         
@@ -267,8 +232,7 @@ class KisApi:
             "FID_ORG_ADJ_PRC": "1" # Adjusted Price
         }
         
-        res = requests.get(url, headers=headers, params=params, timeout=20)
-        data = res.json()
+        res, data = self._request("GET", "/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice", "FHKST03010100", params=params)
         
         if res.status_code == 200 and 'output2' in data:
             return data['output2'] # List of daily records
@@ -276,22 +240,18 @@ class KisApi:
         logger.warning(f"Failed to get daily price for {symbol}: {data.get('msg1')}")
         return []
 
-    def get_balance(self):
-        """Check account balance"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/trading/inquire-balance"
-        headers = self._get_headers(tr_id="TTTC8434R") # Verify TR_ID for real/virtual
-        # Virtual: VTTC8434R, Real: TTTC8434R (Check documentation or try)
-        # However, usually the endpoint URLs differ too.
-        # Let's handle TR_ID based on URL or settings. Common is TTTC8434R for Real.
-        
+    @timed()
+    def get_domestic_balance(self):
+        """
+        Account summary + holdings in one inquire-balance call.
+        Returns {"summary": output2[0], "holdings": output1} or None on failure.
+        """
         # NOTE: KIS TR_ID differs for Real vs Virtual.
         # Real: TTTC8434R (Balance), TTTC0802U (Buy), TTTC0801U (Sell)
         # Virtual: VTTC8434R (Balance), VTTC0802U (Buy), VTTC0801U (Sell)
         
         is_virtual = "openapivts" in self.base_url
         tr_id = "VTTC8434R" if is_virtual else "TTTC8434R"
-        headers["tr_id"] = tr_id
 
         params = {
             "CANO": self.account_no,
@@ -307,57 +267,30 @@ class KisApi:
             "CTX_AREA_NK100": ""
         }
         
-        res = requests.get(url, headers=headers, params=params, timeout=20)
-        data = res.json()
-        if res.status_code == 200 and 'output2' in data:
-            return data['output2'][0] # Contains 'dnca_tot_amt' (Deposit), 'tot_evlu_mony' (Total Eval)
+        res, data = self._request("GET", "/uapi/domestic-stock/v1/trading/inquire-balance", tr_id, params=params)
+        if res.status_code == 200 and 'output1' in data and data.get('output2'):
+            return {
+                "summary": data['output2'][0], # Contains 'dnca_tot_amt' (Deposit), 'tot_evlu_mony' (Total Eval)
+                "holdings": data['output1']    # List of holdings
+            }
         logger.error(f"Failed to get balance: {data}")
         return None
 
+    def get_balance(self):
+        """Check account balance"""
+        bal = self.get_domestic_balance()
+        return bal['summary'] if bal else None
+
     def get_my_stock_balance(self):
         """Check current holdings"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/trading/inquire-balance"
-        # Same endpoint as balance, but output1 has the list of stocks
-        
-        is_virtual = "openapivts" in self.base_url
-        tr_id = "VTTC8434R" if is_virtual else "TTTC8434R"
-        headers = self._get_headers(tr_id=tr_id)
+        bal = self.get_domestic_balance()
+        return bal['holdings'] if bal else None
 
-        params = {
-            "CANO": self.account_no,
-            "ACNT_PRDT_CD": "01",
-            "AFHR_FLPR_YN": "N",
-            "OFL_YN": "N",
-            "INQR_DVSN": "01", # Changed from "02" to "01" (KIS API Update)
-            "UNPR_DVSN": "01",
-            "FUND_STTL_ICLD_YN": "N",
-            "FNCG_AMT_AUTO_RDPT_YN": "N",
-            "PRCS_DVSN": "01",
-            "CTX_AREA_FK100": "",
-            "CTX_AREA_NK100": ""
-        }
-        
-        res = requests.get(url, headers=headers, params=params, timeout=20)
-        data = res.json()
-        
-        if data.get('msg_cd') == 'EGW00123':
-            logger.warning("Token Expired (EGW00123) in get_my_stock_balance. Refreshing...")
-            self.get_access_token(force=True)
-            headers = self._get_headers(tr_id=tr_id)
-            res = requests.get(url, headers=headers, params=params, timeout=20)
-            data = res.json()
-            
-        if res.status_code == 200 and 'output1' in data:
-            return data['output1'] # List of holdings
+    @timed()
     def get_orderable_cash(self):
         """Get exact orderable cash from KIS"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/trading/inquire-psbl-order"
-        
         is_virtual = "openapivts" in self.base_url
         tr_id = "VTTC8908R" if is_virtual else "TTTC8908R"
-        headers = self._get_headers(tr_id=tr_id)
         
         params = {
             "CANO": self.account_no,
@@ -369,8 +302,7 @@ class KisApi:
             "OVRS_ICLD_YN": "Y"
         }
         
-        res = requests.get(url, headers=headers, params=params, timeout=20)
-        data = res.json()
+        res, data = self._request("GET", "/uapi/domestic-stock/v1/trading/inquire-psbl-order", tr_id, params=params)
         if res.status_code == 200 and 'output' in data:
             # 1. nrcvb_buy_amt: Net Receiver Buy Amount (Buying power without margin) - Best for Scalping
             # 2. ord_psbl_cash + ruse_psbl_amt: Manual Calculation
@@ -393,7 +325,6 @@ class KisApi:
         Internal order placement.
         order_type: "00" (Limit), "01" (Market)
         """
-        self.get_access_token()
         url = f"{self.base_url}/uapi/domestic-stock/v1/trading/order-cash"
         
         is_virtual = "openapivts" in self.base_url
@@ -401,19 +332,15 @@ class KisApi:
         # Actually it's better to strictly separate Buy/Sell logic for TR_ID.
         pass
 
+    @timed()
     def buy_order(self, symbol: str, qty: int, price: int = 0):
         """
         Buy Order.
         If price is 0, assumes Market Price ("01"), else Limit Price ("00").
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/trading/order-cash"
-        
         is_virtual = "openapivts" in self.base_url
         tr_id = "VTTC0802U" if is_virtual else "TTTC0802U" # Buy
         
-        headers = self._get_headers(tr_id=tr_id)
-        
         order_div = "01" if price == 0 else "00" # 01: Market, 00: Limit
         
         body = {
@@ -425,15 +352,7 @@ class KisApi:
             "ORD_UNPR": str(int(price)) if price > 0 else "0", 
         }
         
-        res = requests.post(url, headers=headers, json=body, timeout=20)
-        data = res.json()
-        
-        if data.get('msg_cd') == 'EGW00123':
-            logger.warning("Token Expired (EGW00123) in buy_order. Refreshing...")
-            self.get_access_token(force=True)
-            headers = self._get_headers(tr_id=tr_id)
-            res = requests.post(url, headers=headers, json=body, timeout=20)
-            data = res.json()
+        res, data = self._request("POST", "/uapi/domestic-stock/v1/trading/order-cash", tr_id, body=body)
         
         if res.status_code == 200 and data['rt_cd'] == '0':
             return data['output'] # Contains 'KRX_FWDG_ORD_ORGNO' (Order ID)
@@ -441,19 +360,15 @@ class KisApi:
         logger.error(f"Buy Order Failed: {data}")
         return {"error": data.get('msg1')}
 
+    @timed()
     def sell_order(self, symbol: str, qty: int, price: int = 0):
         """
         Sell Order.
         If price is 0, assumes Market Price ("01"), else Limit Price ("00").
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/trading/order-cash"
-        
         is_virtual = "openapivts" in self.base_url
         tr_id = "VTTC0801U" if is_virtual else "TTTC0801U" # Sell
         
-        headers = self._get_headers(tr_id=tr_id)
-        
         order_div = "01" if price == 0 else "00"
         
         body = {
@@ -465,15 +380,7 @@ class KisApi:
             "ORD_UNPR": str(int(price)) if price > 0 else "0", 
         }
         
-        res = requests.post(url, headers=headers, json=body, timeout=20)
-        data = res.json()
-        
-        if data.get('msg_cd') == 'EGW00123':
-            logger.warning("Token Expired (EGW00123) in sell_order. Refreshing...")
-            self.get_access_token(force=True)
-            headers = self._get_headers(tr_id=tr_id)
-            res = requests.post(url, headers=headers, json=body, timeout=20)
-            data = res.json()
+        res, data = self._request("POST", "/uapi/domestic-stock/v1/trading/order-cash", tr_id, body=body)
         
         if res.status_code == 200 and data['rt_cd'] == '0':
             return data['output']
@@ -481,17 +388,13 @@ class KisApi:
         logger.error(f"Sell Order Failed: {data}")
         return {"error": data.get('msg1')}
 
+    @timed()
     def get_orders(self):
         """Get list of orders (filled/unfilled)"""
         # Monitoring open orders to cancel if needed
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
-        
         is_virtual = "openapivts" in self.base_url
         tr_id = "VTTC8001R" if is_virtual else "TTTC8001R" 
         
-        headers = self._get_headers(tr_id=tr_id)
-        
         params = {
             "CANO": self.account_no,
             "ACNT_PRDT_CD": "01",
@@ -509,27 +412,23 @@ class KisApi:
             "CTX_AREA_NK100": ""
         }
 
-        res = requests.get(url, headers=headers, params=params, timeout=20)
-        data = res.json()
+        res, data = self._request("GET", "/uapi/domestic-stock/v1/trading/inquire-daily-ccld", tr_id, params=params)
         if res.status_code == 200 and 'output1' in data:
             return data['output1']
         return []
 
+    @timed()
     def cancel_order(self, order_no, order_branch="01", qty=0, is_buy=True):
         """
         Cancel an existing order.
         qty: 0 means cancel all.
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/trading/order-rvsecncl"
-        
         is_virtual = "openapivts" in self.base_url
         # Buy Cancel: VTTC0803U / Sell Cancel: VTTC0801U? -> No, Cancel is separate TR.
         # Real: TTTC0803U (Cancel)
         # Virtual: VTTC0803U (Cancel)
         
         tr_id = "VTTC0803U" if is_virtual else "TTTC0803U"
-        headers = self._get_headers(tr_id=tr_id)
         
         body = {
             "CANO": self.account_no,
@@ -543,8 +442,7 @@ class KisApi:
             "QTY_ALL_ORD_YN": "Y" if qty == 0 else "N"
         }
         
-        res = requests.post(url, headers=headers, json=body, timeout=20)
-        data = res.json()
+        res, data = self._request("POST", "/uapi/domestic-stock/v1/trading/order-rvsecncl", tr_id, body=body)
         
         if res.status_code == 200 and data['rt_cd'] == '0':
             return data['output']
@@ -554,15 +452,12 @@ class KisApi:
 
     # === US Stock API Support ===
 
+    @timed()
     def get_overseas_price(self, symbol: str, excg_cd: str = "NAS"):
         """
         Get current price for US Stock (with Auto-Retry).
         excg_cd: NAS (Nasdaq), NYS (NYSE), AMS (Amex)
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/overseas-price/v1/quotations/price"
-        headers = self._get_headers(tr_id="HHDFS00000300") 
-        
         # Priority: Requested -> NAS -> NASD -> NYS -> AMS
         # Priority: Mapped 3-char (Best for Data) -> Original -> Fallbacks
         mapped_3char = excg_cd
@@ -583,8 +478,7 @@ class KisApi:
             }
             
             try:
-                res = requests.get(url, headers=headers, params=params, timeout=5)
-                data = res.json()
+                res, data = self._request("GET", "/uapi/overseas-price/v1/quotations/price", "HHDFS00000300", params=params, timeout=5)
                 if res.status_code == 200 and 'output' in data:
                     val = data['output']
                     # Check if 'last' (price) is present and not empty/zero
@@ -597,14 +491,11 @@ class KisApi:
         logger.warning(f"Failed to get US Price for {symbol} after retries.")
         return None
 
+    @timed()
     def get_overseas_daily_price(self, symbol: str, excg_cd: str = "NAS"):
         """
         Get Daily OHLCV for US Stock.
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/overseas-price/v1/quotations/dailyprice"
-        headers = self._get_headers(tr_id="HHDFS76240000")
-        
         # Get data for last 100 days?
         # KIS Overseas Daily Price usually returns pagination or fixed count.
         # Params:
@@ -627,8 +518,7 @@ class KisApi:
             "MODP": "1" # Adjusted Price
         }
         
-        res = requests.get(url, headers=headers, params=params, timeout=20)
-        data = res.json()
+        res, data = self._request("GET", "/uapi/overseas-price/v1/quotations/dailyprice", "HHDFS76240000", params=params)
         
         if res.status_code == 200 and 'output2' in data:
             return data['output2'] # List of daily records
@@ -636,63 +526,51 @@ class KisApi:
         logger.warning(f"Failed to get US daily price for {symbol}: {data.get('msg1')}")
         return []
 
-    def get_overseas_balance(self):
-        """
-        Check US Account Balance & Holdings.
-        Queries ALL US exchanges (NASD, NYSE, AMEX) to get complete holdings.
-        """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/overseas-stock/v1/trading/inquire-balance"
-        
+    OVERSEAS_EXCHANGES = ("NASD", "NYSE", "AMEX")  # NASD=NASDAQ, NYSE=NYSE, AMEX=AMEX
+
+    def get_overseas_balance_exchange(self, excg: str):
+        """US balance for one exchange (raw response data), or None on failure."""
         is_virtual = "openapivts" in self.base_url
         tr_id = "VTTS3012R" if is_virtual else "TTTS3012R"
+
+        params = {
+            "CANO": self.account_no,
+            "ACNT_PRDT_CD": "01",
+            "OVRS_EXCG_CD": excg,
+            "TR_CRCY_CD": "USD",
+            "CTX_AREA_FK200": "",
+            "CTX_AREA_NK200": ""
+        }
         
-        headers = self._get_headers(tr_id=tr_id)
-        
-        # Query all US exchanges
-        exchanges = ["NASD", "NYSE", "AMEX"]  # NASD=NASDAQ, NYSE=NYSE, AMEX=AMEX
-        
+        res, data = self._request("GET", "/uapi/overseas-stock/v1/trading/inquire-balance", tr_id, params=params)
+        if res.status_code == 200 and 'output2' in data:
+            logger.debug(f"📡 {excg}: Found {len(data.get('output1', []))} holdings")
+            return data
+        logger.warning(f"⚠️ Failed to query {excg}: {data.get('msg1', 'Unknown error')}")
+        return None
+
+    @staticmethod
+    def merge_overseas_balances(results: dict):
+        """
+        Merge per-exchange balances {excg: data or None} into
+        {"summary", "holdings", "failed_exchanges"} (None if every exchange failed).
+        """
         unique_holdings = {} # Deduplicate by symbol (ovrs_pdno)
         summary = None
-        
-        for excg in exchanges:
-            params = {
-                "CANO": self.account_no,
-                "ACNT_PRDT_CD": "01",
-                "OVRS_EXCG_CD": excg,
-                "TR_CRCY_CD": "USD",
-                "CTX_AREA_FK200": "",
-                "CTX_AREA_NK200": ""
-            }
-            
-            res = requests.get(url, headers=headers, params=params, timeout=20)
-            data = res.json()
-            
-            # Token Expiration Check & Retry
-            if data.get('msg_cd') == 'EGW00123':
-                logger.warning(f"⚠️ Token Expired (EGW00123) on {excg}. Force refreshing token...")
-                self.get_access_token(force=True)
-                headers = self._get_headers(tr_id=tr_id) # Update headers with new token
-                res = requests.get(url, headers=headers, params=params, timeout=20)
-                data = res.json()
-            
-            if res.status_code == 200 and 'output2' in data:
-                # Merge holdings from all exchanges
-                if data.get('output1'):
-                    for item in data['output1']:
-                        symbol = item.get('ovrs_pdno')
-                        if symbol and symbol not in unique_holdings:
-                            unique_holdings[symbol] = item
-                
-                # Use summary from first successful response (assuming summary matches overall account?)
-                # Actually summary might differ per exchange query? 
-                # Usually summary represents the Total Account status in KIS.
-                if summary is None and data.get('output2'):
-                    summary = data['output2']
-                    
-                logger.debug(f"📡 {excg}: Found {len(data.get('output1', []))} holdings")
-            else:
-                logger.warning(f"⚠️ Failed to query {excg}: {data.get('msg1', 'Unknown error')}")
+        failed_exchanges = []
+        
+        for excg, data in results.items():
+            if data is None:
+                failed_exchanges.append(excg)
+                continue
+            # Merge holdings from all exchanges
+            for item in data.get('output1') or []:
+                symbol = item.get('ovrs_pdno')
+                if symbol and symbol not in unique_holdings:
+                    unique_holdings[symbol] = item
+            # Summary represents the total account status in KIS -> first successful response
+            if summary is None and data.get('output2'):
+                summary = data['output2']
         
         all_holdings = list(unique_holdings.values())
         
@@ -700,29 +578,35 @@ class KisApi:
             logger.info(f"✅ Total US holdings across all exchanges: {len(all_holdings)}")
             return {
                 "summary": summary,
-                "holdings": all_holdings
+                "holdings": all_holdings,
+                "failed_exchanges": failed_exchanges # Holdings may be partial if not empty
             }
         
         logger.error(f"❌ Failed to get overseas balance from any exchange")
         return None
 
+    @timed()
+    def get_overseas_balance(self):
+        """
+        Check US Account Balance & Holdings.
+        Queries ALL US exchanges (NASD, NYSE, AMEX) to get complete holdings.
+        (app.core.portfolio queries the exchanges concurrently.)
+        """
+        return self.merge_overseas_balances({excg: self.get_overseas_balance_exchange(excg) for excg in self.OVERSEAS_EXCHANGES})
+
+    @timed()
     def buy_overseas_order(self, symbol: str, qty: int, price: float = 0, excg_cd: str = "NAS"):
         """
         Buy US Stock.
         price: 0 for Market Order (if supported, else provide limit).
         NOTE: KIS US Market order availability depends on account type. Limit order is safer.
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/overseas-stock/v1/trading/order"
-        
         is_virtual = "openapivts" in self.base_url
         # Buy: VTTT1002U (Virtual) / TTTT1002U (Real)
         tr_id = "VTTT1002U" if is_virtual else "TTTT1002U"
         
         logger.info(f"DEBUG: Buying {symbol} on {'Virtual' if is_virtual else 'REAL'} Server. TR_ID: {tr_id}")
         
-        headers = self._get_headers(tr_id=tr_id)
-        
         # Order Type: 00 (Limit), 32 (Market? Check Docs. KIS US Market order is often restricted)
         # Safer to use Limit High if Market not available, but let's try '00' with price.
         # If price=0, we might need '34' (LOO) or similar? 
@@ -750,15 +634,7 @@ class KisApi:
         
         logger.info(f"US Order Body: {body}")
         
-        res = requests.post(url, headers=headers, json=body, timeout=20)
-        data = res.json()
-        
-        if data.get('msg_cd') == 'EGW00123':
-            logger.warning("Token Expired (EGW00123) in buy_overseas_order. Refreshing...")
-            self.get_access_token(force=True)
-            headers = self._get_headers(tr_id=tr_id)
-            res = requests.post(url, headers=headers, json=body, timeout=20)
-            data = res.json()
+        res, data = self._request("POST", "/uapi/overseas-stock/v1/trading/order", tr_id, body=body)
         
         if res.status_code == 200 and data['rt_cd'] == '0':
             return data['output']
@@ -766,19 +642,15 @@ class KisApi:
         logger.error(f"US Buy Order Failed: {data}")
         return data
 
+    @timed()
     def sell_overseas_order(self, symbol: str, qty: int, price: float = 0, excg_cd: str = "NAS"):
         """
         Sell US Stock.
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/overseas-stock/v1/trading/order"
-        
         is_virtual = "openapivts" in self.base_url
         # Sell: VTTT1006U (Virtual) / TTTT1006U (Real)
         tr_id = "VTTT1006U" if is_virtual else "TTTT1006U"
         
-        headers = self._get_headers(tr_id=tr_id)
-        
         ord_div = "00" # Limit
         
         # Reverted: Use provided code directly.
@@ -794,15 +666,7 @@ class KisApi:
             "ORD_DVSN": ord_div 
         }
         
-        res = requests.post(url, headers=headers, json=body, timeout=20)
-        data = res.json()
-        
-        if data.get('msg_cd') == 'EGW00123':
-            logger.warning("Token Expired (EGW00123) in sell_overseas_order. Refreshing...")
-            self.get_access_token(force=True)
-            headers = self._get_headers(tr_id=tr_id)
-            res = requests.post(url, headers=headers, json=body, timeout=20)
-            data = res.json()
+        res, data = self._request("POST", "/uapi/overseas-stock/v1/trading/order", tr_id, body=body)
         
         if res.status_code == 200 and data['rt_cd'] == '0':
             return data['output']
@@ -810,17 +674,13 @@ class KisApi:
         logger.error(f"US Sell Order Failed: {data}")
         return {"error": data.get('msg1')}
 
+    @timed()
     def get_overseas_outstanding_orders(self):
         """Get US Unexecuted Orders (NCCS)"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/overseas-stock/v1/trading/inquire-nccs"
-        
         is_virtual = "openapivts" in self.base_url
         # TR_ID: VTTS3018R (Virtual) / TTTS3018R (Real)
         tr_id = "VTTS3018R" if is_virtual else "TTTS3018R"
         
-        headers = self._get_headers(tr_id=tr_id)
-        
         params = {
             "CANO": self.account_no,
             "ACNT_PRDT_CD": "01",
@@ -835,8 +695,7 @@ class KisApi:
         for excg in ["NASD", "NYSE", "AMEX"]:
             params["OVRS_EXCG_CD"] = excg
             try:
-                res = requests.get(url, headers=headers, params=params, timeout=20)
-                data = res.json()
+                res, data = self._request("GET", "/uapi/overseas-stock/v1/trading/inquire-nccs", tr_id, params=params)
                 if res.status_code == 200 and 'output' in data:
                      orders = data['output']
                      if orders:
@@ -850,19 +709,49 @@ class KisApi:
                 
         return all_orders
 
+    @timed()
+    def get_overseas_order_fills(self):
+        """Get US Order Executions (CCNL) for the current session - all exchanges, filled & unfilled"""
+        is_virtual = "openapivts" in self.base_url
+        # TR_ID: VTTS3035R (Virtual) / TTTS3035R (Real)
+        tr_id = "VTTS3035R" if is_virtual else "TTTS3035R"
+        
+        # US session spans midnight (KST) -> query yesterday ~ today
+        now = datetime.now()
+        params = {
+            "CANO": self.account_no,
+            "ACNT_PRDT_CD": "01",
+            "PDNO": "" if is_virtual else "%",
+            "ORD_STRT_DT": (now - timedelta(days=1)).strftime("%Y%m%d"),
+            "ORD_END_DT": now.strftime("%Y%m%d"),
+            "SLL_BUY_DVSN": "00", # All
+            "CCLD_NCCS_DVSN": "00", # All (Filled + Unfilled)
+            "OVRS_EXCG_CD": "" if is_virtual else "%",
+            "SORT_SQN": "DS",
+            "ORD_DT": "",
+            "ORD_GNO_BRNO": "",
+            "ODNO": "",
+            "CTX_AREA_NK200": "",
+            "CTX_AREA_FK200": ""
+        }
+        
+        res, data = self._request("GET", "/uapi/overseas-stock/v1/trading/inquire-ccnl", tr_id, params=params)
+        
+        if res.status_code == 200 and 'output' in data:
+            return data['output']
+        
+        logger.error(f"Failed to get US order fills: {data}")
+        return []
+
+    @timed()
     def cancel_overseas_order(self, order_no, symbol, excg_cd, qty=0):
         """
         Cancel US Order.
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/overseas-stock/v1/trading/order-rvsecncl"
-        
         is_virtual = "openapivts" in self.base_url
         # Cancel: VTTT1004U (Virtual) / TTTT1004U (Real)
         tr_id = "VTTT1004U" if is_virtual else "TTTT1004U"
         
-        headers = self._get_headers(tr_id=tr_id)
-        
         body = {
             "CANO": self.account_no,
             "ACNT_PRDT_CD": "01",
@@ -875,8 +764,7 @@ class KisApi:
             "ORD_SVR_DVSN_CD": "0" 
         }
         
-        res = requests.post(url, headers=headers, json=body, timeout=20)
-        data = res.json()
+        res, data = self._request("POST", "/uapi/overseas-stock/v1/trading/order-rvsecncl", tr_id, body=body)
         
         if res.status_code == 200 and data['rt_cd'] == '0':
             return data['output']
@@ -884,14 +772,11 @@ class KisApi:
         logger.error(f"US Cancel Failed: {data}")
         return {"error": data.get('msg1')}
 
+    @timed()
     def get_today_trades(self):
         """Get list of executed trades for today (KR)"""
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
-        
         is_virtual = "openapivts" in self.base_url
         tr_id = "VTTC8001R" if is_virtual else "TTTC8001R"
-        headers = self._get_headers(tr_id=tr_id)
         
         from datetime import datetime
         today_str = datetime.now().strftime("%Y%m%d")
@@ -911,8 +796,7 @@ class KisApi:
             "CTX_AREA_NK100": ""
         }
         
-        res = requests.get(url, headers=headers, params=params, timeout=20)
-        data = res.json()
+        res, data = self._request("GET", "/uapi/domestic-stock/v1/trading/inquire-daily-ccld", tr_id, params=params)
         
         if res.status_code == 200 and 'output1' in data:
             return data['output1']
@@ -922,23 +806,19 @@ class KisApi:
 
     # === Market Index Support (Top-Down Analysis) ===
 
+    @timed()
     def get_current_index(self, market_code="0001"):
         """
         Get Domestic Index (KOSPI/KOSDAQ). 
         market_code: "0001" (Kospi), "1001" (Kosdaq)
         """
-        self.get_access_token()
-        url = f"{self.base_url}/uapi/domestic-stock/v1/quotations/inquire-price"
-        headers = self._get_headers(tr_id="FHKUP03500100") 
-        
         params = {
             "FID_COND_MRKT_DIV_CODE": "U", # U: Upjong (Index)
             "FID_INPUT_ISCD": market_code
         }
         
         try:
-            res = requests.get(url, headers=headers, params=params, timeout=10)
-            data = res.json()
+            res, data = self._request("GET", "/uapi/domestic-stock/v1/quotations/inquire-price", "FHKUP03500100", params=params, timeout=10)
             if res.status_code == 200 and 'output' in data:
                 return data['output'] # bstp_nmiv (Current), prdy_vrss (Change)
         except Exception as e:
@@ -951,7 +831,6 @@ class KisApi:
         symbol: COMP (Nasdaq Composite), SPX (S&P500), DJI (Dow Jones)
         excg: NAS/NYS
         """
-        self.get_access_token()
         # Use price endpoint but usually specific ticker for index
         return self.get_overseas_price(symbol, excg)
 
@@ -0,0 +1,91 @@
+import atexit
+import gzip
+import json
+import logging
+import threading
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Request fields never written to a recording: account number / product code and credentials
+MASKED_FIELDS = frozenset(("CANO", "ACNT_PRDT_CD", "appkey", "appsecret", "secretkey", "authorization",
+                           "access_token", "approval_key"))
+MASK = "***"
+
+
+def mask_fields(fields):
+    """Copy of a params / body dict with MASKED_FIELDS replaced by MASK (anything else as is)."""
+    if not isinstance(fields, dict):
+        return fields
+    return {k: MASK if k in MASKED_FIELDS else v for k, v in fields.items()}
+
+
+class KisRecorder:
+    """
+    Captures KIS traffic for offline replay (app/mock/kis_replay.py): every REST response
+    from KisApi._request and every WebSocket frame received by KisWebSocket, with the
+    time since recording started.
+
+    File format: gzip'd JSON lines. The first line is {"version", "started"}, then one
+    compact array per event:
+        [t, "rest", method, path, tr_id, params_or_body, status, response]
+        [t, "ws", frame]
+    Request headers (token, app key / secret) are never stored, and the account number /
+    product code (CANO, ACNT_PRDT_CD) and any credential in params / body are masked.
+    Enabled by KIS_RECORD_FILE; otherwise every record_* call is a single attribute check.
+    """
+    VERSION = 1
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.enabled = bool(path)
+        self.events = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._t0 = 0.0
+
+    def _open(self):
+        self._t0 = time.time()
+        self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._file.write(json.dumps({"version": self.VERSION, "started": self._t0}) + "\n")
+        atexit.register(self.close)
+        logger.info(f"🎙️ Recording KIS traffic to {self.path}")
+
+    def _write(self, event: list):
+        with self._lock:
+            if not self.enabled:
+                return
+            if self._file is None:
+                self._open()
+            event[0] = round(time.time() - self._t0, 4)
+            self._file.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self.events += 1
+
+    def record_rest(self, method: str, path: str, tr_id: str, params: dict, body: dict, status: int, data):
+        if self.enabled:
+            query = mask_fields(params if params is not None else body)
+            self._write([0, "rest", method, path, tr_id or "", query, status, data])
+
+    def record_ws(self, frame):
+        if self.enabled:
+            self._write([0, "ws", frame if isinstance(frame, str) else frame.decode("utf-8", "replace")])
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                logger.info(f"🎙️ Recording closed: {self.events} events -> {self.path}")
+            self.enabled = False
+
+
+def load_recording(path: str):
+    """(header, events) from a KisRecorder file."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, events
+
+
+kis_recorder = KisRecorder(settings.KIS_RECORD_FILE)
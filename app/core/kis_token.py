@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+import requests
+from app.core.state_store import state_store
+
+logger = logging.getLogger(__name__)
+
+
+class KisTokenManager:
+    """
+    KIS OAuth access token held in memory.
+    - get() is a plain attribute check on the hot path (no disk, no lock while the token is valid).
+    - When less than REFRESH_AHEAD remains, a background thread issues the next token
+      while callers keep using the current one.
+    - refresh(stale) is single-flight: concurrent callers that saw the same stale token
+      (e.g. several EGW00123 responses at once) wait for one issue call and share its result.
+    - kis_token_v2.json is read once on first use and written only when a token is issued.
+    """
+    TOKEN_FILE = "kis_token_v2.json"
+    EXPIRY_MARGIN = 60          # Seconds: treat the token as expired this early
+    REFRESH_AHEAD = 3600        # Seconds before expiry to start a background refresh
+    MIN_ISSUE_INTERVAL = 60     # KIS allows 1 token issue per minute (EGW00133)
+
+    def __init__(self, base_url: str, app_key: str, app_secret: str):
+        self.base_url = base_url
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.access_token = None
+        self.token_expired = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_issue = 0.0
+        self._refreshing = False
+
+    def get(self) -> str:
+        """Valid access token (issues one only if there is none / it has expired)."""
+        token, expiry = self.access_token, self.token_expired
+        now = time.time()
+        if token and now < expiry:
+            if expiry - now < self.REFRESH_AHEAD:
+                self._refresh_in_background()
+            return token
+        return self.refresh(stale=token)
+
+    def refresh(self, stale: str = None) -> str:
+        """
+        Replace `stale` with a new token. If another caller already replaced it,
+        the newer token is returned without a second issue call.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self.access_token and self.access_token != stale and time.time() < self.token_expired:
+                return self.access_token
+            return self._issue()
+
+    def _load(self):
+        self._loaded = True
+        data = state_store.get(self.TOKEN_FILE, {})
+        if data.get("access_token") and time.time() < data.get("token_expired", 0):
+            self.access_token = data["access_token"]
+            self.token_expired = data["token_expired"]
+            logger.info("KIS Access Token Loaded from File (Valid)")
+
+    def _issue(self) -> str:
+        if self.access_token and time.time() - self._last_issue < self.MIN_ISSUE_INTERVAL:
+            # Just issued - asking again would only hit EGW00133
+            logger.warning("KIS token was issued less than a minute ago. Reusing it.")
+            return self.access_token
+
+        self._last_issue = time.time()
+        url = f"{self.base_url}/oauth2/tokenP"
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": self.app_key,
+            "appsecret": self.app_secret
+        }
+
+        try:
+            res = requests.post(url, json=body, timeout=20)
+            data = res.json()
+        except Exception as e:
+            logger.error(f"Error getting token: {str(e)}")
+            raise
+
+        if res.status_code != 200:
+            logger.error(f"Failed to get token: {data}")
+            if "EGW00133" in str(data):
+                logger.critical("⚠️ KIS Token Rate Limit (1/min). Please wait 1 minute.")
+            raise Exception(f"KIS Token Error: {data}")
+
+        self.access_token = data['access_token']
+        # Expires in usually 86400s (24h)
+        self.token_expired = time.time() + float(data['expires_in']) - self.EXPIRY_MARGIN
+        state_store.set(self.TOKEN_FILE, {
+            "access_token": self.access_token,
+            "token_expired": self.token_expired
+        })
+        logger.info("KIS Access Token Refreshed & Saved")
+        return self.access_token
+
+    def _refresh_in_background(self):
+        if self._refreshing or time.time() - self._last_issue < self.MIN_ISSUE_INTERVAL:
+            return
+        self._refreshing = True
+        threading.Thread(target=self._background_refresh, name="kis-token-refresh", daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh(stale=self.access_token)
+        except Exception as e:
+            logger.warning(f"Background token refresh failed (current token still valid): {e}")
+        finally:
+            self._refreshing = False
@@ -6,6 +6,7 @@ import websocket
 from threading import Thread
 from typing import Dict, Optional, Callable
 from app.core.config import settings
+from app.core.kis_recorder import kis_recorder
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad
 from base64 import b64decode
@@ -34,7 +35,7 @@ class KisWebSocket:
         
         # WebSocket URLs
         is_virtual = "openapivts" in self.base_url
-        self.ws_url = "ws://ops.koreainvestment.com:31000" if is_virtual else "ws://ops.koreainvestment.com:21000"
+        self.ws_url = settings.KIS_WS_URL or ("ws://ops.koreainvestment.com:31000" if is_virtual else "ws://ops.koreainvestment.com:21000")
         
         # Encryption key (IV is always 16 bytes of 0x00)
         self.aes_key = None
@@ -74,6 +75,8 @@ class KisWebSocket:
     
     def _on_message(self, ws, message):
         """Handle incoming WebSocket messages"""
+        if kis_recorder.enabled:
+            kis_recorder.record_ws(message)
         try:
             # KIS WebSocket data format: "header|body" or encrypted format
             if isinstance(message, str):
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from app.core.kis_api import kis
+from app.core.order_router import order_router, Order, OrderState
+from app.core.portfolio import portfolio
+
+logger = logging.getLogger(__name__)
+
+
+class LiquidationEngine:
+    """
+    Session-close liquidation (all positions of a market at once).
+    1. Cancel every open order of the market concurrently (router-tracked + broker-side) to unlock qty
+    2. Submit exits for all holdings concurrently (requests are paced by the router's order lane)
+    3. Per position: wait for fills; the unfilled remainder is cancelled and re-submitted
+       (US limits re-priced from the latest quote with a widening discount) until flat or the deadline
+    Fills are booked by the router listeners (TradeManager._on_order_event) like any other exit.
+    """
+    REPRICE_INTERVAL = 8.0                  # Seconds an exit may rest before it is cancelled and re-priced
+    CANCEL_WAIT = 5.0                       # Seconds to wait for a cancel to be confirmed
+    REJECT_RETRY_DELAY = 1.0
+    US_DISCOUNTS = (0.01, 0.02, 0.03, 0.05) # Limit below last price per attempt (US sells can't be market orders)
+
+    def __init__(self, router=order_router):
+        self.router = router
+
+    async def run(self, markets: list, skip: set = None, deadline: float = 90.0) -> list:
+        """
+        Flatten the given markets ("KR"/"US"). skip: symbols to keep (overnight holds).
+        Returns one result per position: {symbol, name, market, qty, filled, avg_price, remaining, attempts, error}
+        """
+        skip = skip or set()
+        deadline_ts = time.monotonic() + deadline
+        per_market = await asyncio.gather(*(self._run_market(m, skip, deadline_ts) for m in markets))
+        return [r for results in per_market for r in results]
+
+    async def _run_market(self, market: str, skip: set, deadline_ts: float) -> list:
+        await self._cancel_outstanding(market)
+
+        positions = await self._fetch_positions(market)
+        positions = [p for p in positions if p['symbol'] not in skip]
+        for symbol in skip:
+            logger.info(f"🛌 Skipping Liquidation for {symbol} (Overnight Hold)")
+        if not positions:
+            return []
+
+        logger.info(f"⏹️ Liquidating {len(positions)} {market} positions concurrently...")
+        return await asyncio.gather(*(self._flatten(p, deadline_ts) for p in positions))
+
+    async def _cancel_outstanding(self, market: str):
+        """Cancel our tracked orders and any broker-side open orders (e.g. placed manually) for the market."""
+        tracked = self.router.get_open_orders(market)
+        tracked_odnos = {self.router._odno_key(o.odno) for o in tracked}
+        cancels = [self.router.cancel(o) for o in tracked]
+
+        try:
+            if market == "US":
+                rows = await asyncio.to_thread(kis.get_overseas_outstanding_orders) or []
+                for r in rows:
+                    if self.router._odno_key(r.get('odno')) in tracked_odnos: continue
+                    logger.info(f"Cancelling Order {r['odno']} for {r['pdno']} ({r.get('ovrs_excg_cd', 'NAS')})")
+                    cancels.append(self.router.call_in_lane(kis.cancel_overseas_order, r['odno'], r['pdno'], r.get('ovrs_excg_cd', 'NAS')))
+            else:
+                rows = await asyncio.to_thread(kis.get_orders) or []
+                for r in rows:
+                    if int(float(r.get('rmn_qty') or 0)) <= 0: continue
+                    if self.router._odno_key(r.get('odno')) in tracked_odnos: continue
+                    logger.info(f"Cancelling Order {r['odno']} for {r.get('prdt_name', r.get('pdno'))}")
+                    cancels.append(self.router.call_in_lane(kis.cancel_order, r['odno']))
+        except Exception as e:
+            logger.error(f"Failed to list outstanding {market} orders: {e}")
+
+        if not cancels:
+            return
+        logger.info(f"Cancelling {len(cancels)} outstanding {market} orders...")
+        await asyncio.gather(*cancels, return_exceptions=True)
+
+        if tracked:
+            await asyncio.gather(*(self.router.wait(o, self.CANCEL_WAIT) for o in tracked))
+        else:
+            await asyncio.sleep(1) # Let the broker release the locked qty
+
+    async def _fetch_positions(self, market: str) -> list:
+        snap = await portfolio.aget(max_age=0) # Fresh view after the cancels
+        if market == "US":
+            ovs_bal = snap.us
+            positions = []
+            for stock in (ovs_bal or {}).get('holdings', []):
+                # ovrs_ord_psbl_qty (Orderable), fallback to ovrs_cblc_qty (Total) since orders were just cancelled
+                qty = int(float(stock.get('ovrs_ord_psbl_qty') or 0)) or int(float(stock.get('ovrs_cblc_qty') or 0))
+                if qty > 0:
+                    positions.append({"symbol": stock['ovrs_pdno'], "name": stock.get('ovrs_item_name', stock['ovrs_pdno']),
+                                      "market": "US", "excg": stock.get('ovrs_excg_cd', 'NASD'), "qty": qty})
+            return positions
+
+        holdings = snap.kr_holdings
+        return [{"symbol": s['pdno'], "name": s.get('prdt_name', s['pdno']), "market": "KR", "excg": "N/A",
+                 "qty": int(s['hldg_qty'])}
+                for s in (holdings or []) if int(s.get('hldg_qty') or 0) > 0]
+
+    async def _flatten(self, pos: dict, deadline_ts: float) -> dict:
+        symbol, name, market = pos['symbol'], pos['name'], pos['market']
+        result = {**pos, "filled": 0, "avg_price": 0.0, "remaining": pos['qty'], "attempts": 0, "error": None}
+        filled_cost = 0.0
+
+        while result['remaining'] > 0 and time.monotonic() < deadline_ts:
+            ref_price = 0.0
+            price = 0 # KR: market order
+            if market == "US":
+                quote = await asyncio.to_thread(kis.get_overseas_price, symbol, pos['excg'])
+                ref_price = float((quote or {}).get('last') or 0)
+                if ref_price <= 0:
+                    result['error'] = "실시간 시세 조회 불가"
+                    await asyncio.sleep(self.REJECT_RETRY_DELAY)
+                    continue
+                discount = self.US_DISCOUNTS[min(result['attempts'], len(self.US_DISCOUNTS) - 1)]
+                price = round(ref_price * (1 - discount), 2)
+
+            order = Order(symbol, "SELL", result['remaining'], price=price, market_type=market, excg=pos['excg'],
+                          meta={"name": name, "ref_price": ref_price, "result": "LIQUIDATION"})
+            result['attempts'] += 1
+            await self.router.submit(order)
+
+            if order.state == OrderState.REJECTED:
+                result['error'] = order.error
+                logger.warning(f"Liquidation failed for {name}: {order.error}. Retrying...")
+                await asyncio.sleep(self.REJECT_RETRY_DELAY)
+                continue
+
+            await self.router.wait(order, max(0.0, min(self.REPRICE_INTERVAL, deadline_ts - time.monotonic())))
+            if not order.is_done:
+                logger.info(f"🔁 {name}: {order.remaining_qty}sh unfilled after {self.REPRICE_INTERVAL:.0f}s. Cancel & re-price...")
+                await self.router.cancel(order)
+                await self.router.wait(order, self.CANCEL_WAIT)
+
+            if order.filled_qty > 0:
+                filled_cost += order.filled_qty * (order.avg_fill_price or ref_price)
+                result['filled'] += order.filled_qty
+                result['remaining'] -= order.filled_qty
+                result['avg_price'] = filled_cost / result['filled']
+
+            if not order.is_done:
+                # Cancel not confirmed -> re-submitting could oversell
+                result['error'] = "취소 확인 지연 (잔량 확인 필요)"
+                logger.error(f"❌ {name}: Cancel not confirmed for order {order.odno}. Stopping re-price loop.")
+                break
+
+        if result['remaining'] > 0 and not result['error']:
+            result['error'] = f"마감 시한 내 미체결 {result['remaining']}주"
+        if result['remaining'] == 0:
+            result['error'] = None
+        return result
+
+
+liquidation_engine = LiquidationEngine()
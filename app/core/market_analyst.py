@@ -2,6 +2,7 @@ import logging
 import requests
 from bs4 import BeautifulSoup
 from app.core.kis_api import kis
+from app.core.state_store import state_store
 
 logger = logging.getLogger(__name__)
 
@@ -159,8 +160,6 @@ class MarketAnalyst:
         Generates Top 10 Picks using AI Context Analysis (Stock Selection v2).
         Returns: list of dicts (the Top 10 picks)
         """
-        import json
-        import os
         from datetime import datetime
         from app.core.ai_analyzer import ai_analyzer
         from app.core.telegram_bot import bot
@@ -193,19 +192,14 @@ class MarketAnalyst:
         
         # Save to File
         file_path = f"app/data/top_picks_{market_type}.json"
-        try:
-            os.makedirs("app/data", exist_ok=True)
-            with open(file_path, "w", encoding='utf-8') as f:
-                json.dump({
-                    "date": datetime.now().strftime("%Y-%m-%d"),
-                    "market": market_type,
-                    "market_summary": ai_result.get('market_summary', {}),
-                    "picks": top_10,
-                    "timestamp": datetime.now().isoformat()
-                }, f, ensure_ascii=False, indent=2)
-            logger.info(f"Saved Top 10 to {file_path}")
-        except Exception as e:
-            logger.error(f"Failed to save Top 10 file: {e}")
+        state_store.set(file_path, {
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "market": market_type,
+            "market_summary": ai_result.get('market_summary', {}),
+            "picks": top_10,
+            "timestamp": datetime.now().isoformat()
+        }, indent=2)
+        logger.info(f"Saved Top 10 to {file_path}")
 
         # 4. Report to Telegram
         summary = ai_result.get('market_summary', {})
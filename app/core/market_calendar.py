@@ -0,0 +1,317 @@
+import logging
+from datetime import date, datetime, timedelta, time as dtime
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# All session times are naive KST datetimes, like the rest of the bot (datetime.now() on a KST host).
+# KST has no DST; US times are converted with the US DST rule (2nd Sunday of March .. 1st Sunday of November),
+# so no tz database is needed.
+
+# --- KRX ---
+KR_OPEN = dtime(9, 0)
+KR_CLOSE = dtime(15, 30)
+KR_FIRST_DAY_OPEN = dtime(10, 0) # First trading day of the year opens an hour late
+
+KR_FIXED_HOLIDAYS = {
+    (1, 1): "신정",
+    (3, 1): "삼일절",
+    (5, 1): "근로자의 날",
+    (5, 5): "어린이날",
+    (6, 6): "현충일",
+    (8, 15): "광복절",
+    (10, 3): "개천절",
+    (10, 9): "한글날",
+    (12, 25): "성탄절",
+}
+# Holidays that get a substitute weekday when they fall on a weekend / another holiday
+KR_SUBSTITUTED = {"삼일절", "어린이날", "광복절", "개천절", "한글날", "성탄절", "부처님오신날"}
+
+# Lunar holidays (solar dates): year -> (설날, 부처님오신날, 추석). Extend yearly.
+KR_LUNAR = {
+    2024: ((2, 10), (5, 15), (9, 17)),
+    2025: ((1, 29), (5, 5), (10, 6)),
+    2026: ((2, 17), (5, 24), (9, 25)),
+    2027: ((2, 7), (5, 13), (9, 15)),
+    2028: ((1, 27), (5, 2), (10, 3)),
+    2029: ((2, 13), (5, 20), (9, 22)),
+    2030: ((2, 3), (5, 9), (9, 12)),
+}
+KR_ELECTION_DAYS = {
+    date(2026, 6, 3): "전국동시지방선거",
+    date(2028, 4, 12): "국회의원선거",
+}
+# Trading days with shifted hours (open, close): 수능 day opens 10:00 and closes 16:30. Extend yearly
+# (or set MARKET_SESSIONS_EXTRA).
+KR_SPECIAL_SESSIONS = {
+    date(2024, 11, 14): (dtime(10, 0), dtime(16, 30)),
+    date(2025, 11, 13): (dtime(10, 0), dtime(16, 30)),
+    date(2026, 11, 19): (dtime(10, 0), dtime(16, 30)),
+}
+
+# --- NYSE (exchange local time, ET) ---
+US_OPEN_ET = dtime(9, 30)
+US_CLOSE_ET = dtime(16, 0)
+US_EARLY_CLOSE_ET = dtime(13, 0)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th weekday (0=Mon) of a month; n=-1 for the last one."""
+    if n > 0:
+        d = date(year, month, 1)
+        d += timedelta(days=(weekday - d.weekday()) % 7)
+        return d + timedelta(weeks=n - 1)
+    d = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(d):
+    """US federal rule: Saturday holiday -> Friday, Sunday -> Monday."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+def us_is_dst(d: date) -> bool:
+    """US daylight saving time on this (US) date."""
+    return _nth_weekday(d.year, 3, 6, 2) <= d < _nth_weekday(d.year, 11, 6, 1)
+
+
+def nyse_holidays(year: int) -> dict:
+    days = {}
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5: # Saturday New Year's Day is not observed on the Friday before
+        days[_observed(new_year)] = "New Year's Day"
+    days[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    days[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    days[_easter(year) - timedelta(days=2)] = "Good Friday"
+    days[_nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        days[_observed(date(year, 6, 19))] = "Juneteenth"
+    days[_observed(date(year, 7, 4))] = "Independence Day"
+    days[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    days[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    days[_observed(date(year, 12, 25))] = "Christmas Day"
+    return days
+
+
+def nyse_early_closes(year: int, holidays: dict) -> set:
+    """13:00 ET closes: July 3, the day after Thanksgiving, Christmas Eve (when they are trading weekdays)."""
+    days = {date(year, 7, 3), _nth_weekday(year, 11, 3, 4) + timedelta(days=1), date(year, 12, 24)}
+    return {d for d in days if d.weekday() < 5 and d not in holidays}
+
+
+def krx_holidays(year: int) -> dict:
+    days = {date(year, month, day): name for (month, day), name in KR_FIXED_HOLIDAYS.items()}
+    for d, name in KR_ELECTION_DAYS.items():
+        if d.year == year:
+            days[d] = name
+
+    substitutes = [(d, name) for d, name in days.items() if name in KR_SUBSTITUTED and d.weekday() >= 5]
+    lunar = KR_LUNAR.get(year)
+    if lunar:
+        seollal, buddha, chuseok = (date(year, m, d) for m, d in lunar)
+        if buddha in days or buddha.weekday() >= 5:
+            substitutes.append((buddha, "부처님오신날"))
+        days.setdefault(buddha, "부처님오신날")
+        for center, name in ((seollal, "설날"), (chuseok, "추석")):
+            block = [center + timedelta(days=i) for i in (-1, 0, 1)]
+            # Three-day holidays get a substitute only if they touch a Sunday or another holiday
+            if any(d.weekday() == 6 or d in days for d in block):
+                substitutes.append((block[-1], name))
+            for d in block:
+                days.setdefault(d, name)
+    else:
+        logger.warning(f"⚠️ KRX lunar holidays for {year} are not in the calendar table (set MARKET_HOLIDAYS_EXTRA)")
+
+    # Substitute holidays (대체공휴일): the next weekday that is not already a holiday
+    for base, name in sorted(substitutes):
+        sub = base + timedelta(days=1)
+        while sub.weekday() >= 5 or sub in days:
+            sub += timedelta(days=1)
+        days[sub] = f"{name} 대체공휴일"
+
+    # Year-end closing: Dec 31, or the last weekday before it
+    year_end = date(year, 12, 31)
+    while year_end.weekday() >= 5:
+        year_end -= timedelta(days=1)
+    days.setdefault(year_end, "연말 휴장일")
+    return days
+
+
+class TradingDay:
+    """One exchange session. date is the exchange-local trading date; open/close are KST."""
+    __slots__ = ("market", "date", "open", "close", "early_close", "late_open")
+
+    def __init__(self, market, day, open_at, close_at, early_close=False, late_open=False):
+        self.market = market
+        self.date = day
+        self.open = open_at
+        self.close = close_at
+        self.early_close = early_close
+        self.late_open = late_open
+
+    def at(self, anchor) -> datetime:
+        """Resolve an anchor ("open" | "close", minutes offset) to a KST datetime."""
+        base, minutes = anchor
+        return (self.open if base == "open" else self.close) + timedelta(minutes=minutes)
+
+    def __repr__(self):
+        flags = (" early-close" if self.early_close else "") + (" late-open" if self.late_open else "")
+        return f"TradingDay({self.market} {self.date} {self.open:%m-%d %H:%M}~{self.close:%m-%d %H:%M} KST{flags})"
+
+
+class MarketCalendar:
+    """
+    KRX / NYSE trading sessions computed offline from the exchange rules (holidays,
+    substitute holidays, half days, US DST, shifted 수능-day hours), plus ad-hoc closures
+    (MARKET_HOLIDAYS_EXTRA) and session hours (MARKET_SESSIONS_EXTRA) from the settings. Each (market, year) table is built once;
+    lookups are dict hits, so the loop can ask "open now / next open / time to close"
+    without API calls.
+    """
+    MARKETS = ("KR", "US")
+
+    def __init__(self, extra_holidays: str = "", extra_sessions: str = ""):
+        self._extra = {m: {} for m in self.MARKETS}
+        for item in filter(None, (s.strip() for s in extra_holidays.split(","))):
+            try:
+                market, day = item.split(":", 1)
+                self._extra[market.strip().upper()][date.fromisoformat(day.strip())] = "임시 휴장일"
+            except (ValueError, KeyError):
+                logger.warning(f"Ignoring malformed MARKET_HOLIDAYS_EXTRA entry: {item}")
+        # Shifted session hours in exchange-local time, e.g. "KR:2026-11-19@10:00-16:30"
+        self._sessions = {"KR": dict(KR_SPECIAL_SESSIONS), "US": {}}
+        for item in filter(None, (s.strip() for s in extra_sessions.split(","))):
+            try:
+                market, rest = item.split(":", 1)
+                day, hours = rest.split("@", 1)
+                open_at, close_at = (dtime.fromisoformat(t.strip()) for t in hours.split("-", 1))
+                if close_at <= open_at:
+                    raise ValueError("close before open")
+                self._sessions[market.strip().upper()][date.fromisoformat(day.strip())] = (open_at, close_at)
+            except (ValueError, KeyError):
+                logger.warning(f"Ignoring malformed MARKET_SESSIONS_EXTRA entry: {item}")
+        self._holidays = {}  # (market, year) -> {date: name}
+        self._days = {}      # (market, year) -> {date: TradingDay}
+
+    def _table(self, market: str, year: int) -> dict:
+        key = (market, year)
+        table = self._days.get(key)
+        if table is None:
+            table = self._days[key] = self._build(market, year)
+        return table
+
+    def _build(self, market: str, year: int) -> dict:
+        holidays = nyse_holidays(year) if market == "US" else krx_holidays(year)
+        holidays.update({d: n for d, n in self._extra[market].items() if d.year == year})
+        self._holidays[(market, year)] = holidays
+        early = nyse_early_closes(year, holidays) if market == "US" else set()
+
+        table = {}
+        first_kr_day = True
+        d = date(year, 1, 1)
+        while d.year == year:
+            if d.weekday() < 5 and d not in holidays:
+                if market == "US":
+                    shift = timedelta(hours=13 if us_is_dst(d) else 14) # ET -> KST
+                    open_et, close_et = self._sessions["US"].get(
+                        d, (US_OPEN_ET, US_EARLY_CLOSE_ET if d in early else US_CLOSE_ET))
+                    table[d] = TradingDay("US", d, datetime.combine(d, open_et) + shift,
+                                          datetime.combine(d, close_et) + shift,
+                                          early_close=close_et < US_CLOSE_ET, late_open=open_et > US_OPEN_ET)
+                else:
+                    open_at, close_at = self._sessions["KR"].get(
+                        d, (KR_FIRST_DAY_OPEN if first_kr_day else KR_OPEN, KR_CLOSE))
+                    table[d] = TradingDay("KR", d, datetime.combine(d, open_at), datetime.combine(d, close_at),
+                                          early_close=close_at < KR_CLOSE, late_open=open_at > KR_OPEN)
+                    first_kr_day = False
+            d += timedelta(days=1)
+        return table
+
+    def trading_day(self, market: str, d: date):
+        """TradingDay for an exchange date, or None if the exchange is closed."""
+        return self._table(market, d.year).get(d)
+
+    def closed_reason(self, market: str, d: date):
+        """Why the exchange is closed on d (None if it trades)."""
+        if self.trading_day(market, d):
+            return None
+        if d.weekday() >= 5:
+            return "주말 (토/일)"
+        return self._holidays[(market, d.year)].get(d, "휴장일")
+
+    def days_from(self, market: str, d: date, limit: int = 370):
+        """Trading days from d (inclusive) onward."""
+        for _ in range(limit):
+            td = self.trading_day(market, d)
+            if td:
+                yield td
+            d += timedelta(days=1)
+
+    def last_closed_day(self, market: str, now: datetime = None, limit: int = 370):
+        """Exchange date of the latest session that has already closed at `now` (KST)."""
+        now = now or datetime.now()
+        d = self.session_date(market, now)
+        for _ in range(limit):
+            td = self.trading_day(market, d)
+            if td and td.close <= now:
+                return d
+            d -= timedelta(days=1)
+        return None
+
+    @staticmethod
+    def session_date(market: str, now: datetime) -> date:
+        """Exchange date of the session `now` (KST) belongs to (US sessions run overnight in KST)."""
+        if market == "US":
+            return (now - timedelta(hours=12)).date()
+        return now.date()
+
+    def day_status(self, market: str, now: datetime = None):
+        """(trades, reason) for the session date of `now`."""
+        now = now or datetime.now()
+        d = self.session_date(market, now)
+        reason = self.closed_reason(market, d)
+        if reason is None:
+            return True, "거래일"
+        label = "미국" if market == "US" else "국내"
+        return False, f"{label} 휴장 - {reason} ({d})"
+
+    def is_open(self, market: str, now: datetime = None) -> bool:
+        now = now or datetime.now()
+        td = self.trading_day(market, self.session_date(market, now))
+        return td is not None and td.open <= now < td.close
+
+    def next_open(self, market: str, now: datetime = None) -> datetime:
+        """Next session open at or after now."""
+        now = now or datetime.now()
+        for td in self.days_from(market, self.session_date(market, now)):
+            if td.open >= now:
+                return td.open
+
+    def time_to_close(self, market: str, now: datetime = None):
+        """Seconds until the current session closes (None while closed)."""
+        now = now or datetime.now()
+        td = self.trading_day(market, self.session_date(market, now))
+        if td is None or not (td.open <= now < td.close):
+            return None
+        return (td.close - now).total_seconds()
+
+
+market_calendar = MarketCalendar(settings.MARKET_HOLIDAYS_EXTRA, settings.MARKET_SESSIONS_EXTRA)
@@ -1,70 +1,38 @@
 import json
+import asyncio
 import logging
 from datetime import datetime
 from app.core.config import settings
 from app.core.market_analyst import market_analyst
-import openai
+from app.core.ai_metrics import ai_metrics
+from app.core.trade_store import trade_store
+from app.core import strategy_config
+from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
 class StrategyOptimizer:
     def __init__(self):
-        self.config_file = "strategy_config.json"
-        self.history_file = "trade_history.json"
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.config_file = strategy_config.CONFIG_FILE
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
 
     def load_config(self):
-        try:
-            with open(self.config_file, "r") as f:
-                return json.load(f)
-        except:
-            return {}
+        return strategy_config.load_config()
 
     def save_config(self, new_config):
-        try:
-            with open(self.config_file, "w") as f:
-                json.dump(new_config, f, indent=4)
-            logger.info("Strategy Config Updated.")
-        except Exception as e:
-            logger.error(f"Failed to save config: {e}")
+        strategy_config.save_config(new_config)
 
     def analyze_history(self, market_type="KR"):
-        """Calculate daily performance stats"""
-        try:
-            with open(self.history_file, "r", encoding='utf-8') as f:
-                history = json.load(f)
-        except:
-            return {"win_rate": 0, "pnl": 0, "count": 0}
+        """Calculate session performance stats (indexed trade store, no file scan)"""
+        return trade_store.session_stats(market_type)
 
-        # Filter for TODAY (or recent session)
-        # For simplicity, we just analyze the last 10 trades if date filtering is complex, 
-        # but let's try to filter by "sell_time" matching today.
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        target_trades = [
-            t for t in history 
-            if t.get('market_type') == market_type and t.get('sell_time', '').startswith(today)
-        ]
-        
-        if not target_trades:
-            return {"win_rate": 0, "pnl": 0, "count": 0}
-            
-        wins = sum(1 for t in target_trades if t['profit_rate'] > 0)
-        total = len(target_trades)
-        avg_pnl = sum(t['profit_rate'] for t in target_trades) / total
-        
-        return {
-            "win_rate": round((wins/total)*100, 1),
-            "pnl": round(avg_pnl, 2),
-            "count": total
-        }
-
-    def run_optimization(self, market_type="KR"):
+    async def run_optimization(self, market_type="KR"):
         """
         1. Analyze Performance
         2. Analyze Market
         3. Ask AI for Parameter Tuning
         4. Apply Changes
+        [Async] Meant to run as a background task so the trading loop / dashboard stay responsive.
         """
         logger.info(f"Running Optimization for {market_type}...")
         
@@ -73,10 +41,14 @@ class StrategyOptimizer:
         logger.info(f"Daily Stats: {stats}")
         
         # 2. Market Context
-        market_status = market_analyst.get_market_status(market_type)
+        market_status = await asyncio.to_thread(market_analyst.get_market_status, market_type)
         market_desc = market_status['description']
         trend = market_status['trend']
         
+        config = self.load_config()
+        key = "kr_parameters" if market_type == "KR" else "us_parameters"
+        current = config.get(key, {})
+        
         # 3. AI Prompt
         prompt = f"""
         You are an elite Algo-Trading Strategist. Analyze today's performance and market conditions to tune parameters for tomorrow.
@@ -87,8 +59,8 @@ class StrategyOptimizer:
         - Leading Sectors (Hypothetical): Analyze implies volatility.
         
         [Current Parameters]
-        - Target Profit: 3.0%
-        - Stop Loss: 2.0%
+        - Target Profit: {current.get('target_profit_rate', 3.0)}%
+        - Stop Loss: {current.get('stop_loss_rate', 2.0)}%
         
         [Goal]
         - Suggest NEW parameters to maximize profit and minimize risk for tomorrow.
@@ -107,22 +79,29 @@ class StrategyOptimizer:
         }}
         """
         
+        record = ai_metrics.start("run_optimization")
+        record.provider, record.model = "GPT", settings.OPTIMIZER_MODEL
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            response = await self.client.chat.completions.create(
+                model=settings.OPTIMIZER_MODEL,
                 messages=[{"role": "system", "content": "You are a JSON-speaking Trading Optimizer."},
                           {"role": "user", "content": prompt}],
                 response_format={"type": "json_object"}
             )
+            if response.usage:
+                record.add_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
             
-            result = json.loads(response.choices[0].message.content)
+            try:
+                result = json.loads(response.choices[0].message.content)
+            except Exception:
+                record.parse_failed = True
+                raise
             logger.info(f"AI Optimization Result: {result}")
             
-            # 4. Apply Changes
+            # 4. Apply Changes (re-load: config may have changed while waiting on AI)
             config = self.load_config()
             
             # Safe access (create key if missing)
-            key = "kr_parameters" if market_type == "KR" else "us_parameters"
             if key not in config: config[key] = {}
             
             config[key]['target_profit_rate'] = result['target_profit_rate']
@@ -135,7 +114,14 @@ class StrategyOptimizer:
             return result
             
         except Exception as e:
+            record.error = str(e)
             logger.error(f"Optimization Failed: {e}")
             return None
+        finally:
+            ai_metrics.finish(record)
+
+    def apply_sweep(self, market_type: str, params: dict, metrics: dict):
+        """Write backtest sweep results (app/core/param_sweep.py) as the market's parameters."""
+        return strategy_config.apply_sweep(market_type, params, metrics)
 
 optimizer = StrategyOptimizer()
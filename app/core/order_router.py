@@ -0,0 +1,394 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from app.core.kis_api import kis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OrderState:
+    NEW = "NEW"                         # Created locally, not yet sent
+    ACKED = "ACKED"                     # KIS accepted (order number assigned)
+    PARTIALLY_FILLED = "PARTIALLY_FILLED"
+    FILLED = "FILLED"
+    CANCELLED = "CANCELLED"
+    REJECTED = "REJECTED"
+
+    TERMINAL = (FILLED, CANCELLED, REJECTED)
+
+    # Allowed transitions (anything -> REJECTED/CANCELLED is validated by the caller)
+    TRANSITIONS = {
+        NEW: (ACKED, REJECTED),
+        ACKED: (PARTIALLY_FILLED, FILLED, CANCELLED, REJECTED),
+        PARTIALLY_FILLED: (PARTIALLY_FILLED, FILLED, CANCELLED),
+    }
+
+
+class Order:
+    """
+    One KIS order tracked from signal to completion.
+    timestamps: {"SIGNAL": t, "NEW": t, "ACKED": t, "PARTIALLY_FILLED": t(first), "FILLED": t, ...} (epoch seconds)
+    meta: caller context (position info, exit reason, ...) passed back through listener events.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, symbol: str, side: str, qty: int, price: float = 0, market_type: str = "KR",
+                 excg: str = None, signal_time: float = None, meta: dict = None):
+        self.id = next(self._ids)
+        self.symbol = symbol
+        self.side = side                # "BUY" / "SELL"
+        self.qty = int(qty)
+        self.price = price              # 0 = market order (KR), limit price otherwise
+        self.market_type = market_type
+        self.excg = excg
+        self.meta = meta or {}
+
+        self.state = OrderState.NEW
+        self.odno = None                # KIS order number
+        self.filled_qty = 0
+        self.avg_fill_price = 0.0
+        self.error = None
+
+        now = time.time()
+        self.timestamps = {"SIGNAL": signal_time or now, OrderState.NEW: now}
+        self._done = None
+
+    @property
+    def is_done(self):
+        return self.state in OrderState.TERMINAL
+
+    @property
+    def remaining_qty(self):
+        return max(0, self.qty - self.filled_qty)
+
+    def _latency_ms(self, start, end):
+        if start in self.timestamps and end in self.timestamps:
+            return (self.timestamps[end] - self.timestamps[start]) * 1000
+        return None
+
+    @property
+    def signal_to_ack_ms(self):
+        return self._latency_ms("SIGNAL", OrderState.ACKED)
+
+    @property
+    def ack_to_fill_ms(self):
+        return self._latency_ms(OrderState.ACKED, OrderState.FILLED)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "market_type": self.market_type,
+            "qty": self.qty,
+            "price": self.price,
+            "state": self.state,
+            "odno": self.odno,
+            "filled_qty": self.filled_qty,
+            "avg_fill_price": self.avg_fill_price,
+            "error": self.error,
+            "signal_to_ack_ms": self.signal_to_ack_ms,
+            "ack_to_fill_ms": self.ack_to_fill_ms,
+            "timestamps": dict(self.timestamps),
+        }
+
+
+class OrderRouter:
+    """
+    Async order submission + fill reconciliation for KIS.
+    - submit(): sends the order off the event loop (to_thread) and moves NEW -> ACKED/REJECTED
+    - a reconcile task polls KIS order inquiries (KR: inquire-daily-ccld, US: inquire-ccnl)
+      while orders are open and moves them to PARTIALLY_FILLED / FILLED / CANCELLED / REJECTED
+    - listeners are called on every transition: listener(order, prev_state)
+    - order/cancel requests share one lane paced at KIS_ORDER_RATE_PER_SEC
+    """
+    POLL_INTERVAL = 1.0       # Seconds between fill inquiries while orders are open
+    TRACK_TIMEOUT = 300.0     # Cancel orders still open after this many seconds
+
+    def __init__(self, rate_per_sec: float = settings.KIS_ORDER_RATE_PER_SEC):
+        self.open_orders = {}                 # id -> Order
+        self.completed = deque(maxlen=500)    # Recently finished orders (latency stats / dashboard)
+        self._listeners = []
+        self._reconcile_task = None
+        self._lane_interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._lane_next = 0.0
+        self._lane_lock = asyncio.Lock()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    # --- Transitions ---
+
+    def _transition(self, order: Order, new_state: str, error: str = None):
+        prev = order.state
+        if new_state != prev and new_state not in OrderState.TRANSITIONS.get(prev, ()):
+            logger.warning(f"Invalid order transition {prev} -> {new_state} (#{order.id} {order.symbol})")
+            return
+        if error:
+            order.error = error
+        order.state = new_state
+        order.timestamps.setdefault(new_state, time.time())
+
+        if order.is_done:
+            self.open_orders.pop(order.id, None)
+            self.completed.append(order)
+            if order._done and not order._done.is_set():
+                order._done.set()
+
+        if new_state == OrderState.FILLED:
+            logger.info(f"⏱️ Order #{order.id} {order.side} {order.symbol} FILLED {order.filled_qty}sh @ {order.avg_fill_price:,.2f} "
+                        f"(signal→ack {order.signal_to_ack_ms or 0:.0f}ms, ack→fill {order.ack_to_fill_ms or 0:.0f}ms)")
+
+        for listener in self._listeners:
+            try:
+                listener(order, prev)
+            except Exception as e:
+                logger.error(f"Order listener error (#{order.id} {order.symbol}): {e}", exc_info=True)
+
+    def _apply_fill(self, order: Order, filled_qty: int, avg_price: float, closed: bool = False, rejected: bool = False):
+        """Apply an inquiry snapshot (cumulative filled qty / avg price) to an order."""
+        if filled_qty > order.filled_qty:
+            order.filled_qty = min(filled_qty, order.qty)
+            if avg_price > 0:
+                order.avg_fill_price = avg_price
+            if order.filled_qty >= order.qty:
+                self._transition(order, OrderState.FILLED)
+                return
+            self._transition(order, OrderState.PARTIALLY_FILLED)
+
+        if closed and not order.is_done:
+            # No remaining qty at the broker but not fully filled
+            if rejected and order.filled_qty == 0:
+                self._transition(order, OrderState.REJECTED, error=order.error or "Rejected by broker")
+            else:
+                self._transition(order, OrderState.CANCELLED)
+
+    # --- Order Lane ---
+
+    async def _acquire_lane(self):
+        """Pace order/cancel requests (callers queue in FIFO order on the lock)."""
+        if self._lane_interval <= 0:
+            return
+        async with self._lane_lock:
+            now = time.monotonic()
+            wait = self._lane_next - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._lane_next = max(now, self._lane_next) + self._lane_interval
+
+    async def call_in_lane(self, fn, *args, **kwargs):
+        """Run a blocking KIS order-lane request that isn't a tracked Order (e.g. cancelling broker-side orders)."""
+        await self._acquire_lane()
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    # --- Submission ---
+
+    def _send(self, order: Order):
+        """Blocking KIS call (runs in a worker thread). Returns raw response dict."""
+        if order.market_type == "US":
+            if order.side == "BUY":
+                res = kis.buy_overseas_order(order.symbol, order.qty, price=order.price, excg_cd=order.excg)
+                # Retry Logic for Exchange Code Mismatch (APBK0656)
+                if isinstance(res, dict) and (res.get('msg_cd') == 'APBK0656' or '해당종목' in res.get('msg1', '')):
+                    logger.warning(f"Order failed for {order.symbol} ({order.excg}). Retrying with other exchanges...")
+                    # Priority: 4-char (Correct) -> 3-char (Legacy/Fallback)
+                    for alt_excg in ['NASD', 'NYSE', 'AMEX', 'NAS', 'NYS', 'AMS']:
+                        if alt_excg == order.excg: continue
+                        logger.info(f"Retrying {order.symbol} on {alt_excg}...")
+                        res = kis.buy_overseas_order(order.symbol, order.qty, price=order.price, excg_cd=alt_excg)
+                        if isinstance(res, dict) and "ODNO" in res:
+                            logger.info(f"Retry Successful on {alt_excg}!")
+                            order.excg = alt_excg # Update for record
+                            break
+                return res
+            return kis.sell_overseas_order(order.symbol, order.qty, price=order.price, excg_cd=order.excg)
+
+        if order.side == "BUY":
+            return kis.buy_order(order.symbol, order.qty, price=order.price)
+        return kis.sell_order(order.symbol, order.qty, price=order.price)
+
+    async def submit(self, order: Order) -> Order:
+        """Send order (non-blocking for the event loop). Returns the order in ACKED or REJECTED state."""
+        self.open_orders[order.id] = order
+        logger.info(f"📤 Order #{order.id} {order.market_type} {order.side} {order.symbol} {order.qty}sh @ {order.price or 'MKT'}")
+
+        try:
+            await self._acquire_lane()
+            res = await asyncio.to_thread(self._send, order)
+        except Exception as e:
+            self._transition(order, OrderState.REJECTED, error=str(e))
+            return order
+
+        # Standardize Failure (KIS returns raw data with rt_cd on some failures, {"error"} on others)
+        if not isinstance(res, dict) or "error" in res or res.get("rt_cd", "0") != "0" or not res.get("ODNO"):
+            error_msg = res.get("error") or res.get("msg1", "KIS API Error") if isinstance(res, dict) else str(res)
+            order.meta['response'] = res
+            self._transition(order, OrderState.REJECTED, error=error_msg)
+            return order
+
+        order.odno = res.get("ODNO")
+        self._transition(order, OrderState.ACKED)
+        self._ensure_reconciler()
+        return order
+
+    def adopt(self, order: Order, odno: str, filled_qty: int = 0) -> Order:
+        """
+        Track an order the broker already accepted in an earlier run (restart): ACKED with its KIS
+        order number and fills so far; later fills arrive through reconciliation as usual.
+        """
+        order.odno = odno
+        order.filled_qty = min(int(filled_qty), order.qty)
+        order.state = OrderState.ACKED
+        order.timestamps[OrderState.ACKED] = time.time()
+        self.open_orders[order.id] = order
+        logger.info(f"📎 Adopted open order #{order.id} {order.market_type} {order.side} {order.symbol} "
+                    f"(ODNO {odno}, {order.filled_qty}/{order.qty} filled)")
+        self._ensure_reconciler()
+        return order
+
+    async def cancel(self, order: Order) -> bool:
+        """Request cancellation of the remaining qty. Final state arrives via reconciliation."""
+        if order.is_done or not order.odno:
+            return False
+        await self._acquire_lane()
+        if order.market_type == "US":
+            res = await asyncio.to_thread(kis.cancel_overseas_order, order.odno, order.symbol, order.excg)
+        else:
+            res = await asyncio.to_thread(kis.cancel_order, order.odno)
+        ok = isinstance(res, dict) and "error" not in res
+        if ok:
+            order.meta['cancel_requested'] = time.time()
+        else:
+            logger.warning(f"Cancel failed for order #{order.id} ({order.symbol}): {res}")
+        return ok
+
+    async def wait(self, order: Order, timeout: float = None) -> Order:
+        """Wait until the order reaches a terminal state (or timeout). Returns the order either way."""
+        if order.is_done:
+            return order
+        if order._done is None:
+            order._done = asyncio.Event()
+        try:
+            await asyncio.wait_for(order._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return order
+
+    def get_open_orders(self, market_type: str = None, side: str = None, symbol: str = None) -> list:
+        return [o for o in self.open_orders.values()
+                if (market_type is None or o.market_type == market_type)
+                and (side is None or o.side == side)
+                and (symbol is None or o.symbol == symbol)]
+
+    # --- Reconciliation ---
+
+    def _ensure_reconciler(self):
+        if self._reconcile_task is None or self._reconcile_task.done():
+            self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+
+    async def _reconcile_loop(self):
+        while self.open_orders:
+            await asyncio.sleep(self.POLL_INTERVAL)
+            try:
+                await self.reconcile_once()
+            except Exception as e:
+                logger.error(f"Order reconciliation error: {e}")
+
+    @staticmethod
+    def _odno_key(odno):
+        return str(odno or "").lstrip("0")
+
+    async def reconcile_once(self):
+        acked = [o for o in self.open_orders.values() if o.odno]
+        markets = {o.market_type for o in acked}
+
+        fetches = {}
+        if "KR" in markets:
+            fetches["KR"] = asyncio.to_thread(kis.get_orders)
+        if "US" in markets:
+            fetches["US"] = asyncio.to_thread(kis.get_overseas_order_fills)
+        results = dict(zip(fetches.keys(), await asyncio.gather(*fetches.values(), return_exceptions=True)))
+
+        rows_by_odno = {}
+        for market, rows in results.items():
+            if isinstance(rows, Exception):
+                logger.warning(f"Order inquiry failed ({market}): {rows}")
+                continue
+            for row in rows or []:
+                rows_by_odno[(market, self._odno_key(row.get('odno')))] = row
+
+        now = time.time()
+        for order in acked:
+            row = rows_by_odno.get((order.market_type, self._odno_key(order.odno)))
+            if row:
+                if order.market_type == "US":
+                    self._apply_us_row(order, row)
+                else:
+                    self._apply_kr_row(order, row)
+
+            if not order.is_done and now - order.timestamps[OrderState.ACKED] > self.TRACK_TIMEOUT \
+                    and 'cancel_requested' not in order.meta:
+                logger.warning(f"⌛ Order #{order.id} {order.symbol} open for {self.TRACK_TIMEOUT:.0f}s. Cancelling remainder...")
+                await self.cancel(order)
+
+    def _apply_kr_row(self, order: Order, row: dict):
+        def to_float(v):
+            try: return float(v)
+            except (TypeError, ValueError): return 0.0
+
+        filled = int(to_float(row.get('tot_ccld_qty')))
+        avg_price = to_float(row.get('avg_prvs'))
+        remaining = int(to_float(row.get('rmn_qty', order.qty)))
+        rejected = int(to_float(row.get('rjct_qty'))) > 0
+        closed = row.get('cncl_yn') == 'Y' or rejected or (remaining == 0 and filled < order.qty)
+        self._apply_fill(order, filled, avg_price, closed=closed, rejected=rejected)
+
+    def _apply_us_row(self, order: Order, row: dict):
+        def to_float(v):
+            try: return float(v)
+            except (TypeError, ValueError): return 0.0
+
+        filled = int(to_float(row.get('ft_ccld_qty')))
+        avg_price = to_float(row.get('ft_ccld_unpr3'))
+        remaining = int(to_float(row.get('nccs_qty', order.qty)))
+        status = row.get('prcs_stat_name', '')
+        rejected = bool(row.get('rjct_rson')) or '거부' in status
+        if rejected and not order.error:
+            order.error = row.get('rjct_rson') or status
+        closed = rejected or (remaining == 0 and filled < order.qty and status in ('완료', '취소', '거부'))
+        self._apply_fill(order, filled, avg_price, closed=closed, rejected=rejected)
+
+    # --- Stats ---
+
+    def latency_summary(self) -> dict:
+        """signal→ack / ack→fill percentiles per market & side over recently completed orders."""
+        def pct(values, p):
+            if not values: return None
+            values = sorted(values)
+            return round(values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))], 1)
+
+        groups = {}
+        for o in self.completed:
+            g = groups.setdefault(f"{o.market_type}_{o.side}", {"count": 0, "states": {}, "ack": [], "fill": []})
+            g["count"] += 1
+            g["states"][o.state] = g["states"].get(o.state, 0) + 1
+            if o.signal_to_ack_ms is not None: g["ack"].append(o.signal_to_ack_ms)
+            if o.ack_to_fill_ms is not None: g["fill"].append(o.ack_to_fill_ms)
+
+        return {
+            key: {
+                "count": g["count"],
+                "states": g["states"],
+                "signal_to_ack_p50_ms": pct(g["ack"], 50),
+                "signal_to_ack_p95_ms": pct(g["ack"], 95),
+                "ack_to_fill_p50_ms": pct(g["fill"], 50),
+                "ack_to_fill_p95_ms": pct(g["fill"], 95),
+            }
+            for key, g in groups.items()
+        }
+
+
+order_router = OrderRouter()
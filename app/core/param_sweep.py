@@ -0,0 +1,126 @@
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app.core.backtest_engine import BacktestEngine
+from app.core.exit_rules import ExitRules
+
+logger = logging.getLogger(__name__)
+
+# Search space (same bounds the AI optimizer is told: stop 1.5~5%, target 2~10%).
+# target None = no fixed take-profit (trailing stop only, the live default).
+SWEEP_SPACE = {
+    "target": [None, 2.0, 3.0, 4.0, 5.0, 7.0, 10.0],
+    "stop": [1.5, 2.0, 2.5, 3.0, 4.0, 5.0],
+    "trail_activate": [1.0, 1.5, 2.0, 2.5, 3.0],
+    "trail_drop": [0.5, 0.75, 1.0, 1.5, 2.0],
+}
+
+# Pareto objectives (all maximized): return, drawdown (negative %), win rate
+OBJECTIVES = ("return_pct", "max_drawdown_pct", "win_rate")
+
+
+def grid(space: dict = None) -> list:
+    space = space or SWEEP_SPACE
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_sample(n: int, space: dict = None, seed: int = None) -> list:
+    combos = grid(space)
+    return random.Random(seed).sample(combos, min(n, len(combos)))
+
+
+def make_engine(params: dict, cost_pct: float = 0.0) -> BacktestEngine:
+    rules = ExitRules(params["trail_activate"], params["trail_drop"], target_exit=params["target"] is not None)
+    return BacktestEngine(rules, stop_loss_pct=params["stop"], target_pct=params["target"] or 0.0, cost_pct=cost_pct)
+
+
+def pareto_front(results: list, objectives=OBJECTIVES) -> list:
+    """Results not dominated on every objective by another result."""
+    front = []
+    for r in results:
+        score = [r["metrics"][k] for k in objectives]
+        dominated = False
+        for other in results:
+            if other is r:
+                continue
+            o = [other["metrics"][k] for k in objectives]
+            if all(a >= b for a, b in zip(o, score)) and any(a > b for a, b in zip(o, score)):
+                dominated = True
+                break
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: -r["metrics"]["return_pct"])
+
+
+def pick_best(front: list) -> dict:
+    """Pareto pick: best return per unit of drawdown (Calmar-style), return as the tie-breaker."""
+    def calmar(r):
+        m = r["metrics"]
+        return m["return_pct"] / max(abs(m["max_drawdown_pct"]), 0.5)
+    return max(front, key=lambda r: (calmar(r), r["metrics"]["return_pct"]))
+
+
+def to_config_params(params: dict) -> dict:
+    """Sweep params -> strategy_config.json market keys (read by PreTradeCache / ExitRules.from_params)."""
+    out = {
+        "stop_loss_rate": params["stop"],
+        "trail_activate_rate": params["trail_activate"],
+        "trail_drop_rate": params["trail_drop"],
+        "target_exit": params["target"] is not None,
+    }
+    if params["target"] is not None:
+        out["target_profit_rate"] = params["target"]
+    return out
+
+
+# --- Worker process side ---
+_worker_data = {}
+
+
+def _init_worker(prices, days, cost_pct):
+    # Transposed to (steps, paths) once per worker, not once per combo
+    _worker_data.update(steps=BacktestEngine.prepare(prices), days=days, cost_pct=cost_pct)
+
+
+def _evaluate(chunk: list) -> list:
+    out = []
+    for params in chunk:
+        result = make_engine(params, _worker_data["cost_pct"]).run(_worker_data["steps"], day=_worker_data["days"],
+                                                                   step_major=True)
+        out.append({"params": params, "metrics": result.summary()})
+    return out
+
+
+class ParamSweep:
+    """
+    Backtests every parameter combination over the same price paths on a process pool
+    (prices are shipped once per worker via the initializer; combos go out in chunks).
+    """
+    def __init__(self, prices, days, cost_pct: float = 0.0, workers: int = None):
+        self.prices = prices
+        self.days = days
+        self.cost_pct = cost_pct
+        self.workers = workers or os.cpu_count() or 1
+        self.elapsed = 0.0
+
+    def run(self, combos: list) -> list:
+        start = time.perf_counter()
+        chunk = max(1, len(combos) // (self.workers * 4))
+        chunks = [combos[i:i + chunk] for i in range(0, len(combos), chunk)]
+        results = []
+        if self.workers == 1:
+            _init_worker(self.prices, self.days, self.cost_pct)
+            for c in chunks:
+                results.extend(_evaluate(c))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.prices, self.days, self.cost_pct)) as pool:
+                for part in pool.map(_evaluate, chunks):
+                    results.extend(part)
+        self.elapsed = time.perf_counter() - start
+        logger.info(f"Parameter sweep: {len(results)} combos in {self.elapsed:.1f}s ({self.workers} workers)")
+        return results
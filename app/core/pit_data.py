@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from app.core.market_calendar import market_calendar
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("open", "high", "low", "close", "volume")
+KIS_FIELDS = ("stck_oprc", "stck_hgpr", "stck_lwpr", "stck_clpr", "acml_vol")
+KIS_DAILY_MAX_ROWS = 100 # inquire-daily-itemchartprice returns at most this many rows per call
+
+
+class PITView:
+    """
+    A symbol's daily history as known at one point in time (ascending, zero-copy views
+    into the loaded arrays). Never contains rows on or after the as-of date.
+    """
+    __slots__ = ("symbol", "dates", "ohlcv")
+
+    def __init__(self, symbol, dates, ohlcv):
+        self.symbol = symbol
+        self.dates = dates   # int YYYYMMDD
+        self.ohlcv = ohlcv   # (rows, 5) float: open, high, low, close, volume
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def open(self):
+        return self.ohlcv[:, 0]
+
+    @property
+    def high(self):
+        return self.ohlcv[:, 1]
+
+    @property
+    def low(self):
+        return self.ohlcv[:, 2]
+
+    @property
+    def close(self):
+        return self.ohlcv[:, 3]
+
+    @property
+    def volume(self):
+        return self.ohlcv[:, 4]
+
+    def to_rows(self) -> list:
+        """KIS daily rows, newest first (copies; for code that still takes get_daily_price output)."""
+        return [{"stck_bsop_date": str(d), **{k: f"{v:g}" for k, v in zip(KIS_FIELDS, row)}}
+                for d, row in zip(self.dates[::-1], self.ohlcv[::-1])]
+
+
+class PointInTimeData:
+    """
+    Point-in-time data for backtests. Each symbol's daily history is fetched from KIS once
+    (or read from the disk cache / a CSV) into numpy arrays; as_of(symbol, date) then serves
+    slices of it without I/O. News titles are cached per (symbol, date) the same way, so a
+    re-run never touches the network for data it has already seen.
+    """
+    def __init__(self, cache_dir: str = "app/data/pit", fetch_daily=None, fetch_news=None):
+        self.cache_dir = cache_dir
+        self._fetch_daily = fetch_daily
+        self._fetch_news = fetch_news
+        self._dates = {}   # symbol -> int array (ascending)
+        self._ohlcv = {}   # symbol -> (rows, 5) float array
+        self._news = None  # "symbol|YYYYMMDD" -> titles
+        self._news_dirty = False
+        self.fetches = 0   # Network calls made (daily + news)
+
+    # --- Loading ---
+
+    def add_rows(self, symbol: str, rows: list):
+        """KIS daily rows (any order) -> arrays. Rows with a missing price are dropped."""
+        rows = sorted((r for r in rows if r.get('stck_clpr') not in (None, "")), key=lambda r: r['stck_bsop_date'])
+        self._dates[symbol] = np.array([int(r['stck_bsop_date']) for r in rows], dtype=np.int64)
+        self._ohlcv[symbol] = np.array([[float(r[k] or 0) for k in KIS_FIELDS] for r in rows],
+                                       dtype=np.float64).reshape(-1, 5)
+
+    def load(self, symbols, days: int = 150):
+        """
+        Make sure each symbol's history is in memory: disk cache first, KIS otherwise.
+        `days` is calendar days back from today (kis.get_daily_price). A cache file with fewer
+        rows than KRX sessions in that window, or ending before the last closed session, is
+        refetched (and kept if the fetch comes back empty).
+        """
+        last = market_calendar.last_closed_day("KR")
+        start = (datetime.now() - timedelta(days=days)).date()
+        sessions = 0
+        for td in market_calendar.days_from("KR", start, limit=days + 1):
+            if td.date > last:
+                break
+            sessions += 1
+        min_rows = min(sessions, KIS_DAILY_MAX_ROWS)
+        last_day = int(last.strftime("%Y%m%d"))
+        for symbol in symbols:
+            if symbol in self._dates:
+                continue
+            path = os.path.join(self.cache_dir, f"daily_{symbol}.json")
+            rows = []
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    rows = json.load(f)
+            if self._stale(rows, min_rows, last_day):
+                fetched = self._daily_fetcher()(symbol, days=days) or []
+                self.fetches += 1
+                if fetched:
+                    rows = fetched
+                    self._write(path, rows)
+            self.add_rows(symbol, rows)
+
+    def load_csv(self, path: str):
+        """Long-format daily CSV (date, symbol, open, high, low, close, volume); no network at all."""
+        import pandas as pd
+        df = pd.read_csv(path, dtype={"symbol": str})
+        df.columns = [c.lower() for c in df.columns]
+        df["date"] = df["date"].astype(str).str.replace("-", "", regex=False).astype(np.int64)
+        for symbol, g in df.sort_values(["symbol", "date"]).groupby("symbol", sort=False):
+            self._dates[symbol] = g["date"].to_numpy()
+            self._ohlcv[symbol] = g[list(FIELDS)].to_numpy(dtype=np.float64)
+
+    @property
+    def symbols(self) -> list:
+        return list(self._dates)
+
+    # --- Point-in-time access ---
+
+    def as_of(self, symbol: str, day: str, n: int = None):
+        """History strictly before `day` (what was known before that day's open), last n rows."""
+        dates = self._dates.get(symbol)
+        if dates is None:
+            return None
+        i = int(np.searchsorted(dates, int(day), side="left"))
+        j = 0 if n is None else max(0, i - n)
+        return PITView(symbol, dates[j:i], self._ohlcv[symbol][j:i])
+
+    def bar(self, symbol: str, day: str):
+        """The day's own OHLCV (the outcome, for verification only), or None if not traded."""
+        dates = self._dates.get(symbol)
+        if dates is None:
+            return None
+        i = int(np.searchsorted(dates, int(day), side="left"))
+        if i == len(dates) or dates[i] != int(day):
+            return None
+        return dict(zip(FIELDS, self._ohlcv[symbol][i].tolist()))
+
+    def news(self, symbol: str, day: str, limit: int = 3) -> list:
+        """News titles for (symbol, day), fetched from KIS at most once ever."""
+        if self._news is None:
+            path = os.path.join(self.cache_dir, "news.json")
+            self._news = {}
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    self._news = json.load(f)
+        key = f"{symbol}|{day}"
+        if key not in self._news:
+            items = self._news_fetcher()(symbol, search_date=day) or []
+            self.fetches += 1
+            self._news[key] = [n['hts_pbnt_titl_cntt'] for n in items if 'hts_pbnt_titl_cntt' in n]
+            self._news_dirty = True
+        return self._news[key][:limit]
+
+    def save(self):
+        """Persist the news cache (daily histories are written as they are fetched)."""
+        if self._news_dirty:
+            self._write(os.path.join(self.cache_dir, "news.json"), self._news)
+            self._news_dirty = False
+
+    # --- Helpers ---
+
+    @staticmethod
+    def _stale(rows: list, min_rows: int, last_day: int) -> bool:
+        if not rows or len(rows) < min_rows:
+            return True
+        return max(int(r['stck_bsop_date']) for r in rows) < last_day
+
+    def _daily_fetcher(self):
+        if self._fetch_daily is None:
+            from app.core.kis_api import kis
+            self._fetch_daily = kis.get_daily_price
+        return self._fetch_daily
+
+    def _news_fetcher(self):
+        if self._fetch_news is None:
+            from app.core.kis_api import kis
+            self._fetch_news = kis.get_news_titles
+        return self._fetch_news
+
+    @staticmethod
+    def _write(path: str, data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+pit_data = PointInTimeData()
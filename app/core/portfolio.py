@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.core.kis_api import kis
+from app.core.order_router import order_router
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioSnapshot:
+    """Consolidated account view from one refresh (KR summary/holdings/cash + merged US balance)."""
+    __slots__ = ("kr_summary", "kr_holdings", "kr_cash", "us", "taken_at", "elapsed_ms")
+
+    def __init__(self, kr_summary=None, kr_holdings=None, kr_cash=None, us=None, taken_at=None, elapsed_ms=0.0):
+        self.kr_summary = kr_summary      # inquire-balance output2[0] (None on failure)
+        self.kr_holdings = kr_holdings    # inquire-balance output1 (None on failure, [] if flat)
+        self.kr_cash = kr_cash            # Orderable cash (None on failure)
+        self.us = us                      # {"summary", "holdings", "failed_exchanges"} or None
+        self.taken_at = time.monotonic() if taken_at is None else taken_at # When the queries were sent
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+    def __repr__(self):
+        us_count = len(self.us['holdings']) if self.us else None
+        kr_count = len(self.kr_holdings) if self.kr_holdings is not None else None
+        return f"PortfolioSnapshot(KR={kr_count}, US={us_count}, age={self.age:.1f}s)"
+
+
+class PortfolioService:
+    """
+    Single source of account balance / holdings for the bot and the dashboard.
+    A refresh issues the KR balance, KR orderable cash and the three US exchange
+    balances concurrently and caches the merged snapshot for PORTFOLIO_TTL_SEC.
+    Order events (acks, fills, cancels) invalidate the cache, so the next read after
+    a fill is fresh. Concurrent readers share one in-flight refresh.
+    """
+    def __init__(self, ttl: float = settings.PORTFOLIO_TTL_SEC):
+        self.ttl = ttl
+        self._snapshot = None
+        self._dirty = True
+        self._lock = threading.Lock() # Single-flight refresh (callers come from the loop thread and workers)
+        self._pool = ThreadPoolExecutor(max_workers=2 + len(kis.OVERSEAS_EXCHANGES), thread_name_prefix="portfolio")
+        self.refresh_count = 0
+        order_router.add_listener(self._on_order_event)
+
+    def _on_order_event(self, order, prev_state):
+        self.invalidate()
+
+    def invalidate(self):
+        """Mark the cached snapshot stale (next read refreshes)."""
+        self._dirty = True
+
+    def _is_fresh(self, max_age: float) -> bool:
+        snap = self._snapshot
+        return snap is not None and not self._dirty and snap.age <= max_age
+
+    def get(self, max_age: float = None) -> PortfolioSnapshot:
+        """Cached snapshot if younger than max_age (default TTL), else refresh (blocking)."""
+        max_age = self.ttl if max_age is None else max_age
+        if self._is_fresh(max_age):
+            return self._snapshot
+        requested = time.monotonic()
+        with self._lock:
+            # Another caller may have refreshed while we waited
+            snap = self._snapshot
+            if snap is not None and not self._dirty and snap.taken_at >= requested - max_age:
+                return snap
+            return self._refresh()
+
+    async def aget(self, max_age: float = None) -> PortfolioSnapshot:
+        """Async variant for the event loop (refresh runs in a worker thread)."""
+        max_age = self.ttl if max_age is None else max_age
+        if self._is_fresh(max_age):
+            return self._snapshot
+        return await asyncio.to_thread(self.get, max_age)
+
+    def _refresh(self) -> PortfolioSnapshot:
+        taken_at = time.monotonic()
+        start = time.perf_counter()
+        self._dirty = False # Events arriving during the refresh mark it dirty again
+        kr_future = self._pool.submit(self._safe, kis.get_domestic_balance)
+        cash_future = self._pool.submit(self._safe, kis.get_orderable_cash)
+        us_futures = {excg: self._pool.submit(self._safe, kis.get_overseas_balance_exchange, excg)
+                      for excg in kis.OVERSEAS_EXCHANGES}
+
+        kr = kr_future.result()
+        us = kis.merge_overseas_balances({excg: f.result() for excg, f in us_futures.items()})
+        snap = PortfolioSnapshot(
+            kr_summary=kr['summary'] if kr else None,
+            kr_holdings=kr['holdings'] if kr else None,
+            kr_cash=cash_future.result(),
+            us=us,
+            taken_at=taken_at,
+            elapsed_ms=(time.perf_counter() - start) * 1000
+        )
+        self._snapshot = snap
+        self.refresh_count += 1
+        logger.debug(f"💼 Portfolio refreshed in {snap.elapsed_ms:.0f}ms: {snap}")
+        return snap
+
+    @staticmethod
+    def _safe(fn, *args):
+        try:
+            return fn(*args)
+        except Exception as e:
+            logger.error(f"Portfolio query {fn.__name__} failed: {e}")
+            return None
+
+
+portfolio = PortfolioService()
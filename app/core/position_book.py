@@ -0,0 +1,311 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+MARKETS = ("KR", "US")
+
+
+class Position:
+    """
+    One open position. Core fields live in __slots__; anything else the bot attaches
+    (max_price, trailing_active, exit_order_id, overnight, ...) goes to `extra`.
+    Supports the dict-style access the rest of the code uses (trade['qty'], trade.get(...),
+    trade.update(...), dict(trade)), so it is a drop-in for the old per-trade dicts.
+    Changes to qty / buy_price / market_type are reported to the owning PositionBook, and every
+    item-style write (except per-tick display fields in VOLATILE and order markers in TRANSIENT)
+    is journaled by the book.
+    """
+    __slots__ = ("symbol", "name", "_market_type", "excg", "_qty", "_buy_price",
+                 "target_price", "stop_loss_price", "buy_time", "extra", "_book")
+
+    FIELDS = ("name", "buy_price", "qty", "target_price", "stop_loss_price", "market_type", "excg", "buy_time")
+    VOLATILE = frozenset(("current_price", "profit_rate", "value", "value_krw")) # Recomputed every tick, not journaled
+    TRANSIENT = frozenset(("exit_order_id",)) # In-flight order markers: only valid for this run's order router
+    UNJOURNALED = VOLATILE | TRANSIENT
+
+    def __init__(self, symbol: str, name: str = "", buy_price: float = 0.0, qty: int = 0,
+                 target_price: float = 0.0, stop_loss_price: float = 0.0, market_type: str = "KR",
+                 excg: str = "N/A", buy_time: str = None, **extra):
+        self.symbol = symbol
+        self.name = name or symbol
+        self._market_type = market_type or "KR"
+        self.excg = excg
+        self._qty = int(qty)
+        self._buy_price = float(buy_price)
+        self.target_price = target_price
+        self.stop_loss_price = stop_loss_price
+        self.buy_time = buy_time
+        self.extra = extra
+        self._book = None
+
+    # --- Book-tracked fields ---
+
+    @property
+    def qty(self):
+        return self._qty
+
+    @qty.setter
+    def qty(self, value):
+        self._set_basis(int(value), self._buy_price)
+
+    @property
+    def buy_price(self):
+        return self._buy_price
+
+    @buy_price.setter
+    def buy_price(self, value):
+        self._set_basis(self._qty, float(value))
+
+    @property
+    def market_type(self):
+        return self._market_type
+
+    @market_type.setter
+    def market_type(self, value):
+        value = value or "KR"
+        if value != self._market_type and self._book is not None:
+            self._book._move(self, value)
+        self._market_type = value
+
+    @property
+    def cost(self):
+        return self._qty * self._buy_price
+
+    def _set_basis(self, qty: int, buy_price: float):
+        if self._book is not None:
+            self._book._adjust_cost(self._market_type, qty * buy_price - self.cost)
+        self._qty = qty
+        self._buy_price = buy_price
+
+    def _touch(self):
+        if self._book is not None:
+            self._book._on_change(self)
+
+    # --- Dict-style access ---
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+        if key not in self.UNJOURNALED:
+            self._touch()
+
+    def __contains__(self, key):
+        return key in self.FIELDS or key in self.extra
+
+    def get(self, key, default=None):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key, *default):
+        if key in self.FIELDS:
+            raise KeyError(f"Cannot remove core position field '{key}'")
+        existed = key in self.extra
+        value = self.extra.pop(key, *default)
+        if existed and key not in self.UNJOURNALED:
+            self._touch()
+        return value
+
+    def update(self, other=None, **kwargs):
+        items = dict(other or {}, **kwargs)
+        journaled = any(k not in self.UNJOURNALED for k in items)
+        # Apply qty + buy_price together so the book sees one cost-basis change
+        if "qty" in items or "buy_price" in items:
+            self._set_basis(int(items.pop("qty", self._qty)), float(items.pop("buy_price", self._buy_price)))
+        for key, value in items.items():
+            if key in self.FIELDS:
+                setattr(self, key, value)
+            else:
+                self.extra[key] = value
+        if journaled:
+            self._touch()
+
+    def keys(self):
+        return list(self.FIELDS) + list(self.extra)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def to_dict(self) -> dict:
+        return {k: self[k] for k in self.keys()}
+
+    def copy(self) -> dict:
+        return self.to_dict()
+
+    def to_record(self) -> dict:
+        """Durable state (journal): everything except per-tick display fields and in-flight order markers."""
+        return {k: self[k] for k in self.keys() if k not in self.UNJOURNALED}
+
+    def __repr__(self):
+        return f"Position({self.symbol} {self._market_type} {self._qty}sh @ {self._buy_price:,.2f})"
+
+
+class PositionBook:
+    """
+    Open positions keyed by symbol with per-market indexes, slot counts and
+    cost-basis totals kept up to date on open/close/resize (all O(1) queries).
+    Mapping interface matches the old active_trades dict; assigning a dict opens a Position.
+    With a journal attached, every open/change/close is written ahead to it and restore()
+    rebuilds the book on startup (targets, trailing peaks, overnight flags survive restarts).
+    """
+    def __init__(self, journal=None):
+        self._positions = {}                          # symbol -> Position
+        self._by_market = {m: {} for m in MARKETS}    # market -> {symbol: Position}
+        self._cost = {m: 0.0 for m in MARKETS}        # market -> sum(qty * buy_price)
+        self.journal = journal
+
+    # --- Queries ---
+
+    def count(self, market: str) -> int:
+        return len(self._by_market.get(market, {}))
+
+    def cost_basis(self, market: str) -> float:
+        return self._cost.get(market, 0.0)
+
+    def positions(self, market: str = "ALL") -> list:
+        """Snapshot list (safe to iterate while positions open/close)."""
+        if market == "ALL":
+            return list(self._positions.values())
+        return list(self._by_market.get(market, {}).values())
+
+    def symbols(self, market: str = "ALL") -> list:
+        if market == "ALL":
+            return list(self._positions)
+        return list(self._by_market.get(market, {}))
+
+    # --- Mutations ---
+
+    def open(self, symbol: str, fields) -> Position:
+        if isinstance(fields, Position):
+            position = fields
+        else:
+            fields = dict(fields)
+            fields.pop("symbol", None)
+            position = Position(symbol, **fields)
+        position.symbol = symbol
+        if symbol in self._positions:
+            self._remove(symbol)
+        market = position.market_type
+        self._by_market.setdefault(market, {})[symbol] = position
+        self._cost[market] = self._cost.get(market, 0.0) + position.cost
+        self._positions[symbol] = position
+        position._book = self
+        self._on_change(position)
+        return position
+
+    def _remove(self, symbol: str) -> Position:
+        position = self._positions.pop(symbol)
+        market = position.market_type
+        self._by_market[market].pop(symbol, None)
+        self._cost[market] -= position.cost
+        if not self._by_market[market]:
+            self._cost[market] = 0.0 # Clear float drift when the market is flat
+        position._book = None
+        if self.journal is not None:
+            self.journal.delete(symbol)
+        return position
+
+    def _on_change(self, position: Position):
+        if self.journal is None:
+            return
+        self.journal.put(position.symbol, position.to_record())
+        if self.journal.needs_compaction:
+            self.journal.compact(self.snapshot())
+
+    def snapshot(self) -> dict:
+        return {s: p.to_record() for s, p in self._positions.items()}
+
+    def restore(self) -> int:
+        """
+        Replay the journal into the book (startup) and compact it. Returns the number of positions.
+        In-flight order markers from older journals are dropped: the orders they point to belonged
+        to the previous run (open ones are re-attached by TradeManager.sync_portfolio).
+        """
+        if self.journal is None:
+            return 0
+        journal, self.journal = self.journal, None # Don't re-journal while replaying
+        try:
+            for symbol, fields in journal.replay().items():
+                try:
+                    self.open(symbol, {k: v for k, v in fields.items() if k not in Position.TRANSIENT})
+                except Exception as e:
+                    logger.error(f"Skipping unreadable journaled position {symbol}: {e}")
+        finally:
+            self.journal = journal
+        self.journal.compact(self.snapshot())
+        return len(self._positions)
+
+    def _adjust_cost(self, market: str, delta: float):
+        self._cost[market] = self._cost.get(market, 0.0) + delta
+
+    def _move(self, position: Position, new_market: str):
+        old = position.market_type
+        self._by_market[old].pop(position.symbol, None)
+        self._cost[old] -= position.cost
+        self._by_market.setdefault(new_market, {})[position.symbol] = position
+        self._cost[new_market] = self._cost.get(new_market, 0.0) + position.cost
+
+    # --- Mapping interface (drop-in for the old dict) ---
+
+    def __setitem__(self, symbol, fields):
+        self.open(symbol, fields)
+
+    def __getitem__(self, symbol) -> Position:
+        return self._positions[symbol]
+
+    def __delitem__(self, symbol):
+        self._remove(symbol)
+
+    def __contains__(self, symbol):
+        return symbol in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __bool__(self):
+        return bool(self._positions)
+
+    def get(self, symbol, default=None):
+        return self._positions.get(symbol, default)
+
+    def pop(self, symbol, *default):
+        if symbol in self._positions:
+            return self._remove(symbol)
+        if default:
+            return default[0]
+        raise KeyError(symbol)
+
+    def keys(self):
+        return self._positions.keys()
+
+    def values(self):
+        return self._positions.values()
+
+    def items(self):
+        return self._positions.items()
+
+    def to_dict(self) -> dict:
+        return {s: p.to_dict() for s, p in self._positions.items()}
+
+    def __repr__(self):
+        return f"PositionBook(KR={self.count('KR')}, US={self.count('US')})"
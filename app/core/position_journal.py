@@ -0,0 +1,161 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PositionJournal:
+    """
+    Append-only write-ahead journal of open positions (position_journal.jsonl).
+    One JSON line per mutation:
+      {"op": "put", "symbol": ..., "position": {...}}   full position state after the change
+      {"op": "del", "symbol": ...}                      position closed
+      {"op": "snapshot", "positions": {...}}            compaction base (first line after compaction)
+    Writes are coalesced per symbol and flushed with a single fsync every FLUSH_INTERVAL by a
+    writer thread, so frequent updates (e.g. trailing max_price) cost one line per flush at most.
+    The file is rewritten as a single snapshot on startup and every COMPACT_EVERY lines.
+    A failed write keeps its entries queued and is retried by the writer thread with a growing
+    delay (up to RETRY_MAX), logged once per failure streak.
+    """
+    FLUSH_INTERVAL = 0.25   # Seconds (max data loss window on crash)
+    COMPACT_EVERY = 2000    # Lines appended before the journal is compacted
+    RETRY_MAX = 30.0        # Longest delay between retries of a failing write
+
+    def __init__(self, path: str = "position_journal.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Serializes flushes (writer thread / atexit)
+        self._wake = threading.Event()
+        self._pending = {}          # symbol -> position dict (None = deleted), coalesced
+        self._snapshot = None       # Pending compaction snapshot {symbol: position}
+        self._lines = 0
+        self._thread = None
+        self._failures = 0          # Failed flushes in a row
+        self._retry_at = 0.0        # Monotonic time of the next retry while failing
+
+    # --- Replay ---
+
+    def replay(self) -> dict:
+        """Rebuild {symbol: position dict} from the journal. A torn last line (crash mid-write) is ignored."""
+        start = time.perf_counter()
+        positions = {}
+        lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for raw in f:
+                    try:
+                        entry = json.loads(raw)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping corrupt journal line {lines + 1}")
+                        continue
+                    lines += 1
+                    op = entry.get("op")
+                    if op == "put":
+                        positions[entry["symbol"]] = entry["position"]
+                    elif op == "del":
+                        positions.pop(entry["symbol"], None)
+                    elif op == "snapshot":
+                        positions = dict(entry["positions"])
+        except FileNotFoundError:
+            return {}
+
+        self._lines = lines
+        logger.info(f"📒 Position journal replayed: {len(positions)} positions from {lines} entries "
+                    f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return positions
+
+    # --- Writes (called from the trading thread, non-blocking) ---
+
+    def put(self, symbol: str, position: dict):
+        with self._lock:
+            self._pending[symbol] = position
+        self._ensure_writer()
+
+    def delete(self, symbol: str):
+        with self._lock:
+            self._pending[symbol] = None
+        self._ensure_writer()
+
+    def compact(self, positions: dict):
+        """Replace the journal with a single snapshot line (applied by the writer thread)."""
+        with self._lock:
+            self._snapshot = positions
+            self._pending.clear()
+            self._lines = 0
+        self._ensure_writer()
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._lines >= self.COMPACT_EVERY
+
+    def flush(self):
+        """Write pending entries now (also used at shutdown)."""
+        with self._write_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            snapshot, self._snapshot = self._snapshot, None
+
+        try:
+            if snapshot is not None:
+                self._write_snapshot(snapshot)
+            if pending:
+                lines = [json.dumps({"op": "del", "symbol": s} if p is None else {"op": "put", "symbol": s, "position": p},
+                                    ensure_ascii=False, default=str) for s, p in pending.items()]
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._lines += len(lines)
+        except Exception as e:
+            with self._lock:
+                # Keep unwritten entries (newer updates win)
+                for s, p in pending.items():
+                    self._pending.setdefault(s, p)
+                if snapshot is not None and self._snapshot is None:
+                    self._snapshot = snapshot
+            self._failures += 1
+            self._retry_at = time.monotonic() + min(self.FLUSH_INTERVAL * 2 ** self._failures, self.RETRY_MAX)
+            if self._failures == 1:
+                logger.error(f"Failed to write position journal: {e} (retrying, backoff up to {self.RETRY_MAX:.0f}s)")
+            else:
+                logger.debug(f"Failed to write position journal (attempt {self._failures}): {e}")
+            self._wake.set() # Retried by the writer thread even if no position changes meanwhile
+            return
+        if self._failures:
+            logger.info(f"📒 Position journal written again after {self._failures} failed attempts")
+            self._failures = 0
+
+    def _write_snapshot(self, positions: dict):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "snapshot", "positions": positions}, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._lines = 1
+
+    def _ensure_writer(self):
+        self._wake.set()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._writer_loop, name="position-journal", daemon=True)
+            self._thread.start()
+
+    def _writer_loop(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.FLUSH_INTERVAL) # Batch everything that arrives in this window
+            if self._failures:
+                time.sleep(max(0.0, self._retry_at - time.monotonic())) # Backing off after a failed write
+            self._wake.clear()
+            self.flush()
+
+
+position_journal = PositionJournal()
+atexit.register(position_journal.flush)
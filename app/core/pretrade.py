@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import math
+import time
+from app.core.exit_rules import ExitRules, exit_rules
+
+logger = logging.getLogger(__name__)
+
+# Order API needs 4-char US exchange codes; quotes/selector use 3-char ones
+ORDER_EXCHANGE = {"NAS": "NASD", "NYS": "NYSE", "AMS": "AMEX"}
+
+# KRX tick size table (price below bound -> tick)
+KR_TICKS = ((2000, 1), (5000, 5), (20000, 10), (50000, 50), (200000, 100), (500000, 500))
+US_TICK = 0.01
+
+
+def kr_tick_size(price: float) -> int:
+    for bound, tick in KR_TICKS:
+        if price < bound:
+            return tick
+    return 1000
+
+
+def round_to_tick(price: float, market: str = "KR", up: bool = False) -> float:
+    """Round a price onto the market's tick grid (down by default, up for buy limits that must cross)."""
+    if price <= 0:
+        return 0
+    if market == "US":
+        cents = price / US_TICK
+        cents = math.ceil(cents - 1e-9) if up else math.floor(cents + 1e-9)
+        return round(cents * US_TICK, 2)
+    tick = kr_tick_size(price)
+    steps = math.ceil(price / tick - 1e-9) if up else math.floor(price / tick + 1e-9)
+    return steps * tick
+
+
+class SymbolPlan:
+    """Per-symbol order parameters worked out ahead of the signal."""
+    __slots__ = ("symbol", "market", "excg", "order_excg", "ref_price", "tick")
+
+    US_LIMIT_BUFFER = 1.01   # US buy limit = price + 1%
+    KR_UPPER_LIMIT = 1.3     # KR market buy reserves cash at the upper price limit (+30%)
+
+    def __init__(self, symbol: str, market: str, excg: str = "NAS", ref_price: float = 0.0):
+        self.symbol = symbol
+        self.market = market
+        self.excg = excg
+        self.order_excg = ORDER_EXCHANGE.get(excg, excg) if market == "US" else excg
+        self.ref_price = ref_price
+        self.tick = US_TICK if market == "US" else kr_tick_size(ref_price)
+
+    def buy_price(self, price: float) -> float:
+        """Order price: US limit at +1% on the tick grid, KR market order (0)."""
+        if self.market == "US":
+            return round_to_tick(price * self.US_LIMIT_BUFFER, "US", up=True)
+        return 0
+
+    def cash_per_share(self, price: float) -> float:
+        """Cash the broker reserves per share for the buy order."""
+        if self.market == "US":
+            return self.buy_price(price)
+        return round_to_tick(price * self.KR_UPPER_LIMIT, "KR")
+
+    def __repr__(self):
+        return f"SymbolPlan({self.symbol} {self.market}/{self.order_excg} tick={self.tick})"
+
+
+class PreTradeCache:
+    """
+    Keeps everything process_signals needs before a buy ready, so the path from
+    signal to order is the order request itself:
+    - buying power / equity (from the shared portfolio snapshot, applied via owner.update_balance)
+    - exit defaults (target / stop %) and per-market exit rules (trailing) from the strategy config
+    - per-symbol plans: order exchange code, tick size, limit / reserve price helpers
+    run() refreshes the account part every REFRESH_INTERVAL in the background.
+    """
+    REFRESH_INTERVAL = 5.0   # Seconds
+    MAX_AGE = 15.0           # Older than this -> refresh on the signal path
+
+    def __init__(self, owner):
+        self.owner = owner            # TradeManager (balances, positions)
+        self.plans = {}               # symbol -> SymbolPlan
+        self.exit_defaults = {"KR": (3.0, 2.0), "US": (3.0, 2.0)}  # market -> (target %, stop %)
+        self.exit_rules = {"KR": exit_rules, "US": exit_rules}     # market -> ExitRules
+        self.refreshed_at = 0.0
+        self._task = None
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.refreshed_at < self.MAX_AGE
+
+    async def refresh(self):
+        from app.core.portfolio import portfolio
+        from app.core.strategy_config import load_config
+
+        await portfolio.aget()      # REST only when the snapshot is stale / invalidated
+        self.owner.update_balance() # Served from the snapshot
+        config = load_config() # Re-read if run_sweep.py / a hand edit changed the file
+        for market, key in (("KR", "kr_parameters"), ("US", "us_parameters")):
+            params = config.get(key, {})
+            self.exit_defaults[market] = (float(params.get('target_profit_rate', 3.0)),
+                                          float(params.get('stop_loss_rate', 2.0)))
+            self.exit_rules[market] = ExitRules.from_params(params)
+        self.refreshed_at = time.monotonic()
+
+    def plan(self, symbol: str, market: str, excg: str = "NAS", price: float = 0.0) -> SymbolPlan:
+        """Cached plan for a symbol (rebuilt if the exchange or tick band changed)."""
+        plan = self.plans.get(symbol)
+        if plan is None or plan.market != market or plan.excg != excg or \
+                (market == "KR" and kr_tick_size(price) != plan.tick):
+            plan = self.plans[symbol] = SymbolPlan(symbol, market, excg, price)
+        return plan
+
+    def watch(self, stocks: list):
+        """Pre-build plans for candidates (e.g. pre-market picks, held positions)."""
+        for s in stocks:
+            market = s.get('market_type') or s.get('market', 'KR')
+            self.plan(s['symbol'], market, s.get('excg', 'NAS'), float(s.get('price') or s.get('buy_price') or 0))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+                self.watch([{"symbol": p.symbol, "market_type": p.market_type, "excg": p.excg, "price": p.buy_price}
+                            for p in self.owner.active_trades.positions()])
+            except Exception as e:
+                logger.error(f"Pre-trade refresh failed: {e}")
+            await asyncio.sleep(self.REFRESH_INTERVAL)
@@ -0,0 +1,100 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A scheduled call. deadline is a wall-clock timestamp (time.time())."""
+    __slots__ = ("name", "fn", "deadline", "seq", "cancelled")
+
+    def __init__(self, name: str, fn, deadline: float, seq: int):
+        self.name = name
+        self.fn = fn
+        self.deadline = deadline
+        self.seq = seq
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+    def __repr__(self):
+        return f"Job({self.name} @ {datetime.fromtimestamp(self.deadline).strftime('%H:%M:%S.%f')[:-3]})"
+
+
+class Scheduler:
+    """
+    Deadline scheduler: jobs sit in a min-heap by deadline and the loop sleeps until
+    the earliest one is due (woken early when an earlier job is added).
+    Due jobs are started as their own tasks, so a slow job never delays the next deadline.
+    Sleeps are capped at MAX_SLEEP so wall-clock adjustments (NTP, DST) are picked up.
+    """
+    MAX_SLEEP = 60.0
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._running = set()   # Job tasks in flight (keep references)
+        self.wakeups = 0
+        self.fired = 0
+
+    def call_at(self, when, fn, name: str = None) -> Job:
+        """Run async fn() at `when` (datetime or timestamp)."""
+        deadline = when.timestamp() if isinstance(when, datetime) else float(when)
+        job = Job(name or getattr(fn, "__name__", "job"), fn, deadline, next(self._seq))
+        heapq.heappush(self._heap, job)
+        if self._heap[0] is job:
+            self._wake.set() # New earliest deadline -> re-arm the sleep
+        return job
+
+    def call_later(self, delay: float, fn, name: str = None) -> Job:
+        return self.call_at(time.time() + max(0.0, delay), fn, name)
+
+    def cancel(self, job: Job):
+        job.cancelled = True # Lazily dropped when it reaches the top of the heap
+
+    def next_deadline(self):
+        self._drop_cancelled()
+        return self._heap[0].deadline if self._heap else None
+
+    def pending(self) -> list:
+        return sorted(j for j in self._heap if not j.cancelled)
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+
+    async def run(self):
+        """Fire jobs at their deadlines (never returns)."""
+        while True:
+            deadline = self.next_deadline()
+            delay = self.MAX_SLEEP if deadline is None else min(deadline - time.time(), self.MAX_SLEEP)
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeups += 1
+
+            now = time.time()
+            while self._heap and self._heap[0].deadline <= now:
+                job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                self.fired += 1
+                task = asyncio.create_task(self._fire(job), name=f"job-{job.name}")
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    @staticmethod
+    async def _fire(job: Job):
+        try:
+            await job.fn()
+        except Exception as e:
+            logger.error(f"Scheduled job {job.name} failed: {e}", exc_info=True)
@@ -0,0 +1,74 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Selector filtering / ranking stages shared by the live selector (app/core/selector.py)
+# and the walk-forward harness (app/core/walk_forward.py)
+
+# ETFs / ETNs / SPACs / derivatives products are never traded
+KR_EXCLUDE_KEYWORDS = ("KODEX", "TIGER", "KBSTAR", "SOL", "ACE", "HANARO", "KOSEF", "ARIRANG", "ETN",
+                       "스팩", "선물", "레버리지", "인버스")
+
+KR_RSI_MAX = 70            # RSI at or above -> overbought
+KR_MAX_DAILY_CHANGE = 15.0 # Daily change (%) at or above -> too late to chase
+MIN_AI_SCORE = 60          # AI score needed to become a buy candidate
+MAX_CANDIDATES = 30        # Sourcing limit per scan
+
+
+def is_excluded(name: str) -> bool:
+    return any(k in (name or "") for k in KR_EXCLUDE_KEYWORDS)
+
+
+def daily_change_pct(daily_data: list) -> float:
+    """Change (%) of the latest close vs the one before (KIS daily rows, newest first)."""
+    if len(daily_data) >= 2:
+        curr = float(daily_data[0]['stck_clpr'])
+        prev = float(daily_data[1]['stck_clpr'])
+        if prev > 0:
+            return ((curr - prev) / prev) * 100
+    return 0.0
+
+
+def kr_hard_filter(tech: dict, daily_change: float, budget: float = None):
+    """Reject reason for a KR candidate, or None if it goes on to AI scoring."""
+    if 'rsi' not in tech:
+        return "no_data" # Not enough history / analysis error
+    if tech['rsi'] >= KR_RSI_MAX:
+        return "rsi" # Overbought
+    if tech['trend'] == 'DOWN':
+        return "trend" # Downtrend
+    if daily_change >= KR_MAX_DAILY_CHANGE:
+        return "daily_change" # Too high
+    if budget and tech['close'] > budget:
+        return "budget"
+    return None
+
+
+def rank_candidates(jobs: list, results: dict, market: str = "KR", min_score: int = MIN_AI_SCORE) -> list:
+    """AI results -> buy candidates (score >= min_score), best first."""
+    selected = []
+    for job in jobs:
+        res = results.get(job['symbol'])
+        if not res:
+            continue
+        if not isinstance(res, dict):
+            logger.warning(f"AI returned invalid format for {job['symbol']}: {res}")
+            continue
+
+        strategy = res.get('strategy', {})
+        if not isinstance(strategy, dict):
+            strategy = {}
+
+        if res.get('score', 0) >= min_score:
+            selected.append({
+                "symbol": job['symbol'],
+                "name": job['name'],
+                "score": res['score'],
+                "reason": res.get('reason', 'N/A'),
+                "price": job['tech_summary']['close'],
+                "target": strategy.get('target_price'),
+                "stop_loss": strategy.get('stop_loss'),
+                "market": market
+            })
+    selected.sort(key=lambda x: x['score'], reverse=True)
+    return selected
@@ -1,6 +1,9 @@
 from app.core.kis_api import kis
 from app.core.ai_analyzer import ai_analyzer
 from app.core.technical_analysis import technical
+from app.core.state_store import state_store
+from app.core.instrumentation import timed, span
+from app.core.selection_rules import is_excluded, daily_change_pct, kr_hard_filter, rank_candidates, MAX_CANDIDATES
 import logging
 import asyncio
 import time
@@ -11,13 +14,12 @@ class Selector:
     def __init__(self):
         pass
 
+    @timed()
     async def select_pre_market_picks(self, market_type="KR", force=False):
         """
         Pre-Market Top 10 Selection (30 mins before open).
         Analyzes Market Context + News + Technicals to pick 10 promising stocks.
         """
-        import json
-        import os
         from datetime import datetime
         from app.core.technical_analysis import technical
         from app.core.market_analyst import market_analyst
@@ -28,15 +30,11 @@ class Selector:
         # Check if already done today
         today_str = datetime.now().strftime("%Y-%m-%d")
         
-        try:
-            if not force and os.path.exists(TOP_PICKS_FILE):
-                with open(TOP_PICKS_FILE, "r", encoding='utf-8') as f:
-                    data = json.load(f)
-                    if data.get("date") == today_str and data.get("market") == market_type:
-                        logger.info(f"Pre-Market Picks for {market_type} already exist.")
-                        return data.get("picks", [])
-        except Exception as e:
-            logger.error(f"Failed to load top picks: {e}")
+        if not force:
+            data = state_store.get(TOP_PICKS_FILE, {})
+            if data.get("date") == today_str and data.get("market") == market_type:
+                logger.info(f"Pre-Market Picks for {market_type} already exist.")
+                return data.get("picks", [])
 
         bot.send_message(f"🌅 [{market_type}] 장전 Top 10 유망 종목 분석 시작...")
         
@@ -44,12 +42,11 @@ class Selector:
         candidates = []
         if market_type == "KR":
             # KR: Use Volume Rank (Yesterday's Leaders)
-            raw_candidates = kis.get_volume_rank()
+            raw_candidates = await asyncio.to_thread(kis.get_volume_rank)
             if raw_candidates:
                 # Filter ETFs
-                exclusion_keywords = ["KODEX", "TIGER", "KBSTAR", "SOL", "ACE", "HANARO", "KOSEF", "ARIRANG", "ETN", "스팩", "선물", "레버리지", "인버스"]
                 for stock in raw_candidates:
-                    if not any(k in stock['hts_kor_isnm'] for k in exclusion_keywords):
+                    if not is_excluded(stock['hts_kor_isnm']):
                         candidates.append({
                             "symbol": stock['mksc_shrn_iscd'],
                             "name": stock['hts_kor_isnm'],
@@ -110,7 +107,7 @@ class Selector:
              pass
 
         # 1.5 Get Market Context
-        market_ctx = market_analyst.get_market_context_for_ai(market_type)
+        market_ctx = await asyncio.to_thread(market_analyst.get_market_context_for_ai, market_type)
         logger.info(f"Market Context for {market_type} Top 10: {market_ctx}")
         bot.send_message(f"🌍 시장 컨텍스트 분석: {market_ctx}")
 
@@ -144,69 +141,70 @@ class Selector:
             
             await asyncio.sleep(0.1)
             
-            try:
-                # 1. Get Daily Data (Unified call if possible, or split)
-                daily_data = []
-                if market_type == "KR":
-                     daily_data = kis.get_daily_price(symbol)
-                else:
-                     daily_data = kis.get_overseas_daily_price(symbol, excg)
-                
-                if not daily_data:
-                    logger.warning(f"No Daily Data for {name}")
-                    continue
-                
-                # Tech Analysis Prep
-                mapped_data = []
-                for d in daily_data:
+            with span("Selector.pre_market.prepare"):
+                try:
+                    # 1. Get Daily Data (Unified call if possible, or split)
+                    daily_data = []
                     if market_type == "KR":
-                        mapped_data.append(d) # KIS KR returns correct keys usually? Check utils.
-                        # Actually KIS KR keys are stck_clpr etc. check helper.
-                        # kis_api.get_daily_price returns list of dicts.
-                        # technical.analyze handles standard keys.
-                        # Let's ensure mapping is correct.
-                        # KR API returns: stck_bsop_date, stck_clpr, etc.
-                        # US API returns: xymd, clos, etc.
-                        pass 
+                         daily_data = await asyncio.to_thread(kis.get_daily_price, symbol)
                     else:
-                        # US Mapping
-                        mapped_data.append({
-                            "stck_bsop_date": d['xymd'],
-                            "stck_clpr": d['clos'],
-                            "stck_oprc": d['open'],
-                            "stck_hgpr": d['high'],
-                            "stck_lwpr": d['low'],
-                            "acml_vol": d['tvol']
-                        })
+                         daily_data = await asyncio.to_thread(kis.get_overseas_daily_price, symbol, excg)
                 
-                if market_type == "KR":
-                     mapped_data = daily_data # Assuming get_daily_price returns standard keys compatible with technical
+                    if not daily_data:
+                        logger.warning(f"No Daily Data for {name}")
+                        continue
                 
-                # 2. Tech Analysis
-                tech_summary = technical.analyze(mapped_data)
+                    # Tech Analysis Prep
+                    mapped_data = []
+                    for d in daily_data:
+                        if market_type == "KR":
+                            mapped_data.append(d) # KIS KR returns correct keys usually? Check utils.
+                            # Actually KIS KR keys are stck_clpr etc. check helper.
+                            # kis_api.get_daily_price returns list of dicts.
+                            # technical.analyze handles standard keys.
+                            # Let's ensure mapping is correct.
+                            # KR API returns: stck_bsop_date, stck_clpr, etc.
+                            # US API returns: xymd, clos, etc.
+                            pass 
+                        else:
+                            # US Mapping
+                            mapped_data.append({
+                                "stck_bsop_date": d['xymd'],
+                                "stck_clpr": d['clos'],
+                                "stck_oprc": d['open'],
+                                "stck_hgpr": d['high'],
+                                "stck_lwpr": d['low'],
+                                "acml_vol": d['tvol']
+                            })
                 
-                # Daily Change
-                daily_change = 0.0
-                if len(daily_data) >= 2:
-                    c = float(daily_data[0]['stck_clpr']) if market_type == "KR" else float(daily_data[0]['clos'])
-                    p = float(daily_data[1]['stck_clpr']) if market_type == "KR" else float(daily_data[1]['clos'])
-                    if p > 0: daily_change = ((c - p) / p) * 100
+                    if market_type == "KR":
+                         mapped_data = daily_data # Assuming get_daily_price returns standard keys compatible with technical
                 
-                # 3. Add to Job (No Filter)
-                analysis_jobs.append({
-                    "symbol": symbol,
-                    "name": name,
-                    "excg": excg,
-                    "tech_summary": {
-                        **tech_summary,
-                        "daily_change": daily_change
-                    },
-                    "news_titles": [] 
-                })
+                    # 2. Tech Analysis
+                    tech_summary = technical.analyze(mapped_data)
+                
+                    # Daily Change
+                    daily_change = 0.0
+                    if len(daily_data) >= 2:
+                        c = float(daily_data[0]['stck_clpr']) if market_type == "KR" else float(daily_data[0]['clos'])
+                        p = float(daily_data[1]['stck_clpr']) if market_type == "KR" else float(daily_data[1]['clos'])
+                        if p > 0: daily_change = ((c - p) / p) * 100
+                
+                    # 3. Add to Job (No Filter)
+                    analysis_jobs.append({
+                        "symbol": symbol,
+                        "name": name,
+                        "excg": excg,
+                        "tech_summary": {
+                            **tech_summary,
+                            "daily_change": daily_change
+                        },
+                        "news_titles": [] 
+                    })
                 
-            except Exception as e:
-                logger.error(f"Error preparing {name}: {e}")
-                continue
+                except Exception as e:
+                    logger.error(f"Error preparing {name}: {e}")
+                    continue
 
         logger.info(f"Data collected. Analyzing {len(analysis_jobs)} stocks...")
         bot.send_message(f"🔬 데이터 수집 완료. Hot Trend 심층 분석 중... ({len(analysis_jobs)}개)")
@@ -254,16 +252,11 @@ class Selector:
         top_10 = scored_candidates[:10]
         
         # 4. Save to File
-        try:
-            os.makedirs("app/data", exist_ok=True)
-            with open(TOP_PICKS_FILE, "w", encoding='utf-8') as f:
-                json.dump({
-                    "date": today_str,
-                    "market": market_type,
-                    "picks": top_10
-                }, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save top picks: {e}")
+        state_store.set(TOP_PICKS_FILE, {
+            "date": today_str,
+            "market": market_type,
+            "picks": top_10
+        }, indent=2)
             
         # 5. Report
         if top_10:
@@ -284,6 +277,7 @@ class Selector:
     # So we MUST NOT delete `_analyze_single_stock`.
     # But for `select_pre_market_picks`, we have fully replaced the loop.
     
+    @timed()
     async def _analyze_single_stock(self, stock, market_type, market_ctx="Neutral"):
         """Helper for parallel processing"""
         symbol = stock['symbol']
@@ -387,6 +381,7 @@ class Selector:
             return None
         return None
 
+    @timed()
     async def select_stocks_kr(self, budget=None, target_count=3):
         """
         [Stock Selection v2] KR Market Selection Pipeline
@@ -395,14 +390,12 @@ class Selector:
         from app.core.technical_analysis import technical
         from app.core.market_analyst import market_analyst
         from app.core.telegram_bot import bot
-        import json
-        import os
         from datetime import datetime
 
         start_time = time.time()
         
         # 1. Market Context
-        market_ctx = market_analyst.get_market_context_for_ai("KR")
+        market_ctx = await asyncio.to_thread(market_analyst.get_market_context_for_ai, "KR")
         logger.info(f"[KR] Market Context: {market_ctx}")
 
         # 2. Sourcing (Priorities)
@@ -412,21 +405,19 @@ class Selector:
         # Priority 1: Top 10 Picks (Pre-Market)
         top_picks_path = "app/data/top_picks_KR.json"
         try:
-            if os.path.exists(top_picks_path):
-                with open(top_picks_path, "r", encoding='utf-8') as f:
-                    data = json.load(f)
-                    if data.get("date") == datetime.now().strftime("%Y-%m-%d"):
-                        for p in data.get("picks", []):
-                            if p['ticker'] not in existing_symbols:
-                                candidates.append({
-                                    'symbol': p['ticker'],
-                                    'name': p['stock_name'],
-                                    'priority': 1,
-                                    'source': 'Top 10',
-                                    'reason': p.get('selection_reason', '')
-                                })
-                                existing_symbols.add(p['ticker'])
-                        logger.info(f"[KR] Loaded {len(candidates)} Top 10 picks.")
+            data = state_store.get(top_picks_path, {})
+            if data.get("date") == datetime.now().strftime("%Y-%m-%d"):
+                for p in data.get("picks", []):
+                    if p['ticker'] not in existing_symbols:
+                        candidates.append({
+                            'symbol': p['ticker'],
+                            'name': p['stock_name'],
+                            'priority': 1,
+                            'source': 'Top 10',
+                            'reason': p.get('selection_reason', '')
+                        })
+                        existing_symbols.add(p['ticker'])
+                logger.info(f"[KR] Loaded {len(candidates)} Top 10 picks.")
         except Exception as e:
             logger.error(f"Failed to load KR Top 10: {e}")
 
@@ -445,13 +436,12 @@ class Selector:
                 existing_symbols.add(code)
 
         # Priority 3: Volume Spike (KIS API)
-        vol_rank = kis.get_volume_rank()
+        vol_rank = await asyncio.to_thread(kis.get_volume_rank)
         if vol_rank:
-            exclusion = ["KODEX", "TIGER", "KBSTAR", "SOL", "ACE", "HANARO", "KOSEF", "ARIRANG", "ETN", "스팩", "선물", "레버리지", "인버스"]
             for s in vol_rank:
                 sym = s['mksc_shrn_iscd']
                 nm = s['hts_kor_isnm']
-                if sym not in existing_symbols and not any(ex in nm for ex in exclusion):
+                if sym not in existing_symbols and not is_excluded(nm):
                     candidates.append({
                         'symbol': sym,
                         'name': nm,
@@ -459,7 +449,7 @@ class Selector:
                         'source': 'Volume'
                     })
                     existing_symbols.add(sym)
-                    if len(candidates) >= 30: break # Limit Total Candidates
+                    if len(candidates) >= MAX_CANDIDATES: break # Limit Total Candidates
         
         logger.info(f"[KR] Sourcing Complete. Total Candidates: {len(candidates)}")
         bot.send_message(f"🔍 [KR] 종목 발굴: {len(candidates)}개 (Top10/Trend/Volume)")
@@ -472,69 +462,36 @@ class Selector:
             batch = candidates[i : i + BATCH_SIZE]
             analysis_jobs = []
             
-            for stock in batch:
-                symbol = stock['symbol']
-                name = stock['name']
-                
-                # Data & Tech
-                daily_data = kis.get_daily_price(symbol)
-                if not daily_data: continue
+            with span("Selector.kr_batch"):
+                for stock in batch:
+                    symbol = stock['symbol']
+                    name = stock['name']
                 
-                tech = technical.analyze(daily_data)
+                    # Data & Tech
+                    daily_data = await asyncio.to_thread(kis.get_daily_price, symbol)
+                    if not daily_data: continue
                 
-                # --- Hard Filters (KR) ---
-                if tech['rsi'] >= 70: continue # Overbought
-                if tech['trend'] == 'DOWN': continue # Downtrend
-                
-                # Daily Change Calculation
-                daily_change = 0.0
-                if len(daily_data) >= 2:
-                    curr = float(daily_data[0]['stck_clpr'])
-                    prev = float(daily_data[1]['stck_clpr'])
-                    if prev > 0: daily_change = ((curr - prev) / prev) * 100
-                    
-                if daily_change >= 15.0: continue # Too high
+                    tech = technical.analyze(daily_data)
                 
-                # Check Budget
-                if budget and tech['close'] > budget: continue
+                    # --- Hard Filters (KR, app/core/selection_rules.py) ---
+                    daily_change = daily_change_pct(daily_data)
+                    if kr_hard_filter(tech, daily_change, budget):
+                        continue
                 
-                # Pass to AI
-                analysis_jobs.append({
-                    "symbol": symbol,
-                    "name": name,
-                    "tech_summary": {**tech, "daily_change": daily_change},
-                    "news_titles": [], # Optimization: Fetch news only for high priority or just pass title from source?
-                    "market_status": market_ctx
-                })
+                    # Pass to AI
+                    analysis_jobs.append({
+                        "symbol": symbol,
+                        "name": name,
+                        "tech_summary": {**tech, "daily_change": daily_change},
+                        "news_titles": [], # Optimization: Fetch news only for high priority or just pass title from source?
+                        "market_status": market_ctx
+                    })
 
             if not analysis_jobs: continue
 
             # AI Scoring
             results = await ai_analyzer.analyze_stocks_batch(analysis_jobs)
-            
-            for job in analysis_jobs:
-                res = results.get(job['symbol'])
-                
-                # Validation
-                if res and not isinstance(res, dict):
-                     logger.warning(f"AI returned invalid format for {job['symbol']}: {res}")
-                     continue
-
-                strategy = res.get('strategy', {})
-                if not isinstance(strategy, dict):
-                    strategy = {}
-
-                if res and res.get('score', 0) >= 60:
-                    final_selected.append({
-                        "symbol": job['symbol'],
-                        "name": job['name'],
-                        "score": res['score'],
-                        "reason": res.get('reason', 'N/A'),
-                        "price": job['tech_summary']['close'],
-                        "target": strategy.get('target_price'),
-                        "stop_loss": strategy.get('stop_loss'),
-                        "market": "KR"
-                    })
+            final_selected.extend(rank_candidates(analysis_jobs, results, "KR"))
 
             if len(final_selected) >= target_count: break
             
@@ -555,6 +512,7 @@ class Selector:
         # Let's route to select_stocks_kr.
         return await self.select_stocks_kr(budget, target_count)
 
+    @timed()
     async def select_us_stocks(self, budget=None):
         """
         Stock Selection for US Market (Async Wrapper).
@@ -565,28 +523,21 @@ class Selector:
 
         start_time = time.time()
         
-        market_ctx = market_analyst.get_market_context_for_ai("US")
+        market_ctx = await asyncio.to_thread(market_analyst.get_market_context_for_ai, "US")
         logger.info(f"US Market Context: {market_ctx}")
         
         logger.info(f"Starting US stock selection (Budget: {budget if budget else 'N/A'} USD)...")
         
-        import json
-        import os
         from datetime import datetime
         TOP_PICKS_FILE = "app/data/top_picks_US.json"
         pre_market_picks = []
         
-        try:
-            if os.path.exists(TOP_PICKS_FILE):
-                with open(TOP_PICKS_FILE, "r", encoding='utf-8') as f:
-                    data = json.load(f)
-                    today_str = datetime.now().strftime("%Y-%m-%d")
-                    if data.get("date") == today_str and data.get("market") == "US":
-                        pre_market_picks = data.get("picks", [])
-                        logger.info(f"Loaded {len(pre_market_picks)} Pre-Market Picks for US.")
-                        bot.send_message(f"📂 장전 Top 10 종목 {len(pre_market_picks)}개를 후보에 추가합니다.")
-        except Exception as e:
-            logger.error(f"Failed to load top picks: {e}")
+        data = state_store.get(TOP_PICKS_FILE, {})
+        today_str = datetime.now().strftime("%Y-%m-%d")
+        if data.get("date") == today_str and data.get("market") == "US":
+            pre_market_picks = data.get("picks", [])
+            logger.info(f"Loaded {len(pre_market_picks)} Pre-Market Picks for US.")
+            bot.send_message(f"📂 장전 Top 10 종목 {len(pre_market_picks)}개를 후보에 추가합니다.")
 
         us_candidates = []
         
@@ -699,54 +650,55 @@ class Selector:
             
             await asyncio.sleep(0.1)
             
-            try:
-                # 1. Get Daily Data
-                daily_data = kis.get_overseas_daily_price(symbol, excg)
-                if not daily_data:
-                    logger.warning(f"No Daily Data for {name} ({excg})")
-                    continue
+            with span("Selector.us.prepare"):
+                try:
+                    # 1. Get Daily Data
+                    daily_data = await asyncio.to_thread(kis.get_overseas_daily_price, symbol, excg)
+                    if not daily_data:
+                        logger.warning(f"No Daily Data for {name} ({excg})")
+                        continue
                     
-                current_price = float(daily_data[0]['clos'])
-                # strict budget check moved to trading, but simple check helps
-                # if budget and current_price > budget: continue 
+                    current_price = float(daily_data[0]['clos'])
+                    # strict budget check moved to trading, but simple check helps
+                    # if budget and current_price > budget: continue 
                     
-                mapped_data = []
-                for d in daily_data:
-                    mapped_data.append({
-                        "stck_bsop_date": d['xymd'],
-                        "stck_clpr": d['clos'],
-                        "stck_oprc": d['open'],
-                        "stck_hgpr": d['high'],
-                        "stck_lwpr": d['low'],
-                        "acml_vol": d['tvol']
-                    })
+                    mapped_data = []
+                    for d in daily_data:
+                        mapped_data.append({
+                            "stck_bsop_date": d['xymd'],
+                            "stck_clpr": d['clos'],
+                            "stck_oprc": d['open'],
+                            "stck_hgpr": d['high'],
+                            "stck_lwpr": d['low'],
+                            "acml_vol": d['tvol']
+                        })
                 
-                # 2. Tech Analysis
-                tech_summary = technical.analyze(mapped_data)
+                    # 2. Tech Analysis
+                    tech_summary = technical.analyze(mapped_data)
                 
-                # Check Daily Change (For AI Context)
-                daily_change = 0.0
-                if len(daily_data) >= 2:
-                     curr = float(daily_data[0]['clos'])
-                     prev = float(daily_data[1]['clos'])
-                     if prev > 0: daily_change = ((curr - prev) / prev) * 100
+                    # Check Daily Change (For AI Context)
+                    daily_change = 0.0
+                    if len(daily_data) >= 2:
+                         curr = float(daily_data[0]['clos'])
+                         prev = float(daily_data[1]['clos'])
+                         if prev > 0: daily_change = ((curr - prev) / prev) * 100
                 
-                # NO FILTERS FOR HOT TRENDS (Pass Everything)
-
-                # 4. Prepare Job
-                analysis_jobs.append({
-                    "symbol": symbol,
-                    "name": name,
-                    "excg": excg,
-                    "tech_summary": {
-                        **tech_summary,
-                        "daily_change": daily_change
-                    },
-                    "news_titles": [] 
-                })
-            except Exception as e:
-                logger.error(f"Error processing {name} in Top 10: {e}")
-                continue
+                    # NO FILTERS FOR HOT TRENDS (Pass Everything)
+
+                    # 4. Prepare Job
+                    analysis_jobs.append({
+                        "symbol": symbol,
+                        "name": name,
+                        "excg": excg,
+                        "tech_summary": {
+                            **tech_summary,
+                            "daily_change": daily_change
+                        },
+                        "news_titles": [] 
+                    })
+                except Exception as e:
+                    logger.error(f"Error processing {name} in Top 10: {e}")
+                    continue
             
         logger.info(f"US Data collected. Analyzing...")
 
@@ -793,16 +745,11 @@ class Selector:
         top_10 = scored_candidates[:10]
         
         # 4. Save
-        try:
-            os.makedirs("app/data", exist_ok=True)
-            with open(TOP_PICKS_FILE, "w", encoding='utf-8') as f:
-                json.dump({
-                    "date": today_str,
-                    "market": "US",
-                    "picks": top_10
-                }, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save top picks: {e}")
+        state_store.set(TOP_PICKS_FILE, {
+            "date": today_str,
+            "market": "US",
+            "picks": top_10
+        }, indent=2)
             
         # 5. Report
         if top_10:
@@ -815,6 +762,7 @@ class Selector:
         
         return top_10
 
+    @timed()
     async def assess_risk(self, symbol: str, current_price: float, buy_price: float, daily_data: list, news_titles: list) -> dict:
         """
         Assess risk for a losing position using AI (Async).
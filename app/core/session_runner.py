@@ -0,0 +1,231 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from app.core.market_calendar import market_calendar
+from app.core.scheduler import Scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class Duty:
+    """
+    One recurring job of a market session (scan, monitor, risk check, liquidation, report).
+    fn: async callable(now). window: (start, end) anchors it may run in (None = whole session).
+    An anchor is ("open" | "close", minutes offset) on the exchange calendar's trading day.
+    once: run until it succeeds once per session (fn returning False means "not done, retry").
+    """
+    def __init__(self, name: str, fn, interval: float, window: tuple = None, once: bool = False):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.window = window
+        self.once = once
+        self.done_session = None     # Session id the once-duty completed in
+        self.last_run = None
+        self.last_duration_ms = 0.0
+        self.runs = 0
+        self.failures = 0            # Consecutive failures (drives the backoff)
+        self.last_error = None
+        self.job = None              # Pending scheduler Job
+
+    def to_dict(self, session_id=None) -> dict:
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": self.last_run.strftime("%H:%M:%S") if self.last_run else None,
+            "last_duration_ms": round(self.last_duration_ms, 1),
+            "last_error": self.last_error,
+            "done": self.once and self.done_session is not None and self.done_session == session_id
+        }
+
+
+class MarketSession:
+    """
+    A market's trading window and its duties, laid out on the exchange calendar
+    (app/core/market_calendar.py): start/end are anchors around each trading day's
+    open/close, so holidays, half days and US DST move the whole schedule.
+    gate(now) -> (ok, reason): market switched on / no circuit breaker; duties wait while it is closed.
+    on_new_session(session_id): reset per-session flags when a new trading day starts.
+    on_error(duty, exc): market-level reaction to a failure (e.g. holiday circuit breaker).
+    The session id is the exchange trading date (a US session crossing midnight KST keeps its US date).
+    """
+    def __init__(self, market: str, start, end, calendar=None, gate=None, on_new_session=None, on_error=None):
+        self.market = market
+        self.start = start
+        self.end = end
+        self.calendar = calendar or market_calendar
+        self.gate = gate
+        self.on_new_session = on_new_session
+        self.on_error = on_error
+        self.duties = {}
+        self.session_id = None
+        self.day = None              # Current TradingDay
+        self._closed_reason = None
+
+    def add(self, name: str, fn, interval: float, window: tuple = None, once: bool = False) -> Duty:
+        duty = self.duties[name] = Duty(name, fn, interval, window, once)
+        return duty
+
+    def bounds(self, day, window: tuple = None):
+        start, end = window or (self.start, self.end)
+        return day.at(start), day.at(end)
+
+    def days_from(self, now: datetime):
+        """Trading days whose session may still contain `now` or come after it."""
+        return self.calendar.days_from(self.market, (now - timedelta(days=1)).date())
+
+    def day_at(self, now: datetime):
+        """TradingDay whose session window contains now (None outside sessions / on closed days)."""
+        for day in self.days_from(now):
+            start, end = self.bounds(day)
+            if end < now:
+                continue
+            return day if start <= now else None
+        return None
+
+    def in_session(self, now: datetime) -> bool:
+        return self.day_at(now) is not None
+
+    def enter(self, now: datetime) -> bool:
+        """Track session changes and the market gate. Returns True if duties may run now."""
+        day = self.day_at(now)
+        if day is None:
+            return False
+        if day.date != self.session_id:
+            self.session_id = day.date
+            self.day = day
+            logger.info(f"📅 [{self.market}] New session {day}")
+            if self.on_new_session:
+                self.on_new_session(day.date)
+        if self.gate is None:
+            return True
+        ok, reason = self.gate(now)
+        if not ok and reason != self._closed_reason:
+            logger.info(f"💤 [{self.market}] Duties on hold: {reason}")
+        elif ok and self._closed_reason:
+            logger.info(f"▶️ [{self.market}] Duties resumed")
+        self._closed_reason = None if ok else reason
+        return ok
+
+
+class SessionRunner:
+    """
+    Runs every duty of every market session on one deadline scheduler (app/core/scheduler.py):
+    - each duty is parked until its next deadline (window start, last run + interval,
+      next session) instead of polling the clock, so an idle bot wakes only when work is due
+    - duties are started as independent tasks, so a slow duty never delays another
+    - a failing duty backs off exponentially (BACKOFF_BASE .. BACKOFF_MAX)
+    - while paused / the market is gated, duties re-check every PAUSE_RECHECK / GATE_RECHECK
+      seconds, or immediately when wake() is called (dashboard resume / market switch)
+    """
+    PAUSE_RECHECK = 5.0
+    GATE_RECHECK = 30.0
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+
+    def __init__(self, paused=None, notify=None, scheduler: Scheduler = None):
+        self.sessions = {}
+        self.paused = paused or (lambda: False)   # Global pause (dashboard)
+        self.notify = notify                      # Callable(msg) for failure alerts (Telegram)
+        self.scheduler = scheduler or Scheduler()
+        self._parked = set()                      # (market, duty) waiting on pause / gate
+
+    def add_session(self, session: MarketSession) -> MarketSession:
+        self.sessions[session.market] = session
+        return session
+
+    def status(self) -> dict:
+        out = {}
+        for market, session in self.sessions.items():
+            duties = {}
+            for name, d in session.duties.items():
+                duties[name] = d.to_dict(session.session_id)
+                duties[name]["next_run"] = datetime.fromtimestamp(d.job.deadline).strftime("%m-%d %H:%M:%S") \
+                    if d.job is not None and not d.job.cancelled else None
+            out[market] = {
+                "session": str(session.session_id) if session.session_id else None,
+                "on_hold": session._closed_reason,
+                "duties": duties
+            }
+        return out
+
+    async def run(self):
+        """Schedule all duties and run the scheduler (never returns)."""
+        now = datetime.now()
+        for session in self.sessions.values():
+            for duty in session.duties.values():
+                self._schedule(session, duty, now)
+        await self.scheduler.run()
+
+    def wake(self):
+        """Re-check parked duties now (pause lifted / market switched on)."""
+        for market, name in list(self._parked):
+            session = self.sessions[market]
+            self._schedule(session, session.duties[name], datetime.now())
+
+    def _schedule(self, session: MarketSession, duty: Duty, when: datetime):
+        if duty.job is not None:
+            self.scheduler.cancel(duty.job)
+        self._parked.discard((session.market, duty.name))
+
+        async def fire():
+            await self._run_duty(session, duty)
+        duty.job = self.scheduler.call_at(when, fire, name=f"{session.market}-{duty.name}")
+
+    def _park(self, session: MarketSession, duty: Duty, now: datetime, delay: float):
+        self._schedule(session, duty, now + timedelta(seconds=delay))
+        self._parked.add((session.market, duty.name))
+
+    def next_run(self, session: MarketSession, duty: Duty, after: datetime) -> datetime:
+        """First time at or after `after` when the duty is due (inside its window on a trading day, not done)."""
+        for day in session.days_from(after):
+            start, end = session.bounds(day, duty.window)
+            if end < after or (duty.once and duty.done_session == day.date):
+                continue
+            return max(start, after)
+        return after + timedelta(days=1) # No trading day within the calendar horizon: look again tomorrow
+
+    async def _run_duty(self, session: MarketSession, duty: Duty):
+        now = datetime.now()
+        duty.job = None
+        try:
+            if self.paused():
+                return self._park(session, duty, now, self.PAUSE_RECHECK)
+            due = self.next_run(session, duty, now)
+            if due > now: # Woke early (clock adjusted / rescheduled): wait for the real deadline
+                return self._schedule(session, duty, due)
+            if not session.enter(now):
+                return self._park(session, duty, now, self.GATE_RECHECK)
+        except Exception as e:
+            logger.error(f"Duty [{session.market}] {duty.name} scheduling failed: {e}", exc_info=True)
+            return self._schedule(session, duty, now + timedelta(seconds=self.BACKOFF_MAX))
+
+        start = time.perf_counter()
+        try:
+            result = await duty.fn(now)
+        except Exception as e:
+            duty.failures += 1
+            duty.last_error = str(e)
+            backoff = min(self.BACKOFF_BASE * 2 ** (duty.failures - 1), self.BACKOFF_MAX)
+            logger.error(f"Duty [{session.market}] {duty.name} failed ({duty.failures}x, retry in {backoff:.0f}s): {e}",
+                         exc_info=True)
+            if session.on_error:
+                session.on_error(duty, e)
+            if duty.failures == 1 and self.notify:
+                try:
+                    self.notify(f"🚨 [{session.market}] {duty.name} 오류 (자동 재시도): {e}")
+                except Exception:
+                    pass
+            return self._schedule(session, duty, self.next_run(session, duty, now + timedelta(seconds=backoff)))
+
+        duty.runs += 1
+        duty.failures = 0
+        duty.last_error = None
+        duty.last_run = now
+        duty.last_duration_ms = (time.perf_counter() - start) * 1000
+        if duty.once and result is not False:
+            duty.done_session = session.session_id
+        # Next deadline counts from the scheduled start, so the cadence does not drift by the run time
+        self._schedule(session, duty, self.next_run(session, duty, max(now + timedelta(seconds=duty.interval),
+                                                                       datetime.now())))
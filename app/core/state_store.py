@@ -0,0 +1,177 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class StateStore:
+    """
+    Shared JSON persistence for small state files (trading_state.json, strategy_config.json,
+    kis_token_v2.json, exchange_rate.json, app/data/top_picks_*.json).
+    - Reads are served from an in-memory copy. At most once per STAT_INTERVAL per file, the
+      file's mtime / size is checked and it is re-read if it changed on disk (edits by hand or
+      by other processes such as run_sweep.py), unless a write of ours is still pending - then
+      the memory copy wins. invalidate(path) forces a re-read on the next get().
+    - Writes update the memory copy immediately and are flushed by a writer thread:
+      bursts within DEBOUNCE seconds collapse into one write per file. A failed write is
+      retried with a growing delay (up to RETRY_MAX) and logged once per failure streak.
+    - Files are written to a temp file, fsynced and renamed over the target, so a crash
+      never leaves a half-written JSON file.
+    get()/set() hand out and store deep copies, so callers can mutate their data freely.
+    """
+    DEBOUNCE = 0.2   # Seconds to wait for more writes before flushing
+    STAT_INTERVAL = 1.0  # Seconds between on-disk change checks of a file
+    RETRY_MAX = 30.0     # Longest delay between retries of a failing write
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Serializes flushes (writer thread / atexit)
+        self._wake = threading.Event()
+        self._cache = {}     # path -> data (or _MISSING)
+        self._stamps = {}    # path -> (mtime_ns, size) of the file the memory copy matches
+        self._checked = {}   # path -> monotonic time of the last on-disk change check
+        self._failures = {}  # path -> (failed attempts in a row, monotonic time of the next retry)
+        self._pending = {}   # path -> indent of files waiting to be written
+        self._thread = None
+
+    # --- Reads ---
+
+    def get(self, path: str, default=None):
+        """Current contents of `path` (memory copy), or `default` if missing / unreadable."""
+        with self._lock:
+            data = self._current(path)
+            return default if data is _MISSING else copy.deepcopy(data)
+
+    def invalidate(self, path: str = None):
+        """Drop the memory copy of `path` (all files if None) so the next read comes from disk."""
+        with self._lock:
+            for p in ([path] if path else list(self._cache)):
+                if p not in self._pending:
+                    self._cache.pop(p, None)
+                    self._stamps.pop(p, None)
+
+    def _current(self, path: str):
+        """Memory copy, (re)loaded if missing or changed on disk. Caller holds _lock."""
+        if path in self._pending:
+            return self._cache[path]
+        now = time.monotonic()
+        if path in self._cache and now - self._checked.get(path, 0.0) < self.STAT_INTERVAL:
+            return self._cache[path]
+        self._checked[path] = now
+        stamp = self._stat(path)
+        if path not in self._cache or stamp != self._stamps.get(path):
+            self._cache[path] = self._load(path)
+            self._stamps[path] = stamp
+        return self._cache[path]
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    @staticmethod
+    def _load(path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return _MISSING
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Failed to read {path}: {e}")
+            return _MISSING
+
+    # --- Writes (non-blocking) ---
+
+    def set(self, path: str, data, indent: int = None):
+        """Replace the contents of `path`. Visible to get() at once, written to disk shortly after."""
+        with self._lock:
+            self._cache[path] = copy.deepcopy(data)
+            self._pending[path] = indent
+        self._ensure_writer()
+
+    def update(self, path: str, fn, default=None, indent: int = None):
+        """Read-modify-write under the store lock: data = fn(current or default). Returns the new data."""
+        with self._lock:
+            current = self._current(path)
+            data = fn(copy.deepcopy(default) if current is _MISSING else copy.deepcopy(current))
+            self._cache[path] = copy.deepcopy(data)
+            self._pending[path] = indent
+        self._ensure_writer()
+        return data
+
+    def flush(self, due_only: bool = False):
+        """Write pending files now (also used at shutdown). due_only: skip failing files still backing off."""
+        with self._write_lock:
+            with self._lock:
+                now = time.monotonic()
+                pending = {path: indent for path, indent in self._pending.items()
+                           if not due_only or self._failures.get(path, (0, 0.0))[1] <= now}
+                for path in pending:
+                    del self._pending[path]
+                snapshot = {path: self._cache[path] for path in pending}
+
+            for path, indent in pending.items():
+                try:
+                    self._write(path, snapshot[path], indent)
+                    with self._lock:
+                        if path not in self._pending:
+                            self._stamps[path] = self._stat(path) # Our own write is not an external change
+                        streak = self._failures.pop(path, None)
+                    if streak:
+                        logger.info(f"💾 {path} written again after {streak[0]} failed attempts")
+                except Exception as e:
+                    with self._lock:
+                        self._pending.setdefault(path, indent) # Retried by the writer thread
+                        failures = self._failures.get(path, (0, 0.0))[0] + 1
+                        delay = min(self.DEBOUNCE * 2 ** failures, self.RETRY_MAX)
+                        self._failures[path] = (failures, time.monotonic() + delay)
+                    if failures == 1:
+                        logger.error(f"Failed to write {path}: {e} (retrying, backoff up to {self.RETRY_MAX:.0f}s)")
+                    else:
+                        logger.debug(f"Failed to write {path} (attempt {failures}): {e}")
+
+    @staticmethod
+    def _write(path: str, data, indent: int = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _ensure_writer(self):
+        self._wake.set()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._writer_loop, name="state-store", daemon=True)
+            self._thread.start()
+
+    def _retry_in(self):
+        """Seconds until the next failed write is due (None if nothing is failing)."""
+        with self._lock:
+            if not self._failures:
+                return None
+            return max(0.0, min(at for _, at in self._failures.values()) - time.monotonic())
+
+    def _writer_loop(self):
+        while True:
+            self._wake.wait(self._retry_in())
+            time.sleep(self.DEBOUNCE) # Collapse bursts into one write
+            self._wake.clear()
+            self.flush(due_only=True)
+
+
+state_store = StateStore()
+atexit.register(state_store.flush)
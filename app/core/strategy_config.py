@@ -0,0 +1,36 @@
+import logging
+from datetime import datetime
+from app.core.state_store import state_store
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = "strategy_config.json"
+
+
+def load_config() -> dict:
+    """strategy_config.json (re-read when another process such as run_sweep.py changed it)."""
+    return state_store.get(CONFIG_FILE, {})
+
+
+def save_config(config: dict):
+    state_store.set(CONFIG_FILE, config, indent=4)
+    logger.info("Strategy Config Updated.")
+
+
+def market_key(market_type: str) -> str:
+    return "kr_parameters" if market_type == "KR" else "us_parameters"
+
+
+def apply_sweep(market_type: str, params: dict, metrics: dict) -> dict:
+    """
+    Write backtest sweep results (app/core/param_sweep.py) as the market's parameters.
+    No AI client involved, so the run_sweep.py CLI can use it without OPENAI_API_KEY; the running
+    bot picks the file up on its next read (PreTradeCache refresh / optimizer run).
+    """
+    config = load_config()
+    key = market_key(market_type)
+    config.setdefault(key, {}).update(params)
+    config[key]["sweep_metrics"] = {k: metrics[k] for k in ("return_pct", "max_drawdown_pct", "win_rate", "trades")}
+    config["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    save_config(config)
+    return config[key]
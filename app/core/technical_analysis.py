@@ -1,5 +1,7 @@
 import pandas as pd
+import numpy as np
 import logging
+from app.core.instrumentation import timed
 
 logger = logging.getLogger(__name__)
 
@@ -7,6 +9,7 @@ class TechnicalAnalyzer:
     def __init__(self):
         pass
 
+    @timed()
     def analyze(self, daily_data: list, target_date: str = None) -> dict:
         """
         Calculate technical indicators from daily data.
@@ -79,4 +82,27 @@ class TechnicalAnalyzer:
             logger.error(f"Technical Analysis Error: {e}")
             return {"status": "Error"}
 
+    @timed()
+    def analyze_arrays(self, close, high, low) -> dict:
+        """
+        Same indicators as analyze() from ascending numpy columns (e.g. app/core/pit_data.py views),
+        without building a DataFrame. Used by backtests that evaluate many (symbol, day) pairs.
+        """
+        if len(close) < 20:
+            return {"status": "Not enough data"}
+
+        delta = np.diff(close[-15:])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.where(delta > 0, delta, 0).mean() / np.where(delta < 0, -delta, 0).mean()
+            rsi = 100 - (100 / (1 + rs))
+        sma_20 = close[-20:].mean()
+        return {
+            "close": float(close[-1]),
+            "sma_5": float(close[-5:].mean()),
+            "sma_20": float(sma_20),
+            "rsi": round(float(rsi), 2),
+            "trend": "UP" if close[-1] > sma_20 else "DOWN",
+            "volatility": float((high[-1] - low[-1]) / close[-1] * 100)
+        }
+
 technical = TechnicalAnalyzer()
@@ -1,49 +1,51 @@
 import logging
 import time
+import asyncio
 from datetime import datetime
 from app.core.kis_api import kis
 from app.core.telegram_bot import bot
+from app.core.trade_store import trade_store
+from app.core.order_router import order_router, Order, OrderState
+from app.core.liquidation import liquidation_engine
+from app.core.position_book import PositionBook
+from app.core.position_journal import position_journal
+from app.core.state_store import state_store
+from app.core.instrumentation import timed, span
+from app.core.portfolio import portfolio
+from app.core.pretrade import PreTradeCache
+from app.core.exit_rules import exit_rules, TRAILING, STOP_LOSS, TARGET
 
 logger = logging.getLogger(__name__)
 
 class TradeManager:
     def __init__(self):
-        self.active_trades = {} # {symbol: {buy_price, target_price, stop_loss_price, qty, market_type, excg}}
+        self.active_trades = PositionBook(journal=position_journal) # {symbol: Position(buy_price, target_price, stop_loss_price, qty, market_type, excg)}
+        self._restored = False # Journal replayed by restore_positions() at startup, not on import
         self.capital_krw = 0
         self.capital_usd = 0
         self.total_asset_krw = 0 # Equity (Cash + Stock)
         self.total_asset_usd = 0
         self.start_balance_krw = 0 
         self.start_balance_usd = 0
-        self.trade_history = [] 
+        self.trade_store = trade_store # Closed trades (indexed by market / sell date)
         self.manual_slots = {} # {market_type: count}
         
+        # Orders (fills are booked into active_trades by _on_order_event)
+        self.order_router = order_router
+        self.order_router.add_listener(self._on_order_event)
+        self.pretrade = PreTradeCache(self) # Buying power / exit defaults / per-symbol order params ready before signals
+        
         # Trading Switches (Persistent)
         self.trading_state_file = "trading_state.json"
         self.market_status = self.load_trading_state()
 
     def load_trading_state(self):
-        """Load ON/OFF state from file"""
-        import json
-        import os
-        try:
-            if os.path.exists(self.trading_state_file):
-                with open(self.trading_state_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load trading state: {e}")
-        
-        # Default: Both ON
-        return {"KR": True, "US": True}
+        """Load ON/OFF state (Default: Both ON)"""
+        return state_store.get(self.trading_state_file, {"KR": True, "US": True})
 
     def save_trading_state(self):
-        """Save ON/OFF state to file"""
-        import json
-        try:
-            with open(self.trading_state_file, 'w', encoding='utf-8') as f:
-                json.dump(self.market_status, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            logger.error(f"Failed to save trading state: {e}")
+        """Save ON/OFF state (atomic, written in the background)"""
+        state_store.set(self.trading_state_file, self.market_status, indent=4)
 
     def set_market_status(self, market: str, is_active: bool):
         """Turn Market ON/OFF"""
@@ -62,11 +64,26 @@ class TradeManager:
         self.manual_slots[market] = int(count)
         logger.info(f"Manual Slot Limit Set for {market}: {count}")
 
+    def update_trade_settings(self, symbol: str, target_price: float = None, stop_loss_price: float = None) -> bool:
+        """Manually adjust target / stop-loss price of an open position (Dashboard)"""
+        trade = self.active_trades.get(symbol)
+        if trade is None:
+            return False
+        if target_price is not None:
+            trade['target_price'] = float(target_price)
+        if stop_loss_price is not None:
+            trade['stop_loss_price'] = float(stop_loss_price)
+        logger.info(f"Trade Settings Updated for {trade['name']}: Target={trade['target_price']}, Stop={trade['stop_loss_price']}")
+        return True
 
+
+    @timed()
     def update_balance(self):
-        """Fetch latest balance from KIS (KRW & USD)"""
+        """Refresh KRW & USD balances from the portfolio snapshot (cached, see app.core.portfolio). Returns the snapshot."""
+        snap = portfolio.get()
+
         # 1. Domestic
-        balance = kis.get_balance()
+        balance = snap.kr_summary
         if balance:
             logger.info(f"DEBUG: Balance Content: {balance}")
             
@@ -76,7 +93,7 @@ class TradeManager:
                 logger.info(f"Start Balance Set (KRW): {self.start_balance_krw:,.0f}")
             
             # Prioritize Orderable Cash (Explicit Endpoint)
-            real_cash = kis.get_orderable_cash()
+            real_cash = snap.kr_cash
             if real_cash is not None:
                 self.capital_krw = float(real_cash)
                 logger.info(f"DEBUG: Real Orderable Cash: {self.capital_krw:,.0f}")
@@ -92,7 +109,7 @@ class TradeManager:
             self.total_asset_krw = float(balance.get('tot_evlu_amt', self.capital_krw)) # Total Asset
             
         # 2. Overseas (US)
-        ovs_bal = kis.get_overseas_balance()
+        ovs_bal = snap.us
         if ovs_bal and 'summary' in ovs_bal:
             summary = ovs_bal['summary']
             logger.info(f"DEBUG: US Balance Summary: {summary}")
@@ -118,6 +135,8 @@ class TradeManager:
                 self.start_balance_usd = val_usd
                 logger.info(f"Start Balance Set (USD): {self.start_balance_usd:,.2f}")
 
+        return snap
+
     def get_available_budget(self, market_type="KR"):
         """Get available buying power for the market"""
         self.update_balance()
@@ -145,7 +164,7 @@ class TradeManager:
         
         # Calculate Total Equity properly (Cash + Holdings Value)
         # Note: self.total_asset_usd from KIS might be unreliable or exclude cash depending on endpoint.
-        current_holdings_val = sum(t['buy_price'] * t['qty'] for t in self.active_trades.values() if t.get('market_type') == 'US')
+        current_holdings_val = self.active_trades.cost_basis("US")
         
         # Self-Healing: Check for missing trades (Discrepancy Check)
         # If Balance says we have stock, but active_trades is empty/low
@@ -154,7 +173,7 @@ class TradeManager:
              logger.warning(f"Equity Mismatch! Balance Stock: ${estimated_stock_val:.2f}, Active: ${current_holdings_val:.2f}. Triggering Re-sync...")
              self.sync_portfolio()
              # Recalculate after sync
-             current_holdings_val = sum(t['buy_price'] * t['qty'] for t in self.active_trades.values() if t.get('market_type') == 'US')
+             current_holdings_val = self.active_trades.cost_basis("US")
 
         base_equity = buying_power + current_holdings_val
         
@@ -169,7 +188,7 @@ class TradeManager:
              # Lowered threshold to $300 to allow execution for smaller accounts
              max_slots = 2 if base_equity < 300 else 3
              
-        current_us_slots = sum(1 for t in self.active_trades.values() if t.get('market_type') == 'US')
+        current_us_slots = self.active_trades.count("US")
         
         # If already full, return 0 (Shouldn't select anything)
         if current_us_slots >= max_slots:
@@ -195,17 +214,32 @@ class TradeManager:
             return target_amount
 
     
+    @timed()
+    def restore_positions(self) -> int:
+        """
+        Replay the position journal into active_trades (startup, before the first sync_portfolio):
+        targets / trailing peaks / overnight flags from the last run. Runs once.
+        """
+        if self._restored:
+            return len(self.active_trades)
+        self._restored = True
+        return self.active_trades.restore()
+
     def sync_portfolio(self):
         """
         Sync existing holdings from KIS to active_trades.
         Ensures Restart doesn't ignore existing positions.
         """
         logger.info("🔄 Starting portfolio sync...")
-        self.update_balance()
-        holdings = kis.get_my_stock_balance()
+        snap = self.update_balance()
+        holdings = snap.kr_holdings
         if holdings is None:
             holdings = []
             logger.warning("⚠️ Failed to fetch KR holdings (API Error or Safety Mode)")
+        else:
+            # Reconcile journaled positions with the broker (KR)
+            self._adopt_open_exits("KR")
+            self._reconcile_journaled("KR", {s['pdno']: (int(s['hldg_qty']), float(s['pchs_avg_pric'])) for s in holdings})
         
         if not holdings:
             logger.warning("⚠️ No KR holdings found or API returned empty")
@@ -234,13 +268,19 @@ class TradeManager:
 
         # 2. US Holdings
         try:
-            us_bal = kis.get_overseas_balance()
+            us_bal = snap.us
             logger.debug(f"🔍 US Balance Response: {us_bal}")
             
             if us_bal and 'holdings' in us_bal:
                 holdings_list = us_bal['holdings']
                 logger.info(f"📦 Found {len(holdings_list)} US holdings to process")
                 
+                # Reconcile journaled positions (only with a complete view of all exchanges)
+                if not us_bal.get('failed_exchanges'):
+                    self._adopt_open_exits("US")
+                    self._reconcile_journaled("US", {s.get('ovrs_pdno'): (int(float(s.get('ovrs_cblc_qty', 0))), float(s.get('pchs_avg_pric', 0)))
+                                                     for s in holdings_list})
+                
                 for stock in holdings_list:
                     symbol = stock.get('ovrs_pdno')
                     name = stock.get('ovrs_item_name')
@@ -273,12 +313,55 @@ class TradeManager:
                 logger.warning(f"⚠️ No US holdings found or invalid response: {us_bal}")
             
             # DEBUG: Check what is actually in active_trades
-            us_keys = [k for k, v in self.active_trades.items() if v.get('market_type') == 'US']
+            us_keys = self.active_trades.symbols("US")
             logger.info(f"🎯 Current US Active Trades: {us_keys} (Count: {len(us_keys)})")
 
         except Exception as e:
             logger.error(f"❌ Failed to sync US holdings: {e}", exc_info=True)
 
+    def _adopt_open_exits(self, market: str):
+        """
+        Re-attach sell orders still open at the broker to their restored positions (the order router
+        starts empty after a restart), so the exit is tracked and booked on fill instead of sent twice.
+        Positions without one are left to the monitors.
+        """
+        def to_int(v):
+            try: return int(float(v))
+            except (TypeError, ValueError): return 0
+
+        rows = kis.get_orders() if market == "KR" else kis.get_overseas_outstanding_orders()
+        qty_key, filled_key, remaining_key = (("ord_qty", "tot_ccld_qty", "rmn_qty") if market == "KR"
+                                              else ("ft_ord_qty", "ft_ccld_qty", "nccs_qty"))
+        for row in rows or []:
+            trade = self.active_trades.get(row.get('pdno'))
+            if trade is None or trade.get('market_type', 'KR') != market or trade.get('exit_order_id'):
+                continue
+            if row.get('sll_buy_dvsn_cd') != "01" or row.get('cncl_yn') == 'Y' or to_int(row.get(remaining_key)) <= 0:
+                continue # Not an open sell order
+            order = Order(trade.symbol, "SELL", to_int(row.get(qty_key)), market_type=market,
+                          excg=row.get('ovrs_excg_cd') or trade.get('excg', 'NAS'),
+                          meta={"ref_price": trade['buy_price'], "fill_msg": f"✅ 매도 체결 (재시작 전 주문): {trade['name']}"})
+            self.order_router.adopt(order, row.get('odno'), filled_qty=to_int(row.get(filled_key)))
+            trade['exit_order_id'] = order.id
+
+    def _reconcile_journaled(self, market: str, held: dict):
+        """
+        Align positions restored from the journal with broker holdings {symbol: (qty, avg_price)}.
+        Broker qty / avg price win; targets, trailing peaks and flags are kept.
+        Positions the broker no longer holds (sold while the bot was down) are dropped.
+        """
+        for trade in self.active_trades.positions(market):
+            symbol = trade.symbol
+            if self.order_router.get_open_orders(symbol=symbol):
+                continue # Fills in flight will settle it
+            qty, avg_price = held.get(symbol, (0, 0.0))
+            if qty <= 0:
+                logger.warning(f"🧹 Dropping journaled position {trade['name']} ({symbol}): not held at broker")
+                del self.active_trades[symbol]
+            elif qty != trade['qty'] or (avg_price > 0 and abs(avg_price - trade['buy_price']) > 1e-6):
+                logger.info(f"🔧 Reconciled {trade['name']}: {trade['qty']}sh @ {trade['buy_price']:,.2f} -> {qty}sh @ {avg_price:,.2f}")
+                trade.update({"qty": qty, "buy_price": avg_price or trade['buy_price']})
+
     def get_account_status_str(self):
         """Generate status report text: Balance + Holdings"""
         self.update_balance()
@@ -290,7 +373,7 @@ class TradeManager:
         if not self.active_trades:
             msg += "(No active trades)\n"
         else:
-            for sym, t in self.active_trades.items():
+            for sym, t in list(self.active_trades.items()):
                 # Get current price
                 # Helper for safe float
                 def safe_float(v):
@@ -317,11 +400,16 @@ class TradeManager:
         
         return msg
 
-    def process_signals(self, selected_stocks: list):
+    @timed()
+    async def process_signals(self, selected_stocks: list):
         """
         Process buy signals from Selector (KR & US).
+        [Async] Orders go through the order router; positions are created/updated
+        from actual fills in _on_order_event (not at submission time).
         """
-        self.update_balance()
+        signal_time = time.time()
+        if not self.pretrade.is_fresh():
+            await self.pretrade.refresh() # Background refresher not running yet / stalled
         if not selected_stocks:
             return
 
@@ -335,7 +423,12 @@ class TradeManager:
             current_price = float(stock['price'])
             market_type = stock.get('market_type') or stock.get('market', 'KR')
             excg = stock.get('excg', 'NAS')
-            
+            plan = self.pretrade.plan(symbol, market_type, excg, current_price)
+
+            if self.order_router.get_open_orders(symbol=symbol):
+                logger.info(f"Skipping {name}: Order already in flight")
+                continue
+
             if symbol in self.active_trades:
                 # Add-on Buy Logic (Pyramiding/Averaging)
                 trade = self.active_trades[symbol]
@@ -373,8 +466,8 @@ class TradeManager:
                 # Capital >= $300 -> Max 3 Slots
                 max_slots = 2 if base_equity < 300 else 3
                 
-                # Count current US active trades
-                current_us_slots = sum(1 for t in self.active_trades.values() if t.get('market_type') == 'US')
+                # Count current US active trades (+ buys still in flight)
+                current_us_slots = self.active_trades.count("US") + self._pending_buy_slots("US")
                 
                 if current_us_slots >= max_slots:
                     logger.info(f"Skipping {symbol}: Max Slots Reached ({current_us_slots}/{max_slots}) for Capital ${base_equity:.0f}")
@@ -403,7 +496,7 @@ class TradeManager:
                 # Safety Buffer for US: 98% of invest_amt, Price is 1.01x (Limit)
                 # This ensures we cover the +1% price buffer limit order AND fees.
                 safe_invest_amt = invest_amt * 0.98
-                limit_price = current_price * 1.01
+                limit_price = plan.buy_price(current_price)
                 qty = int(safe_invest_amt // limit_price)
                 
                 logger.info(f"🇺🇸 US Buy Calc: Invest=${invest_amt:.2f} -> Safe=${safe_invest_amt:.2f} / Limit=${limit_price:.2f} = {qty} sh")
@@ -417,8 +510,8 @@ class TradeManager:
                     remaining_slots = 3 
                     logger.info(f"Add-on Allocation for {name}: Treating as 3 slots (Using 33% of Cash)")
                 else:
-                    current_kr_slots = sum(1 for t in self.active_trades.values() if t.get('market_type', 'KR') == 'KR')
-                    
+                    current_kr_slots = self.active_trades.count("KR") + self._pending_buy_slots("KR")
+
                     if "KR" in self.manual_slots:
                         MAX_KR_SLOTS = self.manual_slots["KR"]
                     else:
@@ -442,7 +535,7 @@ class TradeManager:
                 safe_invest_amt = invest_amt * 0.95
                 
                 # Calculate qty based on Upper Limit Buffer to avoid "Insufficient Funds"
-                upper_limit_proxy = current_price * 1.3
+                upper_limit_proxy = plan.cash_per_share(current_price)
                 qty = int(safe_invest_amt // upper_limit_proxy)
                 
                 logger.info(f"🇰🇷 KR Buy Calc: Invest={invest_amt:,.0f} -> Safe={safe_invest_amt:,.0f} / (Price*1.3)={upper_limit_proxy:,.0f} = {qty} sh")
@@ -451,163 +544,245 @@ class TradeManager:
                 logger.warning(f"Skipping {name}: Qty is 0. Invest: {invest_amt:,.0f} < Price: {current_price:,.0f}")
                 continue
 
+            # Target / Stop (Calculate BEFORE submitting so fills can build the position)
+            # Dynamic Strategy Config defaults (cached by the pre-trade refresher)
+            default_target, default_stop = self.pretrade.exit_defaults[market_type]
+            
+            t_val = stock.get('target')
+            if t_val is None: t_val = default_target
+            target_pct = float(t_val)
+            
+            # Stop Loss Logic
+            sl_val = stock.get('stop_loss')
+            if sl_val is None: sl_val = default_stop
+            
+            raw_stop = float(sl_val)
+            stop_pct = abs(raw_stop)
+            
+            # AI might suggest very loose stop (e.g. 10%), allow it ONLY if it's within Config "Safety" limits?
+            # For now, let's trust AI but enforce Hard Floor 1.5%
+            if stop_pct < 1.5:
+                stop_pct = 1.5 # Enforce Hard Limit 1.5%
+
             # Execute Buy
             logger.info(f"Buying {market_type}: {name} ({qty}sh) @ {current_price}")
             
-            if market_type == "US":
-                # Ensure 4-char code for Order API (Documentation Requirement)
-                if excg == 'NAS': excg = 'NASD'
-                elif excg == 'NYS': excg = 'NYSE'
-                elif excg == 'AMS': excg = 'AMEX'
+            # US: Limit Order (Current + 1% buffer, 4-char exchange code for the Order API)
+            # KR: Market Order (Immediate Execution; cash is reserved at the upper limit)
+            order_price = plan.buy_price(current_price)
+
+            order = Order(symbol, "BUY", qty, price=order_price, market_type=market_type, excg=plan.order_excg,
+                          signal_time=stock.get('signal_time', signal_time),
+                          meta={"name": name, "ref_price": current_price, "target_pct": target_pct,
+                                "stop_pct": stop_pct, "reason": stock.get('reason', 'No details')})
+            await self.order_router.submit(order)
+
+            if order.state == OrderState.REJECTED:
+                res = order.meta.get('response') or {}
+                error_msg = order.error or ""
+                # Check for Cash Shortage (Approx check)
+                if "주문가능금액" in error_msg or "부족" in error_msg or (isinstance(res, dict) and res.get('msg_cd') == 'APBK0913'):
+                    if market_type == "US" and self.capital_usd < 10 and self.capital_krw > 100000:
+                        bot.send_message(f"💡 [TIP] 달러 부족으로 매수 실패! 원화(KRW)는 충분합니다.\nKIS 앱에서 **[통합증거금]** 서비스를 신청하면 원화로 바로 미국 주식을 살 수 있습니다.")
+                    elif market_type == "KR":
+                        bot.send_message(f"💡 [TIP] 증거금 부족. 미체결 주문이 있거나 예수금이 부족합니다.")
+                continue
 
-                # Limit Order for US (Current + 1% buffer)
-                res = kis.buy_overseas_order(symbol, qty, price=current_price*1.01, excg_cd=excg) 
-                
-                # Retry Logic for Exchange Code Mismatch (APBK0656)
-                if isinstance(res, dict) and (res.get('msg_cd') == 'APBK0656' or '해당종목' in res.get('msg1', '')):
-                    logger.warning(f"Order failed for {symbol} ({excg}). Retrying with other exchanges...")
-                    # Priority: 4-char (Correct) -> 3-char (Legacy/Fallback)
-                    for alt_excg in ['NASD', 'NYSE', 'AMEX', 'NAS', 'NYS', 'AMS']:
-                        if alt_excg == excg: continue
-                        
-                        logger.info(f"Retrying {symbol} on {alt_excg}...")
-                        res = kis.buy_overseas_order(symbol, qty, price=current_price*1.01, excg_cd=alt_excg)
-                        if isinstance(res, dict) and res.get('rt_cd') == '0':
-                            logger.info(f"Retry Successful on {alt_excg}!")
-                            excg = alt_excg # Update for record
-                            stock['excg'] = alt_excg
-                            break
+            stock['excg'] = order.excg # Exchange may have changed on retry
+            
+            # Update Wallet Balance Locally (to prevent over-spending in same batch)
+            spent_amount = qty * current_price # Approximate until fills arrive
+            if market_type == "US":
+                current_us_cash = max(0, current_us_cash - spent_amount)
+                self.capital_usd = current_us_cash
+                logger.info(f"Local Wallet Update: -${spent_amount:.2f} (Rem: ${current_us_cash:.2f})")
             else:
-                # Market Order for KR (Immediate Execution)
-                # Note: Market orders may require higher available balance calc (Upper Limit)
-                # but ensures execution vs Limit orders that miss fast moves.
-                res = kis.buy_order(symbol, qty, price=0) 
-
-            # Standardize Failure (KIS returns rt_cd but no error key sometimes)
-            error_msg = res.get('msg1', 'KIS API Error') if isinstance(res, dict) else str(res)
+                fees = spent_amount * 0.00015 # Approx fees
+                current_kr_cash = max(0, current_kr_cash - (spent_amount + fees))
+                self.capital_krw = current_kr_cash
+                logger.info(f"Local Wallet Update: -{spent_amount:,.0f} KRW (Rem: {current_kr_cash:,.0f})")
             
-            if isinstance(res, dict) and res.get("rt_cd", "0") != "0":
-                 res['error'] = error_msg
-                 
-                 # Check for Cash Shortage (Approx check)
-                 if "주문가능금액" in error_msg or "부족" in error_msg or res.get('msg_cd') == 'APBK0913':
-                     if market_type == "US" and self.capital_usd < 10 and self.capital_krw > 100000:
-                         bot.send_message(f"💡 [TIP] 달러 부족으로 매수 실패! 원화(KRW)는 충분합니다.\nKIS 앱에서 **[통합증거금]** 서비스를 신청하면 원화로 바로 미국 주식을 살 수 있습니다.")
-                     elif market_type == "KR":
-                          bot.send_message(f"💡 [TIP] 증거금 부족. 미체결 주문이 있거나 예수금이 부족합니다.")
+            # Refresh Balance for next iteration (DISABLED to prevent race condition with KIS API)
+            # self.update_balance()
 
-            if isinstance(res, dict) and res.get("rt_cd", "0") != "0":
-                 # Already handled above
-                 pass
+    def _pending_buy_slots(self, market_type: str) -> int:
+        """New positions whose BUY orders are still in flight (they occupy a slot already)."""
+        return len({o.symbol for o in self.order_router.get_open_orders(market_type, "BUY")
+                    if o.symbol not in self.active_trades})
 
+    # --- Order Events (fills drive the position book) ---
 
-            if "error" not in res:
-                currency = "USD" if market_type == "US" else "KRW"
-                reason = stock.get('reason', 'No details')
-                
-                # Sane Defaults if AI returns None (Calculate BEFORE sending message)
-                # Load Dynamic Strategy Config
-                from app.core.optimizer import optimizer
-                config = optimizer.load_config()
-                
-                market_key = "us_parameters" if market_type == "US" else "kr_parameters"
-                default_target = float(config.get(market_key, {}).get('target_profit_rate', 3.0))
-                default_stop = float(config.get(market_key, {}).get('stop_loss_rate', 2.0))
-                
-                t_val = stock.get('target')
-                if t_val is None: t_val = default_target
-                target_pct = float(t_val)
-                
-                # Stop Loss Logic
-                sl_val = stock.get('stop_loss')
-                if sl_val is None: sl_val = default_stop
-                
-                raw_stop = float(sl_val)
-                stop_pct = abs(raw_stop)
-                
-                # AI might suggest very loose stop (e.g. 10%), allow it ONLY if it's within Config "Safety" limits?
-                # For now, let's trust AI but enforce Hard Floor 1.5%
-                if stop_pct < 1.5:
-                    stop_pct = 1.5 # Enforce Hard Limit 1.5%
-
-                bot.send_message(
-                    f"🚀 {market_type} 매수 체결: {name}\n"
-                    f"수량: {qty}\n"
-                    f"가격: {current_price:,.2f} {currency}\n"
-                    f"목표가: {target_pct}%\n"
-                    f"AI 분석: {reason}"
-                )
-                
-                buy_price = current_price # Approximate
+    def _on_order_event(self, order: Order, prev_state: str):
+        """Order router listener: apply fills to active_trades and notify."""
+        if order.side == "BUY":
+            self._on_buy_event(order)
+        else:
+            self._on_sell_event(order)
+
+    def _on_buy_event(self, order: Order):
+        symbol = order.symbol
+        meta = order.meta
+        name = meta.get('name', symbol)
+
+        # Apply the new fill delta (fills are cumulative snapshots)
+        delta = order.filled_qty - meta.get('applied_qty', 0)
+        if delta > 0:
+            fill_price = order.avg_fill_price or meta.get('ref_price', 0)
+            delta_cost = order.filled_qty * fill_price - meta.get('applied_cost', 0)
+            meta['applied_qty'] = order.filled_qty
+            meta['applied_cost'] = order.filled_qty * fill_price
+            target_pct = meta.get('target_pct', 3.0)
+            stop_pct = meta.get('stop_pct', 2.0)
+
+            # Update Active Trades (Handle Add-on)
+            if symbol in self.active_trades:
+                trade = self.active_trades[symbol]
+                old_qty = trade['qty']
+                old_price = trade['buy_price']
                 
-                # Update Active Trades (Handle Add-on)
-                if symbol in self.active_trades:
-                    old_trade = self.active_trades[symbol]
-                    old_qty = old_trade['qty']
-                    old_price = old_trade['buy_price']
-                    
-                    new_qty = old_qty + qty
-                    new_avg_price = ((old_qty * old_price) + (qty * current_price)) / new_qty
-                    
-                    self.active_trades[symbol].update({
-                        "buy_price": new_avg_price,
-                        "qty": new_qty,
-                        "target_price": new_avg_price * (1 + target_pct/100),
-                        "stop_loss_price": new_avg_price * (1 - stop_pct/100),
-                        "buy_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S") # Update time? Maybe keep original? Let's update for now so we know action happened.
-                    })
-                    logger.info(f"Updated Position {name}: Avg Price {old_price:.0f}->{new_avg_price:.0f}, Qty {old_qty}->{new_qty}")
-                else:
-                    self.active_trades[symbol] = {
-                        "name": name,
-                        "buy_price": current_price,
-                        "qty": qty,
-                        "target_price": current_price * (1 + target_pct/100),
-                        "stop_loss_price": current_price * (1 - stop_pct/100),
-                        "market_type": market_type,
-                        "excg": excg,
-                        "buy_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
+                new_qty = old_qty + delta
+                new_avg_price = ((old_qty * old_price) + delta_cost) / new_qty
                 
-                # Update Wallet Balance Locally (to prevent over-spending in same batch)
-                spent_amount = qty * buy_price
-                if market_type == "US":
-                    current_us_cash = max(0, current_us_cash - spent_amount)
-                    self.capital_usd = current_us_cash
-                    logger.info(f"Local Wallet Update: -${spent_amount:.2f} (Rem: ${current_us_cash:.2f})")
-                else:
-                    fees = spent_amount * 0.00015 # Approx fees
-                    current_kr_cash = max(0, current_kr_cash - (spent_amount + fees))
-                    self.capital_krw = current_kr_cash
-                    logger.info(f"Local Wallet Update: -{spent_amount:,.0f} KRW (Rem: {current_kr_cash:,.0f})")
+                trade.update({
+                    "buy_price": new_avg_price,
+                    "qty": new_qty,
+                    "target_price": new_avg_price * (1 + target_pct/100),
+                    "stop_loss_price": new_avg_price * (1 - stop_pct/100),
+                    "buy_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S") # Update time? Maybe keep original? Let's update for now so we know action happened.
+                })
+                logger.info(f"Updated Position {name}: Avg Price {old_price:.0f}->{new_avg_price:.0f}, Qty {old_qty}->{new_qty}")
+            else:
+                buy_price = delta_cost / delta
+                self.active_trades[symbol] = {
+                    "name": name,
+                    "buy_price": buy_price,
+                    "qty": delta,
+                    "target_price": buy_price * (1 + target_pct/100),
+                    "stop_loss_price": buy_price * (1 - stop_pct/100),
+                    "market_type": order.market_type,
+                    "excg": order.excg,
+                    "buy_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "buy_odno": order.odno
+                }
                 
                 # Subscribe to WebSocket for real-time monitoring
                 if kis.websocket and kis.websocket.is_connected:
-                    kis.websocket.subscribe_stock(symbol, market_type)
+                    kis.websocket.subscribe_stock(symbol, order.market_type)
                     logger.info(f"📡 WebSocket subscribed: {symbol}")
-                
-                # Send Status Update
-                bot.send_message(self.get_account_status_str())
-                
-                # Refresh Balance for next iteration (DISABLED to prevent race condition with KIS API)
-                # self.update_balance()
 
-            else:
-                bot.send_message(f"❌ 매수 실패 ({name}): {res.get('error')}")
+        if not order.is_done:
+            return
+
+        if order.filled_qty > 0:
+            trade = self.active_trades.get(symbol)
+            if trade is not None:
+                trade['entry_exec'] = {"signal_to_ack_ms": order.signal_to_ack_ms, "ack_to_fill_ms": order.ack_to_fill_ms}
+
+            currency = "USD" if order.market_type == "US" else "KRW"
+            partial = f" (부분 체결 {order.filled_qty}/{order.qty})" if order.filled_qty < order.qty else ""
+            bot.send_message(
+                f"🚀 {order.market_type} 매수 체결: {name}{partial}\n"
+                f"수량: {order.filled_qty}\n"
+                f"가격: {order.avg_fill_price or meta.get('ref_price', 0):,.2f} {currency}\n"
+                f"목표가: {meta.get('target_pct')}%\n"
+                f"AI 분석: {meta.get('reason')}"
+            )
+            
+            # Send Status Update
+            self._send_status_update()
+        elif order.state == OrderState.REJECTED:
+            bot.send_message(f"❌ 매수 실패 ({name}): {order.error}")
+        else:
+            logger.info(f"⌛ Buy order for {name} cancelled without fills")
+
+    def _on_sell_event(self, order: Order):
+        if not order.is_done:
+            logger.info(f"📥 Partial sell fill: {order.symbol} {order.filled_qty}/{order.qty}")
+            return
 
-    def monitor_active_trades(self, market_filter="ALL"):
+        symbol = order.symbol
+        meta = order.meta
+        trade = self.active_trades.get(symbol)
+        if trade is not None and trade.get('exit_order_id') == order.id:
+            trade.pop('exit_order_id', None)
+
+        if order.filled_qty <= 0:
+            if meta.get('fail_msg'):
+                bot.send_message(f"{meta['fail_msg']}: {order.error or '미체결 취소'}")
+            return
+
+        sell_price = order.avg_fill_price or meta.get('ref_price', 0)
+        msg = meta.get('fill_msg')
+
+        if trade is not None:
+            buy_price = trade['buy_price']
+            profit_rate = ((sell_price - buy_price) / buy_price * 100) if buy_price > 0 and sell_price > 0 else 0.0
+            self.trade_store.append({
+                "name": trade['name'],
+                "market": order.market_type,
+                "qty": order.filled_qty,
+                "buy_price": buy_price,
+                "sell_price": sell_price,
+                "profit_rate": profit_rate,
+                "result": meta.get('result') or ("WIN" if profit_rate > 0 else "LOSS"),
+                "buy_time": trade.get('buy_time', 'Unknown'),
+                "sell_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "sell_odno": order.odno,
+                "entry_exec": trade.get('entry_exec'),
+                "exit_exec": {"signal_to_ack_ms": order.signal_to_ack_ms, "ack_to_fill_ms": order.ack_to_fill_ms}
+            }, symbol=symbol)
+
+            remaining = trade['qty'] - order.filled_qty
+            if remaining > 0:
+                trade['qty'] = remaining
+                logger.warning(f"⚠️ {trade['name']}: Partial exit ({order.filled_qty}sh). {remaining}sh still held.")
+            else:
+                # Unsubscribe from WebSocket
+                if kis.websocket:
+                    kis.websocket.unsubscribe_stock(symbol)
+                    logger.info(f"📡 WebSocket unsubscribed: {symbol}")
+                self.active_trades.pop(symbol, None)
+
+            if msg:
+                msg += f"\n수익률: {profit_rate:.2f}%"
+
+        if msg:
+            bot.send_message(msg)
+        if meta.get('status_update'):
+            self._send_status_update()
+
+    def _send_status_update(self):
+        """Account status message off the event loop (it fetches prices per holding)."""
+        asyncio.get_running_loop().run_in_executor(None, lambda: bot.send_message(self.get_account_status_str()))
+
+    @timed()
+    async def _submit_exit(self, symbol: str, trade: dict, price: float, ref_price: float, **meta) -> Order:
+        """
+        Submit a full exit for a position. While it is in flight the position is flagged
+        with 'exit_order_id' (monitors skip it); the fill is booked in _on_sell_event.
+        """
+        order = Order(symbol, "SELL", trade['qty'], price=price, market_type=trade.get('market_type', 'KR'),
+                      excg=trade.get('excg', 'NAS'), meta={"ref_price": ref_price, **meta})
+        trade['exit_order_id'] = order.id
+        await self.order_router.submit(order)
+        if order.state == OrderState.REJECTED:
+            logger.error(f"❌ Sell order failed for {trade['name']}: {order.error}")
+        return order
+
+    @timed()
+    async def monitor_active_trades(self, market_filter="ALL"):
         if not self.active_trades:
             return
 
-        active_symbols = list(self.active_trades.keys())
-        
-        for symbol in active_symbols:
-            trade = self.active_trades[symbol]
+        for trade in self.active_trades.positions(market_filter):
+            symbol = trade.symbol
+            if self.active_trades.get(symbol) is not trade:
+                continue # Closed earlier in this pass
             name = trade['name']
             market_type = trade.get('market_type', 'KR')
-            
-            # Filter by Market (KR/US)
-            if market_filter != "ALL" and market_type != market_filter:
+
+            # Exit already in flight (fill will close the position)
+            if trade.get('exit_order_id'):
                 continue
 
             excg = trade.get('excg', 'NAS')
@@ -618,7 +793,11 @@ class TradeManager:
                 except: return 0.0
 
             # Get Price - Use WebSocket if available
-            price_data = kis.get_realtime_price(symbol, market_type, excg_cd=excg)
+            with span("TradeManager.monitor.price"):
+                # WebSocket tick from memory; the REST fallback blocks, so it runs off the event loop
+                price_data = kis.get_ws_price(symbol)
+                if not price_data:
+                    price_data = await asyncio.to_thread(kis.get_realtime_price, symbol, market_type, excg_cd=excg)
             
             if not price_data:
                 logger.warning(f"⚠️ {name}: No price data available")
@@ -655,263 +834,262 @@ class TradeManager:
             else:
                  trade['value_krw'] = trade['value']
             
-            # Trailing Stop Logic
-            trade.setdefault('max_price', buy_price)
-            trade.setdefault('trailing_active', False)
-            
-            if current_price > trade['max_price']:
-                trade['max_price'] = current_price
-                
-            action = None
-            
-            if trade['trailing_active']:
-                # Already hit target, now trailing (Sell if drops 1% from peak)
-                if current_price < trade['max_price'] * 0.99:
-                    action = "트레일링 익절 (고점 대비 -1%)"
-                    logger.info(f"🎯 {name}: Trailing stop triggered at {profit_rate:.2f}%")
-            else:
-                # Normal Monitoring
-                # Activate Trailing Stop earlier (at +2%) to secure small profits
-                if profit_rate >= 2.0:
-                    trade['trailing_active'] = True
-                    logger.info(f"✅ {name}: Profit > 2%. Activating Trailing Stop.")
-                elif current_price <= trade['stop_loss_price']:
-                    action = "손절매 (Stop Loss)"
-                    logger.warning(f"🛑 {name}: Stop-loss triggered! Current=${current_price:.2f} <= StopLoss=${stop_loss_price:.2f} (P&L={profit_rate:.2f}%)")
+            # Trailing Stop / Stop Loss (app/core/exit_rules.py, shared with the backtest engine)
+            max_price = trade.get('max_price', buy_price)
+            was_trailing = trade.get('trailing_active', False)
+            rules = self.pretrade.exit_rules.get(market_type, exit_rules)
+            with span("TradeManager.monitor.exit_rules"):
+                code, new_max, trailing = rules.evaluate(
+                    current_price, buy_price, trade['stop_loss_price'], max_price, was_trailing, trade.get('target_price', 0))
+                # Position writes are journaled: only write what changed
+                if new_max != max_price or 'max_price' not in trade:
+                    trade['max_price'] = new_max
+                if trailing != was_trailing or 'trailing_active' not in trade:
+                    trade['trailing_active'] = trailing
+
+            action = rules.label(code)
+            if code == TARGET:
+                logger.info(f"🎯 {name}: Target reached at {profit_rate:.2f}%")
+            elif trailing and not was_trailing:
+                logger.info(f"✅ {name}: Profit > {rules.trail_activate_pct}%. Activating Trailing Stop.")
+            elif code == TRAILING:
+                logger.info(f"🎯 {name}: Trailing stop triggered at {profit_rate:.2f}%")
+            elif code == STOP_LOSS:
+                logger.warning(f"🛑 {name}: Stop-loss triggered! Current=${current_price:.2f} <= StopLoss=${stop_loss_price:.2f} (P&L={profit_rate:.2f}%)")
                 
             if action:
                 logger.info(f"🔔 Executing {action} for {name}")
                 
-                if market_type == "US":
-                    res = kis.sell_overseas_order(symbol, qty, price=current_price*0.99, excg_cd=excg)
-                else:
-                    res = kis.sell_order(symbol, qty, price=0)
-                
-                if "error" not in res:
-                    currency = "USD" if market_type == "US" else "KRW"
-                    bot.send_message(f"💰 {action}: {name}\n수익률: {profit_rate:.2f}%")
-                    
-                    self.trade_history.append({
-                        "name": name,
-                        "market": market_type,
-                        "qty": qty,
-                        "buy_price": buy_price,
-                        "sell_price": current_price,
-                        "profit_rate": profit_rate,
-                        "result": "WIN" if profit_rate > 0 else "LOSS",
-                        "buy_time": trade.get('buy_time', 'Unknown'),
-                        "sell_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    })
-                    self.save_history() # Persist immediately
-                    
-                    # Unsubscribe from WebSocket
-                    if kis.websocket:
-                        kis.websocket.unsubscribe_stock(symbol)
-                        logger.info(f"📡 WebSocket unsubscribed: {symbol}")
-                    
-                    del self.active_trades[symbol]
-                    
-                    # Send Status Update
-                    bot.send_message(self.get_account_status_str())
-                    
-                else:
-                    logger.error(f"❌ Sell order failed for {name}: {res.get('error')}")
-                    bot.send_message(f"⚠️ 매도 실패 ({name}): {res.get('error')}")
+                await self._submit_exit(
+                    symbol, trade,
+                    price=current_price*0.99 if market_type == "US" else 0,
+                    ref_price=current_price,
+                    fill_msg=f"💰 {action}: {name}",
+                    fail_msg=f"⚠️ 매도 실패 ({name})",
+                    status_update=True
+                )
 
-    def sell_position(self, symbol: str, market_type: str = "KR"):
+    @timed()
+    async def sell_position(self, symbol: str, market_type: str = "KR"):
         """Manually Sell a Position"""
         if symbol not in self.active_trades:
             return {"error": "Trade not found"}
         
         trade = self.active_trades[symbol]
-        qty = trade.get('qty', trade.get('quantity', 0))
         name = trade['name']
         excg = trade.get('excg', 'NASD')
         
-        logger.info(f"🚨 Manual Sell Request: {name} ({symbol}) {qty}sh")
+        if trade.get('exit_order_id'):
+            return {"error": "Sell order already pending"}
+        
+        logger.info(f"🚨 Manual Sell Request: {name} ({symbol}) {trade['qty']}sh")
         
         try:
             # Execute Sell
             if market_type == "US":
                 # For US, Try to get current price for Limit Order to ensure execution
                 # Market order is often not supported or limited for US stocks via API
-                price_data = kis.get_overseas_price(symbol, excg)
+                price_data = await asyncio.to_thread(kis.get_overseas_price, symbol, excg)
                 if price_data:
                     curr_price = float(price_data['last'])
                     sell_price = curr_price * 0.98  # 2% below for immediate fill
                 else:
+                    curr_price = 0
                     sell_price = 0 # Fallback
-                
-                res = kis.sell_overseas_order(symbol, qty, price=sell_price, excg_cd=excg)
             else:
                 # KR Market Order
-                res = kis.sell_order(symbol, qty, price=0)
-                
-            if "error" not in res:
-                # Success
-                trade['sell_price'] = sell_price if market_type == "US" else 0 
-                trade['sell_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                trade['result'] = "MANUAL SELL"
-                
-                self.trade_history.append(trade)
-                self.save_history()
+                curr_price = 0
+                sell_price = 0
                 
-                if symbol in self.active_trades:
-                    del self.active_trades[symbol]
-                
-                msg = f"👋 {market_type} 수동 전량 매도 완료: {name}"
-                bot.send_message(msg)
-                
-                return {"message": "Sell Order Placed", "output": res}
+            order = await self._submit_exit(
+                symbol, trade, price=sell_price, ref_price=curr_price,
+                result="MANUAL SELL",
+                fill_msg=f"👋 {market_type} 수동 전량 매도 완료: {name}"
+            )
+            
+            if order.state != OrderState.REJECTED:
+                return {"message": "Sell Order Placed", "output": order.to_dict()}
             else:
-                return {"error": res.get("error", "Order Failed")}
+                return {"error": order.error or "Order Failed"}
                 
         except Exception as e:
             logger.error(f"Manual Sell Error: {e}")
             return {"error": str(e)}
 
-    def monitor_risks(self, market_filter="KR"):
+    RISK_CHECK_DEADLINE = 20.0 # Seconds per position (price + data + AI verdict)
+
+    @timed()
+    async def monitor_risks(self, market_filter="KR"):
         """
         Check Stop Loss & Target Profit for all active trades.
         - Checks LOSING positions (-0.4%) for early stop-loss
         - Checks WINNING positions (+1%) for early profit-taking
         Supports both Korean (KR) and US stocks.
+        [Async] Positions are evaluated concurrently (each with its own deadline) and
+        SELL verdicts are executed as soon as they arrive.
         """
-        from app.core.selector import selector
-        
         if not self.active_trades: return
         
-        for symbol in list(self.active_trades.keys()):
-            trade = self.active_trades[symbol]
-            market_type = trade.get('market_type', 'KR')
-            name = trade['name']
-            
-            # Filter by Market
-            if market_filter != "ALL" and market_type != market_filter:
+        tasks = []
+        for trade in self.active_trades.positions(market_filter):
+            symbol = trade.symbol
+            if trade.get('exit_order_id'):
                 continue
-
-            # 1. Get Current Status
-            try:
-                if market_type == "US":
-                    excg = trade.get('excg', 'NAS')
-                    p_data = kis.get_overseas_price(symbol, excg)
-                    if not p_data: continue
-                    curr_price = float(p_data.get('last', 0))
-                else:  # KR
-                    p_data = kis.get_current_price(symbol)
-                    if not p_data: continue
-                    curr_price = float(p_data.get('stck_prpr', 0))
-            except: 
+            tasks.append(asyncio.create_task(self._assess_position_risk(symbol, trade)))
+        
+        for next_done in asyncio.as_completed(tasks):
+            assessment = await next_done
+            if not assessment:
                 continue
+            try:
+                await self._apply_risk_verdict(assessment)
+            except Exception as e:
+                logger.error(f"Error in Risk Monitor ({assessment['trade']['name']}): {e}")
 
-            if curr_price <= 0: continue
-            
-            buy_price = trade['buy_price']
-            qty = trade['qty']
-            pnl_rate = ((curr_price - buy_price) / buy_price) * 100
+    async def _assess_position_risk(self, symbol: str, trade: dict):
+        """Price check -> (if flagged) deep data + AI verdict, bounded by RISK_CHECK_DEADLINE."""
+        try:
+            return await asyncio.wait_for(self._evaluate_position_risk(symbol, trade), self.RISK_CHECK_DEADLINE)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ Risk check timed out for {trade['name']} ({self.RISK_CHECK_DEADLINE:.0f}s). Skipping this round.")
+        except Exception as e:
+            logger.error(f"Error in Risk Monitor ({trade['name']}): {e}")
+        return None
+
+    @timed()
+    async def _evaluate_position_risk(self, symbol: str, trade: dict):
+        from app.core.selector import selector
+        
+        market_type = trade.get('market_type', 'KR')
+        name = trade['name']
+        excg = trade.get('excg', 'NAS')
+
+        # 1. Get Current Status
+        try:
+            if market_type == "US":
+                p_data = await asyncio.to_thread(kis.get_overseas_price, symbol, excg)
+                if not p_data: return None
+                curr_price = float(p_data.get('last', 0))
+            else:  # KR
+                p_data = await asyncio.to_thread(kis.get_current_price, symbol)
+                if not p_data: return None
+                curr_price = float(p_data.get('stck_prpr', 0))
+        except Exception:
+            return None
+
+        if curr_price <= 0: return None
+        
+        buy_price = trade['buy_price']
+        pnl_rate = ((curr_price - buy_price) / buy_price) * 100
+        
+        # AI Analysis Conditions:
+        # 1. Loss >= -0.4% (Early stop-loss)
+        # 2. Profit >= +1% (Early profit-taking)
+        if pnl_rate < -0.4:
+            analysis_type = "RISK"
+            logger.info(f"⚠️ {name} ({market_type}) in Loss ({pnl_rate:.2f}%). Requesting AI Risk Analysis...")
+        elif pnl_rate >= 5.0: # Raised from 1.0 to 5.0 to avoid early exit
+            analysis_type = "PROFIT"
+            logger.info(f"💰 {name} ({market_type}) in Profit ({pnl_rate:.2f}%). Requesting AI Profit Analysis...")
+        else:
+            return None
+        
+        # 2. Fetch Deep Data (daily chart + news in parallel)
+        if market_type == "US":
+            daily_data, news = await asyncio.gather(
+                asyncio.to_thread(kis.get_overseas_daily_price, symbol, excg),
+                asyncio.to_thread(kis.get_overseas_news_titles, symbol)
+            )
+        else:  # KR
+            daily_data, news = await asyncio.gather(
+                asyncio.to_thread(kis.get_daily_price, symbol),
+                asyncio.to_thread(kis.get_news_titles, symbol)
+            )
+        
+        # 3. AI Assessment
+        decision = await selector.assess_risk(symbol, curr_price, buy_price, daily_data, news)
+        verdict = decision.get('decision')
+        reason = decision.get('reason')
+        logger.info(f"🤖 AI Verdict ({name}): {verdict} - {reason}")
+        
+        return {
+            "symbol": symbol, "trade": trade, "curr_price": curr_price, "pnl_rate": pnl_rate,
+            "analysis_type": analysis_type, "verdict": verdict, "reason": reason
+        }
+
+    async def _apply_risk_verdict(self, assessment: dict):
+        symbol = assessment['symbol']
+        trade = assessment['trade']
+        curr_price = assessment['curr_price']
+        pnl_rate = assessment['pnl_rate']
+        verdict = assessment['verdict']
+        reason = assessment['reason']
+        market_type = trade.get('market_type', 'KR')
+        name = trade['name']
+        buy_price = trade['buy_price']
+        
+        # Position may have been closed by the exit monitor while the AI was thinking
+        if self.active_trades.get(symbol) is not trade:
+            logger.info(f"⏭️ {name}: Position already closed. Ignoring AI verdict ({verdict}).")
+            return
+
+        if verdict == "SELL":
+            if trade.get('exit_order_id'):
+                logger.info(f"⏭️ {name}: Exit already in flight. Ignoring AI verdict.")
+                return
+
+            if assessment['analysis_type'] == "RISK":
+                msg = f"🚨 AI 리스크 관리 (손절): {name}\n이유: {reason}"
+                result_type = "LOSS (AI)"
+            else:  # PROFIT
+                msg = f"💎 AI 수익 실현 (익절): {name}\n이유: {reason}"
+                result_type = "WIN (AI)"
+
+            # Execute Early Cut/Profit-Taking (KR - Market order for quick execution)
+            await self._submit_exit(
+                symbol, trade,
+                price=curr_price*0.99 if market_type == "US" else 0,
+                ref_price=curr_price,
+                result=result_type,
+                fill_msg=msg
+            )
+
+        # Handle HOLD Decision (Notify User if Loss is significant)
+        elif verdict == "HOLD" and pnl_rate < -1.0:
+            # Throttling: Notify only if sufficient time passed or loss deepened
+            last_notify = trade.get('last_hold_msg_time')
+            last_pnl = trade.get('last_hold_msg_pnl', 0)
             
-            # AI Analysis Conditions:
-            # 1. Loss >= -0.4% (Early stop-loss)
-            # 2. Profit >= +1% (Early profit-taking)
-            should_analyze = False
-            analysis_type = ""
+            now = datetime.now()
+            should_notify = False
             
-            if pnl_rate < -0.4:
-                should_analyze = True
-                analysis_type = "RISK"
-                logger.info(f"⚠️ {name} ({market_type}) in Loss ({pnl_rate:.2f}%). Requesting AI Risk Analysis...")
-            elif pnl_rate >= 5.0: # Raised from 1.0 to 5.0 to avoid early exit
-                should_analyze = True
-                analysis_type = "PROFIT"
-                logger.info(f"💰 {name} ({market_type}) in Profit ({pnl_rate:.2f}%). Requesting AI Profit Analysis...")
+            if not last_notify:
+                should_notify = True
+            else:
+                # 1. Time based: Every 30 mins
+                time_diff = (now - datetime.strptime(last_notify, "%Y-%m-%d %H:%M:%S")).total_seconds() / 60
+                if time_diff >= 30:
+                    should_notify = True
+                # 2. Loss deepened by 1% since last msg
+                elif pnl_rate < (last_pnl - 1.0):
+                    should_notify = True
             
-            if should_analyze:
-                # 2. Fetch Deep Data
-                if market_type == "US":
-                    daily_data = kis.get_overseas_daily_price(symbol, excg)
-                    news = kis.get_overseas_news_titles(symbol)
-                else:  # KR
-                    daily_data = kis.get_daily_price(symbol)
-                    news = kis.get_news_titles(symbol)
+            if should_notify:
+                sl_price = trade.get('stop_loss_price', 0)
+                sl_pct = ((buy_price - sl_price) / buy_price) * 100
                 
-                # 3. AI Assessment
-                try:
-                    decision = selector.assess_risk(symbol, curr_price, buy_price, daily_data, news)
-                    verdict = decision.get('decision')
-                    reason = decision.get('reason')
-                    
-                    logger.info(f"🤖 AI Verdict ({name}): {verdict} - {reason}")
-                    
-                    if verdict == "SELL":
-                        # Execute Early Cut/Profit-Taking
-                        if market_type == "US":
-                            res = kis.sell_overseas_order(symbol, qty, price=curr_price*0.99, excg_cd=excg)
-                        else:  # KR - Market order for quick execution
-                            res = kis.sell_order(symbol, qty, price=0)
-                        
-                        if "error" not in res:
-                            currency = "USD" if market_type == "US" else "KRW"
-                            
-                            if analysis_type == "RISK":
-                                msg = f"🚨 AI 리스크 관리 (손절): {name}\n이유: {reason}\n수익률: {pnl_rate:.2f}%"
-                                result_type = "LOSS (AI)"
-                            else:  # PROFIT
-                                msg = f"💎 AI 수익 실현 (익절): {name}\n이유: {reason}\n수익률: {pnl_rate:.2f}%"
-                                result_type = "WIN (AI)"
-                            
-                            bot.send_message(msg)
-                            
-                            trade['sell_price'] = curr_price
-                            trade['profit_rate'] = pnl_rate
-                            trade['result'] = result_type
-                            trade['sell_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            self.trade_history.append(trade)
-                            self.save_history()
-                            
-                            # Unsubscribe from WebSocket
+                msg = (f"🛡️ AI 리스크 관리 (HOLD): {name}\n"
+                       f"현재 수익률: {pnl_rate:.2f}%\n"
+                       f"판단: 보유 유지 (Reason: {reason})\n"
+                       f"설정된 손절가: -{sl_pct:.1f}%")
                 
-                except Exception as e:
-                    logger.error(f"Error in Risk Monitor ({name}): {e}")
-
-                else: # No Exception
-                    # Handle HOLD Decision (Notify User if Loss is significant)
-                    if verdict == "HOLD" and pnl_rate < -1.0:
-                        # Throttling: Notify only if sufficient time passed or loss deepened
-                        last_notify = trade.get('last_hold_msg_time')
-                        last_pnl = trade.get('last_hold_msg_pnl', 0)
-                        
-                        now = datetime.now()
-                        should_notify = False
-                        
-                        if not last_notify:
-                            should_notify = True
-                        else:
-                            # 1. Time based: Every 30 mins
-                            time_diff = (now - datetime.strptime(last_notify, "%Y-%m-%d %H:%M:%S")).total_seconds() / 60
-                            if time_diff >= 30:
-                                should_notify = True
-                            # 2. Loss deepened by 1% since last msg
-                            elif pnl_rate < (last_pnl - 1.0):
-                                should_notify = True
-                        
-                        if should_notify:
-                            sl_price = trade.get('stop_loss_price', 0)
-                            sl_pct = ((buy_price - sl_price) / buy_price) * 100
-                            
-                            msg = (f"🛡️ AI 리스크 관리 (HOLD): {name}\n"
-                                   f"현재 수익률: {pnl_rate:.2f}%\n"
-                                   f"판단: 보유 유지 (Reason: {reason})\n"
-                                   f"설정된 손절가: -{sl_pct:.1f}%")
-                            
-                            bot.send_message(msg)
-                            
-                            # Update State
-                            trade['last_hold_msg_time'] = now.strftime("%Y-%m-%d %H:%M:%S")
-                            trade['last_hold_msg_pnl'] = pnl_rate
-                            self.save_history() # Persist state in active_trades (via save_history which saves active too?)
-                            # Note: active_trades are NOT persisted to file in current architecture.
-                            # They are re-synced from API on restart.
-                            # So 'last_hold_msg_time' will be lost on restart. This is acceptable.
+                bot.send_message(msg)
+                
+                # Update State
+                trade['last_hold_msg_time'] = now.strftime("%Y-%m-%d %H:%M:%S")
+                trade['last_hold_msg_pnl'] = pnl_rate
+                # Journaled with the position (app/core/position_journal.py), so the
+                # message throttle survives restarts.
 
     def clean_pending_orders(self):
         """Clean up pending orders if needed"""
@@ -925,16 +1103,19 @@ class TradeManager:
                 name = order['prdt_name']
                 logger.info(f"Checking Pending Order {ord_no} for {name} ({rem_qty} sh left)...")
 
-    def check_overnight_holds(self, market_filter="KR"):
+    @timed()
+    async def check_overnight_holds(self, market_filter="KR"):
         """
         Check active trades before market close to see if we should HOLD overnight.
         Criteria: AI analysis returns "HOLD" (Gap-Up potential).
         """
+        from app.core.ai_analyzer import ai_analyzer
+        from app.core.technical_analysis import technical
+
         if not self.active_trades: return
         
         # Only check active trades that are NOT already marked overnight
-        candidates = [s for s, t in self.active_trades.items() 
-                      if t.get('market_type', 'KR') == market_filter and not t.get('overnight')]
+        candidates = [t.symbol for t in self.active_trades.positions(market_filter) if not t.get('overnight')]
         
         if not candidates: return
 
@@ -950,10 +1131,10 @@ class TradeManager:
             try:
                 if market_filter == "US":
                     excg = trade.get('excg', 'NAS')
-                    p_data = kis.get_overseas_price(symbol, excg)
+                    p_data = await asyncio.to_thread(kis.get_overseas_price, symbol, excg)
                     curr_price = float(p_data['last'])
                 else:
-                    p_data = kis.get_current_price(symbol)
+                    p_data = await asyncio.to_thread(kis.get_current_price, symbol)
                     curr_price = float(p_data['stck_prpr'])
             except:
                 logger.warning(f"Could not get price for {name}, skipping overnight check.")
@@ -968,11 +1149,11 @@ class TradeManager:
 
             # Get Data for AI
             if market_filter == "US":
-                daily_data = kis.get_overseas_daily_price(symbol, trade.get('excg', 'NAS'))
-                news = kis.get_overseas_news_titles(symbol)
+                daily_data = await asyncio.to_thread(kis.get_overseas_daily_price, symbol, trade.get('excg', 'NAS'))
+                news = await asyncio.to_thread(kis.get_overseas_news_titles, symbol)
             else:
-                daily_data = kis.get_daily_price(symbol)
-                news = kis.get_news_titles(symbol)
+                daily_data = await asyncio.to_thread(kis.get_daily_price, symbol)
+                news = await asyncio.to_thread(kis.get_news_titles, symbol)
 
             # Analyze Technicals
             mapped_data = []
@@ -990,10 +1171,7 @@ class TradeManager:
 
             # AI Call 
             try:
-                loop = asyncio.get_event_loop()
-                decision = loop.run_until_complete(
-                    ai_analyzer.analyze_overnight_potential(symbol, curr_price, buy_price, tech, news)
-                )
+                decision = await ai_analyzer.analyze_overnight_potential(symbol, curr_price, buy_price, tech, news)
                 
                 if decision.get('decision') == "HOLD":
                     trade['overnight'] = True
@@ -1006,193 +1184,58 @@ class TradeManager:
             except Exception as e:
                 logger.error(f"Error in Overnight Check for {name}: {e}")
 
-    def liquidate_all_positions(self, market_filter="ALL"):
+    LIQUIDATION_DEADLINE = 90.0 # Seconds the liquidation engine keeps re-pricing before reporting leftovers
+
+    @timed()
+    async def liquidate_all_positions(self, market_filter="ALL"):
         """
         Liquidate positions. market_filter: "ALL", "KR", "US"
         Skip trades marked with 'overnight': True
+        [Async] Cancels and exits run concurrently via the liquidation engine (see app/core/liquidation.py).
         """
         logger.info(f"Liquidating {market_filter}...")
-        
-        # 1. KR Liquidation
-        if market_filter in ["ALL", "KR"]:
-            holdings = kis.get_my_stock_balance()
-            if holdings:
-                for stock in holdings:
-                    # Check if this stock is in active_trades and marked as overnight
-                    symbol = stock['pdno']
-                    if symbol in self.active_trades:
-                        if self.active_trades[symbol].get('overnight'):
-                            logger.info(f"🛌 Skipping Liquidation for {stock['prdt_name']} (Overnight Hold)")
-                            continue
-                            
-                    qty = int(stock['hldg_qty'])
-                    if qty > 0:
-                        res = kis.sell_order(stock['pdno'], qty, 0)
-                        
-                        if isinstance(res, dict) and "error" in res:
-                            logger.warn(f"Liquidation failed for {stock['prdt_name']}: {res['error']}. Retrying...")
-                            time.sleep(1)
-                            res = kis.sell_order(stock['pdno'], qty, 0) # Retry
-                        
-                        if isinstance(res, dict) and "error" in res:
-                             bot.send_message(f"❌ 국장 청산 실패 ({stock['prdt_name']}): {res['error']}")
-                             logger.error(f"Final Liquidation failed for {stock['prdt_name']}: {res['error']}")
-                        else:
-                             bot.send_message(f"⏹️ 국장 청산 완료: {stock['prdt_name']}")
-                             if symbol in self.active_trades: del self.active_trades[symbol]
-
-        # 2. US Liquidation
-        if market_filter in ["ALL", "US"]:
-            # Step A: Cancel Outstanding Orders to Unlock Qty
-            try:
-                orders = kis.get_overseas_outstanding_orders()
-                if orders:
-                    logger.info(f"Found {len(orders)} outstanding US orders. Cancelling...")
-                    for o in orders:
-                        oid = o['odno']
-                        sym = o['pdno']
-                        excg = o.get('ovrs_excg_cd', 'NAS') # Default fallback
-                        
-                        logger.info(f"Cancelling Order {oid} for {sym} ({excg})")
-                        kis.cancel_overseas_order(oid, sym, excg)
-                    time.sleep(2)
-            except Exception as e:
-                logger.error(f"Failed to cancel US orders: {e}")
-
-            # Step B: Sell All Holdings
-            ovs_bal = kis.get_overseas_balance()
-            if ovs_bal and 'holdings' in ovs_bal:
-                for stock in ovs_bal['holdings']:
-                    symbol = stock['ovrs_pdno']
-                    
-                    # Check Overnight
-                    if symbol in self.active_trades:
-                        if self.active_trades[symbol].get('overnight'):
-                            logger.info(f"🛌 Skipping Liquidation for {stock['ovrs_item_name']} (Overnight Hold)")
-                            continue
-
-                    qty_str = stock.get('ovrs_ord_psbl_qty', '0')
-                    qty = int(float(qty_str))
-                    
-                    if qty == 0:
-                        qty = int(float(stock.get('ovrs_cblc_qty', '0')))
-                    
-                    if qty > 0:
-                        excg = stock['ovrs_excg_cd']
-                        name = stock['ovrs_item_name']
-                        
-                        current_price_data = kis.get_overseas_price(symbol, excg)
-                        limit_price = 0
-                        if current_price_data and 'last' in current_price_data:
-                            curr_price = float(current_price_data['last'])
-                            limit_price = curr_price * 0.95 
-                        else:
-                            bot.send_message(f"❌ 미장 청산 실패 ({name}): 실시간 시세 조회 불가")
-                            continue
-
-                        res = kis.sell_overseas_order(symbol, qty, price=limit_price, excg_cd=excg)
-                        
-                        if isinstance(res, dict) and "error" in res:
-                             logger.warn(f"US Liquidation failed for {name}: {res['error']}. Retrying...")
-                             time.sleep(1)
-                             res = kis.sell_overseas_order(symbol, qty, price=limit_price, excg_cd=excg)
-
-                        if isinstance(res, dict) and "error" in res:
-                             bot.send_message(f"❌ 미장 청산 실패 ({name}): {res['error']}")
-                             logger.error(f"Final US Liquidation failed for {name}: {res['error']}")
-                        else:
-                             bot.send_message(f"⏹️ 미장 청산 완료 (지정가 ${limit_price:.2f}): {name}")
-                             if symbol in self.active_trades: del self.active_trades[symbol]
+        markets = ["KR", "US"] if market_filter == "ALL" else [market_filter]
+        overnight = {s for s, t in self.active_trades.items() if t.get('overnight')}
 
+        results = await liquidation_engine.run(markets, skip=overnight, deadline=self.LIQUIDATION_DEADLINE)
 
-        # 2. US Liquidation
-        if market_filter in ["ALL", "US"]:
-            # Step A: Cancel Outstanding Orders to Unlock Qty
-            try:
-                orders = kis.get_overseas_outstanding_orders()
-                if orders:
-                    logger.info(f"Found {len(orders)} outstanding US orders. Cancelling...")
-                    for o in orders:
-                        oid = o['odno']
-                        sym = o['pdno']
-                        excg = o.get('ovrs_excg_cd', 'NAS') # Default fallback
-                        
-                        logger.info(f"Cancelling Order {oid} for {sym} ({excg})")
-                        kis.cancel_overseas_order(oid, sym, excg)
-                    
-                    # Wait for cancellation to process
-                    time.sleep(2)
-            except Exception as e:
-                logger.error(f"Failed to cancel US orders: {e}")
-
-            # Step B: Sell All Holdings
-            ovs_bal = kis.get_overseas_balance()
-            if ovs_bal and 'holdings' in ovs_bal:
-                for stock in ovs_bal['holdings']:
-                    # ovrs_ord_psbl_qty or cclt_qty based on availability
-                    # Assuming ovrs_ord_psbl_qty is Orderable Qty
-                    qty_str = stock.get('ovrs_ord_psbl_qty', '0')
-                    qty = int(float(qty_str))
-                    
-                    # If qty is 0, check 'ovrs_cblc_qty' (Total Balance) as fallback IF we just cancelled orders
-                    if qty == 0:
-                        qty = int(float(stock.get('ovrs_cblc_qty', '0')))
-                    
-                    if qty > 0:
-                        symbol = stock['ovrs_pdno']
-                        excg = stock['ovrs_excg_cd']
-                        name = stock['ovrs_item_name']
-                        # Sell with Limit Price (Current Price * 0.95) for immediate execution
-                        # reason: US Market Order (01) is not supported in KIS API for Sell (TTTT1006U).
-                        # We must use Limit Order (00). To ensure fill, we set price lower than current.
-                        
-                        current_price_data = kis.get_overseas_price(symbol, excg)
-                        limit_price = 0
-                        
-                        if current_price_data and 'last' in current_price_data:
-                            curr_price = float(current_price_data['last'])
-                            limit_price = curr_price * 0.95 # 5% lower for immediate fill
-                            logger.info(f"🇺🇸 Liquidation: {name} Current ${curr_price} -> Limit ${limit_price:.2f}")
-                        else:
-                            # Fallback if price fetch fails? Try to use avg price from balance or skip?
-                            # If we can't get price, we can't place valid limit order.
-                            logger.error(f"❌ Failed to get price for {name}. Cannot liquidate without price.")
-                            bot.send_message(f"❌ 미장 청산 실패 ({name}): 실시간 시세 조회 불가")
-                            continue
-
-                        res = kis.sell_overseas_order(symbol, qty, price=limit_price, excg_cd=excg)
-                        
-                        if isinstance(res, dict) and "error" in res:
-                             logger.warn(f"US Liquidation failed for {name}: {res['error']}. Retrying...")
-                             time.sleep(1)
-                             res = kis.sell_overseas_order(symbol, qty, price=limit_price, excg_cd=excg)
-
-                        if isinstance(res, dict) and "error" in res:
-                             bot.send_message(f"❌ 미장 청산 실패 ({name}): {res['error']}")
-                             logger.error(f"Final US Liquidation failed for {name}: {res['error']}")
-                        else:
-                             bot.send_message(f"⏹️ 미장 청산 완료 (지정가 ${limit_price:.2f}): {name}")
-
-        keys_to_remove = [k for k, v in self.active_trades.items() 
-                          if (market_filter == "ALL") or (v.get('market_type') == market_filter)]
-        
-        # Unsubscribe from WebSocket
-        for k in keys_to_remove:
+        for r in results:
+            label = "미장" if r['market'] == "US" else "국장"
+            if r['remaining'] == 0:
+                price = f" (평균 ${r['avg_price']:.2f})" if r['market'] == "US" else ""
+                bot.send_message(f"⏹️ {label} 청산 완료{price}: {r['name']}")
+            else:
+                bot.send_message(f"❌ {label} 청산 실패 ({r['name']}): {r['error']}")
+                logger.error(f"Final Liquidation failed for {r['name']}: {r['error']} ({r['attempts']} attempts)")
+
+        # Fills are booked by _on_sell_event; settle the book against the engine's final view.
+        # Overnight holds (skipped) and partly sold positions stay tracked.
+        for r in results:
+            trade = self.active_trades.get(r['symbol'])
+            if trade is None:
+                continue
+            if r['remaining'] > 0:
+                if trade['qty'] != r['remaining']:
+                    trade['qty'] = r['remaining']
+                continue
             if kis.websocket:
-                kis.websocket.unsubscribe_stock(k)
-                logger.info(f"📡 WebSocket unsubscribed: {k}")
-            del self.active_trades[k]
+                kis.websocket.unsubscribe_stock(r['symbol'])
+                logger.info(f"📡 WebSocket unsubscribed: {r['symbol']}")
+            del self.active_trades[r['symbol']]
 
-        # Return remaining holdings count for verification
+        # Return remaining holdings count for verification (overnight holds are expected to remain)
         rem_count = 0
+        portfolio.invalidate()
+        snap = await portfolio.aget()
         if market_filter in ["ALL", "US"]:
-             ovs_bal = kis.get_overseas_balance()
+             ovs_bal = snap.us
              if ovs_bal and 'holdings' in ovs_bal:
-                 rem_count += len(ovs_bal['holdings'])
+                 rem_count += sum(1 for h in ovs_bal['holdings']
+                                  if h.get('ovrs_pdno') not in overnight and float(h.get('ovrs_cblc_qty') or 0) > 0)
         if market_filter in ["ALL", "KR"]:
-             kr_bal = kis.get_my_stock_balance()
+             kr_bal = snap.kr_holdings
              if kr_bal:
-                 rem_count += len(kr_bal)
+                 rem_count += sum(1 for h in kr_bal if h.get('pdno') not in overnight and int(h.get('hldg_qty') or 0) > 0)
                  
         if rem_count == 0:
             logger.info("✅ All positions successfully liquidated.")
@@ -1201,29 +1244,11 @@ class TradeManager:
             
         return rem_count
 
-    def load_history(self):
-        try:
-            with open("trade_history.json", "r", encoding='utf-8') as f:
-                self.trade_history = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.trade_history = []
-
-    def save_history(self):
-        try:
-            with open("trade_history.json", "w", encoding='utf-8') as f:
-                json.dump(self.trade_history, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save history: {e}")
-
     def get_daily_report(self, market_filter="ALL"):
         self.update_balance()
         
-        # Filter History for Today (or just return all session history if that's what user wants. 
-        # User asked for "Trade History", usually implies "Today's Closed Trades")
-        # For simplicity, returning all history in file implies "Since Last Reset".
-        # Ideally we filter by date, but let's show all available in history file.
-        
-        target_history = [t for t in self.trade_history if market_filter == "ALL" or t['market'] == market_filter]
+        # Today's closed trades (session window, so US trades after midnight are included)
+        target_history = self.trade_store.session_trades(market_filter)
         
         report = f"📊 [{market_filter if market_filter != 'ALL' else '통합'} 일일 리포트]\n"
         report += "\n📜 거래 내역:\n"
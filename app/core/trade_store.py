@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func, case
+from app.db.session import SessionLocal, engine
+from app.db.models import TradeRecord
+
+logger = logging.getLogger(__name__)
+
+
+class TradeStore:
+    """
+    Closed-trade history in SQLite (trade_history table, indexed by market + sell time).
+    Inserts are append-only; reports and the optimizer query by market / time window.
+    Records are normalized on the way in:
+    - 'market' is always set (legacy records used 'market' or 'market_type')
+    - 'profit_rate' / 'result' are derived from buy/sell price when missing (e.g. manual sells)
+    The table is created (and the legacy trade_history.json imported once and renamed to
+    *.migrated) by setup() at startup, or on first use - never on import.
+    """
+    TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    COLUMNS = ("symbol", "name", "market", "qty", "buy_price", "sell_price", "profit_rate", "result", "buy_time", "sell_time")
+
+    def __init__(self, history_file: str = "trade_history.json", session_factory=SessionLocal, db_engine=engine):
+        self.history_file = history_file
+        self._session_factory = session_factory
+        self.engine = db_engine
+        self._ready = False
+        self._setup_lock = threading.Lock()
+
+    def setup(self):
+        """Create the trade_history table if missing and run the legacy JSON migration (once)."""
+        if self._ready:
+            return
+        with self._setup_lock:
+            if not self._ready:
+                TradeRecord.__table__.create(bind=self.engine, checkfirst=True)
+                self.migrate_json()
+                self._ready = True
+
+    def _session(self):
+        self.setup()
+        return self._session_factory()
+
+    def migrate_json(self) -> int:
+        """One-time import of the legacy JSON history (skipped if the table already has rows)."""
+        if not os.path.exists(self.history_file):
+            return 0
+        with self._session_factory() as db: # Called from setup(): table exists, not ready yet
+            if db.query(TradeRecord.id).first() is not None:
+                logger.warning(f"{self.history_file} found but trade_history table is not empty. Skipping migration.")
+                return 0
+            try:
+                with open(self.history_file, "r", encoding='utf-8') as f:
+                    raw = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.error(f"Failed to read {self.history_file} for migration: {e}")
+                return 0
+            db.add_all([self._to_row(self._normalize(r)) for r in raw])
+            db.commit()
+
+        os.replace(self.history_file, self.history_file + ".migrated")
+        logger.info(f"📦 Migrated {len(raw)} trades from {self.history_file} to SQLite")
+        return len(raw)
+
+    def _normalize(self, record: dict, symbol: str = None) -> dict:
+        rec = dict(record)
+        if symbol and not rec.get('symbol'):
+            rec['symbol'] = symbol
+        rec['market'] = rec.get('market') or rec.get('market_type') or "KR"
+        rec.pop('market_type', None)
+
+        buy_price = float(rec.get('buy_price') or 0)
+        sell_price = float(rec.get('sell_price') or 0)
+        if rec.get('profit_rate') is None:
+            rec['profit_rate'] = ((sell_price - buy_price) / buy_price * 100) if buy_price > 0 and sell_price > 0 else 0.0
+        if not rec.get('result'):
+            rec['result'] = "WIN" if rec['profit_rate'] > 0 else "LOSS"
+        if not rec.get('sell_time'):
+            rec['sell_time'] = datetime.now().strftime(self.TIME_FORMAT)
+        return rec
+
+    def _to_row(self, rec: dict) -> TradeRecord:
+        extra = {k: v for k, v in rec.items() if k not in self.COLUMNS}
+        return TradeRecord(
+            symbol=rec.get('symbol'),
+            name=rec.get('name'),
+            market=rec['market'],
+            qty=int(rec.get('qty') or rec.get('quantity') or 0),
+            buy_price=float(rec.get('buy_price') or 0),
+            sell_price=float(rec.get('sell_price') or 0),
+            profit_rate=float(rec['profit_rate']),
+            result=rec['result'],
+            buy_time=str(rec['buy_time']) if rec.get('buy_time') else None,
+            sell_time=str(rec['sell_time']),
+            extra=json.dumps(extra, ensure_ascii=False, default=str) if extra else None
+        )
+
+    @staticmethod
+    def _to_dict(row: TradeRecord) -> dict:
+        rec = json.loads(row.extra) if row.extra else {}
+        rec.update({
+            "symbol": row.symbol,
+            "name": row.name,
+            "market": row.market,
+            "qty": row.qty,
+            "buy_price": row.buy_price,
+            "sell_price": row.sell_price,
+            "profit_rate": row.profit_rate,
+            "result": row.result,
+            "sell_time": row.sell_time,
+        })
+        if row.buy_time:
+            rec['buy_time'] = row.buy_time
+        return rec
+
+    def append(self, record: dict, symbol: str = None) -> dict:
+        """Normalize and insert a closed trade. Returns the stored record."""
+        rec = self._normalize(record, symbol)
+        try:
+            with self._session() as db:
+                db.add(self._to_row(rec))
+                db.commit()
+        except Exception as e:
+            logger.error(f"Failed to save trade history: {e}")
+        return rec
+
+    def _filtered(self, db, market: str, since: datetime, until: datetime):
+        q = db.query(TradeRecord)
+        if market != "ALL":
+            q = q.filter(TradeRecord.market == market)
+        if since is not None:
+            q = q.filter(TradeRecord.sell_time >= since.strftime(self.TIME_FORMAT))
+        until = until or datetime.now() + timedelta(seconds=1)
+        return q.filter(TradeRecord.sell_time < until.strftime(self.TIME_FORMAT))
+
+    def query(self, market: str = "ALL", since: datetime = None, until: datetime = None) -> list:
+        """Closed trades for a market (or ALL) with since <= sell_time < until, oldest first."""
+        with self._session() as db:
+            rows = self._filtered(db, market, since, until).order_by(TradeRecord.sell_time, TradeRecord.id).all()
+            return [self._to_dict(r) for r in rows]
+
+    def session_trades(self, market: str = "ALL", hours: int = 12) -> list:
+        """Trades closed within the current session window (US sessions span midnight KST)."""
+        return self.query(market, since=datetime.now() - timedelta(hours=hours))
+
+    def session_stats(self, market: str, hours: int = 12) -> dict:
+        return self.stats(market, since=datetime.now() - timedelta(hours=hours))
+
+    def stats(self, market: str, since: datetime = None, until: datetime = None) -> dict:
+        """Win rate / avg P&L / count aggregated in SQL."""
+        with self._session() as db:
+            q = self._filtered(db, market, since, until).with_entities(
+                func.count(TradeRecord.id),
+                func.sum(case((TradeRecord.profit_rate > 0, 1), else_=0)),
+                func.avg(TradeRecord.profit_rate)
+            )
+            total, wins, avg_pnl = q.one()
+
+        if not total:
+            return {"win_rate": 0, "pnl": 0, "count": 0}
+        return {
+            "win_rate": round((wins / total) * 100, 1),
+            "pnl": round(avg_pnl, 2),
+            "count": total
+        }
+
+
+trade_store = TradeStore()
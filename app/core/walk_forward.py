@@ -0,0 +1,295 @@
+import bisect
+import json
+import logging
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+import numpy as np
+from app.core.backtest_engine import BacktestEngine
+from app.core.selection_rules import (is_excluded, daily_change_pct, kr_hard_filter, rank_candidates,
+                                      MAX_CANDIDATES)
+from app.core.technical_analysis import technical
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DAYS = 100 # Daily rows handed to technical.analyze (kis.get_daily_price default)
+PRE_MARKET_POOL = 30 # Volume leaders the pre-market Top 10 is picked from (selector.select_pre_market_picks)
+PRE_MARKET_PICKS = 10
+
+
+class Universe:
+    """
+    Locally stored daily OHLCV for a symbol universe, served as KIS daily rows
+    (stck_bsop_date / stck_oprc / stck_hgpr / stck_lwpr / stck_clpr / acml_vol, newest first)
+    so the selector stages run on it unchanged.
+    """
+    def __init__(self, rows: dict, names: dict = None):
+        self.rows = rows                          # symbol -> rows ascending by date
+        self.names = names or {}
+        self.dates = {s: [r['stck_bsop_date'] for r in rs] for s, rs in rows.items()}
+
+    @classmethod
+    def load(cls, path: str):
+        """CSV (date, symbol, [name], open, high, low, close, volume) or a directory of <symbol>.csv files."""
+        import pandas as pd
+        if os.path.isdir(path):
+            frames = []
+            for fname in sorted(os.listdir(path)):
+                if fname.endswith(".csv"):
+                    df = pd.read_csv(os.path.join(path, fname), dtype=str)
+                    df.columns = [c.lower() for c in df.columns]
+                    df["symbol"] = df.get("symbol", os.path.splitext(fname)[0])
+                    frames.append(df)
+            df = pd.concat(frames, ignore_index=True)
+        else:
+            df = pd.read_csv(path, dtype=str)
+            df.columns = [c.lower() for c in df.columns]
+
+        df["date"] = df["date"].str.replace("-", "", regex=False)
+        df = df.sort_values(["symbol", "date"])
+        rows, names = {}, {}
+        for symbol, g in df.groupby("symbol", sort=False):
+            rows[symbol] = [{"stck_bsop_date": r.date, "stck_oprc": r.open, "stck_hgpr": r.high, "stck_lwpr": r.low,
+                             "stck_clpr": r.close, "acml_vol": r.volume} for r in g.itertuples()]
+            if "name" in g.columns:
+                names[symbol] = g["name"].iloc[-1]
+        return cls(rows, names)
+
+    def trading_days(self) -> list:
+        return sorted({d for ds in self.dates.values() for d in ds})
+
+    def history_before(self, symbol: str, day: str, n: int = HISTORY_DAYS) -> list:
+        """Rows strictly before `day`, newest first (what the selector sees before the open)."""
+        i = bisect.bisect_left(self.dates[symbol], day)
+        return self.rows[symbol][max(0, i - n):i][::-1]
+
+    def bar(self, symbol: str, day: str):
+        ds = self.dates[symbol]
+        i = bisect.bisect_left(ds, day)
+        return self.rows[symbol][i] if i < len(ds) and ds[i] == day else None
+
+
+def synthetic_universe(symbols: int = 200, days: int = 160, seed: int = 7) -> Universe:
+    """Random-walk daily bars on weekdays (harness smoke tests)."""
+    rng = np.random.default_rng(seed)
+    dates, d = [], date(2026, 1, 2)
+    while len(dates) < days:
+        if d.weekday() < 5:
+            dates.append(d.strftime("%Y%m%d"))
+        d += timedelta(days=1)
+    rows = {}
+    for k in range(symbols):
+        close = rng.uniform(3_000, 150_000) * np.exp(np.cumsum(rng.normal(0.0005, 0.025, days)))
+        open_ = close * np.exp(rng.normal(0, 0.01, days))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.015, days)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.015, days)))
+        vol = rng.lognormal(13, 1, days)
+        rows[f"{k:06d}"] = [{"stck_bsop_date": dates[i], "stck_oprc": f"{open_[i]:.0f}", "stck_hgpr": f"{high[i]:.0f}",
+                             "stck_lwpr": f"{low[i]:.0f}", "stck_clpr": f"{close[i]:.0f}", "acml_vol": f"{vol[i]:.0f}"}
+                            for i in range(days)]
+    return Universe(rows)
+
+
+# --- Day evaluation (worker processes) ---
+_worker = {}
+
+
+def _init_worker(universe, budget, max_candidates):
+    _worker.update(universe=universe, budget=budget, max_candidates=max_candidates)
+
+
+def evaluate_day(day: str) -> dict:
+    """Sourcing + hard filters for one day, with each candidate's bar on that day (the outcome)."""
+    u, budget = _worker["universe"], _worker["budget"]
+
+    # Sourcing: previous day's volume leaders (stand-in for the volume rank), ETFs / SPACs excluded
+    sourced = []
+    for symbol in u.rows:
+        name = u.names.get(symbol, symbol)
+        if is_excluded(name):
+            continue
+        bar = u.bar(symbol, day)
+        history = u.history_before(symbol, day)
+        if bar is None or len(history) < 2:
+            continue
+        sourced.append((float(history[0]['acml_vol']), symbol, name, history, bar))
+    sourced.sort(key=lambda x: -x[0])
+
+    candidates = []
+    for _, symbol, name, history, bar in sourced[:_worker["max_candidates"]]:
+        tech = technical.analyze(history)
+        change = daily_change_pct(history)
+        reject = kr_hard_filter(tech, change, budget)
+        summary = {k: float(v) for k, v in tech.items() if isinstance(v, (int, float, np.number))}
+        summary.update(trend=tech.get('trend'), daily_change=change)
+        candidates.append({
+            "symbol": symbol,
+            "name": name,
+            "reject": reject,
+            "tech_summary": summary,
+            "bar": [float(bar[k]) for k in ("stck_oprc", "stck_hgpr", "stck_lwpr", "stck_clpr")],
+        })
+    return {"date": day, "candidates": candidates}
+
+
+# --- AI scorers ---
+
+class StubScorer:
+    """Deterministic stand-in for the AI batch score (same 40~95 hash scheme as app/mock/llm_stub.py, per day)."""
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+
+    def score(self, day: str, jobs: list) -> dict:
+        out = {}
+        for job in jobs:
+            score = 40 + zlib.crc32(f"{self.seed}:{day}:{job['symbol']}".encode()) % 56
+            out[job['symbol']] = {"score": score, "reason": "스텁 점수",
+                                  "strategy": {"target_price": 3.0, "stop_loss": 2.0}}
+        return out
+
+
+class CachedScorer:
+    """
+    AI scores cached per (day, symbol) in a JSON file. Missing entries come from the fallback
+    scorer, or from the real AI (ai_analyzer.analyze_stocks_batch) after fill_with_ai().
+    """
+    def __init__(self, path: str, fallback=None):
+        self.path = path
+        self.fallback = fallback or StubScorer()
+        self.cache = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.cache = json.load(f)
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _key(day, symbol):
+        return f"{day}|{symbol}"
+
+    def score(self, day: str, jobs: list) -> dict:
+        out, missing = {}, []
+        for job in jobs:
+            cached = self.cache.get(self._key(day, job['symbol']))
+            if cached is not None:
+                out[job['symbol']] = cached
+                self.hits += 1
+            else:
+                missing.append(job)
+        if missing:
+            self.misses += len(missing)
+            out.update(self.fallback.score(day, missing))
+        return out
+
+    async def fill_with_ai(self, day_jobs: dict, batch_size: int = 5):
+        """Score uncached jobs with the real AI (batches of batch_size, like the selector) and save."""
+        from app.core.ai_analyzer import ai_analyzer
+        for day, jobs in day_jobs.items():
+            todo = [j for j in jobs if self._key(day, j['symbol']) not in self.cache]
+            for i in range(0, len(todo), batch_size):
+                # Only what the selector had before the open (never the day's bar)
+                batch = [{"symbol": j['symbol'], "name": j['name'], "tech_summary": j['tech_summary'],
+                          "news_titles": [], "market_status": "Neutral"} for j in todo[i:i + batch_size]]
+                results = await ai_analyzer.analyze_stocks_batch(batch)
+                for symbol, res in results.items():
+                    if isinstance(res, dict):
+                        self.cache[self._key(day, symbol)] = res
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def pre_market_pool(candidates: list) -> list:
+    """Pre-market Top 10 pool: the first PRE_MARKET_POOL volume leaders, hard filters not applied."""
+    # No daily history -> skipped by the live pipeline as well
+    return [c for c in candidates[:PRE_MARKET_POOL] if c["reject"] != "no_data"]
+
+
+class WalkForward:
+    """
+    Re-runs the KR selector stages day by day over a local universe:
+    sourcing (volume leaders) -> hard filters -> AI score -> ranking (top target_count),
+    and the pre-market pipeline: top PRE_MARKET_PICKS of the first PRE_MARKET_POOL leaders by
+    AI score, no hard filters (the AI trend screening step is not replayed, and the hot-trend
+    score comes from the same scorer as the batch score).
+    Each candidate enters at that day's open and exits with the live exit rules on the day's bar.
+    Days are independent, so sourcing / filters run on a process pool;
+    scoring and ranking run in the main process (cache / AI client live there).
+    """
+    def __init__(self, universe: Universe, scorer=None, budget: float = None, target_count: int = 3,
+                 max_candidates: int = MAX_CANDIDATES, workers: int = None, engine: BacktestEngine = None):
+        self.universe = universe
+        self.scorer = scorer or StubScorer()
+        self.budget = budget
+        self.target_count = target_count
+        self.max_candidates = max_candidates
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine or BacktestEngine()
+        self.elapsed = 0.0
+
+    def days(self, start: str = None, end: str = None) -> list:
+        return [d for d in self.universe.trading_days() if (not start or d >= start) and (not end or d <= end)]
+
+    def filter_days(self, days: list) -> list:
+        args = (self.universe, self.budget, self.max_candidates)
+        if self.workers == 1:
+            _init_worker(*args)
+            return [evaluate_day(d) for d in days]
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=args) as pool:
+            return list(pool.map(evaluate_day, days, chunksize=max(1, len(days) // (self.workers * 4))))
+
+    def run(self, start: str = None, end: str = None, day_results: list = None) -> dict:
+        t0 = time.perf_counter()
+        day_results = day_results if day_results is not None else self.filter_days(self.days(start, end))
+
+        groups = {"sourced": [], "passed": [], "selected": [], "pre_market": []}
+        rejected = {}
+        for res in day_results:
+            passed = [c for c in res["candidates"] if c["reject"] is None]
+            pool = pre_market_pool(res["candidates"])
+            scores = self.scorer.score(res["date"], passed + [c for c in pool if c["reject"] is not None])
+            picks = {p["symbol"] for p in rank_candidates(passed, scores)[:self.target_count]}
+            pool.sort(key=lambda c: -float(scores.get(c["symbol"], {}).get("score", 0)))
+            groups["pre_market"].extend(pool[:PRE_MARKET_PICKS])
+            for c in res["candidates"]:
+                groups["sourced"].append(c)
+                if c["reject"]:
+                    rejected.setdefault(c["reject"], []).append(c)
+                else:
+                    groups["passed"].append(c)
+                    if c["symbol"] in picks:
+                        groups["selected"].append(c)
+
+        report = {
+            "days": len(day_results),
+            "groups": {name: self._outcome(cs) for name, cs in groups.items()},
+            "rejected": {reason: self._outcome(cs) for reason, cs in sorted(rejected.items())},
+        }
+        self.elapsed = time.perf_counter() - t0
+        report["elapsed_s"] = round(self.elapsed, 2)
+        return report
+
+    def _outcome(self, candidates: list) -> dict:
+        """
+        Open entry, live exit rules on the day's bar; plus plain open-to-close return.
+        The bar is walked O-L-H-C whatever its colour: for a long the stop is always
+        tested before the target (worst case when only the daily bar is known).
+        """
+        if not candidates:
+            return {"count": 0}
+        bars = np.array([c["bar"] for c in candidates]) # open, high, low, close
+        path = bars[:, [0, 2, 1, 3]]
+        result = self.engine.run(path)
+        open_to_close = (bars[:, 3] / bars[:, 0] - 1) * 100
+        return {
+            "count": len(candidates),
+            "avg_pnl_pct": round(float(result.pnl_pct.mean()), 3),
+            "win_rate": round(float((result.pnl_pct > 0).mean() * 100), 1),
+            "avg_open_to_close_pct": round(float(open_to_close.mean()), 3),
+        }
@@ -1 +1,2 @@
 from .session import Base, engine, get_db
+from .models import TradeRecord
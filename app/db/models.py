@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Float, String, Text, Index
+from .session import Base
+
+
+class TradeRecord(Base):
+    """Closed trade (one row per exit fill). Times are local 'YYYY-MM-DD HH:MM:SS' strings."""
+    __tablename__ = "trade_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    symbol = Column(String(20), index=True)
+    name = Column(String(100))
+    market = Column(String(4), nullable=False)
+    qty = Column(Integer, default=0)
+    buy_price = Column(Float, default=0.0)
+    sell_price = Column(Float, default=0.0)
+    profit_rate = Column(Float, default=0.0)
+    result = Column(String(20))
+    buy_time = Column(String(19))
+    sell_time = Column(String(19), nullable=False)
+    extra = Column(Text) # JSON: any other fields (order numbers, execution latencies, ...)
+
+    __table_args__ = (
+        Index("ix_trade_history_market_sell_time", "market", "sell_time"),
+        Index("ix_trade_history_sell_time", "sell_time"),
+    )
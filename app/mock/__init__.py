@@ -0,0 +1 @@
+# Init mock package (local stand-ins for external services)
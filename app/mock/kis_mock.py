@@ -0,0 +1,489 @@
+"""
+Offline KIS Mock Server (REST + WebSocket).
+
+A self-contained stand-in for the KIS endpoints the bot uses - quotations, daily charts,
+volume rank, KR / US orders, cancels, fills and balances, token / approval key and the
+real-time WebSocket - with KIS-like rate limits and a configurable latency distribution.
+Prices are random walks that advance with wall time; any symbol is accepted, so the
+universe can be scaled freely. Point the bot at it via `.env`:
+
+    KIS_BASE_URL=http://127.0.0.1:8300
+    KIS_WS_URL=ws://127.0.0.1:8300/ws
+
+Run:
+    python -m app.mock.kis_mock --port 8300 --rate 20 --latency lognormal:-3.5,0.5 --order-latency fixed:0.08
+
+Limits modelled on KIS (real account defaults; virtual accounts are much lower):
+- REST: `rate` requests/s per app key (token bucket) -> HTTP 500 EGW00201 when exceeded
+- Token: one issue per minute -> HTTP 403 EGW00133
+- WebSocket: 41 registrations per session -> OPSP0008
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+from app.mock.llm_stub import LatencyModel
+
+logger = logging.getLogger(__name__)
+
+MAX_WS_REGISTRATIONS = 41
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second with bursts up to `burst`."""
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def allow(self) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class MockMarket:
+    """Per-symbol random-walk prices (created on first use) plus deterministic daily history."""
+    def __init__(self, kr_symbols: int = 200, seed: int = 42, volatility: float = 0.0005):
+        self.seed = seed
+        self.volatility = volatility    # Per-second std of log returns
+        self.rng = random.Random(seed)
+        self.quotes = {}                # symbol -> [price, prev_close, volume, updated]
+        self.kr_universe = [f"{100000 + i:06d}" for i in range(kr_symbols)]
+
+    def _hash(self, symbol: str) -> int:
+        return zlib.crc32(f"{self.seed}:{symbol}".encode())
+
+    def name(self, symbol: str) -> str:
+        return f"모의{symbol}" if symbol.isdigit() else symbol
+
+    def quote(self, symbol: str) -> list:
+        q = self.quotes.get(symbol)
+        now = time.monotonic()
+        if q is None:
+            h = self._hash(symbol)
+            base = 5_000 + h % 195_000 if symbol.isdigit() else 10 + (h % 49_000) / 100
+            q = self.quotes[symbol] = [base, base, h % 1_000_000, now]
+        elapsed = now - q[3]
+        if elapsed > 0:
+            q[0] *= math.exp(self.rng.gauss(0, self.volatility * math.sqrt(elapsed)))
+            q[2] += int(self.rng.expovariate(1 / 200) * elapsed) + 1
+            q[3] = now
+        return q
+
+    def tick(self, symbol: str) -> str:
+        price = round(self.quote(symbol)[0], 0 if symbol.isdigit() else 2)
+        if price == int(price):
+            price = int(price)
+        return str(price)
+
+    def daily(self, symbol: str, days: int = 100) -> list:
+        """Daily bars ending yesterday, newest first (close of the last bar = today's prev_close)."""
+        rng = random.Random(self._hash(symbol))
+        close = self.quote(symbol)[1]
+        rows, day = [], datetime.now() - timedelta(days=1)
+        while len(rows) < days:
+            if day.weekday() < 5:
+                open_ = close * math.exp(rng.gauss(0, 0.01))
+                rows.append((day.strftime("%Y%m%d"), open_, max(open_, close) * (1 + abs(rng.gauss(0, 0.01))),
+                             min(open_, close) * (1 - abs(rng.gauss(0, 0.01))), close, int(rng.lognormvariate(12, 1))))
+                close = close / math.exp(rng.gauss(0.0005, 0.02))
+            day -= timedelta(days=1)
+        return rows
+
+    def volume_rank(self, size: int = 30) -> list:
+        ranked = sorted(self.kr_universe, key=lambda s: -self.quote(s)[2])[:size]
+        rows = []
+        for i, s in enumerate(ranked, 1):
+            price, prev, volume, _ = self.quote(s)
+            rows.append({"hts_kor_isnm": self.name(s), "mksc_shrn_iscd": s, "data_rank": str(i),
+                         "stck_prpr": f"{price:.0f}", "prdy_ctrt": f"{(price / prev - 1) * 100:.2f}",
+                         "acml_vol": str(volume)})
+        return rows
+
+
+class MockAccount:
+    """Cash, holdings and orders for one KR and one US account. Orders fill at the mock price."""
+    def __init__(self, market: MockMarket, cash_krw: float = 100_000_000, cash_usd: float = 100_000,
+                 fill_delay: float = 0.0):
+        self.market = market
+        self.cash = {"KR": cash_krw, "US": cash_usd}
+        self.holdings = {"KR": {}, "US": {}}     # symbol -> [qty, avg_price, excg]
+        self.orders = {}                         # odno -> order dict
+        self.fill_delay = fill_delay
+        self._seq = 0
+
+    def place(self, market_type: str, side: str, symbol: str, qty: int, price: float, excg: str = ""):
+        """(ok, output | (msg_cd, msg1))"""
+        if qty <= 0:
+            return False, ("APBK0012", "주문수량을 확인하세요")
+        ref = float(self.market.tick(symbol))
+        if side == "BUY" and (price or ref) * qty > self.cash[market_type]:
+            return False, ("APBK0952", "주문가능금액을 초과 했습니다")
+        held = self.holdings[market_type].get(symbol, [0, 0, excg])[0]
+        reserved = sum(o["qty"] - o["filled"] for o in self.orders.values()
+                       if o["market"] == market_type and o["symbol"] == symbol and o["side"] == "SELL" and o["open"])
+        if side == "SELL" and qty > held - reserved:
+            return False, ("APBK0400", "주문 가능한 수량을 초과하였습니다")
+
+        self._seq += 1
+        odno = f"{self._seq:010d}"
+        self.orders[odno] = {"odno": odno, "market": market_type, "side": side, "symbol": symbol, "qty": qty,
+                             "price": price, "excg": excg, "filled": 0, "avg": 0.0, "open": True,
+                             "cancelled": False, "placed": time.monotonic(), "time": datetime.now().strftime("%H%M%S")}
+        return True, {"KRX_FWDG_ORD_ORGNO": "91252", "ODNO": odno, "ORD_TMD": self.orders[odno]["time"]}
+
+    def cancel(self, odno: str):
+        order = self.orders.get(str(odno).lstrip("0").zfill(10))
+        if not order or not order["open"]:
+            return False, ("APBK0344", "취소할 수량이 없습니다")
+        self._match(order)
+        if not order["open"]:
+            return False, ("APBK0344", "취소할 수량이 없습니다")
+        order["open"], order["cancelled"] = False, True
+        return True, {"KRX_FWDG_ORD_ORGNO": "91252", "ODNO": f"{self._seq + 1:010d}", "ORD_TMD": datetime.now().strftime("%H%M%S")}
+
+    def _match(self, order: dict):
+        """Fill an open order if it is marketable (market orders always) and fill_delay has passed."""
+        if not order["open"] or time.monotonic() - order["placed"] < self.fill_delay:
+            return
+        price = float(self.market.tick(order["symbol"]))
+        limit = order["price"]
+        if limit and ((order["side"] == "BUY" and price > limit) or (order["side"] == "SELL" and price < limit)):
+            return
+        qty, market_type = order["qty"], order["market"]
+        holdings = self.holdings[market_type]
+        if order["side"] == "BUY":
+            held = holdings.setdefault(order["symbol"], [0, 0.0, order["excg"]])
+            held[1] = (held[0] * held[1] + qty * price) / (held[0] + qty)
+            held[0] += qty
+            self.cash[market_type] -= qty * price
+        else:
+            held = holdings[order["symbol"]]
+            held[0] -= qty
+            if held[0] <= 0:
+                del holdings[order["symbol"]]
+            self.cash[market_type] += qty * price
+        order.update(filled=qty, avg=price, open=False)
+
+    def match_all(self):
+        for order in self.orders.values():
+            self._match(order)
+
+    # --- Inquiry rows (KIS field names the bot reads) ---
+
+    def kr_ccld_rows(self) -> list:
+        self.match_all()
+        return [{"odno": o["odno"], "pdno": o["symbol"], "prdt_name": self.market.name(o["symbol"]),
+                 "sll_buy_dvsn_cd": "02" if o["side"] == "BUY" else "01", "ord_qty": str(o["qty"]),
+                 "tot_ccld_qty": str(o["filled"]), "avg_prvs": f"{o['avg']:.0f}",
+                 "rmn_qty": str(o["qty"] - o["filled"] if o["open"] else 0), "rjct_qty": "0",
+                 "cncl_yn": "Y" if o["cancelled"] else "N", "ord_tmd": o["time"]}
+                for o in reversed(list(self.orders.values())) if o["market"] == "KR"]
+
+    def us_ccnl_rows(self) -> list:
+        self.match_all()
+        status = lambda o: "취소" if o["cancelled"] else ("완료" if not o["open"] else "접수")
+        return [{"odno": o["odno"], "pdno": o["symbol"], "prdt_name": o["symbol"], "ovrs_excg_cd": o["excg"],
+                 "sll_buy_dvsn_cd": "02" if o["side"] == "BUY" else "01", "ft_ord_qty": str(o["qty"]),
+                 "ft_ccld_qty": str(o["filled"]), "ft_ccld_unpr3": f"{o['avg']:.4f}",
+                 "nccs_qty": str(o["qty"] - o["filled"] if o["open"] else 0), "prcs_stat_name": status(o),
+                 "rjct_rson": "", "ord_tmd": o["time"]}
+                for o in reversed(list(self.orders.values())) if o["market"] == "US"]
+
+    def kr_balance(self) -> dict:
+        self.match_all()
+        rows, evlu = [], 0.0
+        for symbol, (qty, avg, _) in self.holdings["KR"].items():
+            price = float(self.market.tick(symbol))
+            evlu += qty * price
+            rows.append({"pdno": symbol, "prdt_name": self.market.name(symbol), "hldg_qty": str(qty),
+                         "ord_psbl_qty": str(qty), "pchs_avg_pric": f"{avg:.2f}", "prpr": f"{price:.0f}",
+                         "evlu_amt": f"{qty * price:.0f}", "evlu_pfls_rt": f"{(price / avg - 1) * 100:.2f}"})
+        cash = self.cash["KR"]
+        return {"output1": rows, "output2": [{"dnca_tot_amt": f"{cash:.0f}", "prvs_rcdl_excc_amt": f"{cash:.0f}",
+                                              "scts_evlu_amt": f"{evlu:.0f}", "tot_evlu_amt": f"{cash + evlu:.0f}"}]}
+
+    def us_balance(self, excg: str) -> dict:
+        self.match_all()
+        rows, evlu = [], 0.0
+        for symbol, (qty, avg, held_excg) in self.holdings["US"].items():
+            if held_excg and held_excg != excg:
+                continue
+            price = float(self.market.tick(symbol))
+            evlu += qty * price
+            rows.append({"ovrs_pdno": symbol, "ovrs_item_name": symbol, "ovrs_excg_cd": held_excg or excg,
+                         "ovrs_cblc_qty": str(qty), "ord_psbl_qty": str(qty), "pchs_avg_pric": f"{avg:.4f}",
+                         "now_pric2": f"{price:.4f}", "ovrs_stck_evlu_amt": f"{qty * price:.2f}",
+                         "evlu_pfls_rt": f"{(price / avg - 1) * 100:.2f}"})
+        return {"output1": rows, "output2": {"frcr_evlu_amt2": f"{evlu:.2f}", "ovrs_tot_pfls": "0",
+                                             "tot_evlu_pfls_amt": "0", "frcr_dncl_amt_2": f"{self.cash['US']:.2f}",
+                                             "ovrs_ord_psbl_amt": f"{self.cash['US']:.2f}"}}
+
+
+def ok(output, key="output", **extra):
+    return {"rt_cd": "0", "msg_cd": "MCA00000", "msg1": "정상처리 되었습니다.", key: output, **extra}
+
+
+def fail(msg_cd, msg1, status_code=200):
+    return JSONResponse({"rt_cd": "1", "msg_cd": msg_cd, "msg1": msg1}, status_code=status_code)
+
+
+def create_app(market: MockMarket = None, account: MockAccount = None, rate: float = 20.0,
+               latency: LatencyModel = None, order_latency: LatencyModel = None,
+               rank_size: int = 30, ws_rate: float = 2.0) -> FastAPI:
+    """
+    rate: REST requests/s per app key (0 = unlimited).
+    ws_rate: real-time frames per second per registered symbol.
+    """
+    market = market or MockMarket()
+    account = account or MockAccount(market)
+    latency = latency or LatencyModel()
+    order_latency = order_latency or latency
+    limiters = {}
+    stats = {"requests": 0, "rate_limited": 0, "orders": 0, "rejected_orders": 0, "cancels": 0,
+             "token_issues": 0, "ws_clients": 0, "ws_frames": 0, "by_path": {}}
+    token_state = {"issued": 0.0}
+
+    app = FastAPI(title="KIS Mock")
+
+    @app.middleware("http")
+    async def throttle(request: Request, call_next):
+        path = request.url.path
+        if path.startswith("/uapi/"):
+            stats["requests"] += 1
+            stats["by_path"][path] = stats["by_path"].get(path, 0) + 1
+            key = request.headers.get("appkey", "")
+            limiter = limiters.get(key) or limiters.setdefault(key, RateLimiter(rate))
+            if not limiter.allow():
+                stats["rate_limited"] += 1
+                return fail("EGW00201", "초당 거래건수를 초과하였습니다.", 500)
+            is_order = "/trading/order" in path
+            await asyncio.sleep((order_latency if is_order else latency).sample())
+        return await call_next(request)
+
+    @app.get("/mock/stats")
+    async def get_stats():
+        return {**stats, "open_orders": sum(1 for o in account.orders.values() if o["open"]),
+                "symbols": len(market.quotes), "cash": account.cash}
+
+    # --- Auth ---
+
+    @app.post("/oauth2/tokenP")
+    async def token():
+        now = time.time()
+        if now - token_state["issued"] < 60:
+            return fail("EGW00133", "접근토큰 발급 잠시 후 다시 시도하세요(1분당 1회)", 403)
+        token_state["issued"] = now
+        stats["token_issues"] += 1
+        return {"access_token": f"mock-token-{stats['token_issues']}", "token_type": "Bearer", "expires_in": 86400,
+                "access_token_token_expired": (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")}
+
+    @app.post("/oauth2/Approval")
+    async def approval():
+        return {"approval_key": "mock-approval-key"}
+
+    # --- Domestic quotations ---
+
+    @app.get("/uapi/domestic-stock/v1/quotations/inquire-price")
+    async def inquire_price(request: Request):
+        q = request.query_params
+        symbol = q.get("fid_input_iscd") or q.get("FID_INPUT_ISCD", "")
+        price, prev, volume, _ = market.quote(symbol)
+        if (q.get("FID_COND_MRKT_DIV_CODE") or q.get("fid_cond_mrkt_div_code")) == "U": # Index
+            return ok({"bstp_nmiv": f"{price / 20:.2f}", "prdy_vrss": f"{(price - prev) / 20:.2f}",
+                       "bstp_nmix_prdy_ctrt": f"{(price / prev - 1) * 100:.2f}"})
+        return ok({"stck_prpr": f"{price:.0f}", "stck_sdpr": f"{prev:.0f}", "acml_vol": str(volume),
+                   "prdy_vrss": f"{price - prev:.0f}", "prdy_ctrt": f"{(price / prev - 1) * 100:.2f}",
+                   "stck_oprc": f"{prev:.0f}", "stck_hgpr": f"{max(price, prev):.0f}", "stck_lwpr": f"{min(price, prev):.0f}"})
+
+    @app.get("/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice")
+    async def daily_chart(request: Request):
+        rows = [{"stck_bsop_date": d, "stck_oprc": f"{o:.0f}", "stck_hgpr": f"{h:.0f}", "stck_lwpr": f"{lo:.0f}",
+                 "stck_clpr": f"{c:.0f}", "acml_vol": str(v)}
+                for d, o, h, lo, c, v in market.daily(request.query_params.get("FID_INPUT_ISCD", ""))]
+        return ok(rows, key="output2", output1={})
+
+    @app.get("/uapi/domestic-stock/v1/quotations/volume-rank")
+    async def volume_rank():
+        return ok(market.volume_rank(rank_size))
+
+    @app.get("/uapi/domestic-stock/v1/quotations/news-title")
+    async def news_title():
+        return ok([])
+
+    @app.get("/uapi/overseas-price/v1/quotations/brknews-title")
+    async def overseas_news_title():
+        return ok([])
+
+    # --- Domestic trading ---
+
+    @app.post("/uapi/domestic-stock/v1/trading/order-cash")
+    async def order_cash(request: Request):
+        body = await request.json()
+        side = "BUY" if request.headers.get("tr_id", "").endswith("0802U") else "SELL"
+        success, out = account.place("KR", side, body.get("PDNO", ""), int(body.get("ORD_QTY", 0)),
+                                     float(body.get("ORD_UNPR", 0)))
+        stats["orders"] += 1
+        if not success:
+            stats["rejected_orders"] += 1
+            return fail(*out)
+        return ok(out)
+
+    @app.post("/uapi/domestic-stock/v1/trading/order-rvsecncl")
+    async def order_cancel_kr(request: Request):
+        body = await request.json()
+        stats["cancels"] += 1
+        success, out = account.cancel(body.get("ORGN_ODNO", ""))
+        return ok(out) if success else fail(*out)
+
+    @app.get("/uapi/domestic-stock/v1/trading/inquire-daily-ccld")
+    async def inquire_daily_ccld():
+        return ok(account.kr_ccld_rows(), key="output1", output2={}, ctx_area_fk100="", ctx_area_nk100="")
+
+    @app.get("/uapi/domestic-stock/v1/trading/inquire-balance")
+    async def inquire_balance_kr():
+        return {"rt_cd": "0", "msg_cd": "MCA00000", "msg1": "정상처리 되었습니다.", **account.kr_balance()}
+
+    @app.get("/uapi/domestic-stock/v1/trading/inquire-psbl-order")
+    async def inquire_psbl_order():
+        cash = account.cash["KR"]
+        return ok({"ord_psbl_cash": f"{cash:.0f}", "nrcvb_buy_amt": f"{cash:.0f}", "ruse_psbl_amt": "0"})
+
+    # --- Overseas ---
+
+    @app.get("/uapi/overseas-price/v1/quotations/price")
+    async def overseas_price(request: Request):
+        price, prev, volume, _ = market.quote(request.query_params.get("SYMB", ""))
+        return ok({"rsym": "D" + request.query_params.get("EXCD", "") + request.query_params.get("SYMB", ""),
+                   "last": f"{price:.4f}", "base": f"{prev:.4f}", "tvol": str(volume),
+                   "diff": f"{price - prev:.4f}", "rate": f"{(price / prev - 1) * 100:.2f}"})
+
+    @app.get("/uapi/overseas-price/v1/quotations/dailyprice")
+    async def overseas_daily(request: Request):
+        rows = [{"xymd": d, "open": f"{o:.4f}", "high": f"{h:.4f}", "low": f"{lo:.4f}", "clos": f"{c:.4f}",
+                 "tvol": str(v)} for d, o, h, lo, c, v in market.daily(request.query_params.get("SYMB", ""))]
+        return ok(rows, key="output2", output1={})
+
+    @app.post("/uapi/overseas-stock/v1/trading/order")
+    async def overseas_order(request: Request):
+        body = await request.json()
+        side = "BUY" if request.headers.get("tr_id", "").endswith("1002U") else "SELL"
+        success, out = account.place("US", side, body.get("PDNO", ""), int(body.get("ORD_QTY", 0)),
+                                     float(body.get("OVRS_ORD_UNPR", 0)), body.get("OVRS_EXCG_CD", "NASD"))
+        stats["orders"] += 1
+        if not success:
+            stats["rejected_orders"] += 1
+            return fail(*out)
+        return ok(out)
+
+    @app.post("/uapi/overseas-stock/v1/trading/order-rvsecncl")
+    async def order_cancel_us(request: Request):
+        body = await request.json()
+        stats["cancels"] += 1
+        success, out = account.cancel(body.get("ORGN_ODNO", ""))
+        return ok(out) if success else fail(*out)
+
+    @app.get("/uapi/overseas-stock/v1/trading/inquire-ccnl")
+    async def inquire_ccnl():
+        return ok(account.us_ccnl_rows(), ctx_area_fk200="", ctx_area_nk200="")
+
+    @app.get("/uapi/overseas-stock/v1/trading/inquire-nccs")
+    async def inquire_nccs(request: Request):
+        excg = request.query_params.get("OVRS_EXCG_CD", "")
+        return ok([r for r in account.us_ccnl_rows() if int(r["nccs_qty"]) > 0 and r["ovrs_excg_cd"] == excg])
+
+    @app.get("/uapi/overseas-stock/v1/trading/inquire-balance")
+    async def inquire_balance_us(request: Request):
+        return {"rt_cd": "0", "msg_cd": "MCA00000", "msg1": "정상처리 되었습니다.",
+                **account.us_balance(request.query_params.get("OVRS_EXCG_CD", "NASD"))}
+
+    # --- Real-time WebSocket ---
+
+    @app.websocket("/ws")
+    async def websocket_feed(ws: WebSocket):
+        await ws.accept()
+        stats["ws_clients"] += 1
+        registered = {}  # symbol -> tr_id
+
+        async def read_requests():
+            while True:
+                msg = json.loads(await ws.receive_text())
+                header, body = msg.get("header", {}), msg.get("body", {}).get("input", msg.get("body", {}))
+                tr_id, symbol = body.get("tr_id"), body.get("tr_key")
+                if header.get("tr_type") == "2":
+                    registered.pop(symbol, None)
+                    reply = ("OPSP0003", "UNSUBSCRIBE SUCCESS")
+                elif symbol not in registered and len(registered) >= MAX_WS_REGISTRATIONS:
+                    reply = ("OPSP0008", "MAX SUBSCRIBE OVER")
+                else:
+                    registered[symbol] = tr_id
+                    reply = ("OPSP0000", "SUBSCRIBE SUCCESS")
+                await ws.send_text(json.dumps({
+                    "header": {"tr_id": tr_id, "tr_key": symbol, "encrypt": "N"},
+                    "body": {"rt_cd": "0" if reply[0] != "OPSP0008" else "1", "msg_cd": reply[0], "msg1": reply[1]}}))
+
+        reader = asyncio.create_task(read_requests())
+        try:
+            interval = 1.0 / ws_rate if ws_rate > 0 else None
+            while not reader.done():
+                await asyncio.sleep(interval or 1.0)
+                if interval is None:
+                    continue
+                clock = datetime.now().strftime("%H%M%S")
+                for symbol, tr_id in list(registered.items()):
+                    price, prev, volume, _ = market.quote(symbol)
+                    await ws.send_text(f"0|{tr_id}|001|{symbol}^{clock}^{market.tick(symbol)}^2^"
+                                       f"{(price / prev - 1) * 100:.2f}^{volume}")
+                    stats["ws_frames"] += 1
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            reader.cancel()
+            stats["ws_clients"] -= 1
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Offline KIS mock (REST + WebSocket) with rate limits")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8300)
+    parser.add_argument("--rate", type=float, default=20.0, help="REST requests/s per app key (0 = unlimited)")
+    parser.add_argument("--latency", default="fixed:0.03", help="Quotation latency: fixed:S | uniform:LO,HI | lognormal:MU,SIGMA")
+    parser.add_argument("--order-latency", default=None, help="Order / cancel latency (default: --latency)")
+    parser.add_argument("--fill-delay", type=float, default=0.0, help="Seconds before a marketable order fills")
+    parser.add_argument("--symbols", type=int, default=200, help="KR universe size for volume rank")
+    parser.add_argument("--rank-size", type=int, default=30)
+    parser.add_argument("--ws-rate", type=float, default=2.0, help="Frames/s per registered symbol")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    market = MockMarket(kr_symbols=args.symbols, seed=args.seed)
+    app = create_app(market=market, account=MockAccount(market, fill_delay=args.fill_delay), rate=args.rate,
+                     latency=LatencyModel(args.latency, seed=args.seed),
+                     order_latency=LatencyModel(args.order_latency, seed=args.seed) if args.order_latency else None,
+                     rank_size=args.rank_size, ws_rate=args.ws_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+KIS Replay Server (REST + WebSocket).
+
+Serves a session recorded with KIS_RECORD_FILE (app/core/kis_recorder.py) back to the bot
+so a trading session can be reproduced and benchmarked offline. Point the bot at it via `.env`:
+
+    KIS_BASE_URL=http://127.0.0.1:8200
+    KIS_WS_URL=ws://127.0.0.1:8200/ws
+
+Run:
+    python -m app.mock.kis_replay session.jsonl.gz --port 8200 --speed 1     # real time
+    python -m app.mock.kis_replay session.jsonl.gz --speed 10 --start 1800   # 10x, from 30 min in
+    python -m app.mock.kis_replay session.jsonl.gz --speed 0                 # max speed
+
+Replay clock: starts at the first request / connection, runs at `speed` x recording time.
+- REST: the latest recorded response (at or before the clock) for the same method + path + tr_id
+  + params; falls back to any params, then any tr_id (real <-> virtual tr_ids differ).
+  At speed 0 responses are served in recorded order per request instead.
+- WebSocket: recorded data frames are pushed on schedule for the subscribed symbols
+  (subscribe / unsubscribe requests are acknowledged like KIS does); at speed 0 back to back.
+Token / approval-key endpoints answer with dummy keys.
+"""
+import argparse
+import asyncio
+import bisect
+import gzip
+import json
+import logging
+import random
+import time
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+from app.core.kis_recorder import load_recording, mask_fields
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayClock:
+    """Recording time (seconds since recording start) as seen by the replay."""
+    def __init__(self, speed: float = 1.0, start: float = 0.0):
+        self.speed = speed
+        self.start = start
+        self.position = start   # speed 0: advanced by the frame pumps
+        self._t0 = None
+
+    def begin(self):
+        if self._t0 is None:
+            self._t0 = time.monotonic()
+
+    def now(self) -> float:
+        if not self.speed or self._t0 is None:
+            return self.position
+        return self.start + (time.monotonic() - self._t0) * self.speed
+
+    def wait_for(self, t: float) -> float:
+        """Wall seconds until recording time t."""
+        if not self.speed:
+            return 0.0
+        return max(0.0, (t - self.now()) / self.speed)
+
+
+class RestIndex:
+    """Recorded REST responses by request key, in time order."""
+    def __init__(self, events: list):
+        self.levels = ({}, {}, {})  # (method, path, tr_id, params) / (method, path, tr_id) / (method, path)
+        self.cursors = {}
+        for t, _, method, path, tr_id, query, status, data in (e for e in events if e[1] == "rest"):
+            for index, key in zip(self.levels, self._keys(method, path, tr_id, query)):
+                times, responses = index.setdefault(key, ([], []))
+                times.append(t)
+                responses.append((status, data))
+
+    @staticmethod
+    def _keys(method, path, tr_id, query):
+        # Recordings hold the account fields masked: mask live requests the same way to match
+        params = json.dumps({k: str(v) for k, v in mask_fields(query or {}).items()}, sort_keys=True)
+        return (method, path, tr_id, params), (method, path, tr_id), (method, path)
+
+    def lookup(self, method: str, path: str, tr_id: str, query: dict, t: float = None):
+        """(status, data) or None. t=None: next response in recorded order for the key."""
+        for index, key in zip(self.levels, self._keys(method, path, tr_id, query)):
+            entry = index.get(key)
+            if entry is None:
+                continue
+            times, responses = entry
+            if t is None:
+                i = self.cursors.get(key, 0)
+                self.cursors[key] = i + 1
+                return responses[min(i, len(responses) - 1)]
+            return responses[max(0, bisect.bisect_right(times, t) - 1)]
+        return None
+
+
+def parse_frame(frame: str):
+    """(tr_id, symbol) of a KIS real-time data frame ("0|H0STCNT0|001|005930^..."), or None for JSON control frames."""
+    if frame.startswith("{"):
+        return None
+    parts = frame.split("|", 3)
+    if len(parts) < 4:
+        return None
+    encrypted = parts[0] == "1"
+    return parts[1], (None if encrypted else parts[3].split("^", 1)[0])
+
+
+def synthetic_recording(path: str, symbols: int = 20, seconds: float = 120.0, seed: int = 42):
+    """
+    Write a KisRecorder-format session without a live account: KR price frames (a market-open
+    burst of ~20 frames/s per symbol for the first 10%, then ~2/s) and an inquire-price
+    response per symbol per second.
+    """
+    rng = random.Random(seed)
+    codes = [f"{100000 + i:06d}" for i in range(symbols)]
+    prices = {c: rng.uniform(5_000, 200_000) for c in codes}
+    volumes = dict.fromkeys(codes, 0)
+    events, t = [], 0.0
+    next_rest = 0.0
+    while t < seconds:
+        rate = 20 if t < seconds * 0.1 else 2
+        t += rng.expovariate(rate * symbols)
+        code = rng.choice(codes)
+        prices[code] *= 1 + rng.gauss(0, 0.0008)
+        volumes[code] += rng.randint(1, 500)
+        clock = time.strftime("%H%M%S", time.gmtime(9 * 3600 + t))
+        events.append([round(t, 4), "ws", f"0|H0STCNT0|001|{code}^{clock}^{prices[code]:.0f}^5^0.10^{volumes[code]}"])
+        while next_rest <= t:
+            for c in codes:
+                events.append([round(next_rest, 4), "rest", "GET", "/uapi/domestic-stock/v1/quotations/inquire-price",
+                               "FHKST01010100", {"fid_cond_mrkt_div_code": "J", "fid_input_iscd": c}, 200,
+                               {"rt_cd": "0", "msg_cd": "MCA00000", "output": {
+                                   "stck_prpr": f"{prices[c]:.0f}", "stck_sdpr": f"{prices[c]:.0f}",
+                                   "acml_vol": str(volumes[c])}}])
+            next_rest += 1.0
+    events.sort(key=lambda e: e[0])
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"version": 1, "started": time.time(), "synthetic": True}) + "\n")
+        for e in events:
+            f.write(json.dumps(e, separators=(",", ":")) + "\n")
+    return path
+
+
+def create_app(events: list, speed: float = 1.0, start: float = 0.0, all_frames: bool = False) -> FastAPI:
+    """
+    all_frames: push every recorded data frame regardless of the client's subscriptions.
+    """
+    clock = ReplayClock(speed, start)
+    rest = RestIndex(events)
+    frames = []  # (t, frame, tr_id, symbol)
+    for e in events:
+        if e[1] == "ws":
+            parsed = parse_frame(e[2])
+            if parsed:
+                frames.append((e[0], e[2], *parsed))
+    frame_times = [f[0] for f in frames]
+    stats = {"rest": 0, "rest_misses": 0, "ws_clients": 0, "frames_sent": 0, "by_path": {}}
+
+    app = FastAPI(title="KIS Replay")
+
+    @app.get("/replay/stats")
+    async def get_stats():
+        return {**stats, "clock": round(clock.now(), 3), "speed": speed,
+                "recorded_rest": sum(len(v[0]) for v in rest.levels[2].values()), "recorded_frames": len(frames)}
+
+    @app.post("/oauth2/tokenP")
+    async def token():
+        return {"access_token": "replay-token", "token_type": "Bearer", "expires_in": 86400}
+
+    @app.post("/oauth2/Approval")
+    async def approval():
+        return {"approval_key": "replay-approval-key"}
+
+    @app.websocket("/ws")
+    async def websocket_feed(ws: WebSocket):
+        await ws.accept()
+        clock.begin()
+        stats["ws_clients"] += 1
+        subscribed = set()  # (tr_id, symbol)
+        first_subscribe = asyncio.Event()
+
+        async def read_requests():
+            while True:
+                msg = json.loads(await ws.receive_text())
+                header, body = msg.get("header", {}), msg.get("body", {}).get("input", msg.get("body", {}))
+                key = (body.get("tr_id"), body.get("tr_key"))
+                if header.get("tr_type") == "2":
+                    subscribed.discard(key)
+                    text = "UNSUBSCRIBE SUCCESS"
+                else:
+                    subscribed.add(key)
+                    text = "SUBSCRIBE SUCCESS"
+                await ws.send_text(json.dumps({
+                    "header": {"tr_id": key[0], "tr_key": key[1], "encrypt": "N"},
+                    "body": {"rt_cd": "0", "msg_cd": "OPSP0000", "msg1": text}}))
+                first_subscribe.set()
+
+        reader = asyncio.create_task(read_requests())
+        try:
+            if not all_frames:
+                await asyncio.wait([reader, asyncio.create_task(first_subscribe.wait())],
+                                   return_when=asyncio.FIRST_COMPLETED)
+            subscribed_trs = lambda: {tr for tr, _ in subscribed}
+            for i in range(bisect.bisect_left(frame_times, clock.now()), len(frames)):
+                if reader.done():
+                    break
+                t, frame, tr_id, symbol = frames[i]
+                delay = clock.wait_for(t)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if all_frames or (tr_id, symbol) in subscribed or (symbol is None and tr_id in subscribed_trs()):
+                    await ws.send_text(frame)
+                    stats["frames_sent"] += 1
+                if not speed:
+                    clock.position = max(clock.position, t)
+                    if i % 100 == 0:
+                        await asyncio.sleep(0) # Let REST handlers / the reader run
+            await reader # Recording exhausted: stay connected until the client leaves
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            reader.cancel()
+            stats["ws_clients"] -= 1
+
+    @app.api_route("/{path:path}", methods=["GET", "POST"])
+    async def replay_rest(path: str, request: Request):
+        clock.begin()
+        method, path = request.method, "/" + path
+        if method == "GET":
+            query = dict(request.query_params)
+        else:
+            try:
+                query = await request.json()
+            except ValueError:
+                query = {}
+        hit = rest.lookup(method, path, request.headers.get("tr_id", ""), query,
+                          clock.now() if speed else None)
+        stats["rest"] += 1
+        stats["by_path"][path] = stats["by_path"].get(path, 0) + 1
+        if hit is None:
+            stats["rest_misses"] += 1
+            return JSONResponse({"rt_cd": "1", "msg_cd": "REPLAY404", "msg1": f"{method} {path} not in recording"},
+                                status_code=404)
+        status, data = hit
+        return JSONResponse(data, status_code=status)
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Replay a recorded KIS session (REST + WebSocket)")
+    parser.add_argument("recording", help="File written with KIS_RECORD_FILE")
+    parser.add_argument("--synthetic", type=int, default=0, help="First write a synthetic N-symbol session to `recording`")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N x faster, 0 = max speed")
+    parser.add_argument("--start", type=float, default=0.0, help="Start this many seconds into the recording")
+    parser.add_argument("--all-frames", action="store_true", help="Push every frame, not just subscribed symbols")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    if args.synthetic:
+        synthetic_recording(args.recording, symbols=args.synthetic)
+    header, events = load_recording(args.recording)
+    logger.info(f"Loaded {len(events)} events (recorded {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['started']))})")
+    app = create_app(events, speed=args.speed, start=args.start, all_frames=args.all_frames)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
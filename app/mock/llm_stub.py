@@ -0,0 +1,263 @@
+"""
+Offline LLM Stand-in Server (OpenAI-compatible).
+
+Serves `/v1/chat/completions` with canned or rule-based JSON responses for every
+prompt type used by AIAnalyzer / StrategyOptimizer, with a configurable latency
+distribution. Point the bot at it via `.env`:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1
+    OPENAI_API_KEY=stub
+    GEMINI_API_KEY=          # empty -> Gemini fallback disabled (no network)
+
+Run:
+    python -m app.mock.llm_stub --port 8100 --latency lognormal:-1.2,0.4 --seed 42
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+import zlib
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars/token for Latin, ~1.5 for Hangul)."""
+    if not text:
+        return 0
+    hangul = sum(1 for ch in text if '가' <= ch <= '힣')
+    return max(1, int((len(text) - hangul) / 4 + hangul / 1.5))
+
+
+class LatencyModel:
+    """
+    Latency distribution for stub responses.
+    spec: "fixed:0.2" | "uniform:0.1,0.5" | "lognormal:mu,sigma" | "none"
+    per_token_ms: extra delay per prompt token (models payload-size cost).
+    """
+    def __init__(self, spec: str = "fixed:0.0", per_token_ms: float = 0.0, seed: int = None):
+        self.spec = spec
+        self.per_token_ms = per_token_ms
+        self.rng = random.Random(seed)
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+
+    def sample(self, prompt_tokens: int = 0) -> float:
+        if self.kind == "fixed":
+            base = self.params[0] if self.params else 0.0
+        elif self.kind == "uniform":
+            base = self.rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "lognormal":
+            base = self.rng.lognormvariate(self.params[0], self.params[1])
+        else:
+            base = 0.0
+        return base + (self.per_token_ms * prompt_tokens) / 1000.0
+
+
+class StubResponder:
+    """Classifies a chat request by prompt type and builds a deterministic reply."""
+
+    PROMPT_TYPES = [
+        # (type, marker found in system or user message)
+        ("risk", "Risk Manager"),
+        ("overnight", "Swing Trading Expert"),
+        ("hot_trends", "'HOT' stocks"),
+        ("batch", "scalping opportunities at market open"),
+        ("candidates", "Global Macro Strategist"),
+        ("top10", "Top-Tier Fund Manager"),
+        ("trend_stocks", "Top 5 most promising stocks"),
+        ("holding_report", "상세 분석 리포트"),
+        ("optimizer", "Algo-Trading Strategist"),
+        ("single", "Analyze the following stock '"),
+    ]
+
+    def __init__(self, seed: int = 0, canned: dict = None):
+        self.seed = seed
+        self.canned = canned or {}
+
+    def classify(self, text: str) -> str:
+        for prompt_type, marker in self.PROMPT_TYPES:
+            if marker in text:
+                return prompt_type
+        return "unknown"
+
+    def _score(self, symbol: str, lo: int = 40, hi: int = 95) -> int:
+        h = zlib.crc32(f"{self.seed}:{symbol}".encode())
+        return lo + h % (hi - lo + 1)
+
+    def _batch_symbols(self, text: str) -> list:
+        # Legacy prose blocks ("--- Stock: name (SYM) ---") or compact table rows ("SYM|name|...")
+        symbols = re.findall(r"--- Stock: .*? \(([^)]+)\) ---", text)
+        return symbols or re.findall(r"^([A-Z0-9][A-Z0-9.]*)\|", text, re.M)
+
+    def respond(self, prompt_type: str, text: str):
+        """Returns a python object (JSON types) or a plain string."""
+        if prompt_type in self.canned:
+            return self.canned[prompt_type]
+
+        if prompt_type == "risk":
+            m = re.search(r"P&L: (-?[\d.]+)%", text)
+            pnl = float(m.group(1)) if m else 0.0
+            decision = "SELL" if pnl <= -2.0 else "HOLD"
+            return {"decision": decision, "reason": f"스텁 판단: 손익 {pnl:.2f}%"}
+
+        if prompt_type == "overnight":
+            m = re.search(r"P&L: (-?[\d.]+)%", text)
+            pnl = float(m.group(1)) if m else 0.0
+            decision = "HOLD" if pnl > 1.0 else "LIQUIDATE"
+            return {"decision": decision, "reason": f"스텁 판단: 손익 {pnl:.2f}%"}
+
+        if prompt_type == "batch":
+            return {
+                sym: {
+                    "score": self._score(sym),
+                    "reason": "스텁 분석 결과",
+                    "action": "Buy" if self._score(sym) >= 80 else "Watch",
+                    "strategy": {"entry": "Dip Buy", "target_price": 3.0, "stop_loss": 2.0},
+                }
+                for sym in self._batch_symbols(text)
+            }
+
+        if prompt_type == "hot_trends":
+            return {sym: {"score": self._score(sym), "reason": "스텁 핫 트렌드"} for sym in self._batch_symbols(text)}
+
+        if prompt_type == "candidates":
+            universe = text.split("[Candidate Universe]", 1)[-1].split("Task:", 1)[0]
+            symbols = re.findall(r"\(([A-Za-z0-9.]+)\)", universe)
+            ranked = sorted(symbols, key=lambda s: -self._score(s))
+            return {"selected_symbols": ranked[:15], "reason": "Stub top-down screen"}
+
+        if prompt_type == "top10":
+            picks = [
+                {"stock_name": f"Stub {i}", "ticker": f"{i:06d}", "selection_reason": "스텁 선정",
+                 "expected_open_price": 0, "target_price_today": 0}
+                for i in range(1, 11)
+            ]
+            return {
+                "market_summary": {"outlook": "Neutral", "key_issues": ["Stub"], "strategy": "스텁 전략"},
+                "top_sectors": [{"sector_name": "Stub", "reason": "Stub", "related_stocks": []}],
+                "top_10_picks": picks,
+            }
+
+        if prompt_type == "trend_stocks":
+            return [{"name": "삼성전자", "code": "005930", "reason": "Stub"},
+                    {"name": "SK하이닉스", "code": "000660", "reason": "Stub"}]
+
+        if prompt_type == "holding_report":
+            return "### 스텁 리포트\n- 결론: 보유 유지 (Stub)"
+
+        if prompt_type == "optimizer":
+            return {"target_profit_rate": 3.0, "stop_loss_rate": 2.0, "reason": "Stub optimizer"}
+
+        if prompt_type == "single":
+            m = re.search(r"stock '([^']+)'", text)
+            return {"score": self._score(m.group(1) if m else ""), "reason": "스텁 분석", "action": "Watch",
+                    "strategy": {"entry": "Dip Buy", "target_price": 3.0, "stop_loss": 2.0}}
+
+        return {}
+
+
+def create_app(latency: LatencyModel = None, responder: StubResponder = None,
+               error_rate: float = 0.0, fence_rate: float = 0.0, seed: int = None) -> FastAPI:
+    """
+    error_rate: fraction of requests answered with HTTP 500 (exercises Gemini/default fallbacks).
+    fence_rate: fraction of JSON replies wrapped in ```json fences (exercises JSON repair).
+    """
+    latency = latency or LatencyModel()
+    responder = responder or StubResponder()
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "by_type": {}}
+
+    app = FastAPI(title="LLM Stub")
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        text = "\n".join(str(m.get("content", "")) for m in messages)
+        prompt_type = responder.classify(text)
+        prompt_tokens = estimate_tokens(text)
+
+        stats["requests"] += 1
+        stats["by_type"][prompt_type] = stats["by_type"].get(prompt_type, 0) + 1
+
+        await asyncio.sleep(latency.sample(prompt_tokens))
+
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": {"message": "stub injected error", "type": "server_error"}})
+
+        reply = responder.respond(prompt_type, text)
+        if isinstance(reply, str):
+            content = reply
+        else:
+            content = json.dumps(reply, ensure_ascii=False)
+            if fence_rate and rng.random() < fence_rate:
+                content = f"```json\n{content}\n```"
+
+        return {
+            "id": f"chatcmpl-stub-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": estimate_tokens(content),
+                "total_tokens": prompt_tokens + estimate_tokens(content),
+            },
+        }
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible LLM stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="fixed:0.0", help="fixed:S | uniform:LO,HI | lognormal:MU,SIGMA")
+    parser.add_argument("--per-token-ms", type=float, default=0.0, help="Extra latency per prompt token (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--fence-rate", type=float, default=0.0)
+    parser.add_argument("--responses", help="JSON file of canned replies keyed by prompt type")
+    args = parser.parse_args()
+
+    canned = None
+    if args.responses:
+        with open(args.responses, "r", encoding="utf-8") as f:
+            canned = json.load(f)
+
+    app = create_app(
+        latency=LatencyModel(args.latency, args.per_token_ms, seed=args.seed),
+        responder=StubResponder(seed=args.seed, canned=canned),
+        error_rate=args.error_rate,
+        fence_rate=args.fence_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
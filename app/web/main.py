@@ -4,7 +4,6 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, RedirectResponse
 import logging
 import asyncio
-import json
 import os
 import sys
 from pathlib import Path
@@ -13,6 +12,11 @@ from pydantic import BaseModel
 from typing import Optional
 from app.core.market_data import market_data_manager
 from app.core.selector import selector
+from app.core.ai_metrics import ai_metrics
+from app.core.order_router import order_router
+from app.core.instrumentation import instrumentation
+from app.core.state_store import state_store
+from app.core.portfolio import portfolio
 
 app = FastAPI(title="Scalping Bot Dashboard")
 
@@ -39,6 +43,7 @@ server_context = {
     "bot_state": None,
     "trade_manager": None,
     "is_paused": False,
+    "session_runner": None,
     "version": VERSION
 }
 
@@ -138,7 +143,7 @@ async def sell_trade(symbol: str, market_type: str = "KR", user=Depends(login_re
     if not tm:
          raise HTTPException(status_code=503, detail="TradeManager not ready")
     
-    result = tm.sell_position(symbol, market_type)
+    result = await tm.sell_position(symbol, market_type)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -172,6 +177,8 @@ async def toggle_market_status(update: MarketStatusUpdate, user=Depends(login_re
          raise HTTPException(status_code=503, detail="TradeManager not ready")
     
     tm.set_market_status(update.market, update.state)
+    if update.state and server_context.get("session_runner"):
+        server_context["session_runner"].wake() # Resume held duties now, not at the next re-check
     return {"status": "success", "market": update.market, "state": update.state}
 
 @app.post("/api/analyze/{symbol}")
@@ -274,12 +281,7 @@ async def get_top_picks(market: str = "KR", user=Depends(login_required)):
     Optionally filter by market (check if the file matches the requested market).
     """
     try:
-        file_path = f"app/data/top_picks_{market}.json"
-        if not os.path.exists(file_path):
-            return {}
-            
-        with open(file_path, "r", encoding='utf-8') as f:
-            data = json.load(f)
+        data = state_store.get(f"app/data/top_picks_{market}.json", {})
             
         # Check market match?
         # The user might want to see whatever is there, but strictly speaking 
@@ -305,18 +307,6 @@ async def add_top_pick(market: str, req: TopPickAddRequest, user=Depends(login_r
     """
     try:
         file_path = f"app/data/top_picks_{market}.json"
-        data = {"picks": []}
-        
-        # Load existing
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding='utf-8') as f:
-                data = json.load(f)
-        
-        # Check duplicates
-        for p in data.get("picks", []):
-            if p['ticker'] == req.ticker:
-                raise HTTPException(status_code=400, detail="Stock already exists in list")
-                
         new_pick = {
             "stock_name": req.stock_name,
             "ticker": req.ticker,
@@ -324,13 +314,17 @@ async def add_top_pick(market: str, req: TopPickAddRequest, user=Depends(login_r
             "target_price_today": req.target_price,
             "source": "USER" # Mark as User Added
         }
-        
-        # Add to beginning or end? User usually wants high priority.
-        # Let's add to beginning to show up top.
-        data["picks"].insert(0, new_pick)
-        
-        with open(file_path, "w", encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+
+        def add(data):
+            # Check duplicates
+            for p in data.get("picks", []):
+                if p['ticker'] == req.ticker:
+                    raise HTTPException(status_code=400, detail="Stock already exists in list")
+            # Add to beginning to show up top (user picks have high priority)
+            data.setdefault("picks", []).insert(0, new_pick)
+            return data
+
+        data = state_store.update(file_path, add, default={"picks": []}, indent=2)
             
         return {"status": "success", "message": f"Added {req.stock_name}", "picks": data["picks"]}
         
@@ -351,14 +345,8 @@ async def refresh_top_picks(req: TopPicksRequest, user=Depends(login_required)):
     try:
         # 1. Load Existing User Picks
         file_path = f"app/data/top_picks_{req.market}.json"
-        user_picks = []
-        if os.path.exists(file_path):
-             try:
-                with open(file_path, "r", encoding='utf-8') as f:
-                    existing = json.load(f)
-                    user_picks = [p for p in existing.get("picks", []) if p.get("source") == "USER"]
-             except Exception:
-                 pass # Ignore if file corrupt
+        existing = state_store.get(file_path, {})
+        user_picks = [p for p in existing.get("picks", []) if p.get("source") == "USER"]
         
         # 2. Generate New AI Picks
         # generate_top_10_picks returns list of dicts. We need to inject 'source': 'AI'
@@ -392,14 +380,11 @@ async def refresh_top_picks(req: TopPicksRequest, user=Depends(login_required)):
             # then merge and re-save.
         }
         
-        # Re-read what AI saved to get summary
-        if os.path.exists(file_path):
-             with open(file_path, "r", encoding='utf-8') as f:
-                 ai_data = json.load(f)
-                 full_data["market_summary"] = ai_data.get("market_summary", {})
+        # Re-read what AI saved to get summary (memory copy, the AI save and this one coalesce into one write)
+        ai_data = state_store.get(file_path, {})
+        full_data["market_summary"] = ai_data.get("market_summary", {})
         
-        with open(file_path, "w", encoding='utf-8') as f:
-            json.dump(full_data, f, ensure_ascii=False, indent=2)
+        state_store.set(file_path, full_data, indent=2)
 
         return {
             "date": full_data["date"],
@@ -418,21 +403,17 @@ async def delete_top_pick(market: str, symbol: str, user=Depends(login_required)
     """
     try:
         file_path = f"app/data/top_picks_{market}.json"
-        if not os.path.exists(file_path):
+        if state_store.get(file_path) is None:
             raise HTTPException(status_code=404, detail="File not found")
-            
-        with open(file_path, "r", encoding='utf-8') as f:
-            data = json.load(f)
-            
-        original_len = len(data.get("picks", []))
-        data["picks"] = [p for p in data.get("picks", []) if p["ticker"] != symbol]
-        
-        if len(data["picks"]) == original_len:
-             raise HTTPException(status_code=404, detail="Stock not found in list")
-             
-        # Save back
-        with open(file_path, "w", encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+
+        def remove(data):
+            original_len = len(data.get("picks", []))
+            data["picks"] = [p for p in data.get("picks", []) if p["ticker"] != symbol]
+            if len(data["picks"]) == original_len:
+                raise HTTPException(status_code=404, detail="Stock not found in list")
+            return data
+
+        state_store.update(file_path, remove, default={}, indent=2)
             
         return {"status": "success", "message": f"Deleted {symbol}"}
         
@@ -458,9 +439,10 @@ async def get_state(user=Depends(login_required)):
              print(f"DEBUG: active_trades first val type: {type(first_val)}")
              print(f"DEBUG: active_trades first val: {first_val}")
 
-        # Safely get budget
+        # Safely get budget (warm the shared portfolio snapshot off the event loop first)
+        await portfolio.aget()
         kr_budget = tm.get_available_budget("KR")
-        us_budget = tm.get_target_slot_budget_us() # Approximate
+        us_budget = await asyncio.to_thread(tm.get_target_slot_budget_us) # Approximate (may re-sync the portfolio)
         
     # Market Data
         market_info = await market_data_manager.get_market_data()
@@ -498,7 +480,7 @@ async def get_state(user=Depends(login_required)):
                     market_type = trade.get('market_type', 'KR')
                     
                     try:
-                        price_info = kis.get_realtime_price(symbol, market_type)
+                        price_info = kis.get_ws_price(symbol) or await asyncio.to_thread(kis.get_realtime_price, symbol, market_type)
                     except Exception as e:
                         print(f"Error fetching price for {symbol}: {e}")
                         price_info = None
@@ -561,7 +543,7 @@ async def get_state(user=Depends(login_required)):
                 except Exception as e:
                     print(f"Error processing trade {symbol}: {e}")
                     # Keep original data if processing failed
-                    enriched_trades[symbol] = trade
+                    enriched_trades[symbol] = trade.copy()
         
         return {
             "status": "ok",
@@ -574,6 +556,8 @@ async def get_state(user=Depends(login_required)):
             "active_trades": enriched_trades,
             "market_info": market_info,
             "manual_slots": tm.manual_slots,
+            "slots": {m: tm.active_trades.count(m) for m in ("KR", "US")},
+            "sessions": server_context["session_runner"].status() if server_context.get("session_runner") else {},
             "server_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
     except Exception as e:
@@ -583,6 +567,42 @@ async def get_state(user=Depends(login_required)):
         logging.error(f"ERROR in get_state: {error_msg}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# === Metrics Endpoints ===
+
+@app.get("/api/metrics/ai")
+async def get_ai_metrics(limit: int = 30, user=Depends(login_required)):
+    """Per-method AI call stats (latency percentiles, tokens, fallback/repair rates) + recent calls"""
+    return {"summary": ai_metrics.summary(), "recent": ai_metrics.recent(limit)}
+
+@app.post("/api/metrics/ai/reset")
+async def reset_ai_metrics(user=Depends(login_required)):
+    ai_metrics.reset()
+    return {"status": "success"}
+
+@app.get("/api/metrics/orders")
+async def get_order_metrics(limit: int = 30, user=Depends(login_required)):
+    """Order latency (signal→ack, ack→fill) per market/side + open and recent orders"""
+    return {
+        "summary": order_router.latency_summary(),
+        "open": [o.to_dict() for o in order_router.open_orders.values()],
+        "recent": [o.to_dict() for o in list(order_router.completed)[-limit:]][::-1]
+    }
+
+@app.get("/api/metrics/latency")
+async def get_latency_metrics(buckets: bool = False, user=Depends(login_required)):
+    """Latency histograms per hot-path operation and KIS TR_ID (INSTRUMENTATION)"""
+    return instrumentation.dump(buckets=buckets)
+
+@app.post("/api/metrics/latency/reset")
+async def reset_latency_metrics(user=Depends(login_required)):
+    instrumentation.reset()
+    return {"status": "success"}
+
+@app.post("/api/metrics/latency/enable")
+async def enable_latency_metrics(enabled: bool = True, user=Depends(login_required)):
+    instrumentation.enabled = enabled
+    return {"status": "success", "enabled": instrumentation.enabled}
+
 # === Control Endpoints ===
 
 @app.post("/api/control/pause")
@@ -593,6 +613,8 @@ async def pause_bot(user=Depends(login_required)):
 @app.post("/api/control/resume")
 async def resume_bot(user=Depends(login_required)):
     server_context["is_paused"] = False
+    if server_context.get("session_runner"):
+        server_context["session_runner"].wake()
     return {"status": "running", "message": "Trading logic resumed"}
 
 @app.post("/api/control/restart")
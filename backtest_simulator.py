@@ -1,11 +1,9 @@
 import os
 import sys
 import logging
-import time
 import asyncio
 import pandas as pd
-import FinanceDataReader as fdr
-from datetime import datetime, timedelta
+from datetime import timedelta
 from dotenv import load_dotenv
 
 # Load Env
@@ -16,7 +14,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.technical_analysis import technical
 from app.core.ai_analyzer import ai_analyzer
-from app.core.kis_api import kis
+from app.core.pit_data import PointInTimeData
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -35,6 +33,19 @@ async def run_backtest():
     
     results = []
     
+    test_candidates = [
+        {"symbol": "005930", "name": "삼성전자"}, # Samsung
+        {"symbol": "000660", "name": "SK하이닉스"}, # SK Hynix
+        {"symbol": "001510", "name": "SK증권"}, # User's Interest
+        {"symbol": "000270", "name": "기아"}, # Kia
+        {"symbol": "042700", "name": "한미반도체"} # Volatile AI stock
+    ]
+    
+    # Point-in-time data: each symbol's history is fetched once (then served from app/data/pit),
+    # news once per (symbol, date). The day loop below does no market-data I/O.
+    store = PointInTimeData()
+    store.load([c['symbol'] for c in test_candidates], days=150) # Request enough days
+    
     for current_date_ts in dates:
         current_date_str = current_date_ts.strftime("%Y%m%d")
         print(f"\n[Processing Date: {current_date_str}]")
@@ -63,32 +74,17 @@ async def run_backtest():
             # Since fetching ALL stocks for ranking is slow, we will test on a fixed set of ~5 stocks 
             # + 2 random ones to see if AI Filters them correctly.
             
-            test_candidates = [
-                {"symbol": "005930", "name": "삼성전자"}, # Samsung
-                {"symbol": "000660", "name": "SK하이닉스"}, # SK Hynix
-                {"symbol": "001510", "name": "SK증권"}, # User's Interest
-                {"symbol": "000270", "name": "기아"}, # Kia
-                {"symbol": "042700", "name": "한미반도체"} # Volatile AI stock
-            ]
-            
             day_results = []
             
             for stock in test_candidates:
                 symbol = stock['symbol']
                 name = stock['name']
                 
-                # A. Get OHLCV Data (Using KIS for consistency with App, passing logic)
-                # But KIS returns 100 days from TODAY. 
-                # technical.analyze now supports filtering.
-                # Use daily_data from KIS (Real) -> Filtered by target_date
-                
-                # Note: If rate limit is an issue, add sleep
-                time.sleep(0.1) 
-                
-                daily_data = kis.get_daily_price(symbol, days=150) # Request enough days
+                # A. OHLCV known before the open (view into the loaded history, no copy)
+                history = store.as_of(symbol, current_date_str, n=100)
                 
                 # B. Technical Analysis (Time Travel)
-                tech_summary = technical.analyze(daily_data, target_date=current_date_str)
+                tech_summary = technical.analyze_arrays(history.close, history.high, history.low)
                 
                 if tech_summary.get("status") in ["Error", "Not enough data"]:
                     print(f"  - {name}: Not enough data before {current_date_str}")
@@ -110,13 +106,11 @@ async def run_backtest():
                      print(f"  - {name}: Skipped (Trend DOWN)")
                      continue
                     
-                # C. Get News (Try to fetch news)
-                time.sleep(0.1)
-                news_items = kis.get_news_titles(symbol, search_date=current_date_str)
-                news_titles = [n['hts_pbnt_titl_cntt'] for n in news_items[:3]] if news_items else [] 
+                # C. Get News (cached per symbol / date)
+                news_titles = store.news(symbol, current_date_str)
                 
                 # D. AI Score
-                # Calling AI Analyzer (Sync wrapper)
+                # Calling AI Analyzer (async)
                 # We need to pass valid data.
                 
                 # Mock AI call to avoid OPENAI Cost? 
@@ -125,22 +119,22 @@ async def run_backtest():
                 # Let's limit to 3 days for initial test? Or user asked for "Jan Simulation".
                 # Let's do it.
                 
-                ai_result = ai_analyzer.analyze_stock(name, news_titles, tech_summary)
+                ai_result = await ai_analyzer.analyze_stock(name, news_titles, tech_summary)
                 
                 score = ai_result.get('score', 0)
                 action = "BUY" if score >= 70 else "WAIT"
                 
                 # E. Verification (Did it rise?)
-                # Get actual OHLCV for current_date using FDR
-                df_verify = fdr.DataReader(symbol, current_date_str, current_date_str)
+                # Actual OHLCV for current_date from the same loaded history
+                bar = store.bar(symbol, current_date_str)
                 
                 actual_outcome = "N/A"
                 profit_potential = 0.0
                 
-                if not df_verify.empty:
-                    open_price = df_verify.iloc[0]['Open']
-                    high_price = df_verify.iloc[0]['High']
-                    close_price = df_verify.iloc[0]['Close']
+                if bar:
+                    open_price = bar['open']
+                    high_price = bar['high']
+                    close_price = bar['close']
                     
                     if open_price > 0:
                         profit_potential = ((high_price - open_price) / open_price) * 100
@@ -166,6 +160,9 @@ async def run_backtest():
         except Exception as e:
             print(f"Error processing {current_date_str}: {e}")
             
+    store.save()
+    print(f"\nData requests to KIS: {store.fetches}")
+    
     # Summary
     print("\n=== Backtest Summary ===")
     df_res = pd.DataFrame(results)
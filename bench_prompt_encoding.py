@@ -0,0 +1,171 @@
+import asyncio
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+# Add path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Batch prompt encoding benchmark: legacy prose blocks vs compact table (app/core/ai_analyzer.py)
+against the offline LLM stub. Reports prompt tokens per stock and round-trip latency.
+
+    python bench_prompt_encoding.py --batch-size 5 --rounds 30 --per-token-ms 0.3
+"""
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--port", type=int, default=8101)
+parser.add_argument("--batch-size", type=int, default=5)
+parser.add_argument("--rounds", type=int, default=30)
+parser.add_argument("--latency", default="fixed:0.05")
+parser.add_argument("--per-token-ms", type=float, default=0.3, help="Stub latency per prompt token (payload cost)")
+args = parser.parse_args()
+
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ["GEMINI_API_KEY"] = ""
+
+from openai import AsyncOpenAI
+from app.core.ai_analyzer import ai_analyzer, AIAnalyzer, BATCH_SYSTEM_PROMPT, HOT_TRENDS_SYSTEM_PROMPT
+
+NEWS = ["2분기 실적 서프라이즈, 영업이익 전년비 45% 증가", "美 빅테크 AI 투자 확대에 반도체 수혜 기대",
+        "외국인 5거래일 연속 순매수", "신규 공급계약 체결 공시 (매출액 대비 12%)", "증권가 목표주가 상향 잇따라"]
+
+
+def legacy_batch_prompt(jobs):
+    """Pre-compaction analyze_stocks_batch prompt (verbatim format)."""
+    market_context = jobs[0].get('market_status', 'Neutral Market')
+    prompt = f"Current Market Environment: {market_context}\n\n"
+    prompt += "Analyze the following stocks for scalping opportunities at market open.\n"
+    prompt += "Return a JSON Object where keys are 'symbols' and values are analysis results.\n"
+    prompt += "Format: { 'SYMBOL': { 'score': ..., 'reason': ..., 'action': ..., 'strategy': ... } }\n\n"
+    for job in jobs:
+        daily_change = job['tech_summary'].get('daily_change', 0.0)
+        prompt += f"--- Stock: {job['name']} ({job['symbol']}) ---\n"
+        prompt += f"Price: {job['tech_summary']['close']} (Change: {daily_change:.2f}%)\n"
+        prompt += f"Technical: Trend={job['tech_summary']['trend']}, RSI={job['tech_summary']['rsi']}, Volatility={job['tech_summary']['volatility']}%\n"
+        prompt += f"News: {job['news_titles']}\n\n"
+    prompt += """
+        Criteria:
+        1. Score 0-100 (80+ Strong Buy, 60+ Watch, <60 Pass).
+        2. Market Context Adaptation:
+           - IF Market is "BEAR" or "Down": Be VERY CONSERVATIVE. Require strong news catalyst. Score < 70 if no news.
+           - IF Market is "BULL" or "Up": Focus on momentum.
+        3. Daily Change Penalties:
+           - IF > 20%: REJECT (Too high risk of reversal). Score MUST be < 60.
+           - IF > 15%: Apply CAUTION.
+        4. IF SMA5 < SMA20:
+           - Generally bearish, BUT allow "Dip Buying" if RSI < 40 or Reversal Pattern detected.
+           - If no reversal signal, Penalize Score.
+        5. Favor "Dip Buying" (Pullback by -1~-3% after breakout) over "Market Order at High".
+        6. "reason" MUST be in Korean (Hangul).
+        """
+    return [{"role": "system", "content": "You are a professional stock trader."}, {"role": "user", "content": prompt}]
+
+
+def legacy_hot_prompt(jobs):
+    """Pre-compaction analyze_hot_trends prompt (verbatim format)."""
+    market_context = jobs[0].get('market_status', 'Neutral Market')
+    prompt = f"Current Market Environment: {market_context}\n\n"
+    prompt += "Identify the TOP 'HOT' stocks from the list below for a 'Must Watch' list.\n"
+    prompt += "Focus on: 1. Strong News/Catalyst 2. Sector Rotation 3. Explostive Momentum.\n"
+    prompt += "**IGNORE Technical Overbought signals (RSI > 75 is OK for Hot stocks).**\n"
+    prompt += "Return JSON: { 'SYMBOL': { 'score': <0-100, Hotness>, 'reason': '<Korean explanation>' } }\n\n"
+    for job in jobs:
+        daily_change = job['tech_summary'].get('daily_change', 0.0)
+        prompt += f"--- Stock: {job['name']} ({job['symbol']}) ---\n"
+        prompt += f"Change: {daily_change:.2f}%\n"
+        prompt += f"Technical: Trend={job['tech_summary']['trend']}, RSI={job['tech_summary']['rsi']}\n"
+        prompt += f"News: {job['news_titles']}\n\n"
+    prompt += """
+        Criteria:
+        1. Score based on 'Excitement' and 'Potential for today'.
+           - Good Earnings/Contract News = 90+
+           - Strong Sector Move (e.g. AI Rally) = 80+
+           - Just momentum without news = 70+
+           - Bad News / Boring = < 50
+        2. Describe the 'Reason' engagingly in Korean (e.g. 'AI 섹터 수급 폭발', '실적 서프라이즈').
+        """
+    return [{"role": "system", "content": "You are a momentum trader."}, {"role": "user", "content": prompt}]
+
+
+def compact_batch_prompt(jobs):
+    return [{"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": AIAnalyzer.encode_stock_table(jobs, ("px", "chg", "trend", "rsi", "vol", "news"))}]
+
+
+def compact_hot_prompt(jobs):
+    return [{"role": "system", "content": HOT_TRENDS_SYSTEM_PROMPT},
+            {"role": "user", "content": AIAnalyzer.encode_stock_table(jobs, ("chg", "trend", "rsi", "news"))}]
+
+
+def make_jobs(rng, n):
+    jobs = []
+    for _ in range(n):
+        code = f"{rng.randint(0, 999999):06d}"
+        jobs.append({
+            "symbol": code,
+            "name": f"종목{code[-3:]}",
+            "market_status": "BULL (KOSPI +0.85%, KOSDAQ +1.20%)",
+            "tech_summary": {"close": rng.randint(1000, 500000), "daily_change": rng.uniform(-5, 18),
+                             "trend": rng.choice(["UP", "DOWN"]), "rsi": round(rng.uniform(25, 80), 2),
+                             "volatility": round(rng.uniform(1, 8), 2)},
+            "news_titles": rng.sample(NEWS, rng.randint(0, 3)),
+        })
+    return jobs
+
+
+def spawn_stub():
+    import uvicorn
+    from app.mock.llm_stub import create_app, LatencyModel, StubResponder
+
+    app = create_app(latency=LatencyModel(args.latency, args.per_token_ms, seed=7), responder=StubResponder(seed=7))
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+async def run_variant(client, builder, job_sets):
+    tokens, latencies, parsed = [], [], 0
+    for jobs in job_sets:
+        messages = builder(jobs)
+        start = time.perf_counter()
+        res = await client.chat.completions.create(model="stub", messages=messages, response_format={"type": "json_object"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        tokens.append(res.usage.prompt_tokens)
+        parsed += len(json.loads(ai_analyzer._clean_json_text(res.choices[0].message.content))) == len(jobs)
+    return tokens, latencies, parsed
+
+
+def report(label, tokens, latencies, parsed, batch_size, rounds):
+    lat = sorted(latencies)
+    p95 = lat[min(len(lat) - 1, int(0.95 * (len(lat) - 1)))]
+    print(f"  {label:18s} tokens/req={statistics.mean(tokens):7.1f}  tokens/stock={statistics.mean(tokens) / batch_size:6.1f}  "
+          f"p50={statistics.median(lat):6.1f}ms  p95={p95:6.1f}ms  parsed={parsed}/{rounds}")
+    return statistics.mean(tokens)
+
+
+async def main():
+    spawn_stub()
+    client = AsyncOpenAI(base_url=os.environ["OPENAI_BASE_URL"], api_key="stub")
+    rng = random.Random(42)
+    job_sets = [make_jobs(rng, args.batch_size) for _ in range(args.rounds)]
+
+    print(f"=== Prompt Encoding Benchmark (batch={args.batch_size}, rounds={args.rounds}, "
+          f"latency={args.latency}, per_token_ms={args.per_token_ms}) ===")
+    for name, legacy, compact in [("analyze_stocks_batch", legacy_batch_prompt, compact_batch_prompt),
+                                  ("analyze_hot_trends", legacy_hot_prompt, compact_hot_prompt)]:
+        print(f"\n[{name}]")
+        before = report("legacy", *await run_variant(client, legacy, job_sets), args.batch_size, args.rounds)
+        after = report("compact", *await run_variant(client, compact, job_sets), args.batch_size, args.rounds)
+        print(f"  -> {100 * (1 - after / before):.1f}% fewer prompt tokens per request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,318 @@
+import asyncio
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Add path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+End-to-end scan benchmark: select_pre_market_picks / select_stocks_kr / select_us_stocks against
+offline KIS (app/mock/kis_mock.py, or a KIS_RECORD_FILE recording via app/mock/kis_replay.py)
+and the LLM stub (app/mock/llm_stub.py). No network, no account, no Telegram.
+
+Per scenario: wall time and a stage breakdown, p50 / p95 over --runs repetitions.
+  sourcing     volume rank, market context (index quotes), market news
+  daily_fetch  daily charts / news titles per candidate
+  technical    technical.analyze
+  ai           LLM calls (trend pick, batch / hot-trend scoring)
+  persistence  state_store writes (top picks) + flush to disk
+  telegram     bot.send_message (to a local sink)
+  other        wall - stages (selector pacing sleeps, glue code)
+Stages are busy time summed over calls, so concurrent calls can add up to more than wall.
+
+    python bench_scan.py --runs 5 --out bench_scan.json
+    python bench_scan.py --runs 5 --compare bench_scan.json            # exit 1 on regression
+    python bench_scan.py --kis-recording session.jsonl.gz --scenarios scan_kr
+    python bench_scan.py --trace                                       # + per-operation / TR_ID histograms
+"""
+
+SCENARIOS = ("pre_market_kr", "pre_market_us", "scan_kr", "scan_us")
+STAGES = ("sourcing", "daily_fetch", "technical", "ai", "persistence", "telegram", "other")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+parser.add_argument("--runs", type=int, default=5)
+parser.add_argument("--warmup", type=int, default=1)
+parser.add_argument("--kis-recording", help="Replay this KIS_RECORD_FILE recording instead of the KIS mock")
+parser.add_argument("--kis-rate", type=float, default=20.0, help="Mock REST limit (requests/s, 0 = unlimited)")
+parser.add_argument("--kis-latency", default="lognormal:-3.5,0.5", help="Mock quotation latency (~30ms median)")
+parser.add_argument("--llm-latency", default="lognormal:-0.7,0.3", help="LLM stub latency (~0.5s median)")
+parser.add_argument("--live-news", action="store_true", help="Scrape real market news (network) instead of canned headlines")
+parser.add_argument("--kis-port", type=int, default=8300)
+parser.add_argument("--llm-port", type=int, default=8100)
+parser.add_argument("--out", default="bench_scan.json", help="Result file (JSON)")
+parser.add_argument("--compare", help="Previous result file: print deltas, exit 1 on regression")
+parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold (fraction of the old p50 / p95)")
+parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore regressions smaller than this")
+parser.add_argument("--trace", action="store_true", help="Also record app/core/instrumentation.py histograms per scenario")
+args = parser.parse_args()
+
+# Settings are read at import time -> configure env before importing app modules
+os.environ["KIS_BASE_URL"] = f"http://127.0.0.1:{args.kis_port}"
+os.environ["KIS_WS_URL"] = f"ws://127.0.0.1:{args.kis_port}/ws"
+os.environ["KIS_RECORD_FILE"] = ""
+os.environ.setdefault("KIS_APP_KEY", "bench")
+os.environ.setdefault("KIS_APP_SECRET", "bench")
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}/v1"
+os.environ["OPENAI_API_KEY"] = "stub"
+os.environ["GEMINI_API_KEY"] = ""
+
+from app.core.kis_api import kis
+from app.core.ai_analyzer import ai_analyzer
+from app.core.market_analyst import market_analyst
+from app.core.selector import selector
+from app.core.state_store import state_store
+from app.core.technical_analysis import technical
+from app.core.telegram_bot import bot
+from app.core.version import VERSION
+from app.core.instrumentation import instrumentation
+from app.mock.llm_stub import create_app as create_llm_app, LatencyModel, StubResponder
+
+CANNED_NEWS = {
+    "KR": ["반도체 수출 3개월 연속 증가, AI 서버 수요 견조", "2차전지 소재株 반등, 美 보조금 확정 기대",
+           "외국인 코스피 5거래일 연속 순매수", "조선업 수주 호황, 연간 목표 조기 달성", "바이오 기술수출 계약 잇따라"],
+    "US": ["Nvidia extends rally on data-center demand", "Fed holds rates, signals patience",
+           "Tesla deliveries beat estimates", "Chip stocks climb as AI capex guidance rises", "Oil slips on supply outlook"],
+}
+
+# (stage, object, attribute) - leaf calls only, so stages never nest
+TIMED = [
+    ("sourcing", kis, "get_volume_rank"),
+    ("sourcing", market_analyst, "get_market_context_for_ai"),
+    ("sourcing", market_analyst, "scrape_market_news"),
+    ("daily_fetch", kis, "get_daily_price"),
+    ("daily_fetch", kis, "get_overseas_daily_price"),
+    ("daily_fetch", kis, "get_news_titles"),
+    ("technical", technical, "analyze"),
+    ("ai", ai_analyzer, "select_candidates_by_trend"),
+    ("ai", ai_analyzer, "recommend_trend_stocks"),
+    ("ai", ai_analyzer, "analyze_stocks_batch"),
+    ("ai", ai_analyzer, "analyze_hot_trends"),
+    ("ai", ai_analyzer, "analyze_stock"),
+    ("ai", ai_analyzer, "analyze_market_context_and_pick_top10"),
+    ("persistence", state_store, "set"),
+    ("telegram", bot, "send_message"),
+]
+
+
+class StageTimer:
+    """Per-run busy time and call count per stage (calls may come from worker threads)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.calls = dict.fromkeys(STAGES, 0)
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.seconds[stage] += seconds
+            self.calls[stage] += 1
+
+    def wrap(self, stage, fn):
+        if asyncio.iscoroutinefunction(fn):
+            async def timed(*a, **kw):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*a, **kw)
+                finally:
+                    self.add(stage, time.perf_counter() - t0)
+        else:
+            def timed(*a, **kw):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*a, **kw)
+                finally:
+                    self.add(stage, time.perf_counter() - t0)
+        return timed
+
+
+timer = StageTimer()
+
+
+def spawn(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+def start_backends():
+    if args.kis_recording:
+        from app.core.kis_recorder import load_recording
+        from app.mock.kis_replay import create_app as create_kis_app
+
+        _, events = load_recording(args.kis_recording)
+        spawn(create_kis_app(events, speed=0), args.kis_port)
+        backend = f"replay:{os.path.basename(args.kis_recording)}"
+    else:
+        from app.mock.kis_mock import create_app as create_kis_app
+
+        spawn(create_kis_app(rate=args.kis_rate, latency=LatencyModel(args.kis_latency, seed=42)), args.kis_port)
+        backend = f"mock:rate={args.kis_rate:g},latency={args.kis_latency}"
+
+    llm_app = create_llm_app(LatencyModel(args.llm_latency, seed=42), StubResponder(seed=42))
+
+    @llm_app.post("/telegram/{method}")
+    async def telegram_sink(method: str):
+        return {"ok": True}
+
+    spawn(llm_app, args.llm_port)
+    return backend
+
+
+def install():
+    # Token stays in memory: never write the dummy token to kis_token_v2.json
+    kis.tokens._loaded = True
+    kis.tokens.access_token, kis.tokens.token_expired = "bench-token", time.time() + 86400
+    bot.token, bot.chat_id = "bench", "0"
+    bot.base_url = f"http://127.0.0.1:{args.llm_port}/telegram"
+    if not args.live_news:
+        market_analyst.scrape_market_news = lambda market_type="KR": list(CANNED_NEWS.get(market_type, CANNED_NEWS["KR"]))
+    for stage, obj, name in TIMED:
+        setattr(obj, name, timer.wrap(stage, getattr(obj, name)))
+
+
+def scenario_call(name):
+    return {
+        "pre_market_kr": lambda: selector.select_pre_market_picks("KR", force=True),
+        "pre_market_us": lambda: selector.select_pre_market_picks("US", force=True),
+        "scan_kr": lambda: selector.select_stocks_kr(budget=1_000_000),
+        "scan_us": lambda: selector.select_us_stocks(budget=1_000),
+    }[name]
+
+
+async def run_once(name):
+    market_analyst.trend_cache = {} # 60-min trend cache would hide the news -> AI step after run 1
+    timer.reset()
+    t0 = time.perf_counter()
+    picks = await scenario_call(name)()
+    t1 = time.perf_counter()
+    await asyncio.to_thread(state_store.flush) # Background writer would otherwise finish after the run
+    wall = time.perf_counter() - t0
+    timer.add("persistence", wall - (t1 - t0))
+    sample = {stage: timer.seconds[stage] for stage in STAGES if stage != "other"}
+    sample["other"] = max(0.0, wall - sum(sample.values()))
+    return wall, sample, dict(timer.calls), len(picks or [])
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000
+
+
+def summarize(values):
+    return {"p50_ms": round(pct(values, 50), 2), "p95_ms": round(pct(values, 95), 2),
+            "mean_ms": round(statistics.mean(values) * 1000, 2)}
+
+
+async def bench(name):
+    for _ in range(args.warmup):
+        await run_once(name)
+    instrumentation.reset()
+    walls, samples, calls, picks = [], [], None, []
+    for _ in range(args.runs):
+        wall, sample, calls, n = await run_once(name)
+        walls.append(wall)
+        samples.append(sample)
+        picks.append(n)
+    result = {
+        "runs": args.runs,
+        "picks": picks,
+        "wall": summarize(walls),
+        "stages": {stage: {**summarize([s[stage] for s in samples]), "calls": calls[stage]} for stage in STAGES},
+    }
+    if args.trace:
+        result["trace"] = instrumentation.dump(reset=True)["operations"]
+    return result
+
+
+def print_result(name, result):
+    wall = result["wall"]
+    print(f"\n[{name}] wall p50 {wall['p50_ms']:9.1f}ms  p95 {wall['p95_ms']:9.1f}ms  (picks {result['picks']})")
+    for stage in STAGES:
+        s = result["stages"][stage]
+        share = s["p50_ms"] / wall["p50_ms"] if wall["p50_ms"] else 0
+        print(f"  {stage:<12} p50 {s['p50_ms']:9.1f}ms  p95 {s['p95_ms']:9.1f}ms  {share:5.0%}  calls {s['calls']}")
+    for op, s in list(result.get("trace", {}).items())[:12]:
+        print(f"    {op:<42} n={s['count']:>4} total {s['total_ms']:9.1f}ms  p50 {s['p50_ms']:8.2f}  p99 {s['p99_ms']:8.2f}ms")
+
+
+def compare(old, new):
+    """Print p50 / p95 deltas per scenario and stage. Returns the number of regressions."""
+    print(f"\n=== Compare: {old['meta'].get('version')} ({old['meta'].get('date')}) -> {new['meta']['version']} ===")
+    regressions = 0
+    for name, result in new["scenarios"].items():
+        before = old.get("scenarios", {}).get(name)
+        if not before:
+            print(f"\n[{name}] not in the previous result")
+            continue
+        print(f"\n[{name}]")
+        rows = [("wall", before["wall"], result["wall"])]
+        rows += [(stage, before["stages"].get(stage), result["stages"][stage]) for stage in STAGES]
+        for label, a, b in rows:
+            if not a:
+                continue
+            line = f"  {label:<12}"
+            flag = ""
+            for key in ("p50_ms", "p95_ms"):
+                delta = b[key] - a[key]
+                ratio = delta / a[key] if a[key] else 0.0
+                line += f" {key[:3]} {a[key]:9.1f} -> {b[key]:9.1f}ms ({ratio:+6.1%})"
+                if delta > args.min_delta_ms and ratio > args.threshold:
+                    flag = "  <-- regression"
+            regressions += bool(flag)
+            print(line + flag)
+    return regressions
+
+
+async def main():
+    out = os.path.abspath(args.out)
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    backend = start_backends()
+    instrumentation.enabled = args.trace
+    install()
+    # Selectors write app/data/top_picks_*.json relative to cwd -> keep them out of the working tree
+    os.chdir(tempfile.mkdtemp(prefix="bench_scan_"))
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    print(f"=== Scan Benchmark {VERSION}: KIS {backend}, LLM {args.llm_latency}, "
+          f"{args.runs} runs (+{args.warmup} warmup) ===")
+    result = {
+        "meta": {"version": VERSION, "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                 "kis": backend, "args": vars(args)},
+        "scenarios": {},
+    }
+    for name in scenarios:
+        result["scenarios"][name] = await bench(name)
+        print_result(name, result["scenarios"][name])
+
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Saved: {out}")
+
+    if previous:
+        regressions = compare(previous, result)
+        print(f"\n=== Result: {'PASS' if not regressions else f'{regressions} regression(s)'} ===")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL) # Keep the report readable
+    sys.exit(asyncio.run(main()))
@@ -1,7 +1,6 @@
 import asyncio
 import time
 import logging
-from datetime import datetime, timedelta, time as dtime
 from dotenv import load_dotenv
 
 # Load Env
@@ -9,10 +8,13 @@ load_dotenv()
 
 from app.core.selector import selector
 from app.core.trade_manager import trade_manager
+from app.core.portfolio import portfolio
 from app.core.telegram_bot import bot
 from app.core.kis_api import kis
 from app.core.kis_websocket import kis_ws
 from app.core.logger_handler import AsyncQueueHandler
+from app.core.session_runner import SessionRunner, MarketSession
+from app.core.market_calendar import market_calendar
 from app.web.main import app as web_app, server_context
 import uvicorn
 
@@ -42,37 +44,23 @@ logging.getLogger("uvicorn.access").setLevel(logging.WARNING) # Reduce Web Acces
 logger = logging.getLogger("AutoTrade")
 
 # === Constants ===
+# Session anchors: ("open" | "close", minutes) around each trading day's open/close on the
+# exchange calendar (app/core/market_calendar.py). KRX 09:00~15:30 KST; NYSE 09:30~16:00 ET,
+# i.e. 22:30~05:00 KST in US summer time and 23:30~06:00 KST in winter. Half days shift the close.
 # KR Market
-KR_START = dtime(8, 30)
-KR_SCAN_START = dtime(8, 40)
-KR_TRADE_START = dtime(9, 0)
-KR_LIQUIDATION = dtime(15, 15)
-KR_CLOSE = dtime(15, 30)
-
-# US Market (Approximate for 24h cycle)
-# Adjust for Summer Time manually or add logic later. 
-# Winter: Open 23:30. Close 06:00.
-# Summer: Open 22:30. Close 05:00.
-# We set wide window 22:00 ~ 06:00.
-US_START = dtime(22, 0) 
-US_SCAN_START = dtime(22, 10)
-US_TRADE_START = dtime(22, 30) # Pre-market / Early
-US_LIQUIDATION = dtime(5, 40)  # 05:40 AM KST (Before US Close 06:00)
-US_CLOSE = dtime(6, 0)
-
-# 2026 US Market Holidays (NYSE/Nasdaq)
-US_HOLIDAYS_2026 = [
-    "2026-01-01", # New Year's Day
-    "2026-01-19", # Martin Luther King, Jr. Day
-    "2026-02-16", # Washington's Birthday
-    "2026-04-03", # Good Friday
-    "2026-05-25", # Memorial Day
-    "2026-06-19", # Juneteenth National Independence Day
-    "2026-07-03", # Independence Day (Observed)
-    "2026-09-07", # Labor Day
-    "2026-11-26", # Thanksgiving Day
-    "2026-12-25", # Christmas Day
-]
+KR_START = ("open", -30)       # 08:30
+KR_SCAN_START = ("open", -20)  # 08:40
+KR_TRADE_START = ("open", 0)   # 09:00
+KR_LIQUIDATION = ("close", -15) # 15:15
+KR_CLOSE = ("close", 0)        # 15:30
+KR_END = ("close", 10)         # 15:40
+
+# US Market
+US_START = ("open", -30)
+US_SCAN_START = ("open", -20)
+US_TRADE_START = ("open", 0)
+US_LIQUIDATION = ("close", -20)
+US_CLOSE = ("close", 0)
 
 SCAN_INTERVAL = 10 # 10 Minutes
 MAX_TRADES = 3
@@ -83,8 +71,6 @@ state = {
     "kr_report_sent": False,
     "us_liquidation_done": False,
     "us_report_sent": False,
-    "last_scan_time": datetime.min,
-    "last_risk_check_time": datetime.min,
     "kr_market_closed": False, # Circuit Breaker for KR
     "us_market_closed": False,  # Circuit Breaker for US
     "kr_pre_market_done": False,
@@ -97,54 +83,18 @@ server_context["bot_state"] = state
 server_context["trade_manager"] = trade_manager
 server_context["version"] = VERSION
 
-def is_time_in_range(start, end, current):
-    """Check if current time is between start and end (handles midnight wrap)"""
-    if start <= end:
-        return start <= current <= end
-    else: # Crosses midnight
-        return start <= current or current <= end
-
-def check_market_open(market_type="KR"):
+def check_market_open(market_type="KR", now=None):
     """
-    Check if the market is open based on:
-    1. Weekend (Sat/Sun) -> Closed
-       - Exception: US Market is OPEN on Saturday Morning (Fri Session)
-       - Exception: US Market is CLOSED on Monday Morning (Sun Session)
-    2. Holidays (Hardcoded 2026)
-    3. Circuit Breaker Flag -> Closed (If API noted holiday previously)
+    Check if the market trades today based on:
+    1. Exchange calendar (weekends, holidays, substitute holidays) for the session date
+       - US sessions run overnight in KST: Saturday morning still belongs to Friday's session
+    2. Circuit Breaker Flag -> Closed (If API noted holiday previously)
     """
-    now = datetime.now()
-    today_str = now.strftime("%Y-%m-%d")
-    
-    # 1. Check Weekend (0=Mon, 5=Sat, 6=Sun)
-    if market_type == "US":
-        # Check Hardcoded Holidays (2026)
-        # Note: US Market Holiday Check should consider the "Trading Day".
-        # If it's Saturday Morning (Fri Session), strict date check might be tricky.
-        # But Holidays are usually Full Day Closures.
-        # If today is a Holiday, market is closed.
-        if today_str in US_HOLIDAYS_2026:
-             return False, f"미국 휴장일 ({today_str})"
-
-        # Saturday Morning (until 08:00 KST) is part of Friday Session -> OPEN
-        if now.weekday() == 5 and now.time() < dtime(8, 0):
-             pass # Treat as Open (Friday Night extension)
-        
-        # Monday Morning (until 08:00 KST) is part of Sunday Session -> CLOSED
-        elif now.weekday() == 0 and now.time() < dtime(8, 0):
-             return False, "주말 (일요일)" # Weekend (Sunday)
-             
-        elif now.weekday() >= 5:
-             return False, "주말 (토/일)" # Weekend (Sat/Sun)
-             
-    else:
-        # KR Market
-        if now.weekday() >= 5:
-            return False, "주말 (토/일)" # Weekend (Sat/Sun)
-            
-        # Simplified KR Holidays (Add if needed, for now mainly US requested)
-        
-    # 2. Check Circuit Breaker
+    is_open, reason = market_calendar.day_status(market_type, now)
+    if not is_open:
+        return False, reason
+
+    # Check Circuit Breaker
     if market_type == "KR" and state.get("kr_market_closed"):
         return False, "국장 종료/휴장 플래그 활성"
     if market_type == "US" and state.get("us_market_closed"):
@@ -152,8 +102,198 @@ def check_market_open(market_type="KR"):
         
     return True, "장 운영 중"
 
+# Background tasks (keep references so they are not garbage-collected mid-run)
+background_tasks = set()
+
+def spawn_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def run_optimization_task(market_type, title):
+    """Strategy optimization off the trading loop (AI call can take tens of seconds)"""
+    from app.core.optimizer import optimizer
+    try:
+        res = await optimizer.run_optimization(market_type)
+        if res:
+            reason = res.get('reason', 'N/A')
+            new_target = res.get('target_profit_rate')
+            new_stop = res.get('stop_loss_rate')
+            bot.send_message(f"🔧 {title}:\n목표가: {new_target}%\n손절가: {new_stop}%\n이유: {reason}")
+        logger.info(f"{market_type} Strategy Optimization Finished.")
+    except Exception as e:
+        logger.error(f"Background Optimization Error ({market_type}): {e}")
+
+# === Market Sessions ===
+# Each duty is parked on a deadline scheduler until it is due (app/core/session_runner.py):
+# pre-market / liquidation fire at their window start on trading days only, scans every SCAN_INTERVAL, and
+# a slow scan or a failing duty never delays monitoring of the other market / other duties.
+
+def _reset_session_flags(market):
+    prefix = market.lower()
+    def reset(session_id):
+        for key in ("liquidation_done", "report_sent", "market_closed", "pre_market_done", "overnight_checked"):
+            state[f"{prefix}_{key}"] = False
+        logger.info(f"🔄 {market} session flags reset ({session_id})")
+    return reset
+
+def _market_gate(market):
+    def gate(now):
+        is_open, reason = check_market_open(market, now)
+        if not is_open:
+            return False, reason
+        if not trade_manager.is_market_active(market):
+            return False, f"{market} Market is set to OFF"
+        return True, "장 운영 중"
+    return gate
+
+def _circuit_breaker(market):
+    def on_error(duty, e):
+        err_msg = str(e)
+        if "장운영" in err_msg or "휴장" in err_msg or "Closed" in err_msg or "market is closed" in err_msg:
+            state[f"{market.lower()}_market_closed"] = True
+            label = "국장" if market == "KR" else "미장"
+            bot.send_message(f"⛔ {label} 휴일/장운영 종료 감지: {err_msg}. 오늘은 매매를 중단합니다.")
+    return on_error
+
+# --- KR Duties ---
+
+async def kr_pre_market(now):
+    await selector.select_pre_market_picks("KR")
+    state['kr_pre_market_done'] = True
+
+async def kr_scan(now):
+    open_slots = MAX_TRADES - trade_manager.active_trades.count("KR")
+    if open_slots <= 0:
+        return
+    # Check Budget (snapshot refreshed off the event loop; the helper then reads it from memory)
+    await portfolio.aget()
+    budget = trade_manager.get_available_budget("KR")
+    if budget < 5000:
+        logger.info(f"Skip Scanning: Insufficient KRW ({budget:,.0f})")
+        return
+    bot.send_message(f"🇰🇷 한국장 스캔 중... ({open_slots} 슬롯, 예산: {budget:,.0f} KRW)")
+    # Ask for more candidates than slots to handle skips (e.g. Add-on skipped)
+    candidates = await selector.select_stocks(budget, target_count=open_slots + 2)
+    if candidates:
+        await trade_manager.process_signals(candidates) # Filters internally
+
+async def kr_monitor(now):
+    await trade_manager.monitor_active_trades("KR")
+
+async def kr_clean_orders(now):
+    await asyncio.to_thread(trade_manager.clean_pending_orders)
+
+async def kr_risk(now):
+    await trade_manager.monitor_risks("KR")
+
+async def kr_overnight(now):
+    # Check 5 mins before liquidation start
+    await trade_manager.check_overnight_holds("KR")
+    state['kr_overnight_checked'] = True
+
+async def kr_liquidation(now):
+    # Tried at 15:15. If failing, the engine re-prices internally; retried every 30s until done.
+    bot.send_message("⏰ 한국장 마감 임박. 보유 종목 전량 청산 시도...")
+    rem = await trade_manager.liquidate_all_positions("KR")
+    if rem == 0:
+        state['kr_liquidation_done'] = True
+        bot.send_message("✅ 한국장 청산 완료.")
+        return True
+    bot.send_message(f"⚠️ 청산 미완료 ({rem} 종목 남음). 30초 뒤 재시도합니다.")
+    return False
+
+async def kr_report(now):
+    report = await asyncio.to_thread(trade_manager.get_daily_report, "KR") # Balance refresh / DB query
+    bot.send_message(report)
+    # Run Auto-Optimization (Background - does not block the session)
+    bot.send_message("🧠 AI 최적화 모듈 실행 중 (오늘 성과 기반)...")
+    spawn_background(run_optimization_task("KR", "내일 전략 최적화 완료"))
+    state['kr_report_sent'] = True
+    logger.info("KR Session Ended & Strategy Optimization Started.")
+
+# --- US Duties ---
+
+async def us_pre_market(now):
+    await selector.select_pre_market_picks("US")
+    state['us_pre_market_done'] = True
+
+async def us_scan(now):
+    open_slots = MAX_TRADES - trade_manager.active_trades.count("US")
+    if open_slots <= 0:
+        return
+    # Check Budget (Target Slot Budget) - may re-sync the portfolio, so off the event loop
+    await portfolio.aget()
+    budget = await asyncio.to_thread(trade_manager.get_target_slot_budget_us)
+    if budget < 20:
+        logger.info(f"Skip Scanning: Insufficient USD for Next Slot ({budget:.2f})")
+        return
+    bot.send_message(f"🇺🇸 미국장 스캔 중... ({open_slots} 슬롯, 목표 예산: ${budget:.2f})")
+    candidates = await selector.select_us_stocks(budget)
+    if candidates:
+        await trade_manager.process_signals(candidates)
+
+async def us_monitor(now):
+    await trade_manager.monitor_active_trades("US")
+
+async def us_risk(now):
+    await trade_manager.monitor_risks("US")
+
+async def us_overnight(now):
+    await trade_manager.check_overnight_holds("US")
+    state['us_overnight_checked'] = True
+
+async def us_liquidation(now):
+    # Tried at 05:40. If failing, the engine re-prices internally; retried every 30s until 06:00.
+    bot.send_message("⏰ 미국장 마감 임박. 보유 종목 전량 청산 시도...")
+    rem = await trade_manager.liquidate_all_positions("US")
+    if rem == 0:
+        state['us_liquidation_done'] = True
+        bot.send_message("✅ 미국장 청산 완료.")
+        return True
+    bot.send_message(f"⚠️ 청산 미완료 ({rem} 종목 남음). 30초 뒤 재시도합니다.")
+    return False
+
+async def us_report(now):
+    # Send report just before session close (05:50 ~ 06:00)
+    report = await asyncio.to_thread(trade_manager.get_daily_report, "US") # Balance refresh / DB query
+    bot.send_message(report)
+    bot.send_message("🧠 AI 최적화 모듈 실행 중 (미국장 성과 기반)...")
+    spawn_background(run_optimization_task("US", "내일 미장 전략 최적화 완료"))
+    state['us_report_sent'] = True
+    logger.info("US Session Ended & Strategy Optimization Started.")
+
+def build_session_runner():
+    runner = SessionRunner(paused=lambda: server_context.get("is_paused", False), notify=bot.send_message)
+
+    kr = runner.add_session(MarketSession("KR", KR_START, KR_END, gate=_market_gate("KR"),
+                                          on_new_session=_reset_session_flags("KR"), on_error=_circuit_breaker("KR")))
+    kr.add("pre_market", kr_pre_market, 60, window=(KR_START, ("open", -10)), once=True)
+    kr.add("scan", kr_scan, SCAN_INTERVAL * 60, window=(KR_SCAN_START, ("close", -60)))
+    kr.add("monitor", kr_monitor, 1, window=(KR_TRADE_START, KR_LIQUIDATION))
+    kr.add("clean_orders", kr_clean_orders, 30, window=(KR_TRADE_START, KR_LIQUIDATION))
+    kr.add("risk", kr_risk, 600, window=(KR_TRADE_START, KR_LIQUIDATION))
+    kr.add("overnight", kr_overnight, 60, window=(("close", -20), KR_LIQUIDATION), once=True)
+    kr.add("liquidation", kr_liquidation, 30, window=(KR_LIQUIDATION, KR_END), once=True)
+    kr.add("report", kr_report, 60, window=(KR_CLOSE, KR_END), once=True)
+
+    us = runner.add_session(MarketSession("US", US_START, US_CLOSE, gate=_market_gate("US"),
+                                          on_new_session=_reset_session_flags("US"), on_error=_circuit_breaker("US")))
+    us.add("pre_market", us_pre_market, 60, window=(US_START, US_TRADE_START), once=True)
+    us.add("scan", us_scan, SCAN_INTERVAL * 60, window=(US_SCAN_START, ("close", -60)))
+    us.add("monitor", us_monitor, 1, window=(US_TRADE_START, US_LIQUIDATION))
+    us.add("risk", us_risk, 600, window=(US_TRADE_START, US_LIQUIDATION))
+    us.add("overnight", us_overnight, 60, window=(("close", -25), US_LIQUIDATION), once=True)
+    us.add("liquidation", us_liquidation, 30, window=(US_LIQUIDATION, US_CLOSE), once=True)
+    us.add("report", us_report, 60, window=(("close", -10), US_CLOSE), once=True)
+    return runner
+
+session_runner = build_session_runner()
+server_context["session_runner"] = session_runner
+
 async def trading_loop():
-    """Original Main Loop extracted to a function"""
+    """Startup (WebSocket, portfolio sync) then run the market sessions"""
     bot.send_message(f"🤖 Global Auto Trading System Started (Ver: {VERSION})")
     logger.info(f"System Started - Trading Loop Active (Ver: {VERSION})")
     
@@ -167,279 +307,14 @@ async def trading_loop():
         bot.send_message("⚠️ WebSocket connection failed - Using REST API fallback")
     
     # Sync Holdings & Send Startup Report
+    trade_manager.trade_store.setup() # Trade history DB (+ legacy JSON migration)
+    trade_manager.restore_positions() # Journaled positions from the last run, reconciled by the sync
     trade_manager.sync_portfolio()
-    startup_msg = trade_manager.get_account_status_str()
+    trade_manager.pretrade.start() # Keep buying power / order params warm for signals
+    startup_msg = await asyncio.to_thread(trade_manager.get_account_status_str) # One price call per holding
     bot.send_message(f"🚀 System Startup Ready\n{startup_msg}")
     
-    while True:
-        try:
-            # Check Pause State
-            if server_context.get("is_paused", False):
-                # logger.info("Trading Paused...") # Optional: log periodically or just silent
-                await asyncio.sleep(1)
-                continue
-
-            now = datetime.now()
-            t = now.time()
-            
-            # === KR Mode (08:30 ~ 15:40) ===
-            if is_time_in_range(KR_START, dtime(15, 40), t):
-                # Reset US flags if entering KR day (e.g. at 08:30)
-                if state['us_report_sent']:
-                    state['us_liquidation_done'] = False
-                    state['us_report_sent'] = False
-                    state['us_market_closed'] = False # Reset US Breaker
-                    state['us_pre_market_done'] = False # Reset
-                    state['us_overnight_checked'] = False # Reset
-
-                # Check Market Open (Weekend/Holiday)
-                is_open, reason = check_market_open("KR")
-                if not is_open:
-                    if now.minute == 0 and now.second < 5: # Log once per hour
-                        msg = f"💤 한국장 휴장/마감 ({reason}). 봇 대기 모드..."
-                        logger.info(msg)
-                        bot.send_message(msg)
-                    await asyncio.sleep(1)
-                    continue
-
-                # --- NEW: Check Switch ---
-                if not trade_manager.is_market_active("KR"):
-                    if now.minute % 10 == 0 and now.second < 5:
-                         logger.info("🚫 KR Market is set to OFF. Skipping activities.")
-                    await asyncio.sleep(1)
-                    continue
-                # -------------------------
-
-                # 0. Pre-Market Analysis (08:30 ~ 08:50)
-                if is_time_in_range(KR_START, dtime(8, 50), t) and not state['kr_pre_market_done']:
-                     await selector.select_pre_market_picks("KR")
-                     state['kr_pre_market_done'] = True
-
-                # 1. Scanning
-                time_since = (now - state['last_scan_time']).total_seconds() / 60
-                
-                is_scan_time = (
-                    is_time_in_range(KR_SCAN_START, dtime(14, 30), t) and
-                    time_since >= SCAN_INTERVAL
-                )
-                
-                if is_scan_time:
-                    open_slots = MAX_TRADES - len([k for k,v in trade_manager.active_trades.items() if v.get('market_type')!='US'])
-                    if open_slots > 0:
-                        # Check Budget
-                        budget = trade_manager.get_available_budget("KR")
-                        if budget < 5000:
-                            logger.info(f"Skip Scanning: Insufficient KRW ({budget:,.0f})")
-                        else:
-                            bot.send_message(f"🇰🇷 한국장 스캔 중... ({open_slots} 슬롯, 예산: {budget:,.0f} KRW)")
-                            # KR Selection
-                            # Ask for more candidates than slots to handle skips (e.g. Add-on skipped)
-                            target_count = open_slots + 2 
-                            candidates = await selector.select_stocks(budget, target_count=target_count)
-                            state['last_scan_time'] = now
-                            if candidates:
-                                trade_manager.process_signals(candidates) # Filters internally
-                    
-                    # [FIX] Update last_scan_time even if skipped (Full Slots or Low Budget)
-                    state['last_scan_time'] = now
-
-                # 2. Monitoring
-                if is_time_in_range(KR_TRADE_START, KR_LIQUIDATION, t):
-                    trade_manager.monitor_active_trades("KR")
-                    if now.second % 30 == 0: trade_manager.clean_pending_orders()
-                    
-                    # AI Risk Check (Every 10 mins) - KR Stocks
-                    risk_time_since = (now - state['last_risk_check_time']).total_seconds() / 60
-                    if risk_time_since >= 10:
-                         trade_manager.monitor_risks("KR")
-                         state['last_risk_check_time'] = now
-
-                    # Overnight Check (15:10 ~ 15:15)
-                    # Check 5 mins before liquidation start
-                    if is_time_in_range(dtime(15, 10), KR_LIQUIDATION, t) and not state.get('kr_overnight_checked'):
-                         trade_manager.check_overnight_holds("KR")
-                         state['kr_overnight_checked'] = True
-
-                # 3. Liquidation (Retry Logic)
-                # Tried at 15:15. If failing, retry every 2 mins until 15:30.
-                if t >= KR_LIQUIDATION:
-                    if not state['kr_liquidation_done']:
-                        # Check Retry Interval (2 mins)
-                        last_try = state.get('last_kr_liquidation_try_time', datetime.min)
-                        time_since_try = (now - last_try).total_seconds()
-                        
-                        if time_since_try >= 120:
-                            bot.send_message("⏰ 한국장 마감 임박. 보유 종목 전량 청산 시도...")
-                            rem = trade_manager.liquidate_all_positions("KR")
-                            state['last_kr_liquidation_try_time'] = now
-                            
-                            if rem == 0:
-                                state['kr_liquidation_done'] = True
-                                bot.send_message("✅ 한국장 청산 완료.")
-                            else:
-                                bot.send_message(f"⚠️ 청산 미완료 ({rem} 종목 남음). 2분 뒤 재시도합니다.")
-                
-                # 4. Report (One-time)
-                if t >= KR_CLOSE and not state['kr_report_sent']:
-                    # Send Daily Report
-                    report = trade_manager.get_daily_report("KR")
-                    bot.send_message(report)
-                    
-                    # Run Auto-Optimization
-                    from app.core.optimizer import optimizer
-                    bot.send_message("🧠 AI 최적화 모듈 실행 중 (오늘 성과 기반)...")
-                    res = optimizer.run_optimization("KR")
-                    
-                    if res:
-                        reason = res.get('reason', 'N/A')
-                        new_target = res.get('target_profit_rate')
-                        new_stop = res.get('stop_loss_rate')
-                        bot.send_message(f"🔧 내일 전략 최적화 완료:\n목표가: {new_target}%\n손절가: {new_stop}%\n이유: {reason}")
-                    
-                    state['kr_report_sent'] = True
-                    logger.info("KR Session Ended & Strategy Optimized.")
-
-            # === US Mode (22:00 ~ 06:00) ===
-            elif is_time_in_range(US_START, dtime(6, 0), t):
-                # Reset KR flags
-                if state['kr_report_sent']:
-                    state['kr_liquidation_done'] = False
-                    state['kr_report_sent'] = False
-                    state['kr_market_closed'] = False # Reset KR Breaker
-                    state['kr_market_closed'] = False # Reset KR Breaker
-                    state['kr_pre_market_done'] = False # Reset
-                    state['kr_overnight_checked'] = False # Reset
-
-                # Check Market Open (Weekend/Holiday)
-                is_open, reason = check_market_open("US")
-                if not is_open:
-                     if now.minute == 0 and now.second < 5:
-                         msg = f"💤 미국장 휴장/마감 ({reason}). 봇 대기 모드..."
-                         logger.info(msg)
-                         bot.send_message(msg)
-                     await asyncio.sleep(1)
-                     continue
-
-                # --- NEW: Check Switch ---
-                if not trade_manager.is_market_active("US"):
-                    if now.minute % 10 == 0 and now.second < 5:
-                         logger.info("🚫 US Market is set to OFF. Skipping activities.")
-                    await asyncio.sleep(1)
-                    continue
-                # -------------------------
-                
-                # 0. Pre-Market Analysis (22:00 ~ 22:30)
-                if is_time_in_range(US_START, dtime(22, 30), t) and not state['us_pre_market_done']:
-                     await selector.select_pre_market_picks("US")
-                     state['us_pre_market_done'] = True
-
-                # 1. Scanning
-                time_since = (now - state['last_scan_time']).total_seconds() / 60
-                is_scan_time = (
-                    is_time_in_range(US_SCAN_START, dtime(5, 0), t) and
-                    time_since >= SCAN_INTERVAL
-                )
-                
-                if is_scan_time:
-                    open_slots = MAX_TRADES - len([k for k,v in trade_manager.active_trades.items() if v.get('market_type')=='US'])
-                    if open_slots > 0:
-                        # Check Budget (Target Slot Budget)
-                        budget = trade_manager.get_target_slot_budget_us()
-                        if budget < 20:
-                             logger.info(f"Skip Scanning: Insufficient USD for Next Slot ({budget:.2f})")
-                        else:
-                            bot.send_message(f"🇺🇸 미국장 스캔 중... ({open_slots} 슬롯, 목표 예산: ${budget:.2f})")
-                            # US Selection
-                            candidates = await selector.select_us_stocks(budget)
-                            state['last_scan_time'] = now
-                            if candidates:
-                                trade_manager.process_signals(candidates)
-                        # [FIX] Update last_scan_time even if skipped, to prevent infinite loop
-                        state['last_scan_time'] = now
-
-                # 2. Monitoring
-                if is_time_in_range(US_TRADE_START, US_LIQUIDATION, t):
-                    trade_manager.monitor_active_trades("US")
-                    
-                    # AI Risk Check (Every 10 mins)
-                    risk_time_since = (now - state['last_risk_check_time']).total_seconds() / 60
-                    if risk_time_since >= 10:
-                         trade_manager.monitor_risks("US")
-                         state['last_risk_check_time'] = now
-
-                    # Overnight Check (05:35 ~ 05:40)
-                    if is_time_in_range(dtime(5, 35), US_LIQUIDATION, t) and not state.get('us_overnight_checked'):
-                         trade_manager.check_overnight_holds("US")
-                         state['us_overnight_checked'] = True
-                
-                # 3. Liquidation (Retry Logic)
-                # Tried at 05:40. If failing, retry every 2 mins until 06:00.
-                if is_time_in_range(US_LIQUIDATION, US_CLOSE, t):
-                    if not state['us_liquidation_done']:
-                        # Check Retry Interval (2 mins)
-                        last_try = state.get('last_liquidation_try_time', datetime.min)
-                        time_since_try = (now - last_try).total_seconds()
-                        
-                        if time_since_try >= 120:
-                            bot.send_message("⏰ 미국장 마감 임박. 보유 종목 전량 청산 시도...")
-                            rem = trade_manager.liquidate_all_positions("US")
-                            state['last_liquidation_try_time'] = now
-                            
-                            if rem == 0:
-                                state['us_liquidation_done'] = True
-                                bot.send_message("✅ 미국장 청산 완료.")
-                            else:
-                                bot.send_message(f"⚠️ 청산 미완료 ({rem} 종목 남음). 2분 뒤 재시도합니다.")
-
-                # 4. Report
-                # Send report just before session close (05:50 ~ 06:00)
-                if is_time_in_range(dtime(5, 50), US_CLOSE, t) and not state['us_report_sent']:
-                    report = trade_manager.get_daily_report("US")
-                    bot.send_message(report)
-                    
-                    # Run Auto-Optimization
-                    from app.core.optimizer import optimizer
-                    bot.send_message("🧠 AI 최적화 모듈 실행 중 (미국장 성과 기반)...")
-                    res = optimizer.run_optimization("US")
-                    
-                    if res:
-                        reason = res.get('reason', 'N/A')
-                        new_target = res.get('target_profit_rate')
-                        new_stop = res.get('stop_loss_rate')
-                        bot.send_message(f"🔧 내일 미장 전략 최적화 완료:\n목표가: {new_target}%\n손절가: {new_stop}%\n이유: {reason}")
-                    
-                    state['us_report_sent'] = True
-                    logger.info("US Session Ended & Strategy Optimized.")
-            
-            else:
-                # Sleep Period
-                pass
-            
-            await asyncio.sleep(1)
-
-        except KeyboardInterrupt:
-            logger.info("Stopped by user.")
-            break
-        except Exception as e:
-            # Circuit Breaker Logic
-            err_msg = str(e)
-            if "장운영" in err_msg or "휴장" in err_msg or "Closed" in err_msg or "market is closed" in err_msg:
-                now = datetime.now()
-                t = now.time()
-                # Determine which market we are in
-                if is_time_in_range(KR_START, dtime(15, 40), t):
-                    state['kr_market_closed'] = True
-                    bot.send_message(f"⛔ 국장 휴일/장운영 종료 감지: {err_msg}. 오늘은 매매를 중단합니다.")
-                elif is_time_in_range(US_START, dtime(6, 0), t):
-                    state['us_market_closed'] = True
-                    bot.send_message(f"⛔ 미장 휴일/장운영 종료 감지: {err_msg}. 오늘은 매매를 중단합니다.")
-            
-            logger.error(f"Error in Main Loop: {e}", exc_info=True)
-            try:
-                bot.send_message(f"🚨 System Error (Auto-Recovering): {e}")
-            except: 
-                pass
-            await asyncio.sleep(60)
+    await session_runner.run()
 
 async def main():
     # Setup Web Server
@@ -2,6 +2,7 @@
 import sys
 import os
 import logging
+import asyncio
 from unittest.mock import MagicMock
 
 # Add project root to path
@@ -40,7 +41,7 @@ def test_liquidate_crash():
 
     print(">>> Running liquidation (Expecting Crash)...")
     try:
-        tm.liquidate_all_positions(market_filter="US")
+        asyncio.run(tm.liquidate_all_positions(market_filter="US"))
         print(">>> Liquidation finished without error (Unexpected if bug exists)")
     except KeyError as e:
         print(f">>> CAUGHT EXPECTED CRASH: KeyError: {e}")
@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+
+# Add path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.backtest_engine import load_bars_csv, synthetic_bars
+from app.core.param_sweep import ParamSweep, grid, random_sample, pareto_front, pick_best, to_config_params
+
+"""
+Parameter sweep for the exit rules (target / stop / trailing activation / trailing distance)
+over historical intraday bars on all cores. The Pareto-best setting (return vs drawdown vs
+win rate) is written to strategy_config.json for the market unless --dry-run is given.
+
+    python run_sweep.py --market KR --csv kr_bars.csv
+    python run_sweep.py --market US --csv us_bars.csv --random 300
+    python run_sweep.py --synthetic 200 --days 22 --dry-run
+"""
+
+
+def fmt(params):
+    target = "off" if params["target"] is None else f"{params['target']:g}%"
+    return (f"target {target:>5} | stop {params['stop']:g}% | "
+            f"trail +{params['trail_activate']:g}% / -{params['trail_drop']:g}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--market", default="KR", choices=["KR", "US"])
+    parser.add_argument("--csv", help="Intraday bars CSV (date, symbol, time, open, high, low, close | price)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Random-walk symbols instead of a CSV")
+    parser.add_argument("--days", type=int, default=22)
+    parser.add_argument("--random", type=int, default=0, help="Random-search N combos instead of the full grid")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cost", type=float, default=0.2, help="Round-trip cost %% (fees + tax + slippage)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--dry-run", action="store_true", help="Print the result without writing the config")
+    args = parser.parse_args()
+
+    if args.csv:
+        prices, days = load_bars_csv(args.csv)
+    elif args.synthetic:
+        prices, days = synthetic_bars(args.synthetic, args.days, seed=args.seed)
+    else:
+        parser.error("--csv or --synthetic is required")
+
+    combos = random_sample(args.random, seed=args.seed) if args.random else grid()
+    print(f"=== Parameter Sweep ({args.market}): {len(combos)} combos x {prices.shape[0]:,} symbol-days ===")
+
+    sweep = ParamSweep(prices, days, cost_pct=args.cost, workers=args.workers)
+    results = sweep.run(combos)
+    front = pareto_front(results)
+    best = pick_best(front)
+
+    print(f"Done in {sweep.elapsed:.1f}s on {sweep.workers} workers")
+    print(f"\nPareto front ({len(front)}):")
+    for r in front[:15]:
+        m = r["metrics"]
+        print(f"  {fmt(r['params'])} -> return {m['return_pct']:+.2f}% | MDD {m['max_drawdown_pct']:.2f}% | "
+              f"win {m['win_rate']:.1f}% | {m['trades']} trades")
+
+    m = best["metrics"]
+    print(f"\n🏆 Best: {fmt(best['params'])}")
+    print(f"   return {m['return_pct']:+.2f}% | MDD {m['max_drawdown_pct']:.2f}% | win {m['win_rate']:.1f}%")
+
+    if args.dry_run:
+        print("(dry run: strategy_config.json not changed)")
+        return
+    from app.core.strategy_config import apply_sweep
+    from app.core.state_store import state_store
+    applied = apply_sweep(args.market, to_config_params(best["params"]), m)
+    state_store.flush()
+    print(f"✅ strategy_config.json updated ({args.market}): {applied}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import os
+import sys
+
+# Add path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.walk_forward import Universe, WalkForward, StubScorer, CachedScorer, synthetic_universe, pre_market_pool
+
+"""
+Walk-forward evaluation of the KR selector stages (sourcing -> hard filters -> AI score -> ranking)
+and the pre-market Top 10 over a locally stored daily universe, one trading day at a time, days in parallel.
+
+    python run_walk_forward.py --universe data/kr_daily.csv --start 20260102 --end 20260630
+    python run_walk_forward.py --universe data/kr_daily/ --scorer cache --cache wf_scores.json
+    python run_walk_forward.py --universe data/kr_daily.csv --scorer ai --cache wf_scores.json   # fills the cache (API cost)
+    python run_walk_forward.py --synthetic 200 --workers 4
+
+Universe CSV: date, symbol, [name], open, high, low, close, volume (or one <symbol>.csv per symbol).
+"""
+
+
+def print_outcome(label, o):
+    if not o.get("count"):
+        print(f"  {label:<14} -")
+        return
+    print(f"  {label:<14} n={o['count']:>5} | exit-rule P&L {o['avg_pnl_pct']:+.3f}% | win {o['win_rate']:5.1f}% | "
+          f"open->close {o['avg_open_to_close_pct']:+.3f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--universe", help="Daily OHLCV CSV or directory of per-symbol CSVs")
+    parser.add_argument("--synthetic", type=int, default=0, help="Random-walk universe of N symbols")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--budget", type=float, default=None, help="Max price per share (selector budget cap)")
+    parser.add_argument("--target-count", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--scorer", default="stub", choices=["stub", "cache", "ai"])
+    parser.add_argument("--cache", default="app/data/walk_forward_scores.json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.universe:
+        universe = Universe.load(args.universe)
+    elif args.synthetic:
+        universe = synthetic_universe(args.synthetic)
+    else:
+        parser.error("--universe or --synthetic is required")
+
+    stub = StubScorer(args.seed)
+    scorer = stub if args.scorer == "stub" else CachedScorer(args.cache, fallback=stub)
+    wf = WalkForward(universe, scorer, budget=args.budget, target_count=args.target_count, workers=args.workers)
+
+    days = wf.days(args.start, args.end)
+    print(f"=== Walk-Forward: {len(universe.rows)} symbols, {len(days)} days ({days[0]} ~ {days[-1]}), "
+          f"scorer={args.scorer}, workers={wf.workers} ===")
+    day_results = wf.filter_days(days)
+
+    if args.scorer == "ai":
+        day_jobs = {}
+        for r in day_results:
+            pool = {c["symbol"] for c in pre_market_pool(r["candidates"])}
+            day_jobs[r["date"]] = [c for c in r["candidates"] if c["reject"] is None or c["symbol"] in pool]
+        asyncio.run(scorer.fill_with_ai(day_jobs))
+
+    report = wf.run(day_results=day_results)
+
+    print("\n[Stages]")
+    for name, outcome in report["groups"].items():
+        print_outcome(name, outcome)
+    print("\n[Rejected by hard filter]")
+    for reason, outcome in report["rejected"].items():
+        print_outcome(reason, outcome)
+    if isinstance(scorer, CachedScorer):
+        print(f"\nScore cache: {scorer.hits} hits / {scorer.misses} misses (stub)")
+    print(f"\nDone in {report['elapsed_s']:.2f}s (ranking + outcomes)")
+
+
+if __name__ == "__main__":
+    main()
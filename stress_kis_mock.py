@@ -0,0 +1,161 @@
+import asyncio
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+import requests
+
+# Add path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Stress the bot's KIS paths against app/mock/kis_mock.py (no network, no account) at
+increasing symbol counts, to find where throughput collapses.
+
+Per scale factor (x today's counts: 30 sourcing candidates, 3 slots per market):
+  [sourcing]  volume rank + daily chart per candidate, sequential as in select_stocks_kr
+  [fan-out]   the same daily charts fetched concurrently (to_thread, as the pre-market / risk paths do)
+  [monitor]   one price check per open position, concurrently - must fit the 1s monitor interval
+  [orders]    buy per position through order_router (order lane + fill reconciliation)
+
+    python stress_kis_mock.py --scales 1,10,100 --rate 20 --latency lognormal:-3.5,0.5
+    python stress_kis_mock.py --scales 1,10 --rate 0         # no KIS rate limit: pure client-side limits
+"""
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--scales", default="1,10,100")
+parser.add_argument("--candidates", type=int, default=30, help="Sourcing candidates at scale 1")
+parser.add_argument("--slots", type=int, default=3, help="Open positions at scale 1")
+parser.add_argument("--rate", type=float, default=20.0, help="Mock REST limit (requests/s, 0 = unlimited)")
+parser.add_argument("--latency", default="lognormal:-3.5,0.5", help="Mock quotation latency (~30ms median)")
+parser.add_argument("--order-latency", default="fixed:0.08")
+parser.add_argument("--monitor-cycles", type=int, default=5)
+parser.add_argument("--port", type=int, default=8300)
+args = parser.parse_args()
+
+# Settings are read at import time -> configure env before importing app modules
+os.environ["KIS_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+os.environ["KIS_WS_URL"] = f"ws://127.0.0.1:{args.port}/ws"
+os.environ["KIS_RECORD_FILE"] = ""
+os.environ.setdefault("KIS_APP_KEY", "mock")
+os.environ.setdefault("KIS_APP_SECRET", "mock")
+
+from app.core.kis_api import kis
+from app.core.order_router import order_router, Order
+from app.mock.kis_mock import create_app, MockMarket, MockAccount
+from app.mock.llm_stub import LatencyModel
+
+MONITOR_INTERVAL = 1.0 # main_auto_trade: monitor duty interval
+
+
+def spawn_mock(max_symbols):
+    import uvicorn
+
+    market = MockMarket(kr_symbols=max_symbols * 2)
+    app = create_app(market=market, account=MockAccount(market, cash_krw=1e13), rate=args.rate,
+                     latency=LatencyModel(args.latency, seed=42), order_latency=LatencyModel(args.order_latency, seed=42),
+                     rank_size=max_symbols)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return app
+
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000
+
+
+async def timed_calls(fn, items, concurrent):
+    """(results, per-call latencies, wall seconds)"""
+    latencies = []
+
+    def call(item):
+        t0 = time.perf_counter()
+        try:
+            return fn(item)
+        finally:
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    if concurrent:
+        results = await asyncio.gather(*[asyncio.to_thread(call, i) for i in items])
+    else:
+        results = [await asyncio.to_thread(call, i) for i in items]
+    return results, latencies, time.perf_counter() - start
+
+
+def report(stage, n, results, latencies, wall, note="", too_slow=False):
+    errors = sum(1 for r in results if not r)
+    flag = "  <-- collapse" if errors > n * 0.01 or too_slow else ""
+    print(f"  {stage:<10} n={n:>5} | {wall:7.2f}s | {n / wall:7.1f} req/s | p50 {pct(latencies, 50):7.1f}ms "
+          f"p95 {pct(latencies, 95):8.1f}ms | errors {errors:>5} ({errors / max(n, 1):.0%}){note}{flag}")
+
+
+async def run_scale(scale):
+    candidates_n, positions_n = args.candidates * scale, args.slots * scale
+    print(f"\n[x{scale}] {candidates_n} candidates, {positions_n} positions")
+
+    # 1. Sourcing (sequential, as select_stocks_kr)
+    t0 = time.perf_counter()
+    rank = await asyncio.to_thread(kis.get_volume_rank)
+    symbols = [r['mksc_shrn_iscd'] for r in rank][:candidates_n]
+    results, lat, wall = await timed_calls(kis.get_daily_price, symbols, concurrent=False)
+    report("sourcing", len(symbols), results, lat, time.perf_counter() - t0)
+
+    # 2. Fan-out (concurrent daily charts)
+    results, lat, wall = await timed_calls(kis.get_daily_price, symbols, concurrent=True)
+    report("fan-out", len(symbols), results, lat, wall)
+
+    # 3. Monitor cycles (concurrent price checks per position)
+    positions = symbols[:positions_n]
+    cycle_walls, all_results, all_lat = [], [], []
+    for _ in range(args.monitor_cycles):
+        results, lat, wall = await timed_calls(kis.get_current_price, positions, concurrent=True)
+        cycle_walls.append(wall)
+        all_results += results
+        all_lat += lat
+        await asyncio.sleep(max(0.0, MONITOR_INTERVAL - wall))
+    slowest = max(cycle_walls)
+    report("monitor", len(all_results), all_results, all_lat, sum(cycle_walls),
+           note=f" | cycle max {slowest:.2f}s", too_slow=slowest > MONITOR_INTERVAL)
+
+    # 4. Orders (order lane + reconciliation)
+    order_router.completed.clear()
+    t0 = time.perf_counter()
+    orders = await asyncio.gather(*[order_router.submit(Order(s, "BUY", 1, market_type="KR")) for s in positions])
+    await asyncio.gather(*[order_router.wait(o, timeout=30 + positions_n) for o in orders])
+    wall = time.perf_counter() - t0
+    filled = sum(1 for o in orders if o.state == "FILLED")
+    summary = order_router.latency_summary().get("KR_BUY", {})
+    print(f"  {'orders':<10} n={len(orders):>5} | {wall:7.2f}s | {len(orders) / wall:7.1f} ord/s | "
+          f"signal->ack p95 {summary.get('signal_to_ack_p95_ms') or 0:8.1f}ms | ack->fill p95 "
+          f"{summary.get('ack_to_fill_p95_ms') or 0:8.1f}ms | filled {filled}/{len(orders)}"
+          + ("  <-- collapse" if filled < len(orders) else ""))
+
+
+async def main():
+    scales = [int(s) for s in args.scales.split(",")]
+    spawn_mock(args.candidates * max(scales))
+    # Token stays in memory: never write the mock token to kis_token_v2.json
+    kis.tokens._loaded = True
+    kis.tokens.access_token, kis.tokens.token_expired = "mock-token", time.time() + 86400
+
+    print(f"=== KIS Mock Stress: rate {args.rate:g}/s, latency {args.latency}, "
+          f"order lane {1 / order_router._lane_interval if order_router._lane_interval else 0:g}/s ===")
+    for scale in scales:
+        await run_scale(scale)
+    # Mock-side view (rate limiting is what the bot sees as failed calls)
+    stats = (await asyncio.to_thread(requests.get, f"http://127.0.0.1:{args.port}/mock/stats")).json()
+    print(f"\nMock: {stats['requests']} requests, {stats['rate_limited']} rate-limited (EGW00201), "
+          f"{stats['orders']} orders ({stats['rejected_orders']} rejected)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL) # Failed calls are counted, not logged
+    asyncio.run(main())
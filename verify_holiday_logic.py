@@ -1,8 +1,7 @@
-
 import sys
 import os
 import logging
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 from datetime import datetime
 
 # Add project root to path
@@ -19,40 +18,52 @@ from main_auto_trade import check_market_open, state
 
 def test_weekend_block():
     print(">>> Testing Weekend Block...")
-    # Mock Saturday (e.g., 2026-02-07 is Saturday)
-    with patch('main_auto_trade.datetime') as mock_date:
-        mock_date.now.return_value = datetime(2026, 2, 7, 10, 0, 0)
-        mock_date.weekday.return_value = 5 # Saturday
-        
-        is_open, msg = check_market_open("KR")
-        if not is_open and "Weekend" in msg:
-            print("✅ Weekend Blocked Successfully (Saturday)")
+    # Saturday (2026-02-07)
+    is_open, msg = check_market_open("KR", datetime(2026, 2, 7, 10, 0, 0))
+    if not is_open and "주말" in msg:
+        print("✅ Weekend Blocked Successfully (Saturday)")
+    else:
+        print(f"❌ Failed Weekend Block: {is_open}, {msg}")
+
+    # Saturday 05:00 KST still belongs to the US Friday session
+    is_open, msg = check_market_open("US", datetime(2026, 2, 7, 5, 0, 0))
+    if is_open:
+        print("✅ US Friday Session Open on Saturday Morning (KST)")
+    else:
+        print(f"❌ Failed US Friday Session: {is_open}, {msg}")
+
+def test_holiday_block():
+    print(">>> Testing Holiday Block...")
+    for market, now in (("KR", datetime(2026, 2, 17, 10, 0, 0)),   # 설날
+                        ("US", datetime(2026, 11, 26, 23, 40, 0))): # Thanksgiving
+        is_open, msg = check_market_open(market, now)
+        if not is_open and "휴장" in msg:
+            print(f"✅ {market} Holiday Blocked: {msg}")
         else:
-            print(f"❌ Failed Weekend Block: {is_open}, {msg}")
+            print(f"❌ Failed {market} Holiday Block: {is_open}, {msg}")
 
 def test_circuit_breaker():
     print(">>> Testing Circuit Breaker...")
-    # Mock Weekday (e.g., 2026-02-06 is Friday)
-    with patch('main_auto_trade.datetime') as mock_date:
-        mock_date.now.return_value = datetime(2026, 2, 6, 10, 0, 0)
-        mock_date.weekday.return_value = 4 # Friday
-        
-        # 1. Normal State
-        state['kr_market_closed'] = False
-        is_open, _ = check_market_open("KR")
-        if is_open:
-            print("✅ Normal Day Open")
-        else:
-            print("❌ Failed Normal Day Open")
+    # Weekday (2026-02-06 is Friday)
+    now = datetime(2026, 2, 6, 10, 0, 0)
 
-        # 2. Trigger Circuit Breaker
-        state['kr_market_closed'] = True
-        is_open, msg = check_market_open("KR")
-        if not is_open and "Closed Flag" in msg:
-            print("✅ Circuit Breaker Active")
-        else:
-            print(f"❌ Failed Circuit Breaker: {is_open}, {msg}")
+    # 1. Normal State
+    state['kr_market_closed'] = False
+    is_open, _ = check_market_open("KR", now)
+    if is_open:
+        print("✅ Normal Day Open")
+    else:
+        print("❌ Failed Normal Day Open")
+
+    # 2. Trigger Circuit Breaker
+    state['kr_market_closed'] = True
+    is_open, msg = check_market_open("KR", now)
+    if not is_open and "플래그" in msg:
+        print("✅ Circuit Breaker Active")
+    else:
+        print(f"❌ Failed Circuit Breaker: {is_open}, {msg}")
 
 if __name__ == "__main__":
     test_weekend_block()
+    test_holiday_block()
     test_circuit_breaker()
@@ -0,0 +1,112 @@
+import asyncio
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Offline KIS path check against app/mock/kis_replay.py (no network, no account).
+Replays a recorded session (or a synthetic market-open burst) and drives the bot's
+KIS REST client and WebSocket client against it.
+
+    python verify_kis_replay.py --symbols 20 --seconds 60 --speed 5
+    python verify_kis_replay.py --recording session.jsonl.gz --speed 10 --duration 30
+"""
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--recording", help="KIS_RECORD_FILE recording (default: synthetic session)")
+parser.add_argument("--symbols", type=int, default=20)
+parser.add_argument("--seconds", type=float, default=60, help="Length of the synthetic session")
+parser.add_argument("--speed", type=float, default=5.0)
+parser.add_argument("--duration", type=float, default=8.0, help="Wall seconds to stream WebSocket frames")
+parser.add_argument("--concurrency", type=int, default=10)
+parser.add_argument("--port", type=int, default=8200)
+args = parser.parse_args()
+
+# Settings are read at import time -> configure env before importing app modules
+os.environ["KIS_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+os.environ["KIS_WS_URL"] = f"ws://127.0.0.1:{args.port}/ws"
+os.environ["KIS_RECORD_FILE"] = ""
+os.environ.setdefault("KIS_APP_KEY", "replay")
+os.environ.setdefault("KIS_APP_SECRET", "replay")
+
+from app.core.kis_api import kis
+from app.core.kis_websocket import KisWebSocket
+from app.core.kis_recorder import load_recording
+from app.mock.kis_replay import create_app, synthetic_recording, parse_frame
+
+
+def spawn_replay(events):
+    import uvicorn
+
+    app = create_app(events, speed=args.speed)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return app
+
+
+async def main():
+    path = args.recording or synthetic_recording(os.path.join(tempfile.mkdtemp(), "synthetic.jsonl.gz"),
+                                                 symbols=args.symbols, seconds=args.seconds)
+    _, events = load_recording(path)
+    symbols = sorted({p[1] for p in (parse_frame(e[2]) for e in events if e[1] == "ws") if p and p[1]})
+    print(f"=== KIS Replay Verification: {len(events)} events, {len(symbols)} symbols, speed {args.speed:g}x ===")
+    spawn_replay(events)
+
+    # Token stays in memory: never write the dummy replay token to kis_token_v2.json
+    kis.tokens._loaded = True
+    kis.tokens.access_token, kis.tokens.token_expired = "replay-token", time.time() + 86400
+    failed = 0
+
+    # 1. REST under concurrent load
+    print(f"\n[1] REST inquire-price x {len(symbols)} symbols, concurrency {args.concurrency}...")
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def quote(symbol):
+        async with sem:
+            t0 = time.perf_counter()
+            data = await asyncio.to_thread(kis.get_current_price, symbol)
+            latencies.append(time.perf_counter() - t0)
+            return data
+
+    start = time.perf_counter()
+    quotes = await asyncio.gather(*[quote(s) for s in symbols * 5])
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for q in quotes if q and float(q.get('stck_prpr', 0)) > 0)
+    latencies.sort()
+    print(f"  - {ok}/{len(quotes)} quotes in {elapsed:.2f}s ({len(quotes) / elapsed:.0f} req/s), "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.1f}ms p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms")
+    failed += ok != len(quotes)
+
+    # 2. WebSocket stream
+    print(f"\n[2] WebSocket stream for {args.duration:g}s...")
+    ws = KisWebSocket()
+    received = []
+    on_message = ws._on_message
+    ws._on_message = lambda sock, message: (received.append(time.perf_counter()), on_message(sock, message))
+    if not ws.connect():
+        print("  - FAIL: could not connect")
+        failed += 1
+    else:
+        for s in symbols:
+            ws.subscribe_stock(s, "KR")
+        await asyncio.sleep(args.duration)
+        ws.disconnect()
+        frames = len(received) - len(symbols) # Minus subscribe acks
+        peak = max((sum(1 for t in received if t0 <= t < t0 + 1) for t0 in received), default=0)
+        print(f"  - {frames} frames ({frames / args.duration:.0f}/s avg, {peak}/s peak)")
+        failed += frames <= 0
+
+    print("\n=== Result:", "PASS" if failed == 0 else f"FAIL ({failed})", "===")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+import asyncio
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Offline AI-path check against app/mock/llm_stub.py (no network).
+
+    python verify_llm_stub.py --spawn --latency uniform:0.05,0.3 --concurrency 20
+"""
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--spawn", action="store_true", help="Start the stub in-process")
+parser.add_argument("--port", type=int, default=8100)
+parser.add_argument("--latency", default="uniform:0.05,0.3")
+parser.add_argument("--fence-rate", type=float, default=0.2)
+parser.add_argument("--concurrency", type=int, default=20)
+args = parser.parse_args()
+
+# Settings are read at import time -> configure env before importing app modules
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ["GEMINI_API_KEY"] = ""
+
+from app.core.ai_analyzer import ai_analyzer
+from app.core.ai_metrics import ai_metrics
+
+
+def spawn_stub():
+    import uvicorn
+    from app.mock.llm_stub import create_app, LatencyModel, StubResponder
+
+    app = create_app(latency=LatencyModel(args.latency, seed=42), responder=StubResponder(seed=42),
+                     fence_rate=args.fence_rate, seed=42)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+def make_job(i):
+    return {
+        "symbol": f"{100000 + i:06d}",
+        "name": f"Stock{i}",
+        "market_status": "Neutral Market",
+        "tech_summary": {"close": 10000 + i, "daily_change": 1.5, "trend": "UP", "rsi": 55, "volatility": 2.1},
+        "news_titles": ["실적 개선 기대"],
+    }
+
+
+async def main():
+    if args.spawn:
+        spawn_stub()
+
+    print("=== LLM Stub Verification ===")
+    tech = {"close": 10000, "trend": "UP", "rsi": 55, "volatility": 2.0, "sma_5": 10, "sma_20": 9}
+
+    # 1. Every prompt type parses
+    print("\n[1] Prompt types...")
+    checks = {
+        "analyze_stock": ai_analyzer.analyze_stock("Stock0", ["뉴스"], tech),
+        "analyze_risk": ai_analyzer.analyze_risk("005930", 9700, 10000, tech, []),
+        "analyze_overnight": ai_analyzer.analyze_overnight_potential("005930", 10200, 10000, tech, []),
+        "batch": ai_analyzer.analyze_stocks_batch([make_job(i) for i in range(5)]),
+        "hot_trends": ai_analyzer.analyze_hot_trends([make_job(i) for i in range(5)]),
+        "candidates": ai_analyzer.select_candidates_by_trend([{"name": "Nvidia", "symbol": "NVDA"}, {"name": "Tesla", "symbol": "TSLA"}], "Neutral"),
+        "top10": ai_analyzer.analyze_market_context_and_pick_top10("KR", {"trend": "Neutral"}, []),
+        "trend_stocks": ai_analyzer.recommend_trend_stocks(["반도체 수출 호조"]),
+        "holding_report": ai_analyzer.analyze_holding_stock("005930", "삼성전자", tech, []),
+    }
+    results = await asyncio.gather(*checks.values())
+    failed = 0
+    for name, res in zip(checks, results):
+        ok = bool(res) and "Failed" not in str(res) and "Error" not in str(res)
+        failed += 0 if ok else 1
+        print(f"  - {name}: {'OK' if ok else 'FAIL'} {str(res)[:80]}")
+
+    # 2. Concurrent batch load
+    print(f"\n[2] Concurrent batch load ({args.concurrency} requests x 5 stocks)...")
+    start = time.perf_counter()
+    batches = await asyncio.gather(*[
+        ai_analyzer.analyze_stocks_batch([make_job(i * 5 + j) for j in range(5)])
+        for i in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+    parsed = sum(len(b) for b in batches)
+    print(f"  - Parsed {parsed}/{args.concurrency * 5} results in {elapsed:.2f}s")
+    if parsed != args.concurrency * 5:
+        failed += 1
+
+    # 3. Metrics accounting
+    print("\n[3] AI metrics (by total wall time)...")
+    for method, m in ai_metrics.summary()["methods"].items():
+        print(f"  - {method:40s} calls={m['total_calls']:3d} p50={m['p50_ms']:7.1f}ms p95={m['p95_ms']:7.1f}ms "
+              f"tokens={m['avg_prompt_tokens']:.0f}/{m['avg_completion_tokens']:.0f} repair={m['json_repair_rate']:.0%}")
+
+    print("\n=== Result:", "PASS" if failed == 0 else f"FAIL ({failed})", "===")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())